@@ -6,7 +6,13 @@
  */
 
 import { describe, it, expect, beforeEach, afterEach } from "vitest";
-import { checkDatabaseHealth, formatHealthCheckResults, checkAllDatabases } from "./db-health.js";
+import {
+	checkDatabaseHealth,
+	formatHealthCheckResults,
+	checkAllDatabases,
+	getFileIdentity,
+	type PreflightResults
+} from "./db-health.js";
 import { extensionPath } from "@vlcn.io/crsqlite";
 import Database from "better-sqlite3";
 import fs from "fs";
@@ -185,6 +191,51 @@ describe("Database Health Check", () => {
 	});
 });
 
+describe("Pre-flight results", () => {
+	beforeEach(() => {
+		cleanup();
+	});
+
+	afterEach(() => {
+		cleanup();
+	});
+
+	function passedPreflight(dbFile: string): PreflightResults {
+		return {
+			version: 1,
+			databases: {
+				[dbFile]: {
+					ok: true,
+					checks: [{ name: "sqlite_quick_check", passed: true, message: "SQLite quick check passed", severity: "error" }],
+					identity: getFileIdentity(path.join(TEST_DIR, dbFile))!,
+					checked_at: "2026-01-01T00:00:00+00:00"
+				}
+			}
+		};
+	}
+
+	it("should reuse a passed verdict for an unchanged file", () => {
+		// Corrupt, so a real check would fail: the verdict must come from the pre-flight results
+		createCorruptDb("cached.sqlite3");
+
+		const results = checkAllDatabases(TEST_DIR, extensionPath, passedPreflight("cached.sqlite3"));
+
+		const result = results.get("cached.sqlite3");
+		expect(result?.ok).toBe(true);
+		expect(result?.checks.some((c) => c.name === "preflight_cached")).toBe(true);
+	});
+
+	it("should check files changed since the pre-flight check", () => {
+		const dbPath = createCorruptDb("changed.sqlite3");
+		const preflight = passedPreflight("changed.sqlite3");
+		fs.appendFileSync(dbPath, "more garbage");
+
+		const results = checkAllDatabases(TEST_DIR, extensionPath, preflight);
+
+		expect(results.get("changed.sqlite3")?.ok).toBe(false);
+	});
+});
+
 describe("Sync Server Startup", () => {
 	beforeEach(() => {
 		cleanup();
@@ -30,6 +30,103 @@ interface SiteIdRow {
 	ordinal: number;
 }
 
+/**
+ * Identity of a database file (and its WAL) as recorded by the launcher's pre-flight checks
+ * (python-apps/launcher/launcher/preflight.py). Nanosecond mtimes and inodes are strings.
+ */
+export interface PreflightFileIdentity {
+	size: number;
+	mtime_ns: string;
+	ino: string;
+	wal: [number, string] | null;
+}
+
+export interface PreflightVerdict extends HealthCheckResult {
+	identity: PreflightFileIdentity;
+	checked_at: string;
+}
+
+export interface PreflightResults {
+	version: number;
+	databases: Record<string, PreflightVerdict>;
+}
+
+const PREFLIGHT_RESULTS_VERSION = 1;
+
+/**
+ * Reads the launcher's pre-flight results, if any.
+ * Returns null if there is no file, it can't be read or it has another version.
+ */
+export function loadPreflightResults(filePath: string | undefined): PreflightResults | null {
+	if (!filePath || !fs.existsSync(filePath)) {
+		return null;
+	}
+
+	try {
+		const results = JSON.parse(fs.readFileSync(filePath, "utf8")) as PreflightResults;
+		return results.version === PREFLIGHT_RESULTS_VERSION && results.databases ? results : null;
+	} catch (err) {
+		console.warn(`Ignoring unreadable pre-flight results ${filePath}: ${err instanceof Error ? err.message : String(err)}`);
+		return null;
+	}
+}
+
+/**
+ * Current identity of a database file, in the format of the pre-flight results (an empty WAL counts as no WAL).
+ */
+export function getFileIdentity(dbPath: string): PreflightFileIdentity | null {
+	try {
+		const stat = fs.statSync(dbPath, { bigint: true });
+		let wal: [number, string] | null = null;
+		const walPath = `${dbPath}-wal`;
+		if (fs.existsSync(walPath)) {
+			const walStat = fs.statSync(walPath, { bigint: true });
+			if (walStat.size > 0n) {
+				wal = [Number(walStat.size), walStat.mtimeNs.toString()];
+			}
+		}
+		return { size: Number(stat.size), mtime_ns: stat.mtimeNs.toString(), ino: stat.ino.toString(), wal };
+	} catch {
+		return null;
+	}
+}
+
+/**
+ * Returns the pre-flight verdict for a database if it passed and the file is unchanged since it was checked.
+ * Failed verdicts are never reused, so failures are always reported with the full checks below.
+ */
+export function getPreflightVerdict(preflight: PreflightResults | null, dbPath: string, dbFile: string): HealthCheckResult | null {
+	const verdict = preflight?.databases[dbFile];
+	if (!verdict?.ok) {
+		return null;
+	}
+
+	const identity = getFileIdentity(dbPath);
+	const expected = verdict.identity;
+	const unchanged =
+		identity != null &&
+		identity.size === expected.size &&
+		identity.mtime_ns === expected.mtime_ns &&
+		identity.ino === expected.ino &&
+		JSON.stringify(identity.wal) === JSON.stringify(expected.wal);
+	if (!unchanged) {
+		return null;
+	}
+
+	return {
+		ok: true,
+		checks: [
+			...verdict.checks,
+			{
+				name: "preflight_cached",
+				passed: true,
+				message: `Unchanged since the launcher's pre-flight check (${verdict.checked_at})`,
+				severity: "warning"
+			}
+		]
+	};
+}
+
 /**
  * Performs comprehensive health checks on a database file.
  * This should be called at server startup for each known database.
@@ -271,9 +368,14 @@ export function checkDatabaseHealth(dbPath: string, extensionPath: string): Heal
 
 /**
  * Checks health of all databases in a folder.
+ * Databases that passed the launcher's pre-flight checks and are unchanged since aren't opened again.
  * Returns a map of database name to health check result.
  */
-export function checkAllDatabases(dbFolder: string, extensionPath: string): Map<string, HealthCheckResult> {
+export function checkAllDatabases(
+	dbFolder: string,
+	extensionPath: string,
+	preflight: PreflightResults | null = null
+): Map<string, HealthCheckResult> {
 	const results = new Map<string, HealthCheckResult>();
 
 	if (!fs.existsSync(dbFolder)) {
@@ -285,7 +387,7 @@ export function checkAllDatabases(dbFolder: string, extensionPath: string): Map<
 
 	for (const dbFile of dbFiles) {
 		const dbPath = path.join(dbFolder, dbFile);
-		results.set(dbFile, checkDatabaseHealth(dbPath, extensionPath));
+		results.set(dbFile, getPreflightVerdict(preflight, dbPath, dbFile) ?? checkDatabaseHealth(dbPath, extensionPath));
 	}
 
 	return results;
@@ -357,10 +459,10 @@ export function formatHealthCheckResults(results: Map<string, HealthCheckResult>
  * Main startup health check function.
  * Call this at server startup. It will exit the process if critical errors are found.
  */
-export function performStartupHealthCheck(dbFolder: string, extensionPath: string): void {
+export function performStartupHealthCheck(dbFolder: string, extensionPath: string, preflight: PreflightResults | null = null): void {
 	console.log("Performing database health checks...");
 
-	const results = checkAllDatabases(dbFolder, extensionPath);
+	const results = checkAllDatabases(dbFolder, extensionPath, preflight);
 	const output = formatHealthCheckResults(results);
 	console.log(output);
 
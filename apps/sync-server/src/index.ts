@@ -11,11 +11,13 @@ import DBFactory from "@vlcn.io/ws-server/dist/DBFactory.js";
 import { getResidentSchemaVersion } from "@vlcn.io/ws-server/dist/DB.js";
 import { extensionPath } from "@vlcn.io/crsqlite";
 
-import { performStartupHealthCheck, checkDatabaseHealth, checkAllDatabases } from "./db-health.js";
+import { performStartupHealthCheck, checkDatabaseHealth, checkAllDatabases, loadPreflightResults } from "./db-health.js";
 import { migrateDatabasesOnStartup } from "./startup-migrations.js";
 
 const IS_DEV = process.env.IS_DEV === "true";
 const SKIP_HEALTH_CHECK = process.env.SKIP_HEALTH_CHECK === "true";
+// Verdicts of the launcher's pre-flight checks, reused for unchanged files
+const PREFLIGHT_RESULTS = process.env.PREFLIGHT_RESULTS;
 const PORT = process.env.PORT || 3000;
 const DB_FOLDER = path.resolve(process.env.DB_FOLDER || "./test-dbs");
 const SCHEMA_FOLDER = path.resolve(process.env.SCHEMA_FOLDER || "./schemas");
@@ -35,7 +37,7 @@ if (!fs.existsSync(DB_FOLDER)) {
 // Perform database health checks before starting the server
 // This will exit the process if critical errors are found
 if (!SKIP_HEALTH_CHECK) {
-	performStartupHealthCheck(DB_FOLDER, extensionPath);
+	performStartupHealthCheck(DB_FOLDER, extensionPath, loadPreflightResults(PREFLIGHT_RESULTS));
 } else {
 	console.warn("WARNING: Database health checks skipped (SKIP_HEALTH_CHECK=true)");
 }
@@ -243,9 +245,18 @@ app.get("/:dbname/file", async (req, res) => {
 	return res.sendFile(dbPath);
 });
 
-server.listen(Number(PORT), "127.0.0.1", () => {
-	console.log("info", `listening on http://127.0.0.1:${PORT}!`);
-});
+// When started by the launcher, listen on the socket it pre-bound (LISTEN_FD) so
+// connections queue in the kernel backlog while the server restarts
+const LISTEN_FD = parseListenFd(process.env.LISTEN_FD);
+if (LISTEN_FD !== undefined) {
+	server.listen({ fd: LISTEN_FD }, () => {
+		console.log("info", `listening on inherited socket (fd ${LISTEN_FD})!`);
+	});
+} else {
+	server.listen(Number(PORT), "127.0.0.1", () => {
+		console.log("info", `listening on http://127.0.0.1:${PORT}!`);
+	});
+}
 
 // Gracefully shut down the server on process termination
 let shuttingDown = false;
@@ -312,3 +323,18 @@ function parsePositiveInteger(rawValue: string | undefined): number | undefined
 
 	return parsed;
 }
+
+function parseListenFd(rawValue: string | undefined): number | undefined {
+	if (rawValue == null || rawValue.trim() === "") {
+		return undefined;
+	}
+
+	const parsed = Number.parseInt(rawValue, 10);
+	// 0-2 are stdio, never a listening socket
+	if (!Number.isFinite(parsed) || parsed < 3) {
+		console.warn(`Ignoring invalid LISTEN_FD=${rawValue}. Falling back to PORT=${PORT}.`);
+		return undefined;
+	}
+
+	return parsed;
+}
@@ -27,6 +27,9 @@ export async function fetchAndStoreDBFile(url: string, target: string, progressS
 		await root.removeEntry(target);
 	};
 
+	// Set when the server sent a compressed (precompressed snapshot) response
+	let encoded = false;
+
 	try {
 		// Fetch
 		const res = await fetch(url);
@@ -37,6 +40,11 @@ export async function fetchAndStoreDBFile(url: string, target: string, progressS
 		const contentLength = parseInt(res.headers.get("Content-Length") || "0", 10);
 		if (!contentLength) throw new Error("Content-Length header is missing or invalid");
 
+		// With Content-Encoding, Content-Length is the compressed size, while the stream yields
+		// decompressed bytes: the decoder validates the stream and the size is checked against
+		// the SQLite header below instead
+		encoded = Boolean(res.headers.get("Content-Encoding"));
+
 		progressStore.set({ active: true, nProcessed: 0, nTotal: contentLength });
 		let received = 0;
 
@@ -50,11 +58,12 @@ export async function fetchAndStoreDBFile(url: string, target: string, progressS
 			await writable.write(value);
 			received += value.length;
 
-			progressStore.set({ active: true, nProcessed: received, nTotal: contentLength });
+			const nTotal = encoded ? Math.max(received, contentLength) : contentLength;
+			progressStore.set({ active: true, nProcessed: received, nTotal });
 		}
 
 		// Verify we received the expected amount
-		if (received !== contentLength) {
+		if (!encoded && received !== contentLength) {
 			throw new Error(`Incomplete download: expected ${contentLength} bytes, got ${received}`);
 		}
 	} catch (err) {
@@ -83,6 +92,16 @@ export async function fetchAndStoreDBFile(url: string, target: string, progressS
 			throw new Error("Invalid SQLite file: magic header mismatch");
 		}
 
+		// For compressed downloads, check the size against the header: page size (bytes 16-17, 1 = 65536) x page count (bytes 28-31)
+		if (encoded && view.length >= 32) {
+			const header = new DataView(view.buffer, view.byteOffset, view.byteLength);
+			const pageSize = header.getUint16(16) === 1 ? 65536 : header.getUint16(16);
+			const pageCount = header.getUint32(28);
+			if (pageCount && buf.byteLength !== pageSize * pageCount) {
+				throw new Error(`Incomplete download: expected ${pageSize * pageCount} bytes, got ${buf.byteLength}`);
+			}
+		}
+
 		// Check and fix WAL mode (if needed)
 		if (view.length >= 20) {
 			const isWal = view[18] === 0x02 || view[19] === 0x02;
@@ -0,0 +1,470 @@
+"""
+HTTP clients for the launcher's own stack: the sync server and Caddy's admin API.
+
+Every client keeps its connections alive and reuses them, so health polling,
+monitoring, tests and benchmarks don't pay a TCP (and TLS) handshake per
+request. Two flavours share the same endpoints and result types, both built on
+httpx (responses are httpx.Response, transport errors httpx.HTTPError):
+
+- SyncServerClient / CaddyAdminClient: blocking, on a pooled httpx.Client
+- AsyncSyncServerClient / AsyncCaddyAdminClient: asyncio, on a pooled
+  httpx.AsyncClient
+
+Sync server endpoints: /health, /:dbname/health, /:dbname/meta and
+/:dbname/file (streamed to disk).
+"""
+
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, AsyncContextManager, Callable, ContextManager, Dict, Optional
+from urllib.parse import quote
+
+import httpx
+
+from launcher.config import SYNC_SERVER_PORT
+
+logger = logging.getLogger("launcher")
+
+SYNC_SERVER_URL = f"http://127.0.0.1:{SYNC_SERVER_PORT}"
+CADDY_ADMIN_URL = "http://127.0.0.1:2019"
+
+# Seconds for connecting and for each read
+DEFAULT_TIMEOUT = 5.0
+
+# Idle keep-alive connections kept per client
+DEFAULT_POOL_SIZE = 4
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+class ApiError(Exception):
+    """A request failed or returned an unexpected response."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class HealthCheck:
+    """One check of a database health report."""
+
+    def __init__(self, name: str, passed: bool, message: str, severity: str):
+        self.name = name
+        self.passed = passed
+        self.message = message
+        self.severity = severity
+
+
+class DatabaseHealth:
+    """Health of one database (/:dbname/health or an entry of /health)."""
+
+    def __init__(self, name: str, ok: bool, checks: list[HealthCheck]):
+        self.name = name
+        self.ok = ok
+        self.checks = checks
+
+    @classmethod
+    def from_json(cls, name: str, data: Dict[str, Any]) -> "DatabaseHealth":
+        checks = [
+            HealthCheck(
+                check.get("name", ""),
+                bool(check.get("passed")),
+                check.get("message", ""),
+                check.get("severity", ""),
+            )
+            for check in data.get("checks", [])
+        ]
+        return cls(data.get("database", name), bool(data.get("ok")), checks)
+
+
+class ServerHealth:
+    """Health of the sync server and all its databases (/health)."""
+
+    def __init__(self, healthy: bool, databases: Dict[str, DatabaseHealth]):
+        self.healthy = healthy
+        self.databases = databases
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "ServerHealth":
+        databases = {
+            name: DatabaseHealth.from_json(name, entry)
+            for name, entry in data.get("databases", {}).items()
+        }
+        return cls(data.get("status") == "healthy", databases)
+
+
+class DatabaseMeta:
+    """Identity of a database (/:dbname/meta)."""
+
+    def __init__(
+        self,
+        site_id: str,
+        schema_name: Optional[str] = None,
+        schema_version: Optional[str] = None,
+    ):
+        self.site_id = site_id
+        self.schema_name = schema_name
+        self.schema_version = schema_version
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "DatabaseMeta":
+        return cls(data["siteId"], data.get("schemaName"), data.get("schemaVersion"))
+
+
+def _db_path(dbname: str, endpoint: str) -> str:
+    return f"/{quote(dbname, safe='')}/{endpoint}"
+
+
+def _expect_json(status: int, data: Any, allowed: tuple[int, ...], what: str) -> Any:
+    """Return data for an allowed status, raise ApiError otherwise."""
+    if status not in allowed or data is None:
+        message = data.get("message") if isinstance(data, dict) else None
+        raise ApiError(f"{what} failed: HTTP {status} {message or ''}".strip(), status)
+    return data
+
+
+def _download_total(response: httpx.Response) -> Optional[int]:
+    """Expected size of a download (None if unknown)."""
+    length = response.headers.get("Content-Length")
+    # Compressed responses are decoded, so the length doesn't apply
+    if not length or response.headers.get("Content-Encoding"):
+        return None
+    return int(length)
+
+
+# Blocking clients
+
+
+class HttpClient:
+    """Keep-alive httpx.Client bound to one base URL."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        verify: bool = True,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        """
+        Args:
+            base_url: Scheme, host and port (e.g. http://127.0.0.1:3000)
+            timeout: Default connect/read timeout in seconds
+            verify: Verify TLS certificates (False for Caddy's internal CA)
+            pool_size: Keep-alive connections kept for reuse
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = httpx.Client(
+            timeout=timeout,
+            verify=verify,
+            limits=httpx.Limits(max_keepalive_connections=pool_size),
+        )
+
+    def request(self, method: str, path: str = "/", **kwargs) -> httpx.Response:
+        """
+        Send a request and read the response (transport errors raise
+        httpx.HTTPError).
+
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            **kwargs: Passed to httpx (timeout defaults to the client's)
+        """
+        return self.session.request(method, self.base_url + path, **kwargs)
+
+    def stream(
+        self, method: str, path: str = "/", **kwargs
+    ) -> ContextManager[httpx.Response]:
+        """
+        Send a request and stream the response body:
+
+            with client.stream("GET", "/x/file") as response:
+                for chunk in response.iter_bytes():
+                    ...
+        """
+        return self.session.stream(method, self.base_url + path, **kwargs)
+
+    def get_json(self, path: str, allowed: tuple[int, ...] = (200,)) -> Any:
+        """GET a JSON document, raising ApiError on other statuses."""
+        try:
+            response = self.request("GET", path)
+        except httpx.HTTPError as exc:
+            raise ApiError(f"GET {path} failed: {exc!r}") from exc
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return _expect_json(response.status_code, data, allowed, f"GET {path}")
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SyncServerClient(HttpClient):
+    """Blocking client for the sync server's HTTP endpoints."""
+
+    def __init__(self, base_url: str = SYNC_SERVER_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    def health(self) -> ServerHealth:
+        """Health of all databases (503 means some are unhealthy)."""
+        return ServerHealth.from_json(self.get_json("/health", allowed=(200, 503)))
+
+    def db_health(self, dbname: str) -> DatabaseHealth:
+        """Health of one database."""
+        data = self.get_json(_db_path(dbname, "health"), allowed=(200, 503))
+        return DatabaseHealth.from_json(dbname, data)
+
+    def meta(self, dbname: str) -> DatabaseMeta:
+        """Site id and schema of a database (creates it if missing)."""
+        return DatabaseMeta.from_json(self.get_json(_db_path(dbname, "meta")))
+
+    def download_file(
+        self,
+        dbname: str,
+        destination: Path,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> int:
+        """
+        Stream a database file to disk (atomically replacing destination).
+
+        Args:
+            dbname: Database name
+            destination: File to write
+            progress: Called with (bytes written, Content-Length or None)
+
+        Returns:
+            Bytes written
+        """
+        path = _db_path(dbname, "file")
+        tmp = destination.with_name(destination.name + ".part")
+        try:
+            with self.stream("GET", path) as response:
+                if response.status_code != 200:
+                    raise ApiError(
+                        f"GET {path} failed: HTTP {response.status_code}",
+                        response.status_code,
+                    )
+                total = _download_total(response)
+                written = 0
+                with open(tmp, "wb") as f:
+                    for chunk in response.iter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+                        if progress:
+                            progress(written, total)
+            if total is not None and written != total:
+                raise ApiError(f"Incomplete download: {written} of {total} bytes")
+            os.replace(tmp, destination)
+            return written
+        except httpx.HTTPError as exc:
+            raise ApiError(f"GET {path} failed: {exc!r}") from exc
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+class CaddyAdminClient(HttpClient):
+    """Blocking client for Caddy's admin API."""
+
+    def __init__(self, base_url: str = CADDY_ADMIN_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    def config(self, path: str = "") -> Any:
+        """The running config (or the part at path, e.g. "apps/http")."""
+        return self.get_json(f"/config/{path}")
+
+    def upstreams(self) -> list[Dict[str, Any]]:
+        """Reverse proxy upstreams with their request and failure counts."""
+        return self.get_json("/reverse_proxy/upstreams")
+
+    def is_ready(self) -> bool:
+        """Whether the admin API answers."""
+        try:
+            return self.request("GET", "/config/").status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def wait_until_ready(self, timeout: float = 30, interval: float = 0.5) -> bool:
+        """Poll the admin API until it answers or the timeout passes."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_ready():
+                return True
+            time.sleep(interval)
+        return False
+
+
+# asyncio clients
+
+
+class AsyncHttpClient:
+    """Keep-alive httpx.AsyncClient bound to one base URL."""
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        verify: bool = True,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        """
+        Args:
+            base_url: Scheme, host and port (e.g. http://127.0.0.1:3000)
+            timeout: Timeout in seconds for connecting and for each read
+            verify: Verify TLS certificates
+            pool_size: Maximum concurrent (and idle) connections
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # Requests beyond pool_size wait for a connection (no pool timeout)
+        self.session = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, pool=None),
+            verify=verify,
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+        )
+
+    async def request(self, method: str, path: str = "/", **kwargs) -> httpx.Response:
+        """Send a request and read the whole response."""
+        return await self.session.request(method, self.base_url + path, **kwargs)
+
+    def stream(
+        self, method: str, path: str = "/", **kwargs
+    ) -> AsyncContextManager[httpx.Response]:
+        """
+        Send a request and stream the response body:
+
+            async with client.stream("GET", "/x/file") as response:
+                async for chunk in response.aiter_bytes():
+                    ...
+        """
+        return self.session.stream(method, self.base_url + path, **kwargs)
+
+    async def get_json(self, path: str, allowed: tuple[int, ...] = (200,)) -> Any:
+        """GET a JSON document, raising ApiError on other statuses."""
+        try:
+            response = await self.request("GET", path)
+        except httpx.HTTPError as exc:
+            raise ApiError(f"GET {path} failed: {exc!r}") from exc
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        return _expect_json(response.status_code, data, allowed, f"GET {path}")
+
+    async def close(self) -> None:
+        await self.session.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncSyncServerClient(AsyncHttpClient):
+    """asyncio client for the sync server's HTTP endpoints."""
+
+    def __init__(self, base_url: str = SYNC_SERVER_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    async def health(self) -> ServerHealth:
+        """Health of all databases (503 means some are unhealthy)."""
+        data = await self.get_json("/health", allowed=(200, 503))
+        return ServerHealth.from_json(data)
+
+    async def db_health(self, dbname: str) -> DatabaseHealth:
+        """Health of one database."""
+        data = await self.get_json(_db_path(dbname, "health"), allowed=(200, 503))
+        return DatabaseHealth.from_json(dbname, data)
+
+    async def meta(self, dbname: str) -> DatabaseMeta:
+        """Site id and schema of a database (creates it if missing)."""
+        return DatabaseMeta.from_json(await self.get_json(_db_path(dbname, "meta")))
+
+    async def download_file(
+        self,
+        dbname: str,
+        destination: Path,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> int:
+        """
+        Stream a database file to disk (atomically replacing destination).
+
+        Args:
+            dbname: Database name
+            destination: File to write
+            progress: Called with (bytes written, Content-Length or None)
+
+        Returns:
+            Bytes written
+        """
+        path = _db_path(dbname, "file")
+        tmp = destination.with_name(destination.name + ".part")
+        try:
+            async with self.stream("GET", path) as response:
+                if response.status_code != 200:
+                    raise ApiError(
+                        f"GET {path} failed: HTTP {response.status_code}",
+                        response.status_code,
+                    )
+                total = _download_total(response)
+                written = 0
+                with open(tmp, "wb") as f:
+                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                        # Keep disk writes off the event loop
+                        await asyncio.to_thread(f.write, chunk)
+                        written += len(chunk)
+                        if progress:
+                            progress(written, total)
+            if total is not None and written != total:
+                raise ApiError(f"Incomplete download: {written} of {total} bytes")
+            os.replace(tmp, destination)
+            return written
+        except (OSError, httpx.HTTPError) as exc:
+            raise ApiError(f"GET {path} failed: {exc!r}") from exc
+        finally:
+            tmp.unlink(missing_ok=True)
+
+
+class AsyncCaddyAdminClient(AsyncHttpClient):
+    """asyncio client for Caddy's admin API."""
+
+    def __init__(self, base_url: str = CADDY_ADMIN_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    async def config(self, path: str = "") -> Any:
+        """The running config (or the part at path, e.g. "apps/http")."""
+        return await self.get_json(f"/config/{path}")
+
+    async def upstreams(self) -> list[Dict[str, Any]]:
+        """Reverse proxy upstreams with their request and failure counts."""
+        return await self.get_json("/reverse_proxy/upstreams")
+
+    async def is_ready(self) -> bool:
+        """Whether the admin API answers."""
+        try:
+            return (await self.request("GET", "/config/")).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def wait_until_ready(
+        self, timeout: float = 30, interval: float = 0.5
+    ) -> bool:
+        """Poll the admin API until it answers or the timeout passes."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if await self.is_ready():
+                return True
+            await asyncio.sleep(interval)
+        return False
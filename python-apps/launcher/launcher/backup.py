@@ -0,0 +1,456 @@
+"""
+Scheduled online backups of the sync server's databases.
+
+Copying a database file while the sync server holds it open (with a WAL) is
+unsafe, so backups use SQLite's online backup API in small page-stepped
+increments, sleeping between steps so no lock is held for long. Each run writes
+one directory of compressed copies (zstd when available, gzip otherwise) plus a
+manifest.json, and old runs are pruned.
+
+Runs happen in a separate process at background CPU/IO priority, with
+compressed writes rate limited, so backing up a multi-hundred-MB CR-SQLite
+database doesn't show up as sync latency.
+
+Configured in settings.toml:
+
+    [backups]
+    enabled = true                # off by default
+    interval_hours = 24
+    keep = 14                     # number of backup runs to keep
+    compression = "auto"          # "auto", "zstd" or "gzip"
+    pages_per_step = 256
+    step_sleep_ms = 20
+    max_write_mb_per_sec = 20     # 0 = unthrottled
+"""
+
+import dataclasses
+import gzip
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from launcher.config import settings_from_table
+from launcher.db_files import list_databases, read_only_uri
+from launcher.logging_config import setup_worker_logging, worker_log_queue
+from launcher.process_priority import BACKGROUND_PRIORITY, apply_priority
+
+logger = logging.getLogger("launcher")
+
+MANIFEST_NAME = "manifest.json"
+TMP_PREFIX = ".tmp-"
+CHUNK_SIZE = 1024 * 1024
+
+# The backup API restarts whenever another connection writes to the source.
+# After this many restarts we fall back to VACUUM INTO, which copies from a
+# single read transaction (WAL readers don't block the sync server's writers)
+MAX_BACKUP_RESTARTS = 5
+
+# Minimum delay before the first scheduled backup after launcher start
+STARTUP_DELAY_SECONDS = 300
+
+
+@dataclasses.dataclass
+class BackupSettings:
+    """Options for a backup run (picklable, passed to the worker process)."""
+
+    interval_hours: float = dataclasses.field(default=24.0, metadata={"positive": True})
+    keep: int = 14
+    compression: str = "auto"
+    pages_per_step: int = 256
+    step_sleep_ms: int = 20
+    max_write_mb_per_sec: float = 20.0
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> "BackupSettings":
+        """Build from the [backups] settings table, ignoring invalid values."""
+        return settings_from_table(cls, "backups", settings)
+
+
+def zstd_module():
+    """The optional zstandard module, or None if not installed."""
+    try:
+        import zstandard
+
+        return zstandard
+    except ImportError:
+        return None
+
+
+def resolve_compression(requested: str = "auto") -> str:
+    """Pick "zstd" if a zstd module is available (and wanted), else "gzip"."""
+    if requested == "gzip":
+        return "gzip"
+    if zstd_module() is not None:
+        return "zstd"
+    if requested == "zstd":
+        logger.warning("zstd requested but not available, using gzip")
+    return "gzip"
+
+
+def backup_database(
+    source: Path, destination: Path, pages_per_step: int = 256, step_sleep_ms: int = 20
+) -> Dict[str, Any]:
+    """
+    Copy a live database with the online backup API, a few pages at a time.
+
+    Args:
+        source: Database file (may be open in the sync server)
+        destination: Uncompressed copy to create
+        pages_per_step: Pages copied per step (the lock is held for one step)
+        step_sleep_ms: Pause between steps
+
+    Returns:
+        Dict with the method used ("backup" or "vacuum_into") and restart count
+    """
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > MAX_BACKUP_RESTARTS:
+                raise _TooManyRestarts()
+        last_remaining = remaining
+
+    src = sqlite3.connect(read_only_uri(source), uri=True)
+    try:
+        dst = sqlite3.connect(destination)
+        try:
+            src.backup(
+                dst,
+                pages=pages_per_step,
+                progress=progress,
+                sleep=step_sleep_ms / 1000,
+            )
+            method = "backup"
+        except _TooManyRestarts:
+            method = "vacuum_into"
+        finally:
+            dst.close()
+
+        if method == "vacuum_into":
+            logger.info(f"{source.name} kept changing during backup, using VACUUM INTO")
+            destination.unlink(missing_ok=True)
+            src.execute("VACUUM INTO ?", (str(destination),))
+    finally:
+        src.close()
+
+    # Standalone copy: no WAL to carry around
+    dst = sqlite3.connect(destination)
+    try:
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+
+    return {"method": method, "restarts": restarts}
+
+
+def compress_file(
+    source: Path,
+    destination: Path,
+    compression: str,
+    max_bytes_per_sec: Optional[float] = None,
+) -> str:
+    """
+    Compress a file, optionally throttling write throughput.
+
+    Returns:
+        sha256 hex digest of the compressed file
+    """
+    digest = hashlib.sha256()
+
+    class HashingWriter:
+        def __init__(self, fh):
+            self.fh = fh
+
+        def write(self, data):
+            digest.update(data)
+            return self.fh.write(data)
+
+        def flush(self):
+            self.fh.flush()
+
+        def close(self):
+            # The file itself is closed by the with block below
+            pass
+
+    started = time.monotonic()
+    written = 0
+    with open(source, "rb") as src, open(destination, "wb") as raw:
+        hashing = HashingWriter(raw)
+        if compression == "zstd":
+            writer = zstd_module().ZstdCompressor(level=6).stream_writer(hashing)
+        else:
+            writer = gzip.GzipFile(fileobj=hashing, mode="wb", compresslevel=6)
+        try:
+            while chunk := src.read(CHUNK_SIZE):
+                writer.write(chunk)
+                written += len(chunk)
+                if max_bytes_per_sec:
+                    # Sleep off any time we are ahead of the allowed rate
+                    ahead = written / max_bytes_per_sec - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        finally:
+            writer.close()
+    return digest.hexdigest()
+
+
+def run_backup(db_dir: Path, backup_root: Path, settings: BackupSettings) -> Path:
+    """
+    Back up every database in db_dir into a new run directory.
+
+    The run is staged in a temporary directory and renamed into place when
+    complete, so a listed run is always whole.
+
+    Returns:
+        Path to the completed run directory
+    """
+    compression = resolve_compression(settings.compression)
+    suffix = ".zst" if compression == "zstd" else ".gz"
+    max_bytes_per_sec = settings.max_write_mb_per_sec * 1024 * 1024 or None
+
+    run_name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    staging = backup_root / f"{TMP_PREFIX}{run_name}"
+    staging.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "compression": compression,
+        "databases": [],
+    }
+    for db_path in list_databases(db_dir):
+        started = time.monotonic()
+        copy_path = staging / db_path.name
+        try:
+            result = backup_database(
+                db_path,
+                copy_path,
+                pages_per_step=settings.pages_per_step,
+                step_sleep_ms=settings.step_sleep_ms,
+            )
+            archive = staging / f"{db_path.name}{suffix}"
+            sha256 = compress_file(copy_path, archive, compression, max_bytes_per_sec)
+        except (sqlite3.Error, OSError) as exc:
+            logger.error(f"Backup of {db_path.name} failed: {exc}")
+            copy_path.unlink(missing_ok=True)
+            continue
+
+        manifest["databases"].append(
+            {
+                "name": db_path.name,
+                "file": archive.name,
+                "size": copy_path.stat().st_size,
+                "compressed_size": archive.stat().st_size,
+                "sha256": sha256,
+                "duration_s": round(time.monotonic() - started, 3),
+                **result,
+            }
+        )
+        copy_path.unlink()
+
+    (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    run_dir = backup_root / run_name
+    if run_dir.exists():
+        # Two runs within the same second (e.g. a manual run right after a
+        # scheduled one)
+        run_dir = backup_root / f"{run_name}-{os.getpid()}"
+    staging.rename(run_dir)
+    prune_backups(backup_root, settings.keep)
+    return run_dir
+
+
+def prune_backups(backup_root: Path, keep: int) -> None:
+    """Keep the newest `keep` backup runs and remove stale staging dirs."""
+    keep = max(keep, 1)
+    runs = sorted(
+        path
+        for path in backup_root.iterdir()
+        if path.is_dir() and (path / MANIFEST_NAME).exists()
+    )
+    for old_run in runs[: max(len(runs) - keep, 0)]:
+        logger.info(f"Removing old backup {old_run.name}")
+        shutil.rmtree(old_run, ignore_errors=True)
+
+    for staging in backup_root.glob(f"{TMP_PREFIX}*"):
+        # Leftovers of interrupted runs (the current run was renamed already)
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def list_backups(backup_root: Path) -> list[Dict[str, Any]]:
+    """Manifests of completed backup runs, newest first."""
+    if not backup_root.is_dir():
+        return []
+    manifests = []
+    for manifest_path in sorted(backup_root.glob(f"*/{MANIFEST_NAME}"), reverse=True):
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            continue
+        manifest["path"] = str(manifest_path.parent)
+        manifests.append(manifest)
+    return manifests
+
+
+def _backup_process_main(
+    log_queue, db_dir: str, backup_root: str, settings: BackupSettings
+):
+    """Entry point of the backup worker process."""
+    setup_worker_logging(log_queue)
+    apply_priority(os.getpid(), BACKGROUND_PRIORITY)
+    run_backup(Path(db_dir), Path(backup_root), settings)
+
+
+class BackupScheduler:
+    """Runs backups in a worker process on a fixed interval."""
+
+    def __init__(
+        self,
+        db_dir: Path,
+        backup_root: Path,
+        settings: BackupSettings,
+        exclusive_lock: Optional[threading.Lock] = None,
+    ):
+        """
+        Args:
+            db_dir: Database directory
+            backup_root: Directory receiving one subdirectory per backup run
+            settings: Backup options
+            exclusive_lock: Lock shared with other DB jobs (e.g. maintenance)
+        """
+        self.db_dir = db_dir
+        self.backup_root = backup_root
+        self.settings = settings
+
+        self._stop_event = threading.Event()
+        self._run_now = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process: Optional[multiprocessing.Process] = None
+        # Guards _process between the scheduler thread and stop()
+        self._process_lock = threading.Lock()
+        # Held while a backup runs
+        self.lock = exclusive_lock or threading.Lock()
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="backup-scheduler", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Backups scheduled every {self.settings.interval_hours}h "
+            f"into {self.backup_root}"
+        )
+
+    def stop(self) -> None:
+        """Stop the scheduler, terminating a running backup."""
+        self._stop_event.set()
+        self._run_now.set()
+        with self._process_lock:
+            if self._process and self._process.is_alive():
+                logger.info("Terminating running backup")
+                self._process.terminate()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def run_now(self) -> None:
+        """Trigger a backup without waiting for the next interval."""
+        self._run_now.set()
+
+    def backup_sync(self) -> Optional[Path]:
+        """
+        Run one backup in a worker process and wait for it (blocking).
+
+        Returns:
+            Path to the new backup run, or None on failure
+        """
+        with self.lock:
+            self.backup_root.mkdir(parents=True, exist_ok=True)
+            before = {m["path"] for m in list_backups(self.backup_root)}
+
+            started = time.monotonic()
+            # spawn: never fork a process that runs Qt and Circus threads
+            context = multiprocessing.get_context("spawn")
+            with worker_log_queue(context) as log_queue:
+                with self._process_lock:
+                    if self._stop_event.is_set():
+                        # stop() ran before there was a process to terminate
+                        return None
+                    self._process = context.Process(
+                        target=_backup_process_main,
+                        args=(
+                            log_queue,
+                            str(self.db_dir),
+                            str(self.backup_root),
+                            self.settings,
+                        ),
+                        name="librocco-backup",
+                        daemon=True,
+                    )
+                    self._process.start()
+                self._process.join()
+            with self._process_lock:
+                exit_code = self._process.exitcode
+                self._process = None
+
+            if exit_code != 0:
+                logger.error(f"Backup process failed (exit code {exit_code})")
+                return None
+
+            new_runs = [
+                m for m in list_backups(self.backup_root) if m["path"] not in before
+            ]
+            if not new_runs:
+                logger.error("Backup process finished without producing a backup")
+                return None
+
+            manifest = new_runs[0]
+            total = sum(db["compressed_size"] for db in manifest["databases"])
+            logger.info(
+                f"Backed up {len(manifest['databases'])} database(s) "
+                f"({total / (1024 * 1024):.1f} MB {manifest['compression']}) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+            return Path(manifest["path"])
+
+    def seconds_until_due(self) -> float:
+        """Time until the next backup, based on the newest existing run."""
+        interval = self.settings.interval_hours * 3600
+        newest = next(iter(list_backups(self.backup_root)), None)
+        if newest is None:
+            due_in = 0.0
+        else:
+            created = datetime.fromisoformat(newest["created_at"])
+            age = (datetime.now(timezone.utc) - created).total_seconds()
+            due_in = interval - age
+        # Don't compete with daemon startup, even when a backup is overdue
+        return max(due_in, STARTUP_DELAY_SECONDS)
+
+    def _run(self) -> None:
+        """Scheduler loop."""
+        while not self._stop_event.is_set():
+            self._run_now.wait(timeout=self.seconds_until_due())
+            self._run_now.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.backup_sync()
+            except Exception as exc:
+                logger.error("Scheduled backup failed", exc_info=exc)
+
+
+class _TooManyRestarts(Exception):
+    """Raised from the backup progress callback to abort the backup API."""
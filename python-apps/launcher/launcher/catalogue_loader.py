@@ -0,0 +1,325 @@
+"""
+Bulk loading of catalogue data (books, warehouses, ...) straight into a sync DB.
+
+Seeding a store through the web client writes one row per transaction; here
+rows are streamed from CSV or JSON lines and upserted with executemany in large
+transactions. The connection loads the crsqlite extension shipped with the sync
+server, so the CRR triggers record every change and it replicates to clients
+like any other write. After every committed batch the DB file is touched, like
+the sync server's touchHack, so its file watcher notices the change and pushes
+it to connected clients.
+
+Used by `main_headless.py load`:
+
+    main_headless.py load books.csv --db librocco_current.sqlite3 --table book
+"""
+
+import csv
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger("launcher")
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 2.0
+
+# Wait this long for the sync server's write lock before failing a batch
+BUSY_TIMEOUT_MS = 30000
+
+
+class LoaderError(Exception):
+    """The data or the target database can't be loaded."""
+
+
+def find_crsqlite_extension() -> Optional[Path]:
+    """
+    Locate the crsqlite extension of the sync server's node_modules.
+
+    Mirrors how the daemon manager finds the sync server (PyInstaller bundle
+    or repo checkout).
+
+    Returns:
+        Extension path without suffix (as passed to load_extension), or None
+    """
+    if getattr(sys, "frozen", False):
+        syncserver_dir = Path(sys._MEIPASS) / "bundled_binaries" / "syncserver"
+    else:
+        project_root = Path(__file__).parent.parent.parent.parent
+        syncserver_dir = project_root / "apps" / "sync-server"
+
+    suffix = {"Darwin": ".dylib", "Windows": ".dll"}.get(platform.system(), ".so")
+    extension = syncserver_dir / "node_modules" / "@vlcn.io" / "crsqlite" / "dist"
+    extension = extension / "crsqlite"
+    if Path(f"{extension}{suffix}").exists():
+        return extension
+    return None
+
+
+def open_database(db_path: Path, extension: Optional[Path]) -> sqlite3.Connection:
+    """
+    Open an existing sync DB with crsqlite loaded, tuned for bulk writes.
+
+    Raises:
+        LoaderError: If the DB doesn't exist or crsqlite can't be loaded
+    """
+    if not db_path.exists():
+        raise LoaderError(
+            f"{db_path} doesn't exist: open it in the app once (or start the sync "
+            "server) so it's created with the current schema"
+        )
+    if extension is None:
+        raise LoaderError(
+            "crsqlite extension not found (install the sync server's dependencies "
+            "or pass --extension)"
+        )
+
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=0)
+    try:
+        conn.enable_load_extension(True)
+        conn.load_extension(str(extension))
+        conn.enable_load_extension(False)
+    except AttributeError:
+        conn.close()
+        raise LoaderError(
+            "This Python's sqlite3 module was built without extension loading"
+        ) from None
+    except sqlite3.Error as exc:
+        conn.close()
+        raise LoaderError(f"Failed to load crsqlite from {extension}: {exc}") from exc
+
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    # The sync server keeps the DB in WAL mode; NORMAL is safe there and
+    # avoids an fsync per transaction
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA cache_size = -65536")  # 64MB
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def close_database(conn: sqlite3.Connection) -> None:
+    """Finalize crsqlite (required before closing a CRR connection) and close."""
+    try:
+        conn.execute("SELECT crsql_finalize()")
+    finally:
+        conn.close()
+
+
+def read_rows(source: Path, file_format: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream rows from a CSV (with header) or JSON lines file.
+
+    Args:
+        source: Input file
+        file_format: "csv" or "jsonl" (by default from the file suffix)
+
+    Yields:
+        One dict per row
+    """
+    file_format = file_format or (
+        "jsonl" if source.suffix.lower() in (".jsonl", ".ndjson") else "csv"
+    )
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        if file_format == "csv":
+            yield from csv.DictReader(f)
+            return
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                raise LoaderError(f"{source}:{line_number}: invalid JSON: {exc}")
+            if not isinstance(row, dict):
+                raise LoaderError(f"{source}:{line_number}: expected a JSON object")
+            yield row
+
+
+class CatalogueLoader:
+    """Upserts rows into one table in batched transactions."""
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        table: str,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        progress: Optional[Callable[[int, float], None]] = None,
+    ):
+        """
+        Args:
+            conn: Open connection (autocommit mode, crsqlite loaded for CRRs)
+            table: Target table
+            batch_size: Rows per transaction
+            progress: Called with (rows loaded, elapsed seconds) periodically
+        """
+        self.conn = conn
+        self.table = table
+        self.batch_size = max(1, batch_size)
+        self.progress = progress
+
+        columns = conn.execute(f'PRAGMA table_info("{table}")').fetchall()
+        if not columns:
+            raise LoaderError(f"Table {table!r} doesn't exist")
+        self.columns = [column[1] for column in columns]
+        self.primary_key = [
+            column[1] for column in sorted(columns, key=lambda c: c[5]) if column[5]
+        ]
+        if not self.primary_key:
+            raise LoaderError(f"Table {table!r} has no primary key to upsert on")
+
+        # The main database's file ("" for in-memory databases)
+        main_file = conn.execute("PRAGMA database_list").fetchone()[2]
+        self.db_path = Path(main_file) if main_file else None
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Upsert rows (existing rows with the same primary key are updated).
+
+        Columns that aren't in the table are ignored (with a warning), empty
+        CSV values are stored as NULL, and a missing updated_at is set to the
+        current time like the app does.
+
+        Returns:
+            Dict with the rows loaded, batches, elapsed seconds and rows/s
+        """
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return {"rows": 0, "batches": 0, "seconds": 0.0, "rows_per_second": 0.0}
+
+        columns = [column for column in first if column in self.columns]
+        ignored = [column for column in first if column not in self.columns]
+        if ignored:
+            logger.warning(f"Ignoring columns not in {self.table}: {ignored}")
+        missing_key = set(self.primary_key) - set(columns)
+        if missing_key:
+            raise LoaderError(f"Input has no primary key column(s) {missing_key}")
+        # The app stamps updated_at (ms) on every write
+        extra = []
+        if "updated_at" in self.columns and "updated_at" not in columns:
+            extra = [int(time.time() * 1000)]
+
+        statement = self._upsert_statement(columns + ["updated_at"] * len(extra))
+
+        def values(row):
+            # CSV has no NULL: empty fields are stored as NULL
+            fields = [row.get(column) for column in columns]
+            return tuple([None if field == "" else field for field in fields] + extra)
+
+        started = time.monotonic()
+        last_report = started
+        loaded = batches = 0
+        batch = [values(first)]
+        for row in rows:
+            batch.append(values(row))
+            if len(batch) >= self.batch_size:
+                self._write(statement, batch)
+                loaded += len(batch)
+                batches += 1
+                batch = []
+                if (
+                    self.progress
+                    and time.monotonic() - last_report >= PROGRESS_INTERVAL
+                ):
+                    last_report = time.monotonic()
+                    self.progress(loaded, last_report - started)
+        if batch:
+            self._write(statement, batch)
+            loaded += len(batch)
+            batches += 1
+
+        seconds = time.monotonic() - started
+        return {
+            "rows": loaded,
+            "batches": batches,
+            "seconds": seconds,
+            "rows_per_second": loaded / seconds if seconds else float(loaded),
+        }
+
+    def _upsert_statement(self, columns: list[str]) -> str:
+        """INSERT ... ON CONFLICT DO UPDATE, which the CRR triggers track."""
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        placeholders = ", ".join("?" for _ in columns)
+        conflict = ", ".join(f'"{column}"' for column in self.primary_key)
+        updates = ", ".join(
+            f'"{column}" = excluded."{column}"'
+            for column in columns
+            if column not in self.primary_key
+        )
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        return (
+            f'INSERT INTO "{self.table}" ({quoted}) VALUES ({placeholders}) '
+            f"ON CONFLICT ({conflict}) {action}"
+        )
+
+    def _write(self, statement: str, batch: list[tuple]) -> None:
+        """Write one batch in its own transaction."""
+        # IMMEDIATE takes the write lock up front (waiting up to busy_timeout)
+        # instead of failing mid-batch when the sync server is writing
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(statement, batch)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self._touch()
+
+    def _touch(self) -> None:
+        """Bump the DB file's mtime: the sync server's watcher picks it up."""
+        if self.db_path is None:
+            return
+        try:
+            os.utime(self.db_path)
+        except OSError as exc:
+            logger.warning(f"Could not touch {self.db_path}: {exc}")
+
+
+def run_load_command(
+    db_dir: Path,
+    source: Path,
+    db_name: str,
+    table: str,
+    file_format: Optional[str] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    extension: Optional[Path] = None,
+) -> int:
+    """
+    Entry point of `main_headless.py load`.
+
+    Returns:
+        Process exit code
+    """
+    db_path = db_dir / db_name
+    try:
+        conn = open_database(db_path, extension or find_crsqlite_extension())
+    except LoaderError as exc:
+        logger.error(str(exc))
+        return 1
+
+    def report(rows, elapsed):
+        logger.info(f"  {rows} rows ({rows / elapsed:.0f} rows/s)")
+
+    try:
+        loader = CatalogueLoader(conn, table, batch_size, progress=report)
+        logger.info(f"Loading {source} into {db_path.name}:{table}")
+        result = loader.load(read_rows(source, file_format))
+    except (LoaderError, OSError, csv.Error, sqlite3.Error) as exc:
+        logger.error(f"Load failed: {exc}")
+        return 1
+    finally:
+        close_database(conn)
+
+    logger.info(
+        f"Loaded {result['rows']} rows into {table} in {result['seconds']:.1f}s "
+        f"({result['rows_per_second']:.0f} rows/s, {result['batches']} transactions)"
+    )
+    return 0
@@ -0,0 +1,437 @@
+"""
+cgroup v2 resource isolation for supervised daemons (Linux only).
+
+Each daemon can be placed in its own cgroup with memory.max, memory.high,
+cpu.weight and io.weight, so Caddy and the sync server can't starve each other
+(or the POS UI) on shared hosts. Two placement strategies are supported:
+
+- "delegated": the launcher's own cgroup is writable (e.g. a systemd user
+  service with Delegate=yes). The launcher moves itself into a "launcher" leaf,
+  enables controllers for the subtree and creates one child cgroup per daemon.
+- "systemd": processes are moved into transient scopes through the systemd
+  user manager (what `systemd-run --user --scope` does, but for an existing
+  PID, so Circus keeps managing the daemon process directly).
+
+Processes are placed from the Circus after_spawn hook, so a daemon runs in the
+launcher's cgroup for a few milliseconds after each spawn. The hook runs on the
+arbiter's event loop: the systemd D-Bus call (up to 10 seconds) is made from a
+worker thread so it doesn't hold up Circus. When neither strategy is available
+the daemons simply run unconfined.
+
+Configured in settings.toml (disabled by default):
+
+    [cgroups]
+    enabled = true
+    strategy = "auto"             # "auto", "delegated" or "systemd"
+
+    [cgroups.syncserver]
+    memory_max = "2G"
+    memory_high = "1536M"
+    cpu_weight = 200
+    io_weight = 200
+"""
+
+import concurrent.futures
+import logging
+import os
+import platform
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("launcher")
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+CONTROLLERS = ("memory", "cpu", "io")
+LAUNCHER_LEAF = "launcher"
+STRATEGIES = ("auto", "delegated", "systemd")
+
+SIZE_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+class CgroupLimits:
+    """Resource limits for one daemon's cgroup."""
+
+    def __init__(
+        self,
+        memory_max: Optional[int] = None,
+        memory_high: Optional[int] = None,
+        cpu_weight: Optional[int] = None,
+        io_weight: Optional[int] = None,
+    ):
+        self.memory_max = memory_max
+        self.memory_high = memory_high
+        self.cpu_weight = cpu_weight
+        self.io_weight = io_weight
+
+    def is_empty(self) -> bool:
+        """Whether no limit is set."""
+        return all(
+            value is None
+            for value in (
+                self.memory_max,
+                self.memory_high,
+                self.cpu_weight,
+                self.io_weight,
+            )
+        )
+
+    def interface_files(self) -> Dict[str, str]:
+        """Values to write to the cgroup interface files."""
+        files = {}
+        if self.memory_max is not None:
+            files["memory.max"] = str(self.memory_max)
+        if self.memory_high is not None:
+            files["memory.high"] = str(self.memory_high)
+        if self.cpu_weight is not None:
+            files["cpu.weight"] = str(self.cpu_weight)
+        if self.io_weight is not None:
+            files["io.weight"] = f"default {self.io_weight}"
+        return files
+
+    def systemd_properties(self) -> list[tuple[str, str, Any]]:
+        """(name, D-Bus signature, value) properties for a transient scope."""
+        properties = []
+        if self.memory_max is not None:
+            properties.append(("MemoryMax", "t", self.memory_max))
+        if self.memory_high is not None:
+            properties.append(("MemoryHigh", "t", self.memory_high))
+        if self.cpu_weight is not None:
+            properties.append(("CPUWeight", "t", self.cpu_weight))
+        if self.io_weight is not None:
+            properties.append(("IOWeight", "t", self.io_weight))
+        return properties
+
+
+def parse_size(value: Any) -> int:
+    """
+    Parse a memory size such as 536870912, "512M" or "2G" into bytes.
+
+    Raises:
+        ValueError: If the value is not a valid size
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        if value <= 0:
+            raise ValueError(f"Size must be positive: {value}")
+        return value
+    text = str(value).strip().upper().removesuffix("B")
+    multiplier = 1
+    if text and text[-1] in SIZE_UNITS:
+        multiplier = SIZE_UNITS[text[-1]]
+        text = text[:-1]
+    size = int(float(text) * multiplier)
+    if size <= 0:
+        raise ValueError(f"Size must be positive: {value}")
+    return size
+
+
+def load_cgroup_limits(settings: Optional[Dict[str, Any]]) -> Dict[str, CgroupLimits]:
+    """
+    Build per-daemon limits from the [cgroups] settings table.
+
+    Invalid values are logged and ignored.
+
+    Args:
+        settings: The cgroups settings dict (may be None or empty)
+
+    Returns:
+        Dict of daemon name to CgroupLimits (only daemons with limits)
+    """
+    limits = {}
+    for daemon_name, values in (settings or {}).items():
+        if not isinstance(values, dict):
+            continue
+
+        daemon_limits = CgroupLimits()
+        for key in ("memory_max", "memory_high"):
+            if key in values:
+                try:
+                    setattr(daemon_limits, key, parse_size(values[key]))
+                except ValueError:
+                    logger.warning(
+                        f"Ignoring invalid cgroups.{daemon_name}.{key}="
+                        f"{values[key]!r}"
+                    )
+        for key in ("cpu_weight", "io_weight"):
+            if key in values:
+                try:
+                    weight = int(values[key])
+                except (TypeError, ValueError):
+                    weight = 0
+                if 1 <= weight <= 10000:
+                    setattr(daemon_limits, key, weight)
+                else:
+                    logger.warning(
+                        f"Ignoring invalid cgroups.{daemon_name}.{key}="
+                        f"{values[key]!r} (must be 1-10000)"
+                    )
+
+        if not daemon_limits.is_empty():
+            limits[daemon_name] = daemon_limits
+    return limits
+
+
+def get_process_cgroup(pid: int) -> Optional[Path]:
+    """Path of a process's cgroup v2 directory, or None if unavailable."""
+    try:
+        content = Path(f"/proc/{pid}/cgroup").read_text()
+    except OSError:
+        return None
+    for line in content.splitlines():
+        # cgroup v2 entries look like "0::/user.slice/..."
+        if line.startswith("0::"):
+            return CGROUP_ROOT / line[3:].lstrip("/")
+    return None
+
+
+def parse_pressure(content: str) -> Dict[str, Dict[str, float]]:
+    """
+    Parse a PSI file (cpu.pressure, memory.pressure, io.pressure).
+
+    Returns:
+        {"some": {"avg10": ..., "avg60": ..., "avg300": ..., "total": ...},
+         "full": {...}}
+    """
+    pressure = {}
+    for line in content.splitlines():
+        kind, *fields = line.split()
+        values = {}
+        for field in fields:
+            key, _, value = field.partition("=")
+            values[key] = float(value)
+        pressure[kind] = values
+    return pressure
+
+
+def read_cgroup_stats(cgroup: Path) -> Dict[str, Any]:
+    """
+    Read memory usage, CPU usage and pressure stall information for a cgroup.
+
+    Missing files (controller not enabled, PSI disabled) are skipped.
+    """
+    stats: Dict[str, Any] = {"cgroup": str(cgroup)}
+
+    def read(name: str) -> Optional[str]:
+        try:
+            return (cgroup / name).read_text().strip()
+        except OSError:
+            return None
+
+    memory_current = read("memory.current")
+    if memory_current is not None:
+        stats["memory_current"] = int(memory_current)
+    memory_max = read("memory.max")
+    if memory_max is not None:
+        stats["memory_max"] = None if memory_max == "max" else int(memory_max)
+
+    cpu_stat = read("cpu.stat")
+    if cpu_stat:
+        for line in cpu_stat.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "usage_usec":
+                stats["cpu_usage_usec"] = int(value)
+
+    for resource in ("cpu", "memory", "io"):
+        content = read(f"{resource}.pressure")
+        if content:
+            stats[f"{resource}_pressure"] = parse_pressure(content)
+
+    return stats
+
+
+class CgroupManager:
+    """Places daemon processes into cgroups and reads their stats back."""
+
+    def __init__(self, limits: Dict[str, CgroupLimits], strategy: str = "auto"):
+        """
+        Args:
+            limits: Per-daemon limits (daemons without an entry are not placed)
+            strategy: "auto", "delegated" or "systemd"
+        """
+        self.limits = limits
+        self.requested_strategy = strategy if strategy in STRATEGIES else "auto"
+        # Resolved by setup(): "delegated", "systemd" or None (unconfined)
+        self.strategy: Optional[str] = None
+        self.base_cgroup: Optional[Path] = None
+        # Runs systemd placements, in spawn order (created on first use)
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+    def setup(self) -> Optional[str]:
+        """
+        Detect and prepare a placement strategy.
+
+        Returns:
+            The strategy in use, or None if daemons will run unconfined
+        """
+        if not self.limits:
+            return None
+        if platform.system() != "Linux":
+            logger.info("cgroup isolation is only available on Linux")
+            return None
+        if not (CGROUP_ROOT / "cgroup.controllers").exists():
+            logger.warning("cgroup v2 is not mounted, daemons will run unconfined")
+            return None
+
+        if self.requested_strategy in ("auto", "delegated"):
+            if self._setup_delegated():
+                self.strategy = "delegated"
+            elif self.requested_strategy == "delegated":
+                logger.warning(
+                    "cgroup delegation is not available, daemons will run unconfined"
+                )
+        if self.strategy is None and self.requested_strategy in ("auto", "systemd"):
+            if self._systemd_user_manager_available():
+                self.strategy = "systemd"
+            else:
+                logger.warning(
+                    "Neither a delegated cgroup nor the systemd user manager is "
+                    "available, daemons will run unconfined"
+                )
+
+        if self.strategy:
+            logger.info(f"Using cgroup strategy '{self.strategy}'")
+        return self.strategy
+
+    def place(self, daemon_name: str, pid: int) -> bool:
+        """
+        Move a freshly spawned daemon process into its cgroup.
+
+        Returns:
+            True if the process was placed
+        """
+        limits = self.limits.get(daemon_name)
+        if not limits or not self.strategy:
+            return False
+
+        try:
+            if self.strategy == "delegated":
+                cgroup = self.base_cgroup / daemon_name
+                (cgroup / "cgroup.procs").write_text(str(pid))
+            else:
+                self._start_transient_scope(daemon_name, pid, limits)
+        except (OSError, subprocess.SubprocessError) as exc:
+            logger.warning(
+                f"Could not place {daemon_name} (PID {pid}) in cgroup: {exc}"
+            )
+            return False
+
+        logger.info(f"Placed {daemon_name} (PID {pid}) in its cgroup")
+        return True
+
+    def place_soon(self, daemon_name: str, pid: int) -> concurrent.futures.Future:
+        """
+        Move a freshly spawned daemon process into its cgroup without blocking.
+
+        For callers on an event loop (the after_spawn hook): delegated cgroups
+        are a quick cgroupfs write and are placed right away, systemd scopes
+        are started from a worker thread.
+
+        Returns:
+            Future of place()'s result
+        """
+        if self.strategy == "systemd" and self.limits.get(daemon_name):
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="cgroup-placement"
+                )
+            return self._executor.submit(self.place, daemon_name, pid)
+
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        future.set_result(self.place(daemon_name, pid))
+        return future
+
+    def close(self) -> None:
+        """Wait for queued placements and stop the worker thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def get_stats(self, pid: int) -> Optional[Dict[str, Any]]:
+        """Resource stats for the cgroup a process runs in (None if unavailable)."""
+        if not self.strategy:
+            return None
+        cgroup = get_process_cgroup(pid)
+        if cgroup is None or not cgroup.exists():
+            return None
+        return read_cgroup_stats(cgroup)
+
+    def _setup_delegated(self) -> bool:
+        """Set up per-daemon child cgroups under the launcher's own cgroup."""
+        own = get_process_cgroup(os.getpid())
+        if own is None or not os.access(own / "cgroup.subtree_control", os.W_OK):
+            return False
+
+        # Processes may only live in leaf cgroups once controllers are enabled
+        # for the subtree, so the launcher moves itself into its own leaf first
+        base = own.parent if own.name == LAUNCHER_LEAF else own
+        try:
+            leaf = base / LAUNCHER_LEAF
+            leaf.mkdir(exist_ok=True)
+            (leaf / "cgroup.procs").write_text(str(os.getpid()))
+
+            available = (base / "cgroup.controllers").read_text().split()
+            enable = [c for c in CONTROLLERS if c in available]
+            if enable:
+                (base / "cgroup.subtree_control").write_text(
+                    " ".join(f"+{c}" for c in enable)
+                )
+
+            for daemon_name, limits in self.limits.items():
+                cgroup = base / daemon_name
+                cgroup.mkdir(exist_ok=True)
+                for name, value in limits.interface_files().items():
+                    try:
+                        (cgroup / name).write_text(value)
+                    except OSError as exc:
+                        logger.warning(f"Could not set {name} for {daemon_name}: {exc}")
+        except OSError as exc:
+            logger.debug(f"cgroup delegation unavailable: {exc}")
+            return False
+
+        self.base_cgroup = base
+        return True
+
+    def _systemd_user_manager_available(self) -> bool:
+        """Whether the systemd user manager is reachable over D-Bus."""
+        if not shutil.which("busctl"):
+            return False
+        try:
+            result = subprocess.run(
+                ["busctl", "--user", "status", "org.freedesktop.systemd1"],
+                capture_output=True,
+                timeout=5,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return False
+        return result.returncode == 0
+
+    def _start_transient_scope(
+        self, daemon_name: str, pid: int, limits: CgroupLimits
+    ) -> None:
+        """Adopt an existing process into a transient systemd scope."""
+        properties = [("PIDs", "au", [pid])] + limits.systemd_properties()
+
+        # StartTransientUnit(name, mode, properties a(sv), aux a(sa(sv)))
+        args = [
+            "busctl",
+            "--user",
+            "call",
+            "org.freedesktop.systemd1",
+            "/org/freedesktop/systemd1",
+            "org.freedesktop.systemd1.Manager",
+            "StartTransientUnit",
+            "ssa(sv)a(sa(sv))",
+            f"librocco-{daemon_name}-{pid}.scope",
+            "fail",
+            str(len(properties)),
+        ]
+        for name, signature, value in properties:
+            args += [name, signature]
+            if signature == "au":
+                args += [str(len(value))] + [str(v) for v in value]
+            else:
+                args.append(str(value))
+        args.append("0")
+
+        subprocess.run(args, check=True, capture_output=True, timeout=10)
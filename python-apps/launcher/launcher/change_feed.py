@@ -0,0 +1,265 @@
+"""
+Change-feed monitor: CR-SQLite change rate and peer lag per database.
+
+Every minute each database in db_dir is opened read-only to read:
+
+- its db_version: the highest db_version in the *__crsql_clock tables (what
+  crsql_db_version() returns, without loading the extension; the clock tables
+  index db_version, so this is cheap)
+- the version of each peer site in crsql_tracked_peers (event 0): the last of
+  that peer's own versions the server has received
+
+From consecutive samples the monitor derives changes/sec and, per peer, how many
+versions the server has moved on since the peer last synced changes in. A till
+whose tracked version stops advancing while the others keep writing falls
+behind; one that only reads is expected to show a growing lag too, so lag is
+reported as a hint ("peer X is N versions behind"), not an error.
+
+Samples go to a compact time series (logs/change_feed.jsonl) and the latest
+status is shown in the tray menu.
+
+Configured in settings.toml:
+
+    [change_feed]
+    enabled = true
+    interval_seconds = 60
+    lag_warning_versions = 1000
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from launcher.db_files import list_databases, read_only_uri
+from launcher.timeseries import TimeSeriesStore
+
+logger = logging.getLogger("launcher")
+
+# Raw samples are kept for a week
+RETENTION_DAYS = 7
+COMPACT_INTERVAL_SECONDS = 3600
+
+# crsql_tracked_peers.event for versions received from a peer
+TRACKED_EVENT_RECEIVE = 0
+
+
+def read_db_version(conn: sqlite3.Connection) -> int:
+    """
+    The database's db_version: the highest db_version in its clock tables.
+
+    Args:
+        conn: Open connection (the extension doesn't need to be loaded)
+
+    Returns:
+        db_version (0 for a database without changes or clock tables)
+    """
+    clock_tables = [
+        name
+        for (name,) in conn.execute(
+            "SELECT name FROM sqlite_schema "
+            "WHERE type = 'table' AND name LIKE '%\\_\\_crsql\\_clock' ESCAPE '\\'"
+        )
+    ]
+    db_version = 0
+    for table in clock_tables:
+        (version,) = conn.execute(f'SELECT max(db_version) FROM "{table}"').fetchone()
+        db_version = max(db_version, version or 0)
+    return db_version
+
+
+def read_change_feed(db_path: Path) -> Dict[str, Any]:
+    """
+    Read the current db_version and tracked peer versions of a database.
+
+    Args:
+        db_path: Database file (opened read-only)
+
+    Returns:
+        Dict with "db_version" and "peers" ({site id hex: version})
+    """
+    conn = sqlite3.connect(read_only_uri(db_path), uri=True)
+    try:
+        db_version = read_db_version(conn)
+
+        peers = {}
+        try:
+            for site_id, version in conn.execute(
+                "SELECT site_id, max(version) FROM crsql_tracked_peers "
+                "WHERE event = ? GROUP BY site_id",
+                (TRACKED_EVENT_RECEIVE,),
+            ):
+                peers[bytes(site_id).hex()] = version
+        except sqlite3.OperationalError:
+            # Not a CR-SQLite database (or never synced)
+            pass
+    finally:
+        conn.close()
+    return {"db_version": db_version, "peers": peers}
+
+
+class PeerState:
+    """What the monitor knows about one peer of one database."""
+
+    def __init__(self, version: int, db_version_at_sync: int, synced_at: float):
+        self.version = version
+        # Server db_version when the peer's tracked version last advanced
+        self.db_version_at_sync = db_version_at_sync
+        self.synced_at = synced_at
+
+
+class DatabaseFeed:
+    """Latest state of one database's change feed."""
+
+    def __init__(self, db_version: int, sampled_at: float):
+        self.db_version = db_version
+        self.sampled_at = sampled_at
+        self.changes_per_second: Optional[float] = None
+        self.peers: Dict[str, PeerState] = {}
+
+    def lag(self, site_id: str) -> int:
+        """Versions the server has moved on since the peer last synced."""
+        return self.db_version - self.peers[site_id].db_version_at_sync
+
+
+class ChangeFeedMonitor:
+    """Samples change feeds on an interval and tracks rates and peer lag."""
+
+    def __init__(
+        self,
+        db_dir: Path,
+        history_file: Path,
+        interval_seconds: float = 60.0,
+        lag_warning_versions: int = 1000,
+    ):
+        """
+        Args:
+            db_dir: Database directory
+            history_file: Time-series file for the samples
+            interval_seconds: Time between samples
+            lag_warning_versions: Peer lag reported in the tray and logged
+        """
+        self.db_dir = db_dir
+        self.store = TimeSeriesStore(history_file, retention_days=RETENTION_DAYS)
+        self.interval_seconds = interval_seconds
+        self.lag_warning_versions = lag_warning_versions
+        self.feeds: Dict[str, DatabaseFeed] = {}
+
+        self._lock = threading.Lock()
+        self._warned: set[tuple[str, str]] = set()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling in the background."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._restore()
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="change-feed", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Change-feed monitor sampling every {self.interval_seconds:.0f}s")
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def sample(self, now: Optional[float] = None) -> Dict[str, DatabaseFeed]:
+        """
+        Sample every database once and update rates and peer lag.
+
+        Returns:
+            Feed state by database file name
+        """
+        now = time.time() if now is None else now
+        for db_path in list_databases(self.db_dir):
+            try:
+                values = read_change_feed(db_path)
+            except sqlite3.Error as exc:
+                logger.debug(f"Change feed of {db_path.name} unavailable: {exc}")
+                continue
+            self.store.append(db_path.name, values, ts=now)
+            with self._lock:
+                self._update(db_path.name, values, now)
+        self._warn_lagging()
+        return self.feeds
+
+    def lagging_peers(self) -> list[tuple[str, str, int]]:
+        """(database, peer site id, versions behind) at or over the threshold."""
+        lagging = []
+        with self._lock:
+            for db_name, feed in self.feeds.items():
+                for site_id in feed.peers:
+                    lag = feed.lag(site_id)
+                    if lag >= self.lag_warning_versions:
+                        lagging.append((db_name, site_id, lag))
+        return sorted(lagging, key=lambda entry: entry[2], reverse=True)
+
+    def total_changes_per_second(self) -> Optional[float]:
+        """Change rate summed over all databases (None before two samples)."""
+        with self._lock:
+            rates = [
+                feed.changes_per_second
+                for feed in self.feeds.values()
+                if feed.changes_per_second is not None
+            ]
+        return sum(rates) if rates else None
+
+    def _update(self, db_name: str, values: Dict[str, Any], now: float) -> None:
+        """Fold one sample into the in-memory state."""
+        db_version = values["db_version"]
+        previous = self.feeds.get(db_name)
+        feed = DatabaseFeed(db_version, now)
+        if previous is not None:
+            elapsed = now - previous.sampled_at
+            if elapsed > 0 and db_version >= previous.db_version:
+                feed.changes_per_second = (db_version - previous.db_version) / elapsed
+            feed.peers = previous.peers
+
+        for site_id, version in values["peers"].items():
+            peer = feed.peers.get(site_id)
+            if peer is None or version > peer.version:
+                feed.peers[site_id] = PeerState(version, db_version, now)
+        # Peers no longer tracked (e.g. DB replaced)
+        for site_id in set(feed.peers) - set(values["peers"]):
+            del feed.peers[site_id]
+        self.feeds[db_name] = feed
+
+    def _restore(self) -> None:
+        """Rebuild peer state from the stored samples."""
+        with self._lock:
+            for record in self.store.read():
+                self._update(record["series"], record["values"], record["ts"])
+            # Rates across a launcher restart would be misleading
+            for feed in self.feeds.values():
+                feed.changes_per_second = None
+
+    def _warn_lagging(self) -> None:
+        """Log each lagging peer once (until it catches up)."""
+        lagging = {(db, site): lag for db, site, lag in self.lagging_peers()}
+        for key, lag in lagging.items():
+            if key not in self._warned:
+                db_name, site_id = key
+                logger.warning(
+                    f"Sync peer {site_id[:8]} of {db_name} is {lag} versions behind"
+                )
+        self._warned = set(lagging)
+
+    def _run(self) -> None:
+        """Sampling loop."""
+        last_compaction = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+                if time.monotonic() - last_compaction > COMPACT_INTERVAL_SECONDS:
+                    self.store.compact()
+                    last_compaction = time.monotonic()
+            except Exception as exc:
+                logger.error("Change-feed sampling failed", exc_info=exc)
+            self._stop_event.wait(self.interval_seconds)
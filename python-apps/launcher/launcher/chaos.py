@@ -0,0 +1,346 @@
+"""
+Chaos harness measuring how long the stack takes to recover from faults.
+
+Against a running launcher, every fault is injected a few times and the stack
+is probed (the sync server's /health and a static route through Caddy) until
+both answer 200 again:
+
+- kill_syncserver / kill_caddy: SIGKILL (a segfault, the OOM killer)
+- stop_syncserver: SIGSTOP for hold_seconds, then SIGCONT (a hung process)
+- block_port: the sync server is killed and port 3000 taken by another
+  process for hold_seconds (not possible with pre-bound sockets, where the
+  launcher keeps holding the port)
+- corrupt_db: a corrupted copy of a database is put in db_dir and the sync
+  server killed, so its restart meets it; the copy is removed after
+  hold_seconds
+- disk_full: a filler file under logs_dir takes the free space (up to
+  max_fill_mb) for hold_seconds. Not in the default set, since it affects
+  everything on that disk
+
+The daemons' processes are the ones the launcher's supervisor reports through
+its control API (see control_api.py), not whatever holds their ports.
+
+Each round reports the recovery time (from the fault being cleared, i.e.
+injected for kills, to serving again), the outage (from the first failed probe)
+and whether the stack kept serving during the fault. Results are summarized
+per fault as a table, so restart policy changes have measurable impact:
+
+    librocco-headless chaos --rounds 3 --json mttr.json
+"""
+
+import logging
+import os
+import shutil
+import socket
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import psutil
+
+from launcher.api_client import HttpClient
+from launcher.config import CADDY_PORT, SYNC_SERVER_PORT
+from launcher.control_api import ControlError
+from launcher.db_files import list_databases
+from launcher.stats import percentile
+
+logger = logging.getLogger("launcher")
+
+FAULTS = (
+    "kill_syncserver",
+    "kill_caddy",
+    "stop_syncserver",
+    "block_port",
+    "corrupt_db",
+    "disk_full",
+)
+DEFAULT_FAULTS = tuple(fault for fault in FAULTS if fault != "disk_full")
+
+DEFAULT_PROBES = {
+    "health": f"http://127.0.0.1:{SYNC_SERVER_PORT}/health",
+    "static": f"https://127.0.0.1:{CADDY_PORT}/",
+}
+DEFAULT_DAEMON_PORTS = {"syncserver": SYNC_SERVER_PORT, "caddy": CADDY_PORT}
+
+PROBE_TIMEOUT = 1.0
+FILL_CHUNK = b"\0" * (1024 * 1024)
+
+
+class FaultNotApplicable(Exception):
+    """The fault can't be injected in this setup."""
+
+
+def corrupt_file(path: Path, offset: int, length: int = 4096) -> None:
+    """Overwrite length bytes at offset with garbage."""
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(bytes((i * 37 + 11) % 256 for i in range(length)))
+
+
+def summarize(results: list[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Recovery statistics per fault (rounds that didn't recover excluded)."""
+    summary: Dict[str, Dict[str, Any]] = {}
+    for fault in dict.fromkeys(r["fault"] for r in results):
+        rounds = [r for r in results if r["fault"] == fault]
+        applied = [r for r in rounds if r.get("error") is None]
+        recovered = sorted(r["recovery_seconds"] for r in applied if r["recovered"])
+        summary[fault] = {
+            "rounds": len(rounds),
+            "recovered": len(recovered),
+            "serving_during_fault": sum(
+                1 for r in applied if r["serving_during_fault"]
+            ),
+            "min_s": recovered[0] if recovered else None,
+            "median_s": percentile(recovered, 50) if recovered else None,
+            "max_s": recovered[-1] if recovered else None,
+            "max_outage_s": max(
+                (r["outage_seconds"] for r in applied if r["recovered"]), default=None
+            ),
+            "error": next((r["error"] for r in rounds if r.get("error")), None),
+        }
+    return summary
+
+
+def format_table(summary: Dict[str, Dict[str, Any]]) -> str:
+    """Recovery time table."""
+
+    def seconds(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.2f}"
+
+    lines = [
+        f"{'fault':<18}{'recovered':>10}{'min s':>9}{'median s':>10}{'max s':>9}"
+        f"{'outage s':>10}  notes"
+    ]
+    for fault, stats in summary.items():
+        notes = stats["error"] or (
+            f"served during {stats['serving_during_fault']} round(s)"
+            if stats["serving_during_fault"]
+            else ""
+        )
+        lines.append(
+            f"{fault:<18}{stats['recovered']:>5}/{stats['rounds']:<4}"
+            f"{seconds(stats['min_s']):>9}{seconds(stats['median_s']):>10}"
+            f"{seconds(stats['max_s']):>9}{seconds(stats['max_outage_s']):>10}"
+            f"  {notes}"
+        )
+    return "\n".join(lines)
+
+
+class ChaosHarness:
+    """Injects faults into a running launcher and times the recovery."""
+
+    def __init__(
+        self,
+        db_dir: Path,
+        logs_dir: Path,
+        daemon_pid: Callable[[str], Optional[int]],
+        probes: Optional[Dict[str, str]] = None,
+        daemon_ports: Optional[Dict[str, int]] = None,
+        hold_seconds: float = 5.0,
+        timeout: float = 120.0,
+        interval: float = 0.1,
+        max_fill_mb: int = 1024,
+    ):
+        """
+        Args:
+            db_dir: Sync server database directory
+            logs_dir: Launcher logs directory (filled by disk_full)
+            daemon_pid: Daemon name -> PID of its process, as the supervisor
+                reports it (see control_api.daemon_pid_lookup())
+            probes: Probe name -> URL, all answering 200 when serving
+            daemon_ports: Daemon name -> listening port (taken by block_port)
+            hold_seconds: Duration of the faults that last (stop, block, ...)
+            timeout: Seconds to wait for the stack to serve again
+            interval: Seconds between probes
+            max_fill_mb: Upper bound of the disk_full filler file
+        """
+        self.db_dir = db_dir
+        self.logs_dir = logs_dir
+        self.daemon_pid = daemon_pid
+        self.probes = probes or DEFAULT_PROBES
+        self.daemon_ports = daemon_ports or DEFAULT_DAEMON_PORTS
+        self.hold_seconds = hold_seconds
+        self.timeout = timeout
+        self.interval = interval
+        self.max_fill_mb = max_fill_mb
+        self._clients = {
+            name: HttpClient(url, timeout=PROBE_TIMEOUT, verify=False)
+            for name, url in self.probes.items()
+        }
+
+    def probe(self) -> bool:
+        """Whether every probe answers 200."""
+        for client in self._clients.values():
+            try:
+                if client.request("GET", "").status_code != 200:
+                    return False
+            except httpx.HTTPError:
+                return False
+        return True
+
+    def wait_until_serving(self) -> Optional[float]:
+        """Monotonic time the stack served again, None after the timeout."""
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.probe():
+                return time.monotonic()
+            time.sleep(self.interval)
+        return None
+
+    def run(self, faults=DEFAULT_FAULTS, rounds: int = 3) -> list[Dict[str, Any]]:
+        """
+        Inject every fault `rounds` times.
+
+        Returns:
+            One dict per round: "fault", "round", "recovered",
+            "recovery_seconds", "outage_seconds", "serving_during_fault" and
+            "error" (why the fault couldn't be injected)
+        """
+        results = []
+        try:
+            for fault in faults:
+                for round_number in range(1, rounds + 1):
+                    result = self.run_fault(fault)
+                    result["round"] = round_number
+                    results.append(result)
+                    recovery = result["recovery_seconds"]
+                    logger.info(
+                        f"{fault} #{round_number}: "
+                        + (
+                            result["error"]
+                            or (
+                                f"recovered in {recovery:.2f}s"
+                                if result["recovered"]
+                                else "did not recover"
+                            )
+                        )
+                    )
+                    if result.get("error"):
+                        break
+        finally:
+            for client in self._clients.values():
+                client.close()
+        return results
+
+    def run_fault(self, fault: str) -> Dict[str, Any]:
+        """Inject one fault, clear it and time the recovery."""
+        result: Dict[str, Any] = {
+            "fault": fault,
+            "recovered": False,
+            "recovery_seconds": None,
+            "outage_seconds": None,
+            "serving_during_fault": False,
+            "error": None,
+        }
+        if self.wait_until_serving() is None:
+            result["error"] = "stack not serving before the fault"
+            return result
+
+        first_failure: Optional[float] = None
+        try:
+            injected = time.monotonic()
+            clear = getattr(self, f"_inject_{fault}")()
+        except FaultNotApplicable as exc:
+            result["error"] = str(exc)
+            return result
+        try:
+            # Watch the stack while the fault lasts
+            while time.monotonic() < injected + (self.hold_seconds if clear else 0):
+                probed_at = time.monotonic()
+                if self.probe():
+                    result["serving_during_fault"] = True
+                elif first_failure is None:
+                    first_failure = probed_at
+                time.sleep(self.interval)
+        finally:
+            if clear:
+                clear()
+        cleared = time.monotonic()
+
+        if first_failure is None and not self.probe():
+            first_failure = cleared
+        serving = self.wait_until_serving()
+        if serving is not None:
+            result["recovered"] = True
+            result["recovery_seconds"] = serving - cleared
+            result["outage_seconds"] = (
+                serving - first_failure if first_failure is not None else 0.0
+            )
+        return result
+
+    def _daemon(self, name: str) -> psutil.Process:
+        try:
+            pid = self.daemon_pid(name)
+            if pid is None:
+                raise FaultNotApplicable(f"{name} is not running")
+            return psutil.Process(pid)
+        except ControlError as exc:
+            raise FaultNotApplicable(str(exc))
+        except psutil.Error:
+            raise FaultNotApplicable(f"{name} process not found")
+
+    def _inject_kill_syncserver(self) -> None:
+        self._daemon("syncserver").kill()
+
+    def _inject_kill_caddy(self) -> None:
+        self._daemon("caddy").kill()
+
+    def _inject_stop_syncserver(self) -> Callable[[], None]:
+        process = self._daemon("syncserver")
+        process.suspend()
+        return process.resume
+
+    def _inject_block_port(self) -> Callable[[], None]:
+        process = self._daemon("syncserver")
+        try:
+            parent = process.parent()
+            if parent and any(
+                c.laddr.port == self.daemon_ports["syncserver"]
+                for c in parent.net_connections(kind="tcp")
+            ):
+                raise FaultNotApplicable("port is held by the launcher (pre-bound)")
+        except psutil.Error:
+            pass
+        process.kill()
+        process.wait(timeout=10)
+        squatter = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            squatter.bind(("0.0.0.0", self.daemon_ports["syncserver"]))
+            squatter.listen()
+        except OSError as exc:
+            squatter.close()
+            raise FaultNotApplicable(f"could not take the port: {exc}")
+        return squatter.close
+
+    def _inject_corrupt_db(self) -> Callable[[], None]:
+        databases = list_databases(self.db_dir)
+        if not databases:
+            raise FaultNotApplicable("no database to copy")
+        copy = self.db_dir / f"chaos-{int(time.time())}.sqlite3"
+        shutil.copyfile(databases[0], copy)
+        # Garbage over the second page (or the middle of a tiny file)
+        corrupt_file(copy, offset=min(4096, copy.stat().st_size // 2))
+        self._daemon("syncserver").kill()
+
+        def clear():
+            for suffix in ("", "-wal", "-shm"):
+                copy.with_name(copy.name + suffix).unlink(missing_ok=True)
+
+        return clear
+
+    def _inject_disk_full(self) -> Callable[[], None]:
+        filler = self.logs_dir / "chaos-filler.bin"
+        written = 0
+        # Unbuffered, so that running out of space shows up here
+        with open(filler, "wb", buffering=0) as f:
+            try:
+                while written < self.max_fill_mb:
+                    f.write(FILL_CHUNK)
+                    written += 1
+                os.fsync(f.fileno())
+            except OSError:
+                # ENOSPC: the disk is full
+                pass
+
+        return lambda: filler.unlink(missing_ok=True)
@@ -2,17 +2,69 @@
 Configuration and directory management using platformdirs.
 """
 
+import dataclasses
+import logging
 import tomllib
 import tomli_w
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Type, TypeVar
 from platformdirs import user_data_dir, user_config_dir
 import platform
 
+logger = logging.getLogger("launcher")
+
 # Server ports (hardcoded, not user-configurable)
 CADDY_PORT = 8433
 SYNC_SERVER_PORT = 3000
 
+# Daemons run by the supervisor, in start order
+DAEMONS = ("caddy", "syncserver")
+
+# Background services that write to the DB directory: only run when enabled
+OPT_IN_SERVICES = frozenset(("backups", "maintenance", "snapshots"))
+
+SettingsT = TypeVar("SettingsT")
+
+
+def settings_from_table(
+    cls: Type[SettingsT], section: str, settings: Optional[Dict[str, Any]]
+) -> SettingsT:
+    """
+    Build a settings dataclass from its settings.toml table.
+
+    Each value is converted to the type of the field's default. Unknown keys,
+    values that don't convert and negative numbers (zero too, for fields with
+    metadata={"positive": True}) are logged and ignored.
+
+    Args:
+        cls: Dataclass whose fields all have defaults
+        section: Table name, for the warnings (e.g. "backups")
+        settings: The table (may be None or empty)
+
+    Returns:
+        cls instance with the valid values applied
+    """
+    fields = {field.name: field for field in dataclasses.fields(cls)}
+    values = {}
+    for key, value in (settings or {}).items():
+        field = fields.get(key)
+        if field is None:
+            # "enabled" is read by Config.service_enabled
+            if key != "enabled":
+                logger.warning(f"Ignoring unknown setting {section}.{key}")
+            continue
+        try:
+            converted = type(field.default)(value)
+            if isinstance(converted, (int, float)) and (
+                converted < 0 or (converted == 0 and field.metadata.get("positive"))
+            ):
+                raise ValueError(value)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring invalid {section}.{key}={value!r}")
+            continue
+        values[key] = converted
+    return cls(**values)
+
 
 def get_binary_name(base_name: str) -> str:
     """
@@ -56,6 +108,9 @@ class Config:
         self.caddy_config_dir = self.data_dir / "caddy-config"
         self.logs_dir = self.data_dir / "logs"
         self.db_dir = self.data_dir / "db"  # Database directory for sync server
+        self.backups_dir = self.data_dir / "backups"  # Scheduled DB backups
+        self.snapshots_dir = self.data_dir / "snapshots"  # DB downloads for Caddy
+        self.reports_dir = self.data_dir / "reports"  # Precomputed reports for Caddy
 
         # Settings file
         self.settings_file = self.config_dir / "settings.toml"
@@ -78,6 +133,9 @@ class Config:
         self.caddy_config_dir.mkdir(parents=True, exist_ok=True)
         self.logs_dir.mkdir(parents=True, exist_ok=True)
         self.db_dir.mkdir(parents=True, exist_ok=True)
+        self.backups_dir.mkdir(parents=True, exist_ok=True)
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
 
         # Load or create settings
         if self.settings_file.exists():
@@ -105,6 +163,15 @@ class Config:
         self._settings[key] = value
         self.save_settings()
 
+    def service_enabled(self, section: str) -> bool:
+        """
+        Whether a background service is enabled by its settings section.
+
+        Services in OPT_IN_SERVICES default to off, the others to on.
+        """
+        settings = self.get(section) or {}
+        return bool(settings.get("enabled", section not in OPT_IN_SERVICES))
+
     def ensure_caddyfile(self, app_dir: Path) -> None:
         """Generate the Caddyfile, overwriting any existing configuration.
 
@@ -114,9 +181,50 @@ class Config:
         caddyfile_path = self.caddy_config_dir / "Caddyfile"
         # Always regenerate to ensure config stays up to date
         if True:  # Changed from: if not caddyfile_path.exists()
+            from launcher.listen_sockets import prebound_sockets_enabled
+
             server_log = self.logs_dir / "caddy-server.log"
             access_log = self.logs_dir / "caddy-access.log"
 
+            # Listen on the sockets inherited from the launcher, which stay open
+            # across Caddy restarts: TCP for HTTP/1.1 and HTTP/2, UDP for
+            # HTTP/3 (both 0.0.0.0 when Caddy is started by hand)
+            bind_block = ""
+            if prebound_sockets_enabled(self.get("prebind_sockets")):
+                bind_block = """
+    bind {$CADDY_BIND:0.0.0.0} {
+        protocols h1 h2
+    }
+    bind {$CADDY_BIND_H3:0.0.0.0} {
+        protocols h3
+    }
+"""
+
+            # With snapshots disabled, DB downloads go to the sync server
+            snapshots_block = ""
+            if self.service_enabled("snapshots"):
+                snapshots_block = f"""
+    # Serve DB downloads from the precompressed snapshot when there is one
+    # (ETag, Range and zstd/gzip encodings), otherwise from the sync server.
+    # A rewrite runs before all handle blocks, so it wins over the proxies below
+    @dbFile path_regexp dbFile ^/([^/]+\\.(?:sqlite3|sqlite|db))/file$
+    rewrite @dbFile /_snapshots/{{re.dbFile.1}}
+    handle_path /_snapshots/* {{
+        root * {self.snapshots_dir}
+        @snapshot file
+        handle @snapshot {{
+            header Cache-Control "no-cache"
+            file_server {{
+                precompressed zstd gzip
+            }}
+        }}
+        handle {{
+            rewrite * {{http.request.orig_uri.path}}
+            reverse_proxy 127.0.0.1:3000
+        }}
+    }}
+"""
+
             # Generate certificates on-demand for any hostname
             # This allows access via localhost, mDNS (hostname.local), Tailscale, or any IP
             default_caddyfile = f"""{{
@@ -151,7 +259,7 @@ class Config:
     }}
 }}
 
-https://:{CADDY_PORT} {{
+https://:{CADDY_PORT} {{{bind_block}
     # Use Caddy's internal CA for on-demand certificate generation
     # This automatically issues certificates for any hostname that connects (SNI-based)
     tls {{
@@ -170,6 +278,13 @@ https://:{CADDY_PORT} {{
     handle /sync* {{
         reverse_proxy localhost:3000
     }}
+{snapshots_block}
+    # Serve precomputed reports (JSON/CSV) built by the launcher
+    handle_path /reports/* {{
+        root * {self.reports_dir}
+        header Cache-Control "no-cache"
+        file_server
+    }}
 
     # Proxy sync database HTTP endpoints to the sync server
     @syncDb path_regexp syncDb ^/[^/]+/(health|meta|exec|reset|file)$
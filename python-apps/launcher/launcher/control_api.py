@@ -0,0 +1,606 @@
+"""
+Local control API of the launcher (tray and headless).
+
+Scripts (CI, store automation) talk to the running launcher instead of polling
+ports and grepping its output. The launcher listens on a Unix socket in its
+data directory (readable by its user only). On Windows, where the supervisor's
+event loop can't serve named pipes, it listens on a loopback TCP port instead,
+published with an access token in an address file next to where the socket
+would be (the same fallback as the Circus endpoint).
+
+The protocol is JSON lines: one request per line, one reply per line. A
+connection can carry any number of requests, one after the other.
+
+    {"command": "status"}                          daemons' status, process and
+                                                   cgroup resource stats
+    {"command": "start", "daemon": "caddy"}        also "stop" and "restart";
+                                                   daemon "all" for both
+    {"command": "wait_ready", "daemons": [...],    until running and answering
+     "timeout": 30}                                (Caddy's admin API, the sync
+                                                   server's HTTP port)
+    {"command": "logs", "log": "syncserver",       the last lines, then (follow)
+     "lines": 100, "follow": true}                 appended lines until the
+                                                   client disconnects
+
+Replies carry "ok" (and "error" if not ok). Log lines are streamed as
+{"line": ...} messages, before the final reply.
+
+    librocco-headless ctl status
+    librocco-headless ctl restart caddy && librocco-headless ctl wait --timeout 60
+    librocco-headless ctl logs syncserver -f
+"""
+
+import asyncio
+import json
+import logging
+import os
+import platform
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+import psutil
+
+from launcher.api_client import (
+    SYNC_SERVER_URL,
+    AsyncCaddyAdminClient,
+    AsyncSyncServerClient,
+)
+from launcher.config import DAEMONS
+from launcher.operation_scheduler import OperationSuperseded
+
+logger = logging.getLogger("launcher")
+
+CONTROL_SOCKET_NAME = "control.sock"
+# Windows: {"host", "port", "token"} of the TCP listener
+CONTROL_ADDRESS_NAME = "control-address.json"
+
+MUTATIONS = ("start", "stop", "restart")
+# Log name -> EmbeddedSupervisor attribute with its path
+LOG_FILES = {
+    "caddy": "caddy_server_log",
+    "caddy-access": "caddy_access_log",
+    "syncserver": "syncserver_log",
+}
+
+DEFAULT_WAIT_TIMEOUT = 30.0
+READY_POLL_INTERVAL = 0.2
+LOG_POLL_INTERVAL = 0.2
+# Longest request line accepted
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+class ControlError(Exception):
+    """The control API can't be reached, or a request failed."""
+
+
+def control_address(data_dir: Path) -> Path:
+    """The Unix socket (or on Windows, the address file) of the control API."""
+    if platform.system() == "Windows":
+        return data_dir / CONTROL_ADDRESS_NAME
+    return data_dir / CONTROL_SOCKET_NAME
+
+
+def _process_stats(pid: int) -> Optional[Dict[str, Any]]:
+    try:
+        process = psutil.Process(pid)
+        with process.oneshot():
+            cpu = process.cpu_times()
+            return {
+                "rss_bytes": process.memory_info().rss,
+                "cpu_seconds": cpu.user + cpu.system,
+                "threads": process.num_threads(),
+                "uptime": time.time() - process.create_time(),
+            }
+    except psutil.Error:
+        return None
+
+
+class ControlServer:
+    """
+    Serves the control API from its own event loop thread.
+
+    Daemon operations go to the supervisor core's OperationScheduler, so
+    requests from scripts coalesce with (and supersede) the launcher's own.
+    Has start()/stop(), to run as one of the supervisor's background services.
+    """
+
+    def __init__(self, supervisor, address: Path):
+        """
+        Args:
+            supervisor: The EmbeddedSupervisor to control
+            address: Unix socket path (Windows: address file), see
+                control_address()
+        """
+        self.supervisor = supervisor
+        self.address = address
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._token: Optional[str] = None
+
+    def start(self) -> None:
+        """Start listening (RuntimeError if another launcher already does)."""
+        if self.loop is not None:
+            return
+        if self._in_use():
+            raise RuntimeError(f"Control API already served at {self.address}")
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="control-api", daemon=True
+        )
+        self._thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._listen(), self.loop).result(10)
+        except BaseException:
+            self.stop()
+            raise
+        logger.info(f"Control API listening at {self.address}")
+
+    def stop(self) -> None:
+        """Close the listener and any open connections."""
+        if self.loop is None:
+            return
+
+        async def shutdown():
+            if self._server is not None:
+                self._server.close()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(10)
+        except Exception as exc:
+            logger.error("Failed to shut down the control API", exc_info=exc)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.loop.close()
+        self.loop = None
+        self._server = None
+        self.address.unlink(missing_ok=True)
+
+    def _in_use(self) -> bool:
+        try:
+            ControlClient(self.address, timeout=1).close()
+        except ControlError:
+            return False
+        return True
+
+    async def _listen(self) -> None:
+        if platform.system() == "Windows":
+            self._token = secrets.token_hex(16)
+            self._server = await asyncio.start_server(
+                self._connection, "127.0.0.1", 0, limit=MAX_REQUEST_BYTES
+            )
+            port = self._server.sockets[0].getsockname()[1]
+            self.address.write_text(
+                json.dumps({"host": "127.0.0.1", "port": port, "token": self._token})
+            )
+            return
+        self.address.parent.mkdir(parents=True, exist_ok=True)
+        # Created owner-only, rather than chmod-ed after bind() has made it
+        # connectable. Replaces a stale socket file left by a launcher that
+        # crashed
+        umask = os.umask(0o077)
+        try:
+            self._server = await asyncio.start_unix_server(
+                self._connection, str(self.address), limit=MAX_REQUEST_BYTES
+            )
+        finally:
+            os.umask(umask)
+
+    async def _connection(self, reader, writer) -> None:
+        async def send(message: Dict[str, Any]) -> None:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("not an object")
+                except ValueError as exc:
+                    await send({"ok": False, "error": f"Invalid request: {exc}"})
+                    continue
+                if self._token and request.get("token") != self._token:
+                    await send({"ok": False, "error": "Invalid token"})
+                    break
+                try:
+                    reply = await self.handle(request, send, reader)
+                except ConnectionError:
+                    raise
+                except (KeyError, ValueError, TypeError) as exc:
+                    reply = {"ok": False, "error": f"Invalid request: {exc}"}
+                except Exception as exc:
+                    logger.error(f"Control API: {request} failed", exc_info=exc)
+                    reply = {"ok": False, "error": str(exc)}
+                await send(reply)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(
+        self,
+        request: Dict[str, Any],
+        send,
+        reader: Optional[asyncio.StreamReader] = None,
+    ) -> Dict[str, Any]:
+        """
+        Carry out one request.
+
+        Args:
+            request: The decoded request line
+            send: Coroutine function sending a message before the reply
+                (streamed log lines)
+            reader: The connection's reader, watched for the client closing
+                it while logs are followed
+
+        Returns:
+            The reply
+        """
+        command = request.get("command")
+        if command == "status":
+            return await self._status()
+        if command in MUTATIONS:
+            return await self._mutation(command, request["daemon"])
+        if command == "wait_ready":
+            daemons = request.get("daemons") or DAEMONS
+            timeout = float(request.get("timeout", DEFAULT_WAIT_TIMEOUT))
+            return await self._wait_ready(daemons, timeout)
+        if command == "logs":
+            return await self._logs(
+                request["log"],
+                int(request.get("lines", 100)),
+                bool(request.get("follow", False)),
+                send,
+                reader,
+            )
+        return {"ok": False, "error": f"Unknown command: {command!r}"}
+
+    async def _core(self, operation: str, daemon: Optional[str] = None) -> Any:
+        """Run a scheduled operation on the supervisor's core."""
+        core = self.supervisor.core
+        return await asyncio.wrap_future(
+            core.submit(core.scheduler.request(operation, daemon))
+        )
+
+    async def _status(self) -> Dict[str, Any]:
+        daemons: Dict[str, Any] = {}
+        if self.supervisor._running and self.supervisor.core.running:
+            statuses = await self._core("system_status")
+        else:
+            statuses = ()
+        for name in DAEMONS:
+            status = next((s for s in statuses if s.name == name), None)
+            daemons[name] = {
+                "status": status.status if status else "stopped",
+                "pid": status.pid if status else None,
+                "process": None,
+                "resources": None,
+            }
+            if status and status.pid:
+                daemons[name]["process"] = await asyncio.to_thread(
+                    _process_stats, status.pid
+                )
+                daemons[name]["resources"] = await asyncio.to_thread(
+                    self.supervisor.get_resource_stats, status.pid
+                )
+        return {
+            "ok": True,
+            "supervisor": "running" if self.supervisor._running else "stopped",
+            "daemons": daemons,
+        }
+
+    async def _mutation(self, command: str, daemon: str) -> Dict[str, Any]:
+        if daemon != "all" and daemon not in DAEMONS:
+            raise ValueError(f"unknown daemon {daemon!r}")
+        if not self.supervisor.core.running:
+            return {"ok": False, "error": "Supervisor not running"}
+        try:
+            if daemon == "all":
+                ok = await self._core(f"{command}_all")
+            else:
+                ok = await self._core(command, daemon)
+        except OperationSuperseded as exc:
+            return {"ok": False, "error": str(exc)}
+        return {"ok": bool(ok)} if ok else {"ok": False, "error": f"{command} failed"}
+
+    async def _wait_ready(self, daemons, timeout: float) -> Dict[str, Any]:
+        unknown = [d for d in daemons if d not in DAEMONS]
+        if unknown:
+            raise ValueError(f"unknown daemons {unknown}")
+        started = time.monotonic()
+        ready = await asyncio.gather(
+            *(self._until_ready(d, started + timeout) for d in daemons)
+        )
+        waiting = [d for d, ok in zip(daemons, ready) if not ok]
+        reply: Dict[str, Any] = {
+            "ok": not waiting,
+            "seconds": time.monotonic() - started,
+        }
+        if waiting:
+            reply["error"] = f"Not ready after {timeout:g}s: {', '.join(waiting)}"
+        return reply
+
+    async def _until_ready(self, daemon: str, deadline: float) -> bool:
+        """Wait for the watcher to be active and the daemon to answer HTTP."""
+        if daemon == "caddy":
+            client, probe = AsyncCaddyAdminClient(timeout=1), "/config/"
+        else:
+            client, probe = AsyncSyncServerClient(SYNC_SERVER_URL, timeout=1), "/"
+        async with client:
+            while True:
+                if (
+                    self.supervisor.core.running
+                    and (await self._core("status", daemon)).status == "active"
+                ):
+                    try:
+                        if (await client.request("GET", probe)).status_code == 200:
+                            return True
+                    except httpx.HTTPError:
+                        pass
+                if time.monotonic() >= deadline:
+                    return False
+                await asyncio.sleep(READY_POLL_INTERVAL)
+
+    async def _logs(
+        self,
+        name: str,
+        lines: int,
+        follow: bool,
+        send,
+        reader: Optional[asyncio.StreamReader] = None,
+    ) -> Dict[str, Any]:
+        path = Path(getattr(self.supervisor, LOG_FILES[name]))
+        log, position, last = await asyncio.to_thread(_tail, path, lines)
+        # A quiet log gives no failed send to notice a client gone: follow
+        # until the client closes its end
+        closed = asyncio.create_task(_until_eof(reader)) if follow and reader else None
+        try:
+            for line in last:
+                await send({"line": line})
+            while follow:
+                if closed is not None:
+                    await asyncio.wait([closed], timeout=LOG_POLL_INTERVAL)
+                    if closed.done():
+                        raise ConnectionResetError("Log follower disconnected")
+                else:
+                    await asyncio.sleep(LOG_POLL_INTERVAL)
+                log, position, appended = await asyncio.to_thread(
+                    _read_appended, path, log, position
+                )
+                for line in appended:
+                    await send({"line": line})
+        finally:
+            if closed is not None:
+                closed.cancel()
+            if log is not None:
+                log.close()
+        return {"ok": True}
+
+
+async def _until_eof(reader: asyncio.StreamReader) -> None:
+    """Return once the client has closed the connection (discarding input)."""
+    try:
+        while await reader.read(MAX_REQUEST_BYTES):
+            pass
+    except ConnectionError:
+        pass
+
+
+def _tail(path: Path, lines: int):
+    """(open file, position read to, last complete lines) of a log file."""
+    try:
+        log = open(path, "r", encoding="utf-8", errors="replace", newline="")
+    except FileNotFoundError:
+        return None, 0, []
+    last: deque = deque(maxlen=max(lines, 0))
+    position = 0
+    while line := log.readline():
+        if not line.endswith("\n"):
+            # Partial last line: read again once it's complete
+            break
+        last.append(line.rstrip("\r\n"))
+        position = log.tell()
+    return log, position, list(last)
+
+
+def _read_appended(path: Path, log, position: int):
+    """Complete lines appended since position, reopening rotated files."""
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return log, position, []
+    if log is None or (
+        os.fstat(log.fileno()).st_ino != current.st_ino or current.st_size < position
+    ):
+        # Created, rotated or truncated: follow the new file from its start
+        if log is not None:
+            log.close()
+        log = open(path, "r", encoding="utf-8", errors="replace", newline="")
+        position = 0
+    log.seek(position)
+    appended = []
+    while line := log.readline():
+        if not line.endswith("\n"):
+            break
+        appended.append(line.rstrip("\r\n"))
+        position = log.tell()
+    return log, position, appended
+
+
+class ControlClient:
+    """Blocking client of the control API."""
+
+    def __init__(self, address: Path, timeout: Optional[float] = 10.0):
+        """
+        Args:
+            address: Unix socket path (Windows: address file), see
+                control_address()
+            timeout: Seconds to wait for each reply (None: no limit)
+
+        Raises:
+            ControlError: Nothing listens at address
+        """
+        self._token: Optional[str] = None
+        try:
+            if platform.system() == "Windows":
+                published = json.loads(address.read_text())
+                self._token = published["token"]
+                self._socket = socket.create_connection(
+                    (published["host"], published["port"]), timeout=timeout
+                )
+            else:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self._socket.settimeout(timeout)
+                self._socket.connect(str(address))
+        except (OSError, ValueError, KeyError) as exc:
+            raise ControlError(
+                f"Launcher control API not reachable at {address}: {exc}"
+            ) from exc
+        self._file = self._socket.makefile("rb")
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def stream(self, command: str, **params) -> Iterator[Dict[str, Any]]:
+        """Send a request, yield its messages (the reply last)."""
+        request = {"command": command, **params}
+        if self._token:
+            request["token"] = self._token
+        try:
+            self._socket.sendall(json.dumps(request).encode() + b"\n")
+            while line := self._file.readline():
+                message = json.loads(line)
+                yield message
+                if "ok" in message:
+                    return
+        except (OSError, ValueError) as exc:
+            raise ControlError(f"Control API request failed: {exc}") from exc
+        raise ControlError("Control API closed the connection")
+
+    def request(self, command: str, **params) -> Dict[str, Any]:
+        """Send a request and return its reply."""
+        *_, reply = self.stream(command, **params)
+        return reply
+
+
+def daemon_pid_lookup(
+    address: Path, timeout: float = 10.0
+) -> Callable[[str], Optional[int]]:
+    """
+    Daemon PID lookup through the running launcher's control API.
+
+    Tools working on the daemons' processes (chaos, loadgen) ask the
+    supervisor which process its watcher runs.
+
+    Args:
+        address: See control_address()
+        timeout: Seconds to wait for each status reply
+
+    Returns:
+        Function of a daemon name returning its PID (None when it isn't
+        running). Raises ControlError if the launcher can't be reached.
+    """
+
+    def daemon_pid(name: str) -> Optional[int]:
+        with ControlClient(address, timeout=timeout) as client:
+            reply = client.request("status")
+        if not reply.get("ok"):
+            raise ControlError(reply.get("error", "status failed"))
+        return reply["daemons"][name]["pid"]
+
+    return daemon_pid
+
+
+def format_status(reply: Dict[str, Any]) -> str:
+    """One line per daemon: status, PID, memory, CPU time and uptime."""
+    lines = [f"supervisor   {reply['supervisor']}"]
+    for name, daemon in reply["daemons"].items():
+        line = f"{name:<12} {daemon['status']:<9}"
+        if daemon["pid"]:
+            line += f" pid {daemon['pid']}"
+        process = daemon["process"]
+        if process:
+            line += (
+                f"  rss {process['rss_bytes'] / 1024 / 1024:.1f} MB"
+                f"  cpu {process['cpu_seconds']:.1f}s"
+                f"  up {process['uptime']:.0f}s"
+            )
+        resources = daemon["resources"]
+        if resources and resources.get("memory_current") is not None:
+            line += f"  cgroup {resources['memory_current'] / 1024 / 1024:.1f} MB"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def run_ctl_command(
+    address: Path,
+    action: str,
+    targets: list[str],
+    timeout: float = DEFAULT_WAIT_TIMEOUT,
+    lines: int = 100,
+    follow: bool = False,
+    as_json: bool = False,
+) -> int:
+    """
+    Entry point of `main_headless.py ctl`.
+
+    Args:
+        address: See control_address()
+        action: status, start, stop, restart, wait or logs
+        targets: Daemons (start/stop/restart/wait) or the log name (logs)
+
+    Returns:
+        Process exit code: 0 done, 1 failed, 2 launcher not reachable
+    """
+    try:
+        with ControlClient(address, timeout=None) as client:
+            if action == "logs":
+                for message in client.stream(
+                    "logs", log=targets[0], lines=lines, follow=follow
+                ):
+                    if "line" in message:
+                        print(message["line"], flush=True)
+                    else:
+                        reply = message
+            elif action == "status":
+                reply = client.request("status")
+            elif action == "wait":
+                reply = client.request(
+                    "wait_ready", daemons=targets or list(DAEMONS), timeout=timeout
+                )
+            else:
+                reply = client.request(action, daemon=targets[0])
+    except ControlError as exc:
+        logger.error(str(exc))
+        return 2
+    except KeyboardInterrupt:
+        return 0
+
+    if as_json:
+        print(json.dumps(reply, indent=2))
+    elif action == "status" and reply["ok"]:
+        print(format_status(reply))
+    elif action == "wait" and reply["ok"]:
+        print(f"Ready after {reply['seconds']:.2f}s")
+    if not reply["ok"]:
+        logger.error(reply.get("error", f"{action} failed"))
+        return 1
+    return 0
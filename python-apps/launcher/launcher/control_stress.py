@@ -0,0 +1,370 @@
+"""
+Stress harness for the supervisor's control plane.
+
+The GUI's status timer, the tray's menu actions and startup all hand
+operations to the supervisor's core concurrently. The harness reproduces that
+contention: `threads` threads fire a random, interleaved mix of
+status/start/stop/restart operations at a running supervisor (usually running
+the stand-ins from fake_daemons.py) and report:
+
+- throughput and latency percentiles per operation
+- hung operations (possible deadlocks), with the stacks of all threads
+- lost replies: Circus calls that timed out (another caller may have read
+  and dropped the reply)
+- rejected commands by Circus reason ("arbiter is already running ..."), and
+  false successes: operations reporting success although Circus rejected
+  their command
+- inconsistent state once the storm is over: watchers not settling, dead or
+  duplicate processes, daemons still listening while stopped, children the
+  arbiter doesn't know about, or daemons that can't be started and stopped
+  any more
+
+    harness = ControlStressHarness(supervisor, threads=8, operations=2000)
+    print(format_report(harness.run()))
+"""
+
+import contextvars
+import logging
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from typing import Any, Coroutine, Dict, Optional
+
+import psutil
+from circus.exc import CallError
+
+from launcher.config import DAEMONS
+from launcher.network_utils import find_listening_process
+from launcher.stats import summarize
+
+logger = logging.getLogger("launcher")
+
+# Relative weights: status reads dominate, like the GUI's polling
+DEFAULT_MIX = {"status": 6, "start": 1, "stop": 1, "restart": 1}
+
+SETTLED_STATUSES = ("active", "stopped")
+
+
+# Outcomes of the running operation's commands, (command, name) -> rejected
+_operation_commands: contextvars.ContextVar[dict] = contextvars.ContextVar(
+    "operation_commands"
+)
+
+
+class _CallRecorder:
+    """Circus connection proxy counting timed out calls and rejected commands."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.calls = 0
+        self.lost_replies = 0
+        self.rejections: Counter = Counter()
+
+    async def send_message(self, command: str, **props) -> Dict[str, Any]:
+        # All calls run on the core's loop: no locking needed
+        self.calls += 1
+        try:
+            response = await self._connection.send_message(command, **props)
+        except CallError as exc:
+            if "timed out" in str(exc).lower():
+                self.lost_replies += 1
+            raise
+        # (status replies carry the watcher's status instead of "ok")
+        rejected = response.get("status") == "error"
+        if rejected:
+            self.rejections[f"{command}: {response.get('reason')}"] += 1
+        # A retry that got through replaces the rejection
+        _operation_commands.get({})[command, props.get("name")] = rejected
+        return response
+
+    def __getattr__(self, name: str):
+        return getattr(self._connection, name)
+
+
+async def _tracked(coro: Coroutine) -> tuple[Any, bool]:
+    """Result of coro, and whether Circus finally rejected one of its commands."""
+    commands: dict = {}
+    _operation_commands.set(commands)
+    return await coro, any(commands.values())
+
+
+class ControlStressHarness:
+    """Fires interleaved control operations at a supervisor from many threads."""
+
+    def __init__(
+        self,
+        supervisor,
+        daemons=DAEMONS,
+        threads: int = 8,
+        operations: int = 1000,
+        mix: Optional[Dict[str, int]] = None,
+        hang_timeout: float = 60.0,
+        settle_timeout: float = 30.0,
+        daemon_ports: Optional[Dict[str, int]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Args:
+            supervisor: A started EmbeddedSupervisor
+            daemons: Daemons the operations target
+            threads: Concurrent caller threads
+            operations: Operations in total, shared by the threads
+            mix: Operation -> relative weight (status, start, stop, restart)
+            hang_timeout: Seconds after which an operation counts as hung
+            settle_timeout: Seconds for the watchers to settle after the storm
+            daemon_ports: Daemon -> port, to check stopped daemons released it
+            seed: Random seed, for reproducible operation sequences
+        """
+        self.supervisor = supervisor
+        self.daemons = tuple(daemons)
+        self.threads = threads
+        self.operations = operations
+        self.mix = mix or DEFAULT_MIX
+        self.hang_timeout = hang_timeout
+        self.settle_timeout = settle_timeout
+        self.daemon_ports = daemon_ports or {}
+        self.random = random.Random(seed)
+
+        self._lock = threading.Lock()
+        self._remaining = operations
+        self._in_flight: Dict[int, tuple[str, str, float]] = {}
+        self._results: list[tuple[str, float, bool]] = []
+        self._statuses: Counter = Counter()
+        self._false_successes: Counter = Counter()
+        # Children that aren't the harness's business (started before it ran)
+        self._other_children: set[int] = set()
+
+    def _run_operation(self, name: str, daemon: str) -> tuple[bool, bool]:
+        """Run an operation on the core: (success, a command was rejected)."""
+        core = self.supervisor.core
+        if name == "status":
+            status, rejected = core.run(_tracked(core.status(daemon)))
+            with self._lock:
+                self._statuses[status.status] += 1
+            return status.status != "error", rejected
+        ok, rejected = core.run(_tracked(getattr(core, f"{name}_daemon")(daemon)))
+        return bool(ok), rejected
+
+    def _next(self) -> Optional[tuple[str, str]]:
+        with self._lock:
+            if self._remaining <= 0:
+                return None
+            self._remaining -= 1
+            operation = self.random.choices(
+                list(self.mix), weights=list(self.mix.values())
+            )[0]
+            return operation, self.random.choice(self.daemons)
+
+    def _caller(self) -> None:
+        ident = threading.get_ident()
+        while (job := self._next()) is not None:
+            operation, daemon = job
+            started = time.perf_counter()
+            with self._lock:
+                self._in_flight[ident] = (operation, daemon, started)
+            try:
+                ok, rejected = self._run_operation(operation, daemon)
+            except Exception as exc:
+                logger.error(f"Stress: {operation} {daemon} raised", exc_info=exc)
+                ok, rejected = False, False
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                del self._in_flight[ident]
+                self._results.append((operation, elapsed, ok))
+                if ok and rejected:
+                    self._false_successes[operation] += 1
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the storm, then check the supervisor's state.
+
+        Returns:
+            Dict with "seconds", "completed", "throughput" (operations/s),
+            "summary" (per operation, see stats.summarize()), "statuses"
+            (status read counts), "calls", "lost_replies", "rejections",
+            "false_successes" (per operation),
+            "hung" (operation, daemon, seconds and stacks of hung calls) and
+            "inconsistencies" (descriptions)
+        """
+        self._other_children = {
+            child.pid
+            for child in psutil.Process().children()
+            if child.pid not in self._daemon_pids()
+        }
+        core = self.supervisor.core
+        recorder = _CallRecorder(core.circus)
+        core.circus = recorder
+        callers = [
+            threading.Thread(target=self._caller, name=f"stress-{i}", daemon=True)
+            for i in range(self.threads)
+        ]
+        hung: list[Dict[str, Any]] = []
+        started = time.perf_counter()
+        try:
+            for caller in callers:
+                caller.start()
+            while any(caller.is_alive() for caller in callers):
+                time.sleep(0.05)
+                hung = self._hung_operations()
+                if hung:
+                    logger.error(f"Stress: {len(hung)} operation(s) hung, giving up")
+                    with self._lock:
+                        self._remaining = 0
+                    break
+            elapsed = time.perf_counter() - started
+            # Hung callers are daemon threads, left behind
+            inconsistencies = [] if hung else self.check_consistency()
+        finally:
+            core.circus = recorder._connection
+
+        return {
+            "threads": self.threads,
+            "seconds": elapsed,
+            "completed": len(self._results),
+            "throughput": len(self._results) / elapsed if elapsed else 0.0,
+            "summary": summarize(self._results),
+            "statuses": dict(self._statuses),
+            "calls": recorder.calls,
+            "lost_replies": recorder.lost_replies,
+            "rejections": dict(recorder.rejections),
+            "false_successes": dict(self._false_successes),
+            "hung": hung,
+            "inconsistencies": inconsistencies,
+        }
+
+    def _hung_operations(self) -> list[Dict[str, Any]]:
+        now = time.perf_counter()
+        with self._lock:
+            overdue = {
+                ident: job
+                for ident, job in self._in_flight.items()
+                if now - job[2] > self.hang_timeout
+            }
+        if not overdue:
+            return []
+        frames = sys._current_frames()
+        stacks = {
+            thread.name: "".join(traceback.format_stack(frames[thread.ident]))
+            for thread in threading.enumerate()
+            if thread.ident in frames
+        }
+        return [
+            {
+                "operation": operation,
+                "daemon": daemon,
+                "seconds": now - since,
+                "stacks": stacks,
+            }
+            for operation, daemon, since in overdue.values()
+        ]
+
+    def check_consistency(self) -> list[str]:
+        """Problems with the supervisor's state once no operation runs."""
+        supervisor = self.supervisor
+        problems = []
+
+        statuses = self._settle()
+        problems.extend(
+            f"{d} did not settle (status {s!r})"
+            for d, s in statuses.items()
+            if s not in SETTLED_STATUSES
+        )
+
+        for daemon, status in statuses.items():
+            pids = supervisor.client.send_message("list", name=daemon).get("pids", [])
+            alive = [pid for pid in pids if psutil.pid_exists(pid)]
+            if status == "active" and len(alive) != 1:
+                problems.append(f"{daemon} active with {len(alive)} live process(es)")
+            if status == "stopped" and pids:
+                problems.append(f"{daemon} stopped but the arbiter lists {pids}")
+            port = self.daemon_ports.get(daemon)
+            if (
+                status == "stopped"
+                and port
+                and not supervisor.listen_sockets
+                and find_listening_process(port) is not None
+            ):
+                problems.append(f"{daemon} stopped but port {port} still listens")
+
+        # Daemons the arbiter lost track of
+        known_pids = self._daemon_pids()
+        for child in psutil.Process().children():
+            if child.pid in self._other_children:
+                continue
+            if child.pid not in known_pids and child.is_running():
+                try:
+                    command = " ".join(child.cmdline()[:3])
+                except psutil.Error:
+                    command = "?"
+                problems.append(f"unknown child process {child.pid}: {command}")
+
+        # The control plane still works (one command at a time: the arbiter
+        # rejects commands while it is still carrying out the previous one)
+        for daemon in self.daemons:
+            if not supervisor._start_daemon_sync(daemon):
+                problems.append(f"{daemon} can't be started after the storm")
+            elif self._settle()[daemon] != "active":
+                problems.append(f"{daemon} not active after a successful start")
+            if not supervisor._stop_daemon_sync(daemon):
+                problems.append(f"{daemon} can't be stopped after the storm")
+            elif self._settle()[daemon] != "stopped":
+                problems.append(f"{daemon} not stopped after a successful stop")
+        return problems
+
+    def _daemon_pids(self) -> set[int]:
+        """PIDs of every watcher's processes (not only the targeted ones)."""
+        return {
+            pid
+            for daemon in DAEMONS
+            for pid in self.supervisor.client.send_message("list", name=daemon).get(
+                "pids", []
+            )
+        }
+
+    def _settle(self) -> Dict[str, str]:
+        """Daemon statuses once none is starting or stopping (or on timeout)."""
+        deadline = time.monotonic() + self.settle_timeout
+        while True:
+            statuses = {
+                d: self.supervisor._get_status_sync(d).status for d in self.daemons
+            }
+            if all(s in SETTLED_STATUSES for s in statuses.values()):
+                return statuses
+            if time.monotonic() > deadline:
+                return statuses
+            time.sleep(0.02)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Latency table followed by the detected problems."""
+    lines = [
+        f"{report['completed']} operations from {report['threads']} threads in "
+        f"{report['seconds']:.1f}s ({report['throughput']:.1f} ops/s), "
+        f"{report['calls']} Circus calls",
+        f"{'operation':<10}{'count':>8}{'failed':>8}{'p50 ms':>10}"
+        f"{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for name, stats in report["summary"].items():
+        lines.append(
+            f"{name:<10}{stats['count']:>8}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}"
+            f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+    lines.append(f"lost replies: {report['lost_replies']}")
+    for operation, count in report["false_successes"].items():
+        lines.append(f"false successes: {count}x {operation}")
+    for reason, count in report["rejections"].items():
+        lines.append(f"rejected {count}x: {reason}")
+    for hung in report["hung"]:
+        lines.append(
+            f"HUNG: {hung['operation']} {hung['daemon']} for {hung['seconds']:.0f}s"
+        )
+    if report["hung"]:
+        for name, stack in report["hung"][0]["stacks"].items():
+            lines.append(f"--- {name}\n{stack}")
+    for problem in report["inconsistencies"]:
+        lines.append(f"INCONSISTENT: {problem}")
+    return "\n".join(lines)
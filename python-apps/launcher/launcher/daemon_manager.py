@@ -1,7 +1,13 @@
 """
 Daemon management using Circus as an embedded supervisor.
+
+Daemon operations run on the supervisor's asyncio core (supervisor_core.py):
+the _*_sync() methods wait for them, the non-blocking methods (get_status(),
+start_all_daemons(), ...) go through the core's scheduler and report through
+DaemonWorker's Qt signals.
 """
 
+import concurrent.futures
 import logging
 import os
 import platform
@@ -10,195 +16,72 @@ import tempfile
 import threading
 import time
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Callable, Coroutine, Dict, Optional, Any
 from circus import get_arbiter
 from circus.client import CircusClient
-from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot as Slot
-import requests
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from launcher.cgroups import CgroupManager
+from launcher.listen_sockets import ListenSockets
+from launcher.node_tuning import NodeTuningProfile
+from launcher.operation_scheduler import OperationSuperseded
+from launcher.preflight import PreflightChecker
+from launcher.process_priority import (
+    PrioritySettings,
+    load_priorities,
+    make_after_spawn_hook,
+)
+from launcher.profiling import SyncServerProfiler, get_heapsnapshot_node_flags
+from launcher.supervisor_core import DaemonStatus, SupervisorCore
 
 logger = logging.getLogger("launcher")
 
 
-class DaemonStatus:
-    """Daemon status information."""
+class SerializedCircusClient(CircusClient):
+    """
+    CircusClient shared by several threads (the GUI and worker threads).
 
-    def __init__(
-        self,
-        name: str,
-        status: str,
-        pid: Optional[int] = None,
-        uptime: Optional[float] = None,
-    ):
-        self.name = name
-        self.status = status  # "active", "stopped", "starting", "error"
-        self.pid = pid
-        self.uptime = uptime
+    All calls go through one ZMQ socket, and a call drops the replies that are
+    not its own: concurrent calls would lose each other's replies and time out.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def call(self, cmd):
+        with self._lock:
+            return super().call(cmd)
 
 
 class DaemonWorker(QObject):
     """
-    Worker object for performing blocking Circus operations in a background thread.
+    Signals carrying the results of the supervisor's non-blocking operations.
 
-    Communicates with main thread via signals to avoid blocking the Qt event loop.
-    All methods are slots that should be called via QMetaObject.invokeMethod or
-    signal connections.
+    The operations run on the supervisor core's thread, which emits these
+    signals: Qt queues them to the threads the receivers live in, so slots of
+    GUI objects run on the GUI thread.
     """
 
     # Signals for communicating results back to main thread
     status_ready = pyqtSignal(object)  # DaemonStatus or None
     operation_complete = pyqtSignal(str, bool)  # (operation_name, success)
     error_occurred = pyqtSignal(str, str)  # (operation, error_message)
+    profile_captured = pyqtSignal(str, str)  # (kind, path or "" on failure)
+    # (callback, result): runs callback(result) in this object's thread
+    _deliver = pyqtSignal(object, object)
 
-    def __init__(self, supervisor: "EmbeddedSupervisor"):
-        """
-        Initialize worker.
-
-        Args:
-            supervisor: The EmbeddedSupervisor instance to perform operations on
-        """
+    def __init__(self):
         super().__init__()
-        self.supervisor = supervisor
+        self._deliver.connect(self._call)
 
-    @Slot(str)
-    def do_get_status(self, daemon_name: str):
-        """
-        Get daemon status in background thread.
-
-        Emits status_ready signal with result when complete.
-        """
-        try:
-            status = self.supervisor._get_status_sync(daemon_name)
-            self.status_ready.emit(status)
-        except Exception as exc:
-            logger.error(
-                f"Worker: Failed to get status for {daemon_name}", exc_info=exc
-            )
-            self.error_occurred.emit("get_status", str(exc))
-            self.status_ready.emit(None)
-
-    @Slot(str)
-    def do_start_daemon(self, daemon_name: str):
-        """
-        Start daemon in background thread.
-
-        Emits operation_complete signal when done.
-        """
-        try:
-            success = self.supervisor._start_daemon_sync(daemon_name)
-            self.operation_complete.emit("start", success)
-        except Exception as exc:
-            logger.error(f"Worker: Failed to start {daemon_name}", exc_info=exc)
-            self.error_occurred.emit("start_daemon", str(exc))
-            self.operation_complete.emit("start", False)
-
-    @Slot(str)
-    def do_stop_daemon(self, daemon_name: str):
-        """
-        Stop daemon in background thread.
-
-        Emits operation_complete signal when done.
-        """
-        try:
-            success = self.supervisor._stop_daemon_sync(daemon_name)
-            self.operation_complete.emit("stop", success)
-        except Exception as exc:
-            logger.error(f"Worker: Failed to stop {daemon_name}", exc_info=exc)
-            self.error_occurred.emit("stop_daemon", str(exc))
-            self.operation_complete.emit("stop", False)
-
-    @Slot(str)
-    def do_restart_daemon(self, daemon_name: str):
-        """
-        Restart daemon in background thread.
-
-        Emits operation_complete signal when done.
-        """
-        try:
-            success = self.supervisor._restart_daemon_sync(daemon_name)
-            self.operation_complete.emit("restart", success)
-        except Exception as exc:
-            logger.error(f"Worker: Failed to restart {daemon_name}", exc_info=exc)
-            self.error_occurred.emit("restart_daemon", str(exc))
-            self.operation_complete.emit("restart", False)
-
-    @Slot()
-    def do_start_all_daemons(self):
-        """
-        Start all daemons in background thread.
-
-        Emits operation_complete signal when done.
-        """
-        try:
-            success = self.supervisor._start_all_daemons_sync()
-            self.operation_complete.emit("start_all", success)
-        except Exception as exc:
-            logger.error("Worker: Failed to start all daemons", exc_info=exc)
-            self.error_occurred.emit("start_all_daemons", str(exc))
-            self.operation_complete.emit("start_all", False)
-
-    @Slot()
-    def do_stop_all_daemons(self):
-        """
-        Stop all daemons in background thread.
-
-        Emits operation_complete signal when done.
-        """
-        try:
-            success = self.supervisor._stop_all_daemons_sync()
-            self.operation_complete.emit("stop_all", success)
-        except Exception as exc:
-            logger.error("Worker: Failed to stop all daemons", exc_info=exc)
-            self.error_occurred.emit("stop_all_daemons", str(exc))
-            self.operation_complete.emit("stop_all", False)
-
-    @Slot()
-    def do_restart_all_daemons(self):
-        """
-        Restart all daemons in background thread.
-
-        Emits operation_complete signal when done.
-        """
-        try:
-            success = self.supervisor._restart_all_daemons_sync()
-            self.operation_complete.emit("restart_all", success)
-        except Exception as exc:
-            logger.error("Worker: Failed to restart all daemons", exc_info=exc)
-            self.error_occurred.emit("restart_all_daemons", str(exc))
-            self.operation_complete.emit("restart_all", False)
-
-    @Slot()
-    def do_get_system_status(self):
-        """
-        Get system status (both daemons) in background thread.
-
-        Emits status_ready signal with tuple (caddy_status, syncserver_status) when complete.
-        """
-        try:
-            caddy_status = self.supervisor._get_status_sync("caddy")
-            syncserver_status = self.supervisor._get_status_sync("syncserver")
-            self.status_ready.emit((caddy_status, syncserver_status))
-        except Exception as exc:
-            logger.error("Worker: Failed to get system status", exc_info=exc)
-            self.error_occurred.emit("get_system_status", str(exc))
-            self.status_ready.emit(None)
+    def _call(self, callback: Callable[[Any], None], result: Any) -> None:
+        callback(result)
 
 
 class EmbeddedSupervisor(QObject):
     """Embedded Circus-based process supervisor."""
 
-    # Initialization timing (seconds)
-    ARBITER_INIT_WAIT_SECONDS = 2  # Wait for arbiter to initialize watchers
-
-    # Internal signals for requesting worker operations
-    _request_status = pyqtSignal(str)
-    _request_start = pyqtSignal(str)
-    _request_stop = pyqtSignal(str)
-    _request_restart = pyqtSignal(str)
-    _request_start_all = pyqtSignal()
-    _request_stop_all = pyqtSignal()
-    _request_restart_all = pyqtSignal()
-    _request_system_status = pyqtSignal()
-
     def __init__(
         self,
         caddy_binary: Path,
@@ -210,6 +93,12 @@ class EmbeddedSupervisor(QObject):
         syncserver_dir: Path,
         db_dir: Path,
         gui_mode: bool = True,
+        node_tuning: Optional[NodeTuningProfile] = None,
+        priorities: Optional[Dict[str, PrioritySettings]] = None,
+        cgroups: Optional[CgroupManager] = None,
+        prebind_sockets: bool = False,
+        preflight: Optional[PreflightChecker] = None,
+        daemon_commands: Optional[Dict[str, list[str]]] = None,
     ):
         super().__init__()
         self.caddy_binary = caddy_binary
@@ -221,6 +110,26 @@ class EmbeddedSupervisor(QObject):
         self.syncserver_dir = syncserver_dir
         self.db_dir = db_dir
         self.gui_mode = gui_mode
+        # Node runtime tuning for the sync server (None = Node defaults)
+        self.node_tuning = node_tuning
+        # CPU/IO priority per daemon, applied by Circus on every spawn
+        self.priorities = priorities or load_priorities(None)
+        self._apply_priority_hook = make_after_spawn_hook(self.priorities)
+        # Optional cgroup v2 isolation (Linux), None = unconfined
+        self.cgroups = cgroups
+        # Listening sockets owned by the supervisor and inherited by the daemons
+        # (see listen_sockets.py), bound in start() when prebind_sockets is set
+        self.prebind_sockets = prebind_sockets
+        # Database checks run before every sync server (re)start
+        self.preflight = preflight
+        # Command prefix replacing a daemon's binary, followed by its usual
+        # arguments (e.g. the stand-ins in fake_daemons.py for benchmarks)
+        self.daemon_commands = daemon_commands or {}
+        self.listen_sockets: Optional[ListenSockets] = None
+
+        # Launcher-side jobs (backups, ...) with start()/stop(), stopped
+        # together with the daemons
+        self.background_services: list[Any] = []
 
         self.arbiter = None
         self.arbiter_thread = None
@@ -237,29 +146,19 @@ class EmbeddedSupervisor(QObject):
         # Generate IPC endpoint for secure communication
         self.endpoint = self._generate_ipc_endpoint()
 
-        # Set up worker thread for non-blocking Circus operations (GUI mode only)
-        self.worker_thread = None
-        self.worker = None
+        # On-demand CPU profiles / heap snapshots of the sync server
+        self.profiler = SyncServerProfiler(self)
+
+        # Daemon operations, on an event loop thread started with the arbiter
+        self.core = SupervisorCore(self)
+
+        # Signals of the non-blocking operations (both modes; the GUI
+        # connects its slots to them)
+        self.worker = DaemonWorker()
         if gui_mode:
-            self.worker_thread = QThread()
-            self.worker = DaemonWorker(self)
-            self.worker.moveToThread(self.worker_thread)
-
-            # Connect internal signals to worker slots
-            self._request_status.connect(self.worker.do_get_status)
-            self._request_start.connect(self.worker.do_start_daemon)
-            self._request_stop.connect(self.worker.do_stop_daemon)
-            self._request_restart.connect(self.worker.do_restart_daemon)
-            self._request_start_all.connect(self.worker.do_start_all_daemons)
-            self._request_stop_all.connect(self.worker.do_stop_all_daemons)
-            self._request_restart_all.connect(self.worker.do_restart_all_daemons)
-            self._request_system_status.connect(self.worker.do_get_system_status)
-
-            # Start worker thread
-            self.worker_thread.start()
-            logger.info("Worker thread started for non-blocking daemon operations")
+            logger.info("GUI mode: daemon operation results arrive as Qt signals")
         else:
-            logger.info("Running in headless mode (no worker thread)")
+            logger.info("Running in headless mode")
 
     def _generate_ipc_endpoint(self) -> str:
         """
@@ -285,6 +184,22 @@ class EmbeddedSupervisor(QObject):
             # Linux/macOS: Use Unix domain socket for better security
             return f"ipc://{tempfile.gettempdir()}/librocco-circus-{os.getpid()}.sock"
 
+    def _before_spawn_hook(self, watcher, arbiter, hook_name, **kwargs):
+        """Circus before_spawn hook: let the daemon inherit only its own socket."""
+        if self.listen_sockets:
+            self.listen_sockets.inherit_only(watcher.name)
+        return True
+
+    def _after_spawn_hook(self, watcher, arbiter, hook_name, pid=None, **kwargs):
+        """Circus after_spawn hook: place the new process and set its priority."""
+        if self.listen_sockets:
+            self.listen_sockets.inherit_only(None)
+        if pid and self.cgroups:
+            # Returns right away: systemd placement must not block the arbiter
+            self.cgroups.place_soon(watcher.name, pid)
+        # Always True: a falsy after_spawn result makes Circus kill the process
+        return self._apply_priority_hook(watcher, arbiter, hook_name, pid=pid)
+
     def _create_caddy_watcher(self) -> dict:
         """Create a Circus watcher configuration for Caddy."""
         # Resolve all paths to absolute paths to handle spaces correctly
@@ -299,9 +214,17 @@ class EmbeddedSupervisor(QObject):
         # Standard Caddy run arguments (storage is configured in Caddyfile)
         args = ["run", "--config", str(caddyfile), "--adapter", "caddyfile"]
 
+        # Hand over the pre-bound socket (Circus keeps inheritable fds open
+        # for the child when use_sockets is set; the before_spawn hook makes
+        # only this daemon's socket inheritable)
+        use_sockets = False
+        if self.listen_sockets:
+            env.update(self.listen_sockets.env("caddy"))
+            use_sockets = True
+
         # No stream configuration needed - Caddy writes logs directly to files
         # configured in the Caddyfile (works cross-platform)
-        return {
+        watcher = {
             "name": "caddy",
             "cmd": str(caddy_binary),
             "args": args,
@@ -309,15 +232,28 @@ class EmbeddedSupervisor(QObject):
             "env": env,
             "copy_env": False,  # Use our env dict instead of copying
             "shell": False,  # Don't use shell (important for paths with spaces)
-            "use_sockets": False,  # Use standard subprocess
+            "use_sockets": use_sockets,
             "autostart": False,  # Don't auto-start, let us control it manually
             "max_retry": 5,
             "graceful_timeout": 10,
             "max_retry_in": 60,  # Max 5 retries in 60 seconds
+            "hooks": {
+                "before_spawn": (self._before_spawn_hook, True),
+                "after_spawn": (self._after_spawn_hook, True),
+            },
         }
+        return self._apply_daemon_command(watcher)
+
+    def _create_syncserver_watcher(
+        self, extra_node_flags: Optional[list[str]] = None
+    ) -> dict:
+        """
+        Create a Circus watcher configuration for the sync server.
 
-    def _create_syncserver_watcher(self) -> dict:
-        """Create a Circus watcher configuration for the sync server."""
+        Args:
+            extra_node_flags: Additional Node flags (e.g. for profiling), placed
+                before the script argument
+        """
         import sys
 
         # Detect if running in bundled (PyInstaller) mode or development mode
@@ -361,10 +297,22 @@ class EmbeddedSupervisor(QObject):
         # Set NODE_PATH so Node can find node_modules in bundled syncserver directory
         env["NODE_PATH"] = str(syncserver_dir / "node_modules")
 
-        # Sync server runs with node executing the script
-        args = [str(syncserver_script)]
-
-        return {
+        # Sync server runs with node executing the script. Heap snapshots are
+        # always armed (no cost until signalled), see profiling.py
+        node_flags = get_heapsnapshot_node_flags(self.profiler.profiles_dir)
+        if self.node_tuning:
+            node_flags = self.node_tuning.node_flags() + node_flags
+            env.update(self.node_tuning.env())
+        args = node_flags + (extra_node_flags or []) + [str(syncserver_script)]
+
+        use_sockets = False
+        if self.listen_sockets:
+            env.update(self.listen_sockets.env("syncserver"))
+            use_sockets = True
+        if self.preflight:
+            env.update(self.preflight.env())
+
+        watcher = {
             "name": "syncserver",
             "cmd": str(node_binary),
             "args": args,
@@ -372,14 +320,27 @@ class EmbeddedSupervisor(QObject):
             "env": env,
             "copy_env": False,
             "shell": False,
-            "use_sockets": False,
+            "use_sockets": use_sockets,
             "autostart": False,  # Don't auto-start, let us control it manually
             "stop_signal": signal.SIGTERM,  # Explicitly send SIGTERM on stop
             "stop_children": True,  # Also send signals to any child processes
             "max_retry": 5,
             "graceful_timeout": 10,
             "max_retry_in": 60,
+            "hooks": {
+                "before_spawn": (self._before_spawn_hook, True),
+                "after_spawn": (self._after_spawn_hook, True),
+            },
         }
+        return self._apply_daemon_command(watcher)
+
+    def _apply_daemon_command(self, watcher: dict) -> dict:
+        """Run the daemon through its configured command prefix, if any."""
+        command = self.daemon_commands.get(watcher["name"])
+        if command:
+            watcher["args"] = command[1:] + watcher["args"]
+            watcher["cmd"] = command[0]
+        return watcher
 
     def _extract_env_overrides(
         self, base_env: Dict[str, str], updated_env: Dict[str, str]
@@ -421,6 +382,16 @@ class EmbeddedSupervisor(QObject):
 
         logger.info(f"Using IPC endpoint for Circus: {self.endpoint}")
 
+        # Bind the daemon ports first: a port conflict fails startup here, once
+        if self.prebind_sockets and self.listen_sockets is None:
+            self.listen_sockets = ListenSockets()
+            self.listen_sockets.bind()
+
+        # Prepare cgroups before any daemon spawns (may move the launcher
+        # itself into a leaf cgroup)
+        if self.cgroups:
+            self.cgroups.setup()
+
         # Create watchers
         watchers = [
             self._create_caddy_watcher(),
@@ -441,7 +412,7 @@ class EmbeddedSupervisor(QObject):
         self._running = True
 
         # Initialize CircusClient with the same IPC endpoint
-        self.client = CircusClient(endpoint=self.endpoint)
+        self.client = SerializedCircusClient(endpoint=self.endpoint)
 
         # Wait for arbiter to be ready with intelligent polling
         if not self._wait_for_arbiter_ready():
@@ -449,6 +420,8 @@ class EmbeddedSupervisor(QObject):
             self._running = False
             raise RuntimeError("Failed to start Circus arbiter")
 
+        self.core.start()
+
     def _run_arbiter(self) -> None:
         """Run the arbiter (called in background thread)."""
         try:
@@ -499,10 +472,21 @@ class EmbeddedSupervisor(QObject):
 
     def stop(self) -> None:
         """Stop the supervisor and all managed processes."""
+        # Stop background jobs first so none of them outlives the daemons
+        for service in self.background_services:
+            try:
+                service.stop()
+            except Exception as exc:
+                logger.error(f"Failed to stop {type(service).__name__}", exc_info=exc)
+        self.background_services.clear()
+
         if not self._running:
             return
 
         try:
+            # Cancel daemon operations still in progress
+            self.core.stop()
+
             # Use CircusClient to send commands (proper async way)
             if self.client:
                 # First, explicitly stop all watchers to ensure clean shutdown
@@ -513,12 +497,8 @@ class EmbeddedSupervisor(QObject):
                 except Exception as exc:
                     logger.error("Failed to stop watchers", exc_info=exc)
 
-                # Give watchers time to stop gracefully
-                import time
-
-                time.sleep(1)
-
-                # Then quit the arbiter
+                # Then quit the arbiter (it waits for the watchers' graceful
+                # shutdown)
                 logger.info("Sending quit command to Circus...")
                 try:
                     quit_response = self.client.send_message("quit")
@@ -538,473 +518,347 @@ class EmbeddedSupervisor(QObject):
                     logger.debug(
                         "Arbiter thread still running (will be terminated on exit)"
                     )
-
-            # Stop worker thread gracefully (GUI mode only)
-            if self.gui_mode and self.worker_thread and self.worker_thread.isRunning():
-                logger.info("Stopping worker thread...")
-                self.worker_thread.quit()
-                if not self.worker_thread.wait(5000):  # 5 second timeout
-                    logger.warning("Worker thread did not stop within timeout")
-                else:
-                    logger.info("Worker thread stopped successfully")
         finally:
             self._running = False
-
-    def _wait_for_caddy_ready(self, timeout=30, interval=0.5):
-        """
-        Waits for Caddy's admin API to become responsive.
-        """
-        logger.info("Waiting for Caddy admin API to be ready...")
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                # Caddy's admin API runs on port 2019 by default
-                response = requests.get("http://127.0.0.1:2019/config", timeout=1)
-                if response.status_code == 200:
-                    logger.info("Caddy admin API is ready.")
-                    return True
-            except requests.exceptions.ConnectionError:
-                pass  # Caddy not yet ready, continue polling
-            except Exception as e:
-                logger.warning(f"Error while waiting for Caddy: {e}")
-            time.sleep(interval)
-        logger.error(
-            "Caddy admin API did not become ready within the specified timeout."
-        )
-        return False
+            # Daemons are gone, release the ports
+            if self.listen_sockets:
+                self.listen_sockets.close()
+                self.listen_sockets = None
+            if self.cgroups:
+                self.cgroups.close()
+
+    def _run_core(self, coro: Coroutine, failure: Any) -> Any:
+        """Wait for a core operation, failure if it was cancelled (shutdown)."""
+        try:
+            return self.core.run(coro)
+        except (concurrent.futures.CancelledError, RuntimeError) as exc:
+            logger.error(f"Daemon operation did not complete: {exc!r}")
+            return failure
 
     def _get_status_sync(self, daemon_name: str = "caddy") -> DaemonStatus:
-        """Get status of a daemon using CircusClient (synchronous, blocking)."""
-        if not self._running or not self.client:
+        """Get status of a daemon (synchronous, blocking)."""
+        if not self._running:
             return DaemonStatus(daemon_name, "stopped")
-
-        try:
-            # Get watcher status
-            response = self.client.send_message("status", name=daemon_name)
-
-            # When querying with name parameter, status is in response["status"] field
-            # When querying all watchers, statuses are in response["statuses"] dict
-            watcher_status = response.get("status", "stopped")
-
-            # If active, get PIDs
-            if watcher_status == "active":
-                list_response = self.client.send_message("list", name=daemon_name)
-                pids = list_response.get("pids", [])
-                pid = pids[0] if pids else None
-                return DaemonStatus(daemon_name, "active", pid=pid)
-
-            return DaemonStatus(daemon_name, watcher_status)
-
-        except Exception as exc:
-            logger.error(f"Failed to get status for {daemon_name}", exc_info=exc)
-            return DaemonStatus(daemon_name, "error")
+        return self._run_core(
+            self.core.status(daemon_name), DaemonStatus(daemon_name, "error")
+        )
 
     def _start_daemon_sync(self, daemon_name: str = "caddy") -> bool:
-        """Start a specific daemon using CircusClient (synchronous, blocking)."""
+        """Start a specific daemon (synchronous, blocking)."""
         if not self._running:
             logger.info(
                 f"Supervisor not running, starting it before starting {daemon_name}"
             )
             self.start()
-            # Fall through to actually start the watcher
-
-        try:
-            if not self.client:
-                logger.error(
-                    f"CircusClient not initialized, cannot start {daemon_name}"
-                )
-                return False
-
-            # First check if daemon is already running
-            status_info = self._get_status_sync(daemon_name)
-            if status_info.status == "active":
-                logger.info(
-                    f"Daemon {daemon_name} is already running (PID {status_info.pid})"
-                )
-                return True  # Consider this a success - the goal is achieved
-
-            logger.info(f"Starting daemon: {daemon_name}")
-            response = self.client.send_message("start", name=daemon_name)
-            status = response.get("status")
-
-            if status == "ok":
-                logger.info(f"Successfully sent start command to {daemon_name}")
-                # Add a readiness check for Caddy
-                if daemon_name == "caddy":
-                    if not self._wait_for_caddy_ready():
-                        logger.error("Caddy did not become ready within timeout")
-                        return False
-                logger.info(f"Successfully started daemon: {daemon_name}")
-                return True
-            else:
-                # Log the full response to understand why it failed
-                response_str = str(response)
-                logger.error(
-                    f"Failed to start daemon {daemon_name}. Circus response: {response}"
-                )
-
-                # Check if it's actually running despite the error
-                if (
-                    "already started" in response_str.lower()
-                    or "already running" in response_str.lower()
-                ):
-                    logger.info(
-                        f"Daemon {daemon_name} reported as already running by Circus"
-                    )
-                    return True  # Treat as success - daemon is running
-
-                return False
-        except Exception as exc:
-            logger.error(
-                f"Exception while starting daemon {daemon_name}: {type(exc).__name__}: {exc}",
-                exc_info=exc,
-            )
-            return False
+        return self._run_core(self.core.start_daemon(daemon_name), False)
 
     def _stop_daemon_sync(self, daemon_name: str = "caddy") -> bool:
-        """Stop a specific daemon using CircusClient (synchronous, blocking)."""
+        """Stop a specific daemon (synchronous, blocking)."""
         if not self._running:
             logger.warning(
                 f"Cannot stop {daemon_name}: supervisor not running (arbiter stopped)"
             )
             return False
-
-        if not self.client:
-            logger.warning(f"Cannot stop {daemon_name}: CircusClient not initialized")
-            return False
-
-        try:
-            # First check if daemon is actually running
-            status_info = self._get_status_sync(daemon_name)
-            if status_info.status == "stopped":
-                logger.info(f"Daemon {daemon_name} is already stopped")
-                return True  # Consider this a success - the goal is achieved
-
-            logger.info(f"Stopping daemon: {daemon_name}")
-            response = self.client.send_message("stop", name=daemon_name)
-            status = response.get("status")
-
-            if status == "ok":
-                logger.info(f"Successfully stopped daemon: {daemon_name}")
-                return True
-            else:
-                # Log the full response to understand why it failed
-                response_str = str(response)
-                logger.error(
-                    f"Failed to stop daemon {daemon_name}. Circus response: {response}"
-                )
-
-                # Check if it's actually stopped despite the error
-                if (
-                    "already stopped" in response_str.lower()
-                    or "not running" in response_str.lower()
-                ):
-                    logger.info(
-                        f"Daemon {daemon_name} reported as already stopped by Circus"
-                    )
-                    return True  # Treat as success - daemon is stopped
-
-                return False
-        except Exception as exc:
-            logger.error(
-                f"Exception while stopping daemon {daemon_name}: {type(exc).__name__}: {exc}",
-                exc_info=exc,
-            )
-            return False
+        return self._run_core(self.core.stop_daemon(daemon_name), False)
 
     def _restart_daemon_sync(self, daemon_name: str = "caddy") -> bool:
-        """Restart a specific daemon using CircusClient (synchronous, blocking)."""
+        """Restart a specific daemon (synchronous, blocking)."""
         if not self._running:
             logger.warning(
                 f"Cannot restart {daemon_name}: supervisor not running (arbiter stopped)"
             )
             return False
+        return self._run_core(self.core.restart_daemon(daemon_name), False)
 
-        if not self.client:
-            logger.warning(
-                f"Cannot restart {daemon_name}: CircusClient not initialized"
-            )
-            return False
-
+    def _run_preflight(self) -> None:
+        """Check changed databases before the sync server opens them."""
+        if not self.preflight:
+            return
         try:
-            logger.info(f"Restarting daemon: {daemon_name}")
-            response = self.client.send_message("restart", name=daemon_name)
-            status = response.get("status")
-
-            if status == "ok":
-                logger.info(f"Successfully sent restart command to {daemon_name}")
-                # Add a readiness check for Caddy (same as _start_daemon_sync)
-                if daemon_name == "caddy":
-                    if not self._wait_for_caddy_ready():
-                        logger.error(
-                            "Caddy did not become ready within timeout after restart"
-                        )
-                        return False
-                logger.info(f"Successfully restarted daemon: {daemon_name}")
-                return True
-            else:
-                # Log the full response to understand why it failed
-                logger.error(
-                    f"Failed to restart daemon {daemon_name}. Circus response: {response}"
-                )
-                return False
+            self.preflight.run()
         except Exception as exc:
-            logger.error(
-                f"Exception while restarting daemon {daemon_name}: {type(exc).__name__}: {exc}",
-                exc_info=exc,
-            )
-            return False
+            # The sync server runs its own checks, so this is not fatal
+            logger.error("Pre-flight database checks failed", exc_info=exc)
 
     def _start_all_daemons_sync(self) -> bool:
-        """Start both Caddy and sync server in sequence (synchronous, blocking)."""
-        logger.info("Starting all daemons (Caddy + Sync Server)")
+        """Start Caddy and the sync server (synchronous, blocking)."""
+        if not self._running:
+            self.start()
+        return self._run_core(self.core.start_all(), False)
 
-        # Start Caddy first (reverse proxy)
-        caddy_success = self._start_daemon_sync("caddy")
-        if not caddy_success:
-            logger.error("Failed to start Caddy, aborting system startup")
+    def _stop_all_daemons_sync(self) -> bool:
+        """Stop Caddy and the sync server (synchronous, blocking)."""
+        if not self._running:
+            logger.warning("Cannot stop daemons: supervisor not running")
             return False
+        return self._run_core(self.core.stop_all(), False)
 
-        # Wait briefly for Circus to finish processing the start command
-        logger.debug("Waiting for Circus to complete Caddy start operation...")
-        time.sleep(0.5)  # 500ms to avoid "arbiter is already running" race
-
-        # Then start sync server
-        syncserver_success = self._start_daemon_sync("syncserver")
-        if not syncserver_success:
-            logger.error("Failed to start sync server")
+    def _restart_all_daemons_sync(self) -> bool:
+        """Restart Caddy and the sync server (synchronous, blocking)."""
+        if not self._running:
+            logger.warning("Cannot restart daemons: supervisor not running")
             return False
+        return self._run_core(self.core.restart_all(), False)
 
-        logger.info("Successfully started all daemons")
-        return True
+    def _capture_profile_sync(self, kind: str = "cpu") -> Optional[Path]:
+        """
+        Capture a sync server profile (synchronous, blocking).
 
-    def _stop_all_daemons_sync(self) -> bool:
-        """Stop both Caddy and sync server in reverse sequence (synchronous, blocking)."""
-        logger.info("Stopping all daemons (Sync Server + Caddy)")
-
-        # Stop sync server first
-        syncserver_success = self._stop_daemon_sync("syncserver")
-        if not syncserver_success:
-            logger.error("Failed to stop sync server")
-
-        # Wait briefly for Circus to finish processing the stop command
-        # This avoids the race condition where Circus reports:
-        # "arbiter is already running watcher_stop command"
-        if syncserver_success:
-            logger.debug("Waiting for Circus to complete syncserver stop operation...")
-            time.sleep(0.5)  # 500ms should be plenty
-
-        # Then stop Caddy (try even if sync server failed)
-        caddy_success = self._stop_daemon_sync("caddy")
-        if not caddy_success:
-            logger.error("Failed to stop Caddy")
-
-        # Consider success if both stopped
-        success = caddy_success and syncserver_success
-        if success:
-            logger.info("Successfully stopped all daemons")
+        Args:
+            kind: "cpu" for a time-boxed CPU profile, "heap" for a heap snapshot
+
+        Returns:
+            Path to the captured artefact, or None on failure
+        """
+        if not self._running:
+            logger.warning(f"Cannot capture {kind} profile: supervisor not running")
+            return None
+        return self._run_core(self.core.capture_profile(kind), None)
+
+    def get_resource_stats(self, pid: int) -> Optional[Dict[str, Any]]:
+        """
+        Memory, CPU and pressure stall stats for a daemon's cgroup.
+
+        Only reads files under /sys/fs/cgroup, so it is safe to call from the
+        GUI thread.
+
+        Returns:
+            Stats dict (see cgroups.read_cgroup_stats), or None when cgroup
+            isolation is not in use
+        """
+        if not self.cgroups:
+            return None
+        return self.cgroups.get_stats(pid)
+
+    def set_daemon_priority(self, daemon_name: str, **changes: Any) -> DaemonWorker:
+        """
+        Change a daemon's CPU/IO priority at runtime (non-blocking).
+
+        The new settings are kept for future restarts right away; the core
+        applies them to the running process tree. Connect to
+        worker.operation_complete to receive the result ("set_priority").
+
+        Args:
+            daemon_name: Watcher name ("caddy" or "syncserver")
+            **changes: PrioritySettings fields to change (e.g. nice=5)
+
+        Returns:
+            DaemonWorker instance - connect to its operation_complete signal
+        """
+        if daemon_name not in self.priorities:
+            error = f"Unknown daemon for priority change: {daemon_name}"
         else:
-            failure_details = []
-            if not syncserver_success:
-                failure_details.append("sync server")
-            if not caddy_success:
-                failure_details.append("caddy")
-            logger.error(f"Failed to stop: {', '.join(failure_details)}")
+            try:
+                settings = self.priorities[daemon_name].copy(**changes)
+                error = None
+            except TypeError as exc:
+                error = f"Invalid priority settings for {daemon_name}: {exc}"
+        if error:
+            logger.error(error)
+            self.worker.error_occurred.emit("set_daemon_priority", error)
+            self.worker.operation_complete.emit("set_priority", False)
+            return self.worker
+
+        # Mutate in place: the after_spawn hook holds a reference to this dict
+        self.priorities[daemon_name] = settings
+        if not self._running:
+            self.worker.operation_complete.emit("set_priority", True)
+            return self.worker
+        return self._emit_operation(
+            self.core.set_priority(daemon_name, settings),
+            "set_priority",
+            "set_daemon_priority",
+        )
 
-        return success
+    def get_operation_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Counts and queue wait/run times of the non-blocking operations.
 
-    def _restart_all_daemons_sync(self) -> bool:
-        """Restart both Caddy and sync server in sequence (synchronous, blocking)."""
-        logger.info("Restarting all daemons (Caddy + Sync Server)")
+        Returns:
+            Operation -> stats (see OperationScheduler.stats()), {} if the
+            supervisor isn't running
+        """
+        if not self.core.running:
+            return {}
+        return self._run_core(self.core.operation_stats(), {})
 
-        # Restart Caddy first
-        caddy_success = self._restart_daemon_sync("caddy")
-        if not caddy_success:
-            logger.error("Failed to restart Caddy, aborting system restart")
-            return False
+    # Non-blocking methods (results via the worker's signals, operations
+    # scheduled by the core's OperationScheduler)
 
-        # Wait briefly for Circus to finish processing the restart command
-        logger.debug("Waiting for Circus to complete Caddy restart operation...")
-        time.sleep(0.5)  # 500ms to avoid "arbiter is already running" race
+    def _emit_when_done(
+        self,
+        coro: Coroutine,
+        operation: str,
+        emit: Callable[[Any], None],
+        failure: Any,
+    ) -> DaemonWorker:
+        """
+        Run an operation on the core and emit its result.
 
-        # Then restart sync server
-        syncserver_success = self._restart_daemon_sync("syncserver")
-        if not syncserver_success:
-            logger.error("Failed to restart sync server")
-            return False
+        Args:
+            coro: The core operation
+            operation: Name for error_occurred
+            emit: Called with the result (or failure) from the core's thread
+            failure: Result emitted if the operation raised or didn't run
+        """
+        try:
+            future = self.core.submit(coro)
+        except RuntimeError as exc:
+            self.worker.error_occurred.emit(operation, str(exc))
+            emit(failure)
+            return self.worker
 
-        logger.info("Successfully restarted all daemons")
-        return True
+        def done(future):
+            try:
+                result = future.result()
+            except OperationSuperseded as exc:
+                # The newer operation reports the outcome
+                logger.info(f"{operation}: {exc}")
+                return
+            except (Exception, concurrent.futures.CancelledError) as exc:
+                logger.error(f"Failed to {operation}", exc_info=exc)
+                self.worker.error_occurred.emit(operation, str(exc))
+                result = failure
+            emit(result)
+
+        future.add_done_callback(done)
+        return self.worker
 
-    # Async wrapper methods (non-blocking, use worker thread)
+    def call_async(self, coro: Coroutine, callback: Callable[[Any], None]) -> None:
+        """
+        Run a core operation, then callback(result) on the worker's (the GUI)
+        thread, e.g.
+        manager.call_async(manager.core.scheduler.request("status", "caddy"), show).
+        """
+        self._emit_when_done(
+            coro,
+            getattr(coro, "__name__", "operation"),
+            lambda result: self.worker._deliver.emit(callback, result),
+            None,
+        )
 
     def get_status(self, daemon_name: str = "caddy") -> DaemonWorker:
         """
         Get status of a daemon asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _get_status_sync() in headless mode.
-
         Connect to worker.status_ready signal to receive result:
             worker = manager.get_status("caddy")
             worker.status_ready.connect(lambda status: handle_status(status))
 
         Returns:
             DaemonWorker instance - connect to its status_ready signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _get_status_sync() instead."
-            )
-        self._request_status.emit(daemon_name)
-        return self.worker
+        if not self._running:
+            self.worker.status_ready.emit(DaemonStatus(daemon_name, "stopped"))
+            return self.worker
+        return self._emit_when_done(
+            self.core.scheduler.request("status", daemon_name),
+            "get_status",
+            self.worker.status_ready.emit,
+            None,
+        )
+
+    def _emit_operation(
+        self, coro: Coroutine, operation: str, error_name: str
+    ) -> DaemonWorker:
+        return self._emit_when_done(
+            coro,
+            error_name,
+            lambda success: self.worker.operation_complete.emit(operation, success),
+            False,
+        )
 
     def start_daemon(self, daemon_name: str = "caddy") -> DaemonWorker:
         """
         Start a daemon asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _start_daemon_sync() in headless mode.
-
         Connect to worker.operation_complete signal to receive result:
             worker = manager.start_daemon("caddy")
             worker.operation_complete.connect(lambda op, success: handle_result(op, success))
 
         Returns:
             DaemonWorker instance - connect to its operation_complete signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _start_daemon_sync() instead."
-            )
-        self._request_start.emit(daemon_name)
-        return self.worker
+        return self._emit_operation(
+            self.core.scheduler.request("start", daemon_name), "start", "start_daemon"
+        )
 
     def stop_daemon(self, daemon_name: str = "caddy") -> DaemonWorker:
         """
         Stop a daemon asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _stop_daemon_sync() in headless mode.
-
-        Connect to worker.operation_complete signal to receive result:
-            worker = manager.stop_daemon("caddy")
-            worker.operation_complete.connect(lambda op, success: handle_result(op, success))
+        Connect to worker.operation_complete signal to receive result.
 
         Returns:
             DaemonWorker instance - connect to its operation_complete signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _stop_daemon_sync() instead."
-            )
-        self._request_stop.emit(daemon_name)
-        return self.worker
+        return self._emit_operation(
+            self.core.scheduler.request("stop", daemon_name), "stop", "stop_daemon"
+        )
 
     def restart_daemon(self, daemon_name: str = "caddy") -> DaemonWorker:
         """
         Restart a daemon asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _restart_daemon_sync() in headless mode.
-
-        Connect to worker.operation_complete signal to receive result:
-            worker = manager.restart_daemon("caddy")
-            worker.operation_complete.connect(lambda op, success: handle_result(op, success))
+        Connect to worker.operation_complete signal to receive result.
 
         Returns:
             DaemonWorker instance - connect to its operation_complete signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _restart_daemon_sync() instead."
-            )
-        self._request_restart.emit(daemon_name)
-        return self.worker
+        return self._emit_operation(
+            self.core.scheduler.request("restart", daemon_name),
+            "restart",
+            "restart_daemon",
+        )
 
     def start_all_daemons(self) -> DaemonWorker:
         """
         Start all daemons asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _start_all_daemons_sync() in headless mode.
-
-        Connect to worker.operation_complete signal to receive result:
-            worker = manager.start_all_daemons()
-            worker.operation_complete.connect(lambda op, success: handle_result(op, success))
+        Connect to worker.operation_complete signal to receive result
+        (operation "start_all").
 
         Returns:
             DaemonWorker instance - connect to its operation_complete signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _start_all_daemons_sync() instead."
-            )
-        self._request_start_all.emit()
-        return self.worker
+        return self._emit_operation(
+            self.core.scheduler.request("start_all"), "start_all", "start_all_daemons"
+        )
 
     def stop_all_daemons(self) -> DaemonWorker:
         """
         Stop all daemons asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _stop_all_daemons_sync() in headless mode.
-
-        Connect to worker.operation_complete signal to receive result:
-            worker = manager.stop_all_daemons()
-            worker.operation_complete.connect(lambda op, success: handle_result(op, success))
+        Connect to worker.operation_complete signal to receive result
+        (operation "stop_all").
 
         Returns:
             DaemonWorker instance - connect to its operation_complete signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _stop_all_daemons_sync() instead."
-            )
-        self._request_stop_all.emit()
-        return self.worker
+        return self._emit_operation(
+            self.core.scheduler.request("stop_all"), "stop_all", "stop_all_daemons"
+        )
 
     def restart_all_daemons(self) -> DaemonWorker:
         """
         Restart all daemons asynchronously (non-blocking).
 
-        Only available in GUI mode. Use _restart_all_daemons_sync() in headless mode.
-
-        Connect to worker.operation_complete signal to receive result:
-            worker = manager.restart_all_daemons()
-            worker.operation_complete.connect(lambda op, success: handle_result(op, success))
+        Connect to worker.operation_complete signal to receive result
+        (operation "restart_all").
 
         Returns:
             DaemonWorker instance - connect to its operation_complete signal
-
-        Raises:
-            RuntimeError: If called in headless mode
         """
-        if not self.gui_mode:
-            raise RuntimeError(
-                "Async methods not available in headless mode. Use _restart_all_daemons_sync() instead."
-            )
-        self._request_restart_all.emit()
-        return self.worker
+        return self._emit_operation(
+            self.core.scheduler.request("restart_all"),
+            "restart_all",
+            "restart_all_daemons",
+        )
 
     def get_system_status(self) -> DaemonWorker:
         """
         Get system status (both daemons) asynchronously (non-blocking).
 
-        Only available in GUI mode.
-
         Connect to worker.status_ready signal to receive result:
             worker = manager.get_system_status()
             worker.status_ready.connect(lambda statuses: handle_statuses(statuses))
@@ -1013,14 +867,36 @@ class EmbeddedSupervisor(QObject):
 
         Returns:
             DaemonWorker instance - connect to its status_ready signal
+        """
+        if not self._running:
+            self.worker.status_ready.emit(
+                (DaemonStatus("caddy", "stopped"), DaemonStatus("syncserver", "stopped"))
+            )
+            return self.worker
+        return self._emit_when_done(
+            self.core.scheduler.request("system_status"),
+            "get_system_status",
+            self.worker.status_ready.emit,
+            None,
+        )
 
-        Raises:
-            RuntimeError: If called in headless mode
+    def capture_profile(self, kind: str = "cpu") -> DaemonWorker:
         """
-        if not self.gui_mode:
-            raise RuntimeError("Async methods not available in headless mode.")
-        self._request_system_status.emit()
-        return self.worker
+        Capture a sync server CPU profile or heap snapshot asynchronously.
+
+        Connect to worker.profile_captured signal to receive result:
+            worker = manager.capture_profile("heap")
+            worker.profile_captured.connect(lambda kind, path: handle(kind, path))
+
+        Returns:
+            DaemonWorker instance - connect to its profile_captured signal
+        """
+        return self._emit_when_done(
+            self.core.capture_profile(kind),
+            "capture_profile",
+            lambda path: self.worker.profile_captured.emit(kind, str(path or "")),
+            None,
+        )
 
     def get_logs(self, daemon_name: str = "caddy", lines: int = 100) -> tuple[str, str]:
         """
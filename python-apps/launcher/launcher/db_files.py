@@ -0,0 +1,41 @@
+"""
+Discovery of the sync server's SQLite databases in db_dir.
+
+Mirrors apps/sync-server/src/database-files.ts so the launcher and the sync
+server agree on which files are databases.
+"""
+
+from pathlib import Path
+
+SQLITE_DATABASE_EXTENSIONS = {".sqlite3", ".sqlite", ".db"}
+
+
+def is_supported_database_file_name(file_name: str) -> bool:
+    """
+    Check whether a file name points to a primary SQLite database file.
+
+    Args:
+        file_name: File name from the DB folder
+
+    Returns:
+        True when the file should be treated as a database (not -wal/-shm)
+    """
+    if file_name.endswith("-wal") or file_name.endswith("-shm"):
+        return False
+    return Path(file_name).suffix in SQLITE_DATABASE_EXTENSIONS
+
+
+def list_databases(db_dir: Path) -> list[Path]:
+    """List database files in db_dir, sorted by name."""
+    if not db_dir.is_dir():
+        return []
+    return sorted(
+        path
+        for path in db_dir.iterdir()
+        if path.is_file() and is_supported_database_file_name(path.name)
+    )
+
+
+def read_only_uri(path: Path) -> str:
+    """SQLite URI opening a database read-only (never creates the file)."""
+    return f"{path.resolve().as_uri()}?mode=ro"
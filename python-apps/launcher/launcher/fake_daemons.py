@@ -0,0 +1,255 @@
+"""
+Stand-in daemons for supervisor tests and benchmarks, without Caddy or Node.
+
+Tiny asyncio programs behaving enough like the real daemons for the
+supervisor's control plane:
+
+- caddy: takes Caddy's `run --config FILE --adapter caddyfile` arguments,
+  serves 200 over plain HTTP on the Caddyfile's site port (or the CADDY_BIND
+  pre-bound socket), answers the admin API on 127.0.0.1:2019 (/config/,
+  /reverse_proxy/upstreams, POST /stop) and writes JSON log lines to the
+  Caddyfile's log files
+- syncserver: ignores the Node flags and script, serves /, /health and
+  /<db>/health on PORT (or the LISTEN_FD pre-bound socket) and prints the
+  sync server's "listening on" line
+
+Both take --startup-delay (seconds before listening), --crash-probability
+(chance to exit with status 1 instead of listening) and --log-lines (log lines
+per second while running), and shut down on SIGTERM/SIGINT. The supervisor
+runs them in place of the real binaries through its daemon_commands option:
+
+    EmbeddedSupervisor(..., daemon_commands=fake_daemon_commands(startup_delay=0.1))
+
+This file only uses the standard library and runs as a script, so it works
+from any watcher working directory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+CADDY_ADMIN_PORT = 2019
+SYNC_SERVER_DEFAULT_PORT = 3000
+
+SITE_ADDRESS = re.compile(r"^\s*(?:https?://)?[^\s{/]*:(\d+)\s*\{", re.MULTILINE)
+LOG_OUTPUT = re.compile(r"output file (\S+)")
+
+
+def fake_daemon_commands(
+    startup_delay: float = 0.0,
+    crash_probability: float = 0.0,
+    log_lines: float = 0.0,
+) -> Dict[str, list[str]]:
+    """
+    Command prefixes running the fake daemons, for the supervisor's
+    daemon_commands option (the daemon's usual arguments follow the "--").
+    """
+    options = [
+        f"--startup-delay={startup_delay}",
+        f"--crash-probability={crash_probability}",
+        f"--log-lines={log_lines}",
+    ]
+    script = str(Path(__file__).resolve())
+    return {
+        name: [sys.executable, script, name, *options, "--"]
+        for name in ("caddy", "syncserver")
+    }
+
+
+class _Log:
+    """JSON lines log file, like Caddy's."""
+
+    def __init__(self, path: Optional[Path], logger_name: str):
+        self.file = open(path, "a", buffering=1) if path else None
+        self.logger_name = logger_name
+
+    def write(self, msg: str, **fields) -> None:
+        if self.file:
+            entry = {"level": "info", "ts": time.time(), "logger": self.logger_name}
+            self.file.write(json.dumps({**entry, "msg": msg, **fields}) + "\n")
+
+
+async def _serve_http(handler, sock: socket.socket) -> asyncio.AbstractServer:
+    """Minimal keep-alive HTTP/1.1 server: handler(method, path) -> (status, body)."""
+
+    async def connection(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                method, path = head.split(b" ", 2)[:2]
+                length = re.search(rb"(?i)\r\ncontent-length:\s*(\d+)", head)
+                if length:
+                    await reader.readexactly(int(length.group(1)))
+                status, body = handler(method.decode(), path.decode())
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(connection, sock=sock)
+
+
+def _listening_socket(port: int, fd: Optional[int]) -> socket.socket:
+    """A pre-bound inherited socket, or a new one bound to port."""
+    if fd is not None:
+        return socket.socket(fileno=fd)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", port))
+    sock.listen(128)
+    return sock
+
+
+async def _until_signalled(log_lines: float, write_line) -> None:
+    """Write log lines at the given rate until SIGTERM/SIGINT."""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stopping.set)
+        except (NotImplementedError, RuntimeError):
+            signal.signal(signum, lambda *_: loop.call_soon_threadsafe(stopping.set))
+    interval = 1 / log_lines if log_lines else None
+    while not stopping.is_set():
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=interval)
+        except TimeoutError:
+            write_line()
+
+
+async def run_caddy(options: argparse.Namespace, args: list[str]) -> None:
+    caddyfile = Path(args[args.index("--config") + 1]) if "--config" in args else None
+    config = caddyfile.read_text() if caddyfile else ""
+    site = SITE_ADDRESS.search(config)
+    logs = [Path(p) for p in LOG_OUTPUT.findall(config)]
+    server_log = _Log(logs[0] if logs else None, "http")
+    access_log = _Log(logs[1] if len(logs) > 1 else None, "http.log.access")
+
+    bind = os.environ.get("CADDY_BIND", "")
+    fd = int(bind[3:]) if bind.startswith("fd/") else None
+    site_socket = _listening_socket(int(site.group(1)) if site else 443, fd)
+    stopped = asyncio.Event()
+
+    def site_handler(method, path):
+        access_log.write(
+            "handled request",
+            request={"method": method, "uri": path},
+            status=200,
+            duration=0.0001,
+        )
+        return 200, b"ok"
+
+    def admin_handler(method, path):
+        if path == "/stop" and method == "POST":
+            stopped.set()
+            return 200, b""
+        if path.startswith("/config"):
+            return 200, json.dumps({"apps": {"http": {"servers": {}}}}).encode()
+        if path == "/reverse_proxy/upstreams":
+            return 200, b"[]"
+        return 404, b"{}"
+
+    site_server = await _serve_http(site_handler, site_socket)
+    admin_server = await _serve_http(
+        admin_handler, _listening_socket(CADDY_ADMIN_PORT, None)
+    )
+    server_log.write("serving initial configuration")
+
+    runner = asyncio.create_task(
+        _until_signalled(
+            options.log_lines,
+            lambda: access_log.write(
+                "handled request",
+                request={"method": "GET", "uri": "/"},
+                status=200,
+                duration=0.0001,
+            ),
+        )
+    )
+    await asyncio.wait(
+        [runner, asyncio.create_task(stopped.wait())],
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    server_log.write("shutting down apps, then terminating")
+    site_server.close()
+    admin_server.close()
+
+
+async def run_syncserver(options: argparse.Namespace, args: list[str]) -> None:
+    db_dir = Path(os.environ.get("DB_FOLDER", "."))
+    fd = os.environ.get("LISTEN_FD")
+    port = int(os.environ.get("PORT", SYNC_SERVER_DEFAULT_PORT))
+
+    def databases() -> Dict[str, dict]:
+        names = (
+            sorted(p.name for p in db_dir.glob("*.sqlite3")) if db_dir.is_dir() else []
+        )
+        return {name: {"ok": True, "checks": []} for name in names}
+
+    def handler(method, path):
+        if path == "/":
+            return 200, b"Ok"
+        if path == "/health":
+            return (
+                200,
+                json.dumps({"status": "healthy", "databases": databases()}).encode(),
+            )
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[1] == "health":
+            return (
+                200,
+                json.dumps({"database": parts[0], "ok": True, "checks": []}).encode(),
+            )
+        return 404, b"{}"
+
+    server = await _serve_http(
+        handler, _listening_socket(port, int(fd) if fd else None)
+    )
+    where = f"inherited socket (fd {fd})" if fd else f"http://127.0.0.1:{port}"
+    print("info", f"listening on {where}!", flush=True)
+    await _until_signalled(
+        options.log_lines,
+        lambda: print("info", "sync: applied 1 changes from peer", flush=True),
+    )
+    print("info", "Server closed", flush=True)
+    server.close()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("daemon", choices=["caddy", "syncserver"])
+    parser.add_argument("--startup-delay", type=float, default=0.0)
+    parser.add_argument("--crash-probability", type=float, default=0.0)
+    parser.add_argument("--log-lines", type=float, default=0.0)
+    argv = sys.argv[1:] if argv is None else argv
+    # The daemon's own arguments follow "--", untouched
+    split = argv.index("--") if "--" in argv else len(argv)
+    options = parser.parse_args(argv[:split])
+    args = argv[split + 1 :]
+
+    time.sleep(options.startup_delay)
+    if random.random() < options.crash_probability:
+        print(f"fake {options.daemon}: simulated crash", file=sys.stderr)
+        return 1
+    run = run_caddy if options.daemon == "caddy" else run_syncserver
+    asyncio.run(run(options, args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+Listening sockets owned by the supervisor and inherited by the daemons.
+
+The launcher binds the Caddy (8433) and sync server (3000) ports itself and
+passes the file descriptors to the daemons through the environment, in the
+style of systemd socket activation. Because the supervisor keeps the sockets
+open, connections made while a daemon restarts wait in the kernel backlog
+instead of being refused, and a port conflict surfaces once, at startup.
+
+Caddy picks its sockets up from its Caddyfile: the TCP one (`bind {$CADDY_BIND}`)
+for HTTP/1.1 and HTTP/2, and a UDP socket on the same port
+(`bind {$CADDY_BIND_H3}`) for HTTP/3. The sync server takes LISTEN_FD. The sockets are not inheritable: the supervisor's
+before_spawn hook marks only the spawning daemon's own socket inheritable
+(Circus spawns watchers with use_sockets one at a time, on the arbiter loop),
+so neither daemon holds the other's port open. Not available on Windows, where
+the daemons bind their ports themselves as before.
+"""
+
+import errno
+import logging
+import platform
+import socket
+from typing import Dict, Optional
+
+import psutil
+
+from launcher.config import CADDY_PORT, SYNC_SERVER_PORT
+
+logger = logging.getLogger("launcher")
+
+# Environment variables carrying the inherited sockets
+CADDY_BIND_ENV = "CADDY_BIND"  # "fd/<n>", used by the Caddyfile bind directive
+CADDY_BIND_H3_ENV = "CADDY_BIND_H3"  # "fdgram/<n>", the HTTP/3 (QUIC) socket
+SYNCSERVER_FD_ENV = "LISTEN_FD"  # "<n>", used by the sync server
+
+# Caddy listens on all interfaces, the sync server only behind Caddy
+LISTEN_ADDRESSES = {
+    "caddy": ("", CADDY_PORT),
+    "syncserver": ("127.0.0.1", SYNC_SERVER_PORT),
+}
+
+# Daemons also given a UDP socket on their port (Caddy's HTTP/3)
+DATAGRAM_DAEMONS = ("caddy",)
+
+
+class PortInUseError(OSError):
+    """A daemon port is already taken by another process."""
+
+
+def prebound_sockets_supported() -> bool:
+    """Whether daemons can inherit listening sockets on this platform."""
+    return platform.system() != "Windows"
+
+
+def prebound_sockets_enabled(setting: Optional[bool]) -> bool:
+    """
+    Whether to use pre-bound sockets, given the prebind_sockets setting.
+
+    Enabled by default wherever it is supported.
+    """
+    return prebound_sockets_supported() and setting is not False
+
+
+def describe_port_owner(port: int) -> Optional[str]:
+    """Best-effort description of the process listening on a port."""
+    try:
+        connections = psutil.net_connections(kind="tcp")
+    except (psutil.Error, OSError):
+        return None
+    for conn in connections:
+        if conn.status == psutil.CONN_LISTEN and conn.laddr.port == port and conn.pid:
+            try:
+                return f"{psutil.Process(conn.pid).name()} (PID {conn.pid})"
+            except psutil.Error:
+                return f"PID {conn.pid}"
+    return None
+
+
+class ListenSockets:
+    """The daemons' listening sockets, held open for the supervisor's lifetime."""
+
+    def __init__(self, addresses: Optional[Dict[str, tuple[str, int]]] = None):
+        self.addresses = addresses or LISTEN_ADDRESSES
+        self.sockets: Dict[str, socket.socket] = {}
+        self.datagram_sockets: Dict[str, socket.socket] = {}
+
+    def bind(self) -> None:
+        """
+        Bind and listen on every daemon port.
+
+        Raises:
+            PortInUseError: If a port is already in use (nothing stays bound)
+        """
+        try:
+            for name, (host, port) in self.addresses.items():
+                self.sockets[name] = self._bind_one(host, port)
+                # The bound port, in case port was 0
+                port = self.sockets[name].getsockname()[1]
+                logger.info(
+                    f"Bound {name} listening socket on {host or '*'}:{port} "
+                    f"(fd {self.sockets[name].fileno()})"
+                )
+                if name in DATAGRAM_DAEMONS:
+                    self.datagram_sockets[name] = self._bind_one(
+                        host, port, socket.SOCK_DGRAM
+                    )
+                    logger.info(
+                        f"Bound {name} UDP socket on {host or '*'}:{port} "
+                        f"(fd {self.datagram_sockets[name].fileno()})"
+                    )
+        except OSError:
+            self.close()
+            raise
+
+    def fd(self, name: str) -> Optional[int]:
+        """File descriptor of a daemon's socket, or None if not bound."""
+        sock = self.sockets.get(name)
+        return sock.fileno() if sock else None
+
+    def env(self, name: str) -> Dict[str, str]:
+        """Environment variables handing the socket to a daemon."""
+        fd = self.fd(name)
+        if fd is None:
+            return {}
+        if name == "caddy":
+            env = {CADDY_BIND_ENV: f"fd/{fd}"}
+            if name in self.datagram_sockets:
+                env[CADDY_BIND_H3_ENV] = (
+                    f"fdgram/{self.datagram_sockets[name].fileno()}"
+                )
+            return env
+        return {SYNCSERVER_FD_ENV: str(fd)}
+
+    def inherit_only(self, name: Optional[str]) -> None:
+        """
+        Make only one daemon's sockets inheritable by the next spawned process.
+
+        Args:
+            name: Daemon about to be spawned, or None to make none inheritable
+        """
+        for sockets in (self.sockets, self.datagram_sockets):
+            for sock_name, sock in sockets.items():
+                sock.set_inheritable(sock_name == name)
+
+    def close(self) -> None:
+        """Close all sockets."""
+        for sockets in (self.sockets, self.datagram_sockets):
+            for sock in sockets.values():
+                sock.close()
+            sockets.clear()
+
+    def _bind_one(
+        self, host: str, port: int, kind: int = socket.SOCK_STREAM
+    ) -> socket.socket:
+        """Bind one listening (or UDP) socket, dual-stack for wildcard."""
+        sock = None
+        try:
+            if not host and socket.has_ipv6:
+                try:
+                    sock = socket.socket(socket.AF_INET6, kind)
+                    sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_V6ONLY, 0)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    sock.bind(("::", port))
+                except OSError as exc:
+                    if sock is not None:
+                        sock.close()
+                    sock = None
+                    # Only fall back to IPv4 when IPv6 itself is unavailable
+                    if _is_addr_in_use(exc):
+                        raise
+            if sock is None:
+                sock = socket.socket(socket.AF_INET, kind)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.bind((host or "0.0.0.0", port))
+            if kind == socket.SOCK_STREAM:
+                sock.listen(socket.SOMAXCONN)
+        except OSError as exc:
+            if sock is not None:
+                sock.close()
+            if _is_addr_in_use(exc):
+                owner = describe_port_owner(port)
+                raise PortInUseError(
+                    exc.errno,
+                    f"Port {port} is already in use"
+                    + (f" by {owner}" if owner else ""),
+                ) from exc
+            raise
+
+        # Not inheritable until its daemon spawns (see inherit_only())
+        return sock
+
+
+def _is_addr_in_use(exc: OSError) -> bool:
+    """Whether a bind error means the port is taken."""
+    return exc.errno in (errno.EADDRINUSE, getattr(errno, "WSAEADDRINUSE", -1))
@@ -0,0 +1,518 @@
+"""
+Load generator for the sync stack: simulated tills syncing through Caddy.
+
+Opens WebSocket connections to wss://localhost:8433/sync, like the web client's
+sync worker, all in one room: a scratch copy of a database in db_dir (the
+template), removed afterwards. Each simulated till:
+
+1. announces itself with a random site id and the template's schema name and
+   version
+2. in a loop, sends a changeset of synthetic rows (a unique title per row of
+   the book table) and waits until another till receives it back
+
+That round trip covers Caddy, the sync server applying the changes, its file
+notifier and the stream to the peers. Concurrency ramps up (2, 4, 8, ...
+max_clients tills), each step running for step_seconds, and every step reports
+changes/sec, p50/p99 round trip and timeouts, with the CPU and RSS of Caddy and
+the sync server sampled meanwhile. The saturation point is the last step before
+throughput stops growing (or round trips start timing out).
+
+Connections use the websockets library. Messages are encoded by hand after
+@vlcn.io/ws-common 0.2 (lib0 encoding), and that encoding has not yet been
+checked against the sync server's @vlcn.io/ws-server: until
+test_ws_common_decodes_frames and test_ramp_against_sync_server (both need the
+sync server's node_modules) pass, the generator is experimental and its numbers
+are not benchmark results. A run stops with LoadGenError when nothing comes
+back in the first step, rather than reporting a ramp of timeouts.
+
+Everything stays on localhost: the generator connects to 127.0.0.1 and checks
+Caddy's certificate against the launcher's local CA. Run against a running
+launcher:
+
+    librocco-headless loadgen --experimental --template dev.sqlite3
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+import ssl
+import statistics
+import struct
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+from websockets.asyncio.client import ClientConnection, connect
+from websockets.exceptions import ConnectionClosed, InvalidHandshake
+
+from launcher.config import CADDY_PORT, DAEMONS
+from launcher.control_api import ControlError
+from launcher.stats import percentile
+
+logger = logging.getLogger("launcher")
+
+SYNC_PATH = "/sync"
+# Caddy issues certificates on demand for any SNI name
+SERVER_HOSTNAME = "localhost"
+
+# Throughput gain (per step) below which the stack counts as saturated
+MIN_STEP_GAIN = 0.1
+
+
+class LoadGenError(Exception):
+    """The sync stack didn't take part in the run (e.g. a wire format mismatch)."""
+
+
+# --- @vlcn.io/ws-common message format (lib0 encoding) ---
+
+TAG_ANNOUNCE_PRESENCE = 1
+TAG_CHANGES = 2
+TAG_REJECT_CHANGES = 3
+
+VALUE_NULL = 0
+VALUE_BIGINT = 1
+VALUE_NUMBER = 2
+VALUE_STRING = 3
+VALUE_BLOB = 4
+
+# crsqlite packed primary key column types
+PACKED_INTEGER = 1
+PACKED_TEXT = 3
+
+
+async def open_websocket(
+    port: int,
+    path: str,
+    ssl_context: Optional[ssl.SSLContext] = None,
+    timeout: float = 10.0,
+) -> ClientConnection:
+    """
+    Connect to 127.0.0.1 (as SERVER_HOSTNAME, for SNI and the Host header).
+
+    Raises:
+        OSError, TimeoutError or InvalidHandshake: The connection failed
+    """
+    scheme = "wss" if ssl_context else "ws"
+    return await connect(
+        f"{scheme}://{SERVER_HOSTNAME}:{port}{path}",
+        ssl=ssl_context,
+        host="127.0.0.1",
+        port=port,
+        open_timeout=timeout,
+        # Changesets are small and unique: compressing them only costs CPU
+        compression=None,
+        max_size=None,
+    )
+
+
+def _varuint(n: int) -> bytes:
+    out = bytearray()
+    while n > 0x7F:
+        out.append(0x80 | (n & 0x7F))
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _varint(n: int) -> bytes:
+    """lib0 signed varint: continuation bit, sign bit, then 6 and 7 bit groups."""
+    negative = n < 0
+    n = abs(n)
+    out = bytearray(
+        [(0x80 if n > 0x3F else 0) | (0x40 if negative else 0) | (n & 0x3F)]
+    )
+    n >>= 6
+    while n > 0:
+        out.append((0x80 if n > 0x7F else 0) | (n & 0x7F))
+        n >>= 7
+    return bytes(out)
+
+
+def _varstring(value: str) -> bytes:
+    data = value.encode()
+    return _varuint(len(data)) + data
+
+
+def _bigint64(n: int) -> bytes:
+    return struct.pack(">q", n)
+
+
+def _value(value: Any) -> bytes:
+    if value is None:
+        return bytes([VALUE_NULL])
+    if isinstance(value, int):
+        return bytes([VALUE_BIGINT]) + _bigint64(value)
+    if isinstance(value, float):
+        return bytes([VALUE_NUMBER]) + struct.pack(">d", value)
+    if isinstance(value, str):
+        return bytes([VALUE_STRING]) + _varstring(value)
+    return bytes([VALUE_BLOB]) + _varuint(len(value)) + bytes(value)
+
+
+def pack_columns(values: list[Any]) -> bytes:
+    """crsqlite's packed primary key: column count, then (type | intlen << 3) items."""
+    out = bytearray([len(values)])
+    for value in values:
+        if isinstance(value, int):
+            data = value.to_bytes((value.bit_length() + 8) // 8, "big", signed=True)
+            out.append(PACKED_INTEGER | (len(data) << 3))
+            out += data
+        else:
+            data = value.encode() if isinstance(value, str) else bytes(value)
+            size = len(data).to_bytes(4, "big").lstrip(b"\x00") or b"\x00"
+            out.append(PACKED_TEXT | (len(size) << 3))
+            out += size + data
+    return bytes(out)
+
+
+def encode_announce_presence(
+    sender: bytes, schema_name: str, schema_version: int
+) -> bytes:
+    """AnnouncePresence of a till that has seen nothing yet."""
+    return (
+        bytes([TAG_ANNOUNCE_PRESENCE])
+        + sender
+        + _varuint(0)
+        + _varstring(schema_name)
+        + _bigint64(schema_version)
+    )
+
+
+def encode_changes(
+    sender: bytes, since: tuple[int, int], changes: list[tuple]
+) -> bytes:
+    """
+    Changes message.
+
+    Args:
+        sender: Site id of the till (16 bytes)
+        since: (db_version, seq) the changes follow
+        changes: (table, pk, cid, val, col_version, db_version, site_id, cl, seq)
+    """
+    out = bytearray([TAG_CHANGES])
+    out += sender + _bigint64(since[0]) + _varint(since[1])
+    out += _varuint(len(changes))
+    for table, pk, cid, val, col_version, db_version, site_id, cl, seq in changes:
+        out += _varstring(table) + _varuint(len(pk)) + pk + _varstring(cid)
+        out += _value(val) + _bigint64(col_version) + _bigint64(db_version)
+        out += site_id + _bigint64(cl) + _varint(seq)
+    return bytes(out)
+
+
+# --- Load run ---
+
+
+def find_saturation(steps: list[Dict[str, Any]]) -> Optional[int]:
+    """
+    Clients at the saturation point: the last step before throughput gained
+    less than MIN_STEP_GAIN or round trips timed out (None if never).
+    """
+    for previous, step in zip(steps, steps[1:]):
+        gain_limit = previous["changes_per_sec"] * (1 + MIN_STEP_GAIN)
+        if step["timeouts"] or step["changes_per_sec"] < gain_limit:
+            return previous["clients"]
+    return None
+
+
+def prepare_database(db_dir: Path, template: str) -> tuple[str, str, int]:
+    """
+    Copy a database to a scratch room in db_dir.
+
+    Returns:
+        (room, schema name, schema version)
+    """
+    source = sqlite3.connect(f"file:{db_dir / template}?mode=ro", uri=True)
+    try:
+        master = dict(source.execute("SELECT key, value FROM crsql_master"))
+        room = f"loadtest-{int(time.time())}.sqlite3"
+        target = sqlite3.connect(db_dir / room)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return room, str(master["schema_name"]), int(master["schema_version"])
+
+
+def remove_database(db_dir: Path, room: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            (db_dir / (room + suffix)).unlink(missing_ok=True)
+        except OSError as exc:
+            logger.warning(f"Could not remove {room}{suffix}: {exc}")
+
+
+def local_ssl_context(ca_file: Path) -> ssl.SSLContext:
+    """TLS context trusting only the launcher's local CA."""
+    return ssl.create_default_context(cafile=str(ca_file))
+
+
+class DaemonSampler:
+    """CPU and RSS of the daemons' processes (with children)."""
+
+    def __init__(
+        self,
+        daemon_pid: Callable[[str], Optional[int]],
+        names: tuple[str, ...] = DAEMONS,
+    ):
+        """
+        Args:
+            daemon_pid: Daemon name -> PID of its process, as the supervisor
+                reports it (see control_api.daemon_pid_lookup())
+            names: Daemons to sample
+        """
+        self.daemon_pid = daemon_pid
+        self.names = names
+        self.processes: Dict[str, list[psutil.Process]] = {}
+
+    def start(self) -> None:
+        """Find the daemons and prime their CPU counters."""
+        self.processes = {}
+        for name in self.names:
+            try:
+                pid = self.daemon_pid(name)
+                if pid is None:
+                    continue
+                process = psutil.Process(pid)
+                tree = [process] + process.children(recursive=True)
+            except ControlError as exc:
+                logger.warning(f"Not sampling the daemons: {exc}")
+                return
+            except psutil.Error:
+                continue
+            for p in tree:
+                try:
+                    p.cpu_percent(None)
+                except psutil.Error:
+                    pass
+            self.processes[name] = tree
+
+    def sample(self) -> Dict[str, Dict[str, float]]:
+        """CPU percent (since the last sample) and RSS in MB by daemon."""
+        result = {}
+        for name, tree in self.processes.items():
+            cpu = rss = 0.0
+            for p in tree:
+                try:
+                    cpu += p.cpu_percent(None)
+                    rss += p.memory_info().rss
+                except psutil.Error:
+                    pass
+            result[name] = {"cpu_percent": cpu, "rss_mb": rss / (1024 * 1024)}
+        return result
+
+
+class _StepStats:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.changes = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+
+class LoadGenerator:
+    """Ramps simulated tills against the sync stack and reports each step."""
+
+    MARKER = re.compile(rb"lg-\d+-\d+-\d+")
+
+    def __init__(
+        self,
+        db_dir: Path,
+        template: str,
+        port: int = CADDY_PORT,
+        ssl_context: Optional[ssl.SSLContext] = None,
+        max_clients: int = 64,
+        step_seconds: float = 10.0,
+        changes_per_message: int = 10,
+        table: str = "book",
+        column: str = "title",
+        timeout: float = 5.0,
+        sampler: Optional[DaemonSampler] = None,
+    ):
+        """
+        Args:
+            db_dir: Sync server database directory
+            template: Database copied into the scratch room
+            port: Port of Caddy (or of the sync server itself, without TLS)
+            ssl_context: TLS context (None: plain WebSocket)
+            max_clients: Simulated tills at the last step
+            step_seconds: Duration of every step
+            changes_per_message: Rows per changeset
+            table: Table written to (single TEXT primary key)
+            column: Column set on every row
+            timeout: Seconds to wait for a changeset to reach a peer
+            sampler: Daemon CPU/RSS sampler (None: daemons aren't sampled)
+        """
+        self.db_dir = db_dir
+        self.template = template
+        self.port = port
+        self.ssl_context = ssl_context
+        self.max_clients = max_clients
+        self.step_seconds = step_seconds
+        self.changes_per_message = changes_per_message
+        self.table = table
+        self.column = column
+        self.timeout = timeout
+        self.sampler = sampler or DaemonSampler(lambda name: None)
+
+        self._run_id = int(time.time())
+        self._pending: Dict[bytes, asyncio.Future] = {}
+        self._stats = _StepStats()
+        self._stopping = asyncio.Event()
+
+    def ramp(self) -> list[int]:
+        """Tills at every step: 2, 4, 8, ... max_clients."""
+        steps, clients = [], 2
+        while clients < self.max_clients:
+            steps.append(clients)
+            clients *= 2
+        return steps + [max(self.max_clients, 2)]
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run the ramp (in a scratch room, removed afterwards).
+
+        Returns:
+            Dict with "room", "steps" (one dict per step) and "saturation"
+            (tills at the saturation point, None if not reached)
+
+        Raises:
+            LoadGenError: If no changeset made a round trip in the first step
+        """
+        room, schema_name, schema_version = prepare_database(self.db_dir, self.template)
+        tills: list[asyncio.Task] = []
+        steps = []
+        try:
+            for clients in self.ramp():
+                while len(tills) < clients:
+                    tills.append(
+                        asyncio.create_task(
+                            self._till(len(tills), room, schema_name, schema_version)
+                        )
+                    )
+                steps.append(await self._step(clients))
+                if len(steps) == 1 and not steps[0]["round_trips"]:
+                    raise LoadGenError(
+                        f"No changeset reached a peer in the first step "
+                        f"({steps[0]['timeouts']} timeouts, "
+                        f"{steps[0]['rejected']} rejected): the sync server may "
+                        "not accept this encoding of @vlcn.io/ws-common messages"
+                    )
+                logger.info(
+                    f"{clients:>4} tills: {steps[-1]['changes_per_sec']:>9.1f} changes/s, "
+                    f"p50 {steps[-1]['p50_ms']:.1f} ms, p99 {steps[-1]['p99_ms']:.1f} ms, "
+                    f"{steps[-1]['timeouts']} timeouts"
+                )
+        finally:
+            self._stopping.set()
+            for task in tills:
+                task.cancel()
+            await asyncio.gather(*tills, return_exceptions=True)
+            remove_database(self.db_dir, room)
+        return {"room": room, "steps": steps, "saturation": find_saturation(steps)}
+
+    async def _step(self, clients: int) -> Dict[str, Any]:
+        """Measure one step."""
+        # Asks the launcher for the daemons' PIDs: off the tills' loop
+        await asyncio.to_thread(self.sampler.start)
+        self._stats = stats = _StepStats()
+        started = time.perf_counter()
+        samples = []
+        while (elapsed := time.perf_counter() - started) < self.step_seconds:
+            await asyncio.sleep(min(1.0, self.step_seconds - elapsed))
+            samples.append(self.sampler.sample())
+        elapsed = time.perf_counter() - started
+
+        ordered = sorted(stats.latencies)
+        daemons = {}
+        for name in self.sampler.processes:
+            values = [s[name] for s in samples if name in s]
+            daemons[name] = {
+                "cpu_percent": statistics.mean(v["cpu_percent"] for v in values),
+                "rss_mb": max(v["rss_mb"] for v in values),
+            }
+        return {
+            "clients": clients,
+            "changes_per_sec": stats.changes / elapsed,
+            "round_trips": len(ordered),
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "timeouts": stats.timeouts,
+            "rejected": stats.rejected,
+            "daemons": daemons,
+        }
+
+    async def _till(
+        self, index: int, room: str, schema_name: str, schema_version: int
+    ) -> None:
+        """One simulated till: write changesets until stopped."""
+        try:
+            ws = await open_websocket(
+                self.port, f"{SYNC_PATH}?room={room}", self.ssl_context
+            )
+        except (OSError, TimeoutError, InvalidHandshake) as exc:
+            logger.error(f"Simulated till {index} could not connect: {exc!r}")
+            return
+        reader = asyncio.create_task(self._receive(ws))
+        sender = os.urandom(16)
+        db_version = 0
+        try:
+            await ws.send(encode_announce_presence(sender, schema_name, schema_version))
+            loop = asyncio.get_running_loop()
+            while not self._stopping.is_set():
+                marker = f"lg-{self._run_id}-{index}-{db_version + 1}"
+                changes = [
+                    (
+                        self.table,
+                        pack_columns([f"{marker}-{seq}"]),
+                        self.column,
+                        marker,
+                        1,
+                        db_version + 1,
+                        sender,
+                        1,
+                        seq,
+                    )
+                    for seq in range(self.changes_per_message)
+                ]
+                received = loop.create_future()
+                self._pending[marker.encode()] = received
+                stats = self._stats
+                sent = time.perf_counter()
+                await ws.send(encode_changes(sender, (db_version, 0), changes))
+                db_version += 1
+                try:
+                    async with asyncio.timeout(self.timeout):
+                        arrived = await received
+                except TimeoutError:
+                    stats.timeouts += 1
+                    continue
+                finally:
+                    self._pending.pop(marker.encode(), None)
+                stats.latencies.append(arrived - sent)
+                stats.changes += len(changes)
+        except ConnectionClosed as exc:
+            logger.error(f"Simulated till {index} was disconnected: {exc}")
+        finally:
+            reader.cancel()
+            await ws.close()
+
+    async def _receive(self, ws: ClientConnection) -> None:
+        """Resolve the changesets a till receives from its peers."""
+        try:
+            async for message in ws:
+                now = time.perf_counter()
+                if message[:1] == bytes([TAG_REJECT_CHANGES]):
+                    logger.warning("Sync server rejected a changeset")
+                    self._stats.rejected += 1
+                for marker in set(self.MARKER.findall(message)):
+                    received = self._pending.get(marker)
+                    if received and not received.done():
+                        received.set_result(now)
+        except ConnectionClosed:
+            # Reported by the till, when its next send fails
+            pass
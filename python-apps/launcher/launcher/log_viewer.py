@@ -157,6 +157,8 @@ class LogViewerDialog(QDialog):
                 uptime_str = self._format_uptime(status.uptime)
                 # Translators: {0} is replaced with the uptime string (e.g., "5m", "2h 30m")
                 status_text += f" | {_('Uptime: {0}').format(uptime_str)}"
+            if status.pid:
+                status_text += self._format_resource_stats(status.pid)
             self.status_label.setText(status_text)
 
         except (AttributeError, TypeError) as exc:
@@ -188,6 +190,37 @@ class LogViewerDialog(QDialog):
             # Scroll to bottom if we were at bottom
             scrollbar.setValue(scrollbar.maximum())
 
+    def _format_resource_stats(self, pid: int) -> str:
+        """Format cgroup memory and pressure stats (empty if not confined)."""
+        stats = self.daemon_manager.get_resource_stats(pid)
+        if not stats:
+            return ""
+
+        text = ""
+        if "memory_current" in stats:
+            memory_mb = stats["memory_current"] / (1024 * 1024)
+            if stats.get("memory_max"):
+                limit_mb = stats["memory_max"] / (1024 * 1024)
+                # Translators: {0} is memory in use, {1} the limit (both in MB)
+                memory_text = _("Memory: {0:.0f}/{1:.0f} MB").format(
+                    memory_mb, limit_mb
+                )
+            else:
+                # Translators: {0} is memory in use in MB
+                memory_text = _("Memory: {0:.0f} MB").format(memory_mb)
+            text += f" | {memory_text}"
+
+        # Share of the last 10s some task was stalled on each resource
+        pressure = [
+            f"{resource} {stats[f'{resource}_pressure']['some']['avg10']:.1f}%"
+            for resource in ("cpu", "memory", "io")
+            if "some" in stats.get(f"{resource}_pressure", {})
+        ]
+        if pressure:
+            # Translators: {0} is a list like "cpu 0.5%, memory 0.0%, io 1.2%"
+            text += f" | {_('Pressure: {0}').format(', '.join(pressure))}"
+        return text
+
     def _format_uptime(self, seconds: float) -> str:
         """Format uptime in a human-readable way."""
         if seconds < 60:
@@ -2,10 +2,14 @@
 Logging configuration for the launcher application.
 """
 
+import contextlib
 import logging
+import queue
 import sys
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Iterator
 
 
 def setup_logging(logs_dir: Path, log_level: int = logging.INFO) -> logging.Logger:
@@ -69,3 +73,58 @@ def get_logger(name: str = "launcher") -> logging.Logger:
         Logger instance
     """
     return logging.getLogger(name)
+
+
+@contextlib.contextmanager
+def worker_log_queue(context) -> Iterator[object]:
+    """
+    Forward log records of a spawned worker process while the block runs.
+
+    Records sent by setup_worker_logging() go through this process' logger of
+    the same name, so they end up in launcher.log (GUI) or on stdout
+    (headless) with the launcher's own format, and only this process rotates
+    the log file.
+
+        with worker_log_queue(context) as log_queue:
+            process = context.Process(target=main, args=(log_queue, ...))
+
+    Args:
+        context: multiprocessing context the worker is spawned from
+    """
+    log_queue = context.Queue()
+    done = threading.Event()
+
+    def forward():
+        # Polls instead of waiting for a sentinel: a terminated worker may
+        # have died holding the queue's write lock
+        while True:
+            try:
+                record = log_queue.get(timeout=0.1)
+            except queue.Empty:
+                if done.is_set():
+                    return
+                continue
+            logging.getLogger(record.name).handle(record)
+
+    thread = threading.Thread(target=forward, name="worker-logs", daemon=True)
+    thread.start()
+    try:
+        yield log_queue
+    finally:
+        # Drain what the worker sent before exiting
+        done.set()
+        thread.join(timeout=5)
+        log_queue.close()
+
+
+def setup_worker_logging(log_queue, log_level: int = logging.INFO) -> None:
+    """
+    Configure logging in a worker process to send records to its parent.
+
+    Args:
+        log_queue: Queue from the parent's worker_log_queue()
+        log_level: Logging level (default: INFO)
+    """
+    root = logging.getLogger()
+    root.handlers[:] = [QueueHandler(log_queue)]
+    root.setLevel(log_level)
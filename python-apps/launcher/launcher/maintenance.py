@@ -0,0 +1,429 @@
+"""
+Idle-time maintenance of the sync server's databases.
+
+CR-SQLite databases grow a WAL and large __crsql_clock tables, and the sync
+server only checkpoints the WAL as it writes. The maintenance scheduler waits
+for an idle window (no HTTP requests in the Caddy access log, no new
+connections to the sync server, no WAL writes) and then, per database:
+
+- wal_checkpoint(PASSIVE), moving committed WAL frames into the database
+- PRAGMA optimize, when the database already has planner statistics
+
+The databases stay open in the sync server, so the job is limited to steps
+that don't change what it sees: the connection loads the crsqlite extension
+(like the sync server's), nothing is written through it, no statistics table
+is created (that would change the schema under the sync server's prepared
+statements) and the WAL is never truncated or restarted. Reclaiming free pages
+is left to an operator: it is only reported.
+
+Every statement runs with a short busy_timeout and is skipped if the sync
+server holds the lock, so writers are never kept waiting for long; if activity
+resumes, the remaining databases wait for the next window. Before/after file
+sizes and per-step timings are appended to logs/maintenance.jsonl. A
+checkpoint changes the database file but not its content, so the pre-flight
+cache keeps the verdicts of databases nothing else wrote to in the meantime.
+
+Configured in settings.toml:
+
+    [maintenance]
+    enabled = true                # off by default
+    idle_minutes = 15
+    min_interval_hours = 6
+    freelist_threshold = 0.2      # fraction of pages on the freelist to report
+    busy_timeout_ms = 200
+"""
+
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import psutil
+
+from launcher.config import SYNC_SERVER_PORT, settings_from_table
+from launcher.db_files import list_databases
+from launcher.preflight import PreflightChecker, file_identity
+from launcher.process_priority import apply_to_current_thread
+
+logger = logging.getLogger("launcher")
+
+POLL_INTERVAL_SECONDS = 60
+ANALYSIS_LIMIT = 1000
+# How much of the access log tail to scan for the last request
+ACCESS_LOG_TAIL_BYTES = 8192
+
+
+@dataclasses.dataclass
+class MaintenanceSettings:
+    """Options for the maintenance scheduler."""
+
+    idle_minutes: float = 15.0
+    min_interval_hours: float = 6.0
+    freelist_threshold: float = 0.2
+    busy_timeout_ms: int = 200
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> "MaintenanceSettings":
+        """Build from the [maintenance] settings table, ignoring invalid values."""
+        return settings_from_table(cls, "maintenance", settings)
+
+
+def last_access_log_request(access_log: Path) -> Optional[float]:
+    """
+    Timestamp of the last request in Caddy's JSON access log.
+
+    Falls back to the file's mtime if the tail can't be parsed.
+    """
+    try:
+        with open(access_log, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(size - ACCESS_LOG_TAIL_BYTES, 0))
+            tail = f.read().decode("utf-8", errors="replace")
+        mtime = access_log.stat().st_mtime
+    except OSError:
+        return None
+
+    for line in reversed(tail.strip().splitlines()):
+        try:
+            return float(json.loads(line)["ts"])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return mtime
+
+
+def sync_server_connections(port: int = SYNC_SERVER_PORT) -> Optional[set]:
+    """
+    Established TCP connections to the sync server.
+
+    Returns:
+        Set of (local, remote) address pairs, or None if connections can't be
+        listed (e.g. macOS without privileges)
+    """
+    try:
+        connections = psutil.net_connections(kind="tcp")
+    except (psutil.AccessDenied, OSError):
+        return None
+    return {
+        (conn.laddr, conn.raddr)
+        for conn in connections
+        if conn.status == psutil.CONN_ESTABLISHED
+        and conn.laddr
+        and conn.laddr.port == port
+    }
+
+
+class ActivityMonitor:
+    """Tracks when the sync stack was last active."""
+
+    def __init__(self, access_log: Path, db_dir: Path, port: int = SYNC_SERVER_PORT):
+        self.access_log = access_log
+        self.db_dir = db_dir
+        self.port = port
+        self.last_activity = time.time()
+        self._connections: Optional[set] = None
+
+    def sample(self, include_wal: bool = True) -> float:
+        """
+        Sample activity sources and return the last time activity was seen.
+
+        Long-lived websocket connections don't count as activity by themselves
+        (tablets keep one open all day), but a new connection does.
+
+        Args:
+            include_wal: Count WAL writes (off while maintenance itself is
+                writing to the databases)
+        """
+        now = time.time()
+        candidates = [self.last_activity]
+
+        last_request = last_access_log_request(self.access_log)
+        if last_request:
+            candidates.append(last_request)
+
+        # Sync writes land in the WAL
+        for db_path in list_databases(self.db_dir) if include_wal else []:
+            wal = db_path.with_name(db_path.name + "-wal")
+            try:
+                candidates.append(wal.stat().st_mtime)
+            except OSError:
+                pass
+
+        connections = sync_server_connections(self.port)
+        if connections is not None:
+            if self._connections is not None and connections - self._connections:
+                candidates.append(now)
+            self._connections = connections
+
+        self.last_activity = max(candidates)
+        return self.last_activity
+
+    def idle_for(self, include_wal: bool = True) -> float:
+        """Seconds since the last activity (samples first)."""
+        return time.time() - self.sample(include_wal)
+
+
+def file_sizes(db_path: Path) -> Dict[str, int]:
+    """Sizes of a database and its WAL."""
+    sizes = {}
+    for key, path in (("db", db_path), ("wal", Path(f"{db_path}-wal"))):
+        try:
+            sizes[key] = path.stat().st_size
+        except OSError:
+            sizes[key] = 0
+    return sizes
+
+
+def maintain_database(
+    db_path: Path,
+    settings: MaintenanceSettings,
+    extension: Optional[Path],
+    should_continue=lambda: True,
+) -> Dict[str, Any]:
+    """
+    Run maintenance steps on one database.
+
+    Args:
+        db_path: Database file
+        settings: Maintenance options
+        extension: crsqlite extension to load (see find_crsqlite_extension),
+            None for plain SQLite databases
+        should_continue: Called between steps, returning False aborts (e.g.
+            when the sync server becomes active again)
+
+    Returns:
+        Record with before/after sizes, per-step timings and results
+
+    Raises:
+        sqlite3.Error: If the database can't be opened or crsqlite loaded
+    """
+    record: Dict[str, Any] = {
+        "database": db_path.name,
+        "started_at": time.time(),
+        "before": file_sizes(db_path),
+        "steps": {},
+        "skipped": [],
+    }
+
+    conn = sqlite3.connect(
+        db_path, timeout=settings.busy_timeout_ms / 1000, isolation_level=None
+    )
+    crsqlite_loaded = False
+    try:
+        if extension is not None:
+            conn.enable_load_extension(True)
+            conn.load_extension(str(extension))
+            conn.enable_load_extension(False)
+            crsqlite_loaded = True
+
+        def step(name: str, sql: str):
+            if not should_continue():
+                record["skipped"].append(name)
+                return None
+            started = time.perf_counter()
+            try:
+                result = conn.execute(sql).fetchall()
+            except sqlite3.OperationalError as exc:
+                # Most likely "database is locked": leave it for the next window
+                logger.info(f"Maintenance of {db_path.name}: {name} skipped ({exc})")
+                record["skipped"].append(name)
+                return None
+            record["steps"][name] = {
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+            return result
+
+        # Never waits on readers or writers, and leaves the WAL file alone
+        checkpoint = step("checkpoint_passive", "PRAGMA wal_checkpoint(PASSIVE)")
+        if checkpoint:
+            busy, wal_pages, checkpointed = checkpoint[0]
+            record["steps"]["checkpoint_passive"].update(
+                {
+                    "busy": bool(busy),
+                    "wal_pages": wal_pages,
+                    "checkpointed": checkpointed,
+                }
+            )
+
+        # optimize would create sqlite_stat1 in a database without statistics
+        (has_statistics,) = conn.execute(
+            "SELECT count(*) FROM sqlite_schema WHERE name = 'sqlite_stat1'"
+        ).fetchone()
+        if has_statistics:
+            conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+            step("optimize", "PRAGMA optimize")
+        else:
+            record["skipped"].append("optimize")
+
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        record["freelist_ratio"] = round(freelist / page_count, 4) if page_count else 0
+        if page_count and freelist / page_count >= settings.freelist_threshold:
+            # VACUUM blocks the sync server's writers: leave it to an operator
+            logger.info(
+                f"{db_path.name} has {freelist} free pages "
+                f"({record['freelist_ratio']:.0%}); stop the sync server and run "
+                "VACUUM to reclaim them"
+            )
+    finally:
+        try:
+            if crsqlite_loaded:
+                # Required before closing a connection with crsqlite loaded
+                conn.execute("SELECT crsql_finalize()")
+        finally:
+            conn.close()
+
+    record["after"] = file_sizes(db_path)
+    record["duration_s"] = round(time.time() - record["started_at"], 3)
+    return record
+
+
+class MaintenanceScheduler:
+    """Runs database maintenance when the sync stack has been idle."""
+
+    def __init__(
+        self,
+        db_dir: Path,
+        access_log: Path,
+        history_file: Path,
+        settings: MaintenanceSettings,
+        exclusive_lock: Optional[threading.Lock] = None,
+        extension: Optional[Path] = None,
+        preflight: Optional[PreflightChecker] = None,
+    ):
+        """
+        Args:
+            db_dir: Database directory
+            access_log: Caddy access log (JSON)
+            history_file: JSON lines file receiving one record per database
+            settings: Maintenance options
+            exclusive_lock: Lock shared with other DB jobs (e.g. backups)
+            extension: crsqlite extension (see find_crsqlite_extension);
+                without it maintenance is skipped
+            preflight: Pre-flight checker whose cached verdicts are kept
+                across the checkpoints
+        """
+        self.db_dir = db_dir
+        self.history_file = history_file
+        self.settings = settings
+        self.extension = extension
+        self.preflight = preflight
+        self.activity = ActivityMonitor(access_log, db_dir)
+        self.lock = exclusive_lock or threading.Lock()
+        self.last_run: Optional[float] = None
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the scheduler thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="db-maintenance", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Database maintenance scheduled after {self.settings.idle_minutes:g} "
+            "idle minutes"
+        )
+
+    def stop(self) -> None:
+        """Stop the scheduler (a running step finishes first)."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+
+    def is_idle(self, include_wal: bool = True) -> bool:
+        """Whether the sync stack has been idle long enough."""
+        idle_for = self.activity.idle_for(include_wal)
+        return idle_for >= self.settings.idle_minutes * 60
+
+    def run_maintenance(self, force: bool = False) -> list[Dict[str, Any]]:
+        """
+        Maintain every database, stopping early if activity resumes.
+
+        Args:
+            force: Run even if not idle (still yields to the sync server's locks)
+
+        Returns:
+            One record per database maintained
+        """
+        if self.extension is None:
+            logger.warning(
+                "Skipping maintenance: crsqlite extension not found (install the "
+                "sync server's dependencies)"
+            )
+            return []
+        if not self.lock.acquire(blocking=False):
+            logger.info("Skipping maintenance: another database job is running")
+            return []
+
+        def should_continue() -> bool:
+            # Our own checkpoints touch the WAL, so only outside signals count
+            # once we've started (sync writes still yield via busy_timeout)
+            if self._stop_event.is_set():
+                return False
+            return force or self.is_idle(include_wal=False)
+
+        records = []
+        try:
+            for db_path in list_databases(self.db_dir):
+                if not should_continue():
+                    logger.info("Activity resumed, postponing remaining maintenance")
+                    break
+                try:
+                    before = file_identity(db_path)
+                    record = maintain_database(
+                        db_path, self.settings, self.extension, should_continue
+                    )
+                    after = file_identity(db_path)
+                except (sqlite3.Error, FileNotFoundError) as exc:
+                    logger.error(f"Maintenance of {db_path.name} failed: {exc}")
+                    continue
+                if self.preflight:
+                    self.preflight.keep_verdict(db_path.name, before, after)
+                records.append(record)
+                self._record(record)
+        finally:
+            self.lock.release()
+
+        self.last_run = time.time()
+        return records
+
+    def _record(self, record: Dict[str, Any]) -> None:
+        """Log a maintenance record and append it to the history file."""
+        saved = (record["before"]["db"] + record["before"]["wal"]) - (
+            record["after"]["db"] + record["after"]["wal"]
+        )
+        logger.info(
+            f"Maintained {record['database']} in {record['duration_s']}s "
+            f"({saved / (1024 * 1024):+.1f} MB reclaimed"
+            + (f", skipped {', '.join(record['skipped'])}" if record["skipped"] else "")
+            + ")"
+        )
+        try:
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.history_file, "a") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as exc:
+            logger.warning(f"Could not write maintenance history: {exc}")
+
+    def _run(self) -> None:
+        """Scheduler loop."""
+        apply_to_current_thread()
+        min_interval = self.settings.min_interval_hours * 3600
+        while not self._stop_event.wait(POLL_INTERVAL_SECONDS):
+            if self.last_run and time.time() - self.last_run < min_interval:
+                continue
+            try:
+                if self.is_idle():
+                    self.run_maintenance()
+            except Exception as exc:
+                logger.error("Database maintenance failed", exc_info=exc)
@@ -184,6 +184,37 @@ def run_with_elevation(command: list[str], graphical: bool = True) -> tuple[bool
         return False, error_msg
 
 
+def find_listening_process(port: int) -> Optional[psutil.Process]:
+    """
+    Process listening on a local TCP port.
+
+    With pre-bound sockets both the launcher and the daemon it started hold the
+    listening socket: the daemon (the innermost holder) is returned.
+
+    Returns:
+        The process, or None if nobody listens or connections can't be listed
+        (e.g. macOS without privileges)
+    """
+    try:
+        connections = psutil.net_connections(kind="tcp")
+    except (psutil.AccessDenied, OSError):
+        return None
+    pids = {
+        c.pid
+        for c in connections
+        if c.status == psutil.CONN_LISTEN and c.pid and c.laddr.port == port
+    }
+    for pid in pids:
+        try:
+            process = psutil.Process(pid)
+            descendants = {child.pid for child in process.children(recursive=True)}
+        except psutil.Error:
+            continue
+        if not descendants & pids:
+            return process
+    return None
+
+
 def detect_running_browsers() -> list[str]:
     """
     Detect which browsers are currently running.
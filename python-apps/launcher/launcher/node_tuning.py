@@ -0,0 +1,195 @@
+"""
+Host-aware Node runtime tuning for the sync server.
+
+The same launcher runs on 4GB point-of-sale boxes and 32GB back-office servers.
+Node's defaults (V8 heap limits, a 4-thread libuv pool) are tuned for neither,
+so we derive a profile from the host's memory and core count.
+
+Every value can be overridden in settings.toml:
+
+    [syncserver_tuning]
+    profile = "auto"              # "auto", "small", "medium", "large" or "off"
+    max_old_space_size_mb = 1024
+    max_semi_space_size_mb = 16
+    uv_threadpool_size = 4
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger("launcher")
+
+MB = 1024 * 1024
+GB = 1024 * MB
+
+# Share of system memory the sync server's old generation may grow to
+OLD_SPACE_MEMORY_FRACTION = 0.25
+MIN_OLD_SPACE_MB = 256
+MAX_OLD_SPACE_MB = 4096
+
+# libuv pool bounds: better-sqlite3 runs on the main thread, the pool only
+# serves fs (file downloads, touch notifications), dns and crypto work
+MIN_UV_THREADPOOL_SIZE = 4
+MAX_UV_THREADPOOL_SIZE = 8
+
+# Preset profiles, selected by system memory when profile = "auto"
+PRESETS: Dict[str, Dict[str, int]] = {
+    "small": {  # < 6GB, e.g. POS boxes
+        "max_old_space_size_mb": 512,
+        "max_semi_space_size_mb": 16,
+        "uv_threadpool_size": 4,
+    },
+    "medium": {  # 6-16GB
+        "max_old_space_size_mb": 2048,
+        "max_semi_space_size_mb": 32,
+        "uv_threadpool_size": 6,
+    },
+    "large": {  # >= 16GB, back-office servers
+        "max_old_space_size_mb": 4096,
+        "max_semi_space_size_mb": 64,
+        "uv_threadpool_size": 8,
+    },
+}
+
+TUNABLE_KEYS = tuple(PRESETS["small"].keys())
+
+
+class NodeTuningProfile:
+    """Node runtime settings applied to the sync server process."""
+
+    def __init__(
+        self,
+        name: str,
+        max_old_space_size_mb: Optional[int] = None,
+        max_semi_space_size_mb: Optional[int] = None,
+        uv_threadpool_size: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_old_space_size_mb = max_old_space_size_mb
+        self.max_semi_space_size_mb = max_semi_space_size_mb
+        self.uv_threadpool_size = uv_threadpool_size
+
+    def node_flags(self) -> list[str]:
+        """V8/Node command line flags for this profile."""
+        flags = []
+        if self.max_old_space_size_mb:
+            flags.append(f"--max-old-space-size={self.max_old_space_size_mb}")
+        if self.max_semi_space_size_mb:
+            flags.append(f"--max-semi-space-size={self.max_semi_space_size_mb}")
+        return flags
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables for this profile."""
+        env = {}
+        if self.uv_threadpool_size:
+            env["UV_THREADPOOL_SIZE"] = str(self.uv_threadpool_size)
+        return env
+
+    def describe(self) -> str:
+        """Human-readable summary for logging."""
+        if not (self.node_flags() or self.env()):
+            return f"{self.name} (Node defaults)"
+        return (
+            f"{self.name} (max-old-space-size={self.max_old_space_size_mb}MB, "
+            f"max-semi-space-size={self.max_semi_space_size_mb}MB, "
+            f"UV_THREADPOOL_SIZE={self.uv_threadpool_size})"
+        )
+
+
+def select_preset(total_memory: int) -> str:
+    """Pick a preset name from total system memory in bytes."""
+    if total_memory < 6 * GB:
+        return "small"
+    if total_memory < 16 * GB:
+        return "medium"
+    return "large"
+
+
+def compute_tuning_profile(
+    total_memory: Optional[int] = None, cpu_count: Optional[int] = None
+) -> NodeTuningProfile:
+    """
+    Compute a tuning profile for this host.
+
+    Args:
+        total_memory: System memory in bytes (defaults to psutil reading)
+        cpu_count: Logical CPU count (defaults to psutil reading)
+
+    Returns:
+        NodeTuningProfile derived from the host's resources
+    """
+    if total_memory is None:
+        total_memory = psutil.virtual_memory().total
+    if cpu_count is None:
+        cpu_count = psutil.cpu_count(logical=True) or MIN_UV_THREADPOOL_SIZE
+
+    name = select_preset(total_memory)
+    preset = PRESETS[name]
+
+    # Scale the heap with memory within the preset's ceiling, rounded to 64MB
+    old_space_mb = int(total_memory * OLD_SPACE_MEMORY_FRACTION / MB) // 64 * 64
+    old_space_mb = max(
+        MIN_OLD_SPACE_MB,
+        min(old_space_mb, preset["max_old_space_size_mb"], MAX_OLD_SPACE_MB),
+    )
+
+    uv_threadpool_size = max(
+        MIN_UV_THREADPOOL_SIZE,
+        min(cpu_count, preset["uv_threadpool_size"], MAX_UV_THREADPOOL_SIZE),
+    )
+
+    return NodeTuningProfile(
+        name=f"auto/{name}",
+        max_old_space_size_mb=old_space_mb,
+        max_semi_space_size_mb=preset["max_semi_space_size_mb"],
+        uv_threadpool_size=uv_threadpool_size,
+    )
+
+
+def load_tuning_profile(settings: Optional[Dict[str, Any]]) -> NodeTuningProfile:
+    """
+    Build the tuning profile from the [syncserver_tuning] settings table.
+
+    Args:
+        settings: The syncserver_tuning settings dict (may be None or empty)
+
+    Returns:
+        NodeTuningProfile with overrides applied
+    """
+    settings = settings or {}
+    profile_name = settings.get("profile", "auto")
+
+    if profile_name == "off":
+        profile = NodeTuningProfile(name="off")
+    elif profile_name in PRESETS:
+        profile = NodeTuningProfile(name=profile_name, **PRESETS[profile_name])
+    else:
+        if profile_name != "auto":
+            logger.warning(
+                f"Unknown syncserver_tuning profile '{profile_name}', using auto"
+            )
+        profile = compute_tuning_profile()
+
+    overridden = []
+    for key in TUNABLE_KEYS:
+        if key not in settings:
+            continue
+        try:
+            value = int(settings[key])
+        except (TypeError, ValueError):
+            logger.warning(
+                f"Ignoring invalid syncserver_tuning.{key}={settings[key]!r}"
+            )
+            continue
+        if value <= 0:
+            logger.warning(f"Ignoring non-positive syncserver_tuning.{key}={value}")
+            continue
+        setattr(profile, key, value)
+        overridden.append(key)
+
+    if overridden:
+        profile.name = f"{profile.name}+overrides({', '.join(overridden)})"
+
+    return profile
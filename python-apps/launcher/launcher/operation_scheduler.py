@@ -0,0 +1,257 @@
+"""
+Scheduler for the supervisor core's operations.
+
+The GUI's status timer, the tray menu and the control API request operations
+at their own pace. Handing every request straight to the core would let status
+polls pile up and repeated clicks queue full restarts one after the other, so
+requests go through two lanes:
+
+- reads (status, system_status) run right away, next to any mutation: a status
+  poll never waits behind a 30 second Caddy readiness wait
+- mutations (start, stop, restart and their *_all variants) run one at a time,
+  in request order
+
+Identical requests share one run: a status poll joins the one in flight, a
+second "restart_all" click joins the pending or running restart. A mutation
+supersedes older ones whose daemons it covers: pending ones are dropped, a
+running one is cancelled (e.g. a stop cancels a start still waiting for Caddy's
+admin API). Their callers get OperationSuperseded: the newer operation reports
+the outcome.
+
+    scheduler = OperationScheduler(core)
+    ok = await scheduler.request("restart", "caddy")
+    scheduler.stats()["restart"]["wait"]["p90_ms"]
+
+Runs on the core's event loop: request() must be awaited there.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from launcher.config import DAEMONS
+from launcher.stats import summarize
+
+logger = logging.getLogger("launcher")
+
+ALL_DAEMONS = frozenset(DAEMONS)
+
+# Operation -> (lane, daemons it acts on: None for the requested daemon)
+OPERATIONS: Dict[str, tuple[str, Optional[frozenset]]] = {
+    "status": ("read", None),
+    "system_status": ("read", ALL_DAEMONS),
+    "start": ("mutation", None),
+    "stop": ("mutation", None),
+    "restart": ("mutation", None),
+    "start_all": ("mutation", ALL_DAEMONS),
+    "stop_all": ("mutation", ALL_DAEMONS),
+    "restart_all": ("mutation", ALL_DAEMONS),
+}
+
+# Timing samples kept per operation
+SAMPLES = 1000
+
+
+class OperationSuperseded(Exception):
+    """A newer operation replaced the requested one."""
+
+    def __init__(self, operation: str, newer: str):
+        super().__init__(f"{operation} superseded by {newer}")
+        self.operation = operation
+        self.newer = newer
+
+
+class _Request:
+    """One scheduled run of an operation, shared by its callers."""
+
+    def __init__(self, operation: str, daemon: Optional[str], targets: frozenset):
+        self.operation = operation
+        self.daemon = daemon
+        self.targets = targets
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.queued = time.monotonic()
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def key(self) -> tuple[str, Optional[str]]:
+        return self.operation, self.daemon
+
+
+class OperationScheduler:
+    """Two-lane scheduler with coalescing and superseding, on the core's loop."""
+
+    def __init__(self, core):
+        """
+        Args:
+            core: The SupervisorCore running the operations
+        """
+        self.core = core
+        self._reads: Dict[tuple, _Request] = {}
+        self._pending: list[_Request] = []
+        self._running: Optional[_Request] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Operation -> (queue wait s, run s, ok) samples and event counts
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, Counter] = {}
+
+    def _factory(
+        self, operation: str, daemon: Optional[str]
+    ) -> Callable[[], Coroutine]:
+        core = self.core
+        if operation == "status":
+            return lambda: core.status(daemon)
+        if operation == "system_status":
+            return core.system_status
+        if operation.endswith("_all"):
+            return getattr(core, operation)
+        return lambda: getattr(core, f"{operation}_daemon")(daemon)
+
+    async def request(self, operation: str, daemon: Optional[str] = None) -> Any:
+        """
+        Run an operation, or join an identical one.
+
+        Args:
+            operation: A key of OPERATIONS
+            daemon: The daemon of per-daemon operations
+
+        Returns:
+            The operation's result
+
+        Raises:
+            OperationSuperseded: A newer mutation replaced this one
+        """
+        lane, targets = OPERATIONS[operation]
+        if targets is None:
+            if daemon not in DAEMONS:
+                raise ValueError(f"Unknown daemon: {daemon!r}")
+            targets = frozenset((daemon,))
+        else:
+            daemon = None
+        counts = self._counts.setdefault(operation, Counter())
+        counts["requested"] += 1
+
+        existing = self._find(operation, daemon, lane)
+        if existing is not None:
+            counts["coalesced"] += 1
+            return await asyncio.shield(existing.result)
+
+        request = _Request(operation, daemon, targets)
+        if lane == "read":
+            self._reads[request.key] = request
+            request.task = asyncio.create_task(self._run(request))
+            request.task.add_done_callback(lambda _: self._reads.pop(request.key, None))
+        else:
+            self._supersede(request)
+            self._pending.append(request)
+            self._start_worker()
+            self._wakeup.set()
+        return await asyncio.shield(request.result)
+
+    def _find(
+        self, operation: str, daemon: Optional[str], lane: str
+    ) -> Optional[_Request]:
+        """A pending or running request identical to this one."""
+        if lane == "read":
+            return self._reads.get((operation, daemon))
+        for request in [self._running, *self._pending]:
+            if (
+                request is not None
+                and request.key == (operation, daemon)
+                and not request.result.done()
+            ):
+                return request
+        return None
+
+    def _supersede(self, newer: _Request) -> None:
+        """Drop pending and cancel running mutations covered by newer."""
+        for older in [r for r in self._pending if r.targets <= newer.targets]:
+            self._pending.remove(older)
+            self._counts[older.operation]["superseded"] += 1
+            logger.info(f"Dropping {older.operation}: superseded by {newer.operation}")
+            self._settle_superseded(older, newer)
+        running = self._running
+        if (
+            running is not None
+            and not running.result.done()
+            and running.targets <= newer.targets
+        ):
+            self._counts[running.operation]["cancelled"] += 1
+            logger.info(
+                f"Cancelling {running.operation}: superseded by {newer.operation}"
+            )
+            self._settle_superseded(running, newer)
+            if running.task is not None:
+                running.task.cancel()
+
+    @staticmethod
+    def _settle_superseded(older: _Request, newer: _Request) -> None:
+        if not older.result.done():
+            older.result.set_exception(
+                OperationSuperseded(older.operation, newer.operation)
+            )
+
+    def _start_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run_mutations())
+
+    async def _run_mutations(self) -> None:
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            request = self._pending.pop(0)
+            self._running = request
+            request.task = asyncio.create_task(self._run(request))
+            try:
+                # (wait() doesn't raise when the run is cancelled)
+                await asyncio.wait([request.task])
+            finally:
+                self._running = None
+
+    async def _run(self, request: _Request) -> None:
+        started = time.monotonic()
+        ok = False
+        try:
+            result = await self._factory(request.operation, request.daemon)()
+            ok = result is not False and getattr(result, "status", None) != "error"
+            if not request.result.done():
+                request.result.set_result(result)
+        except asyncio.CancelledError:
+            # Superseded (callers already told), or the core shutting down
+            if not request.result.done():
+                request.result.cancel()
+            raise
+        except Exception as exc:
+            logger.error(f"{request.operation} failed", exc_info=exc)
+            if not request.result.done():
+                request.result.set_exception(exc)
+        finally:
+            finished = time.monotonic()
+            self._samples.setdefault(request.operation, deque(maxlen=SAMPLES)).append(
+                (started - request.queued, finished - started, ok)
+            )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per operation: "requested", "coalesced", "superseded" and "cancelled"
+        counts, and "wait" (queue wait) and "run" (execution) latency
+        summaries (count, errors, p50_ms ... max_ms, see stats.summarize())
+        over the last SAMPLES runs.
+        """
+        stats = {}
+        for operation in OPERATIONS:
+            counts = self._counts.get(operation, Counter())
+            samples = list(self._samples.get(operation, ()))
+            stats[operation] = {
+                **{
+                    key: counts[key]
+                    for key in ("requested", "coalesced", "superseded", "cancelled")
+                },
+                "wait": summarize([(operation, w, ok) for w, _, ok in samples])["all"],
+                "run": summarize([(operation, r, ok) for _, r, ok in samples])["all"],
+            }
+        return stats
@@ -0,0 +1,312 @@
+"""
+Pre-flight database checks before the sync server starts.
+
+The sync server checks every database in db_dir serially before it listens
+(performStartupHealthCheck in apps/sync-server/src/db-health.ts). Before each
+sync server (re)start the launcher checks them first, in parallel threads
+(SQLite releases the GIL while it reads, so the checks use every core without
+spawning processes that would re-import the launcher and Qt):
+
+- PRAGMA quick_check
+- schema: crsql_master has schema_name and schema_version
+- site id: crsql_site_id has at least one row
+- clock tables exist (warning only)
+
+Verdicts are cached in a JSON file keyed by each file's identity (size, mtime
+and inode of the database and its WAL), so unchanged files are not checked
+again. The cache file's path is passed to the sync server in PREFLIGHT_RESULTS.
+For unchanged files whose verdict is ok, the sync server uses the cached verdict
+and does not open them. It checks every other file itself.
+
+Configured in settings.toml:
+
+    [preflight]
+    enabled = true
+    workers = 0  # 0 = one per CPU
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from launcher.db_files import list_databases, read_only_uri
+
+logger = logging.getLogger("launcher")
+
+# Environment variable pointing the sync server at the cache file
+PREFLIGHT_ENV = "PREFLIGHT_RESULTS"
+# Bumped when the checks change, invalidating cached verdicts
+CACHE_VERSION = 1
+
+
+def file_identity(db_path: Path) -> Dict[str, Any]:
+    """
+    Identity of a database file and its WAL.
+
+    Nanosecond mtimes and inodes are strings, since they don't fit in a JSON
+    number read by JavaScript. An empty WAL counts as no WAL.
+
+    Args:
+        db_path: Database file
+
+    Returns:
+        Dict with "size", "mtime_ns", "ino" and "wal" ([size, mtime_ns] or None)
+    """
+    stat = db_path.stat()
+    wal = None
+    try:
+        wal_stat = db_path.with_name(db_path.name + "-wal").stat()
+        if wal_stat.st_size:
+            wal = [wal_stat.st_size, str(wal_stat.st_mtime_ns)]
+    except FileNotFoundError:
+        pass
+    return {
+        "size": stat.st_size,
+        "mtime_ns": str(stat.st_mtime_ns),
+        "ino": str(stat.st_ino),
+        "wal": wal,
+    }
+
+
+def _check(name: str, passed: bool, message: str, severity: str = "error") -> dict:
+    return {"name": name, "passed": passed, "message": message, "severity": severity}
+
+
+def check_database(db_path: str) -> Dict[str, Any]:
+    """
+    Check one database (runs in a worker thread).
+
+    Args:
+        db_path: Database file (opened read-only)
+
+    Returns:
+        Dict with "ok" and "checks", shaped like the sync server's
+        HealthCheckResult
+    """
+    checks = []
+    try:
+        conn = sqlite3.connect(read_only_uri(Path(db_path)), uri=True)
+    except sqlite3.Error as exc:
+        return {
+            "ok": False,
+            "checks": [_check("database_open", False, f"Failed to open: {exc}")],
+        }
+    try:
+        try:
+            result = [row[0] for row in conn.execute("PRAGMA quick_check")]
+        except sqlite3.DatabaseError as exc:
+            result = [str(exc)]
+        quick_ok = result == ["ok"]
+        checks.append(
+            _check(
+                "sqlite_quick_check",
+                quick_ok,
+                (
+                    "SQLite quick check passed"
+                    if quick_ok
+                    else f"SQLite quick check failed: {', '.join(result)}"
+                ),
+            )
+        )
+        if not quick_ok:
+            return {"ok": False, "checks": checks}
+
+        try:
+            master = dict(conn.execute("SELECT key, value FROM crsql_master"))
+            valid = "schema_name" in master and "schema_version" in master
+            checks.append(
+                _check(
+                    "crsql_master_valid",
+                    valid,
+                    (
+                        f"crsql_master is valid: schema={master.get('schema_name')}, "
+                        f"version={master.get('schema_version')}"
+                        if valid
+                        else "crsql_master is missing schema_name or schema_version"
+                    ),
+                )
+            )
+        except sqlite3.Error as exc:
+            checks.append(
+                _check(
+                    "crsql_master_valid", False, f"Failed to read crsql_master: {exc}"
+                )
+            )
+
+        try:
+            site_ids = conn.execute(
+                "SELECT site_id FROM crsql_site_id ORDER BY ordinal"
+            ).fetchall()
+            checks.append(
+                _check(
+                    "site_id_valid",
+                    bool(site_ids),
+                    (
+                        f"Primary site_id: {bytes(site_ids[0][0]).hex()} "
+                        f"({len(site_ids)} total site(s) tracked)"
+                        if site_ids
+                        else "No site_id found in crsql_site_id table"
+                    ),
+                )
+            )
+        except sqlite3.Error as exc:
+            checks.append(
+                _check("site_id_valid", False, f"Failed to read site_id: {exc}")
+            )
+
+        (clock_tables,) = conn.execute(
+            "SELECT count(*) FROM sqlite_schema "
+            "WHERE type = 'table' AND name LIKE '%\\_\\_crsql\\_clock' ESCAPE '\\'"
+        ).fetchone()
+        checks.append(
+            _check(
+                "clock_tables_exist",
+                clock_tables > 0,
+                f"{clock_tables} clock table(s) found",
+                severity="warning",
+            )
+        )
+    finally:
+        conn.close()
+
+    ok = not any(not c["passed"] and c["severity"] == "error" for c in checks)
+    return {"ok": ok, "checks": checks}
+
+
+class PreflightChecker:
+    """Checks the databases in parallel, reusing verdicts of unchanged files."""
+
+    def __init__(
+        self, db_dir: Path, cache_file: Path, max_workers: Optional[int] = None
+    ):
+        """
+        Args:
+            db_dir: Database directory
+            cache_file: JSON file holding the verdicts (read by the sync server)
+            max_workers: Worker threads (None = one per CPU)
+        """
+        self.db_dir = db_dir
+        self.cache_file = cache_file
+        self.max_workers = max_workers
+        # Serializes updates of the cache file (run() and keep_verdict())
+        self._cache_lock = threading.Lock()
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables for the sync server."""
+        return {PREFLIGHT_ENV: str(self.cache_file)}
+
+    def load_cache(self) -> Dict[str, Dict[str, Any]]:
+        """Cached verdicts by database file name (empty if unreadable)."""
+        try:
+            cache = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != CACHE_VERSION:
+            return {}
+        return cache.get("databases", {})
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Check every changed database and update the cache (blocking).
+
+        Returns:
+            Verdict by database file name
+        """
+        started = time.monotonic()
+        with self._cache_lock:
+            cached = self.load_cache()
+            verdicts: Dict[str, Dict[str, Any]] = {}
+            pending: Dict[str, Dict[str, Any]] = {}
+            for db_path in list_databases(self.db_dir):
+                try:
+                    identity = file_identity(db_path)
+                except FileNotFoundError:
+                    continue
+                previous = cached.get(db_path.name)
+                if previous and previous.get("identity") == identity:
+                    verdicts[db_path.name] = previous
+                else:
+                    pending[db_path.name] = identity
+
+            if pending:
+                checked_at = datetime.now(timezone.utc).isoformat()
+                for name, result in zip(pending, self._check_all(list(pending))):
+                    verdicts[name] = {
+                        "identity": pending[name],
+                        "checked_at": checked_at,
+                        **result,
+                    }
+
+            self._write_cache(verdicts)
+
+        failed = sorted(name for name, verdict in verdicts.items() if not verdict["ok"])
+        logger.info(
+            f"Pre-flight checks: {len(pending)} checked, "
+            f"{len(verdicts) - len(pending)} unchanged, "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+        for name in failed:
+            problems = [
+                c["message"]
+                for c in verdicts[name]["checks"]
+                if not c["passed"] and c["severity"] == "error"
+            ]
+            logger.error(f"Pre-flight check of {name} failed: {'; '.join(problems)}")
+        return verdicts
+
+    def keep_verdict(
+        self, name: str, before: Dict[str, Any], after: Dict[str, Any]
+    ) -> bool:
+        """
+        Keep a database's cached verdict across a WAL checkpoint.
+
+        A checkpoint copies committed pages from the WAL into the database
+        file, changing its size and mtime but not its content, and leaves the
+        WAL file alone. Every commit changes the WAL, so an unchanged
+        non-empty WAL means nothing else wrote to the database meanwhile.
+
+        Args:
+            name: Database file name
+            before: file_identity() before the checkpoint
+            after: file_identity() after it
+
+        Returns:
+            True if the cached verdict now matches the new identity
+        """
+        unchanged_wal = before["wal"] is not None and before["wal"] == after["wal"]
+        if before == after or not unchanged_wal or before["ino"] != after["ino"]:
+            return False
+        with self._cache_lock:
+            cached = self.load_cache()
+            verdict = cached.get(name)
+            if not verdict or verdict.get("identity") != before:
+                return False
+            verdict["identity"] = after
+            self._write_cache(cached)
+        return True
+
+    def _check_all(self, names: list[str]) -> list[Dict[str, Any]]:
+        """Check databases, in worker threads when there are several."""
+        paths = [str(self.db_dir / name) for name in names]
+        if len(paths) == 1:
+            return [check_database(paths[0])]
+        workers = min(self.max_workers or os.cpu_count() or 1, len(paths))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="preflight"
+        ) as pool:
+            return list(pool.map(check_database, paths))
+
+    def _write_cache(self, verdicts: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically replace the cache file."""
+        tmp_path = self.cache_file.with_name(self.cache_file.name + ".tmp")
+        tmp_path.write_text(
+            json.dumps({"version": CACHE_VERSION, "databases": verdicts}, indent=1)
+        )
+        os.replace(tmp_path, self.cache_file)
@@ -0,0 +1,216 @@
+"""
+Page-cache prewarming of the databases after the sync server starts.
+
+After a reboot every page a till's first sync touches comes from a cold disk,
+which on spinning disks or slow eMMC makes the morning start sluggish. Right
+after the daemons start, a low-priority thread asks the OS to load the
+databases in db_dir into the page cache, most recently written database first:
+
+1. the WAL file, which every read checks
+2. the interior pages of every table b-tree and all pages of every index,
+   found by walking the b-trees from their root pages
+3. the rest of the main file, from the start
+
+until the byte budget is used up. Where posix_fadvise(WILLNEED) exists (Linux)
+the kernel reads the pages in the background; elsewhere they are read once.
+
+Configured in settings.toml:
+
+    [prewarm]
+    enabled = true
+    budget_mb = 256
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from launcher.db_files import list_databases, read_only_uri
+from launcher.process_priority import apply_to_current_thread
+from launcher.storage_analytics import walk_btree
+
+logger = logging.getLogger("launcher")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _advise(fd: int, offset: int, length: int) -> None:
+    """Ask the OS to cache a file range (or read it where that's not supported)."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+        return
+    os.lseek(fd, offset, os.SEEK_SET)
+    while length > 0:
+        chunk = os.read(fd, min(CHUNK_SIZE, length))
+        if not chunk:
+            break
+        length -= len(chunk)
+
+
+def _page_ranges(pages: set[int]) -> list[tuple[int, int]]:
+    """Merge page numbers into (first page, page count) runs."""
+    ranges: list[tuple[int, int]] = []
+    for page in sorted(pages):
+        if ranges and ranges[-1][0] + ranges[-1][1] == page:
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + 1)
+        else:
+            ranges.append((page, 1))
+    return ranges
+
+
+def _hot_pages(db_path: Path) -> tuple[int, set[int]]:
+    """
+    Page size and the hot pages of a database: table b-tree interior pages and
+    every index page.
+    """
+    conn = sqlite3.connect(read_only_uri(db_path), uri=True)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        roots = conn.execute(
+            "SELECT type, rootpage FROM sqlite_schema WHERE rootpage > 0"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    hot = {1}
+    with open(db_path, "rb") as f:
+        for object_type, root in [("table", 1)] + roots:
+            interior, leaves = walk_btree(f, page_size, root)
+            hot |= interior
+            if object_type == "index":
+                hot |= leaves
+    # Pages only in the WAL so far aren't in the file yet
+    pages_in_file = db_path.stat().st_size // page_size
+    return page_size, {page for page in hot if page <= pages_in_file}
+
+
+class PagePrewarmer:
+    """Prewarms the databases into the page cache once, in the background."""
+
+    def __init__(self, db_dir: Path, budget_mb: float = 256):
+        """
+        Args:
+            db_dir: Database directory
+            budget_mb: Maximum data to prewarm over all databases
+        """
+        self.db_dir = db_dir
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.result: Optional[Dict[str, Any]] = None
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start prewarming in the background."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop prewarming."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def prewarm(self) -> Dict[str, Any]:
+        """
+        Prewarm databases until the budget is used up (blocking).
+
+        Returns:
+            Dict with "bytes" and "seconds" in total and "databases" (bytes
+            prewarmed by database file name)
+        """
+        started = time.monotonic()
+        remaining = self.budget_bytes
+        per_database: Dict[str, int] = {}
+
+        def mtime(db_path: Path) -> float:
+            wal = db_path.with_name(db_path.name + "-wal")
+            stamps = [p.stat().st_mtime for p in (db_path, wal) if p.exists()]
+            return max(stamps, default=0)
+
+        for db_path in sorted(list_databases(self.db_dir), key=mtime, reverse=True):
+            if remaining <= 0 or self._stop_event.is_set():
+                break
+            try:
+                done = self._prewarm_database(db_path, remaining)
+            except (OSError, sqlite3.Error) as exc:
+                logger.debug(f"Could not prewarm {db_path.name}: {exc}")
+                continue
+            per_database[db_path.name] = done
+            remaining -= done
+
+        result = {
+            "bytes": self.budget_bytes - remaining,
+            "seconds": time.monotonic() - started,
+            "databases": per_database,
+        }
+        self.result = result
+        return result
+
+    def _prewarm_database(self, db_path: Path, budget: int) -> int:
+        """Prewarm one database within budget bytes, returning the bytes used."""
+        used = 0
+        wal = db_path.with_name(db_path.name + "-wal")
+
+        def advise(path: Path, ranges: list[tuple[int, int]]) -> None:
+            nonlocal used
+            fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+            try:
+                for offset, length in ranges:
+                    if self._stop_event.is_set():
+                        return
+                    length = min(length, budget - used)
+                    if length <= 0:
+                        return
+                    _advise(fd, offset, length)
+                    used += length
+            finally:
+                os.close(fd)
+
+        if wal.exists() and wal.stat().st_size:
+            advise(wal, [(0, wal.stat().st_size)])
+
+        page_size, hot = _hot_pages(db_path)
+        hot_ranges = _page_ranges(hot)
+        advise(
+            db_path,
+            [
+                ((first - 1) * page_size, count * page_size)
+                for first, count in hot_ranges
+            ],
+        )
+
+        # The rest of the file: the gaps between the pages prewarmed above
+        cold_ranges = []
+        offset = 0
+        for first, count in hot_ranges:
+            if (first - 1) * page_size > offset:
+                cold_ranges.append((offset, (first - 1) * page_size - offset))
+            offset = (first - 1 + count) * page_size
+        file_size = db_path.stat().st_size
+        if file_size > offset:
+            cold_ranges.append((offset, file_size - offset))
+        advise(db_path, cold_ranges)
+        return used
+
+    def _run(self) -> None:
+        """Prewarm once at background priority."""
+        apply_to_current_thread()
+        try:
+            result = self.prewarm()
+        except Exception as exc:
+            logger.error("Page-cache prewarming failed", exc_info=exc)
+            return
+        method = "fadvise" if hasattr(os, "posix_fadvise") else "read"
+        logger.info(
+            f"Prewarmed {result['bytes'] / (1024 * 1024):.1f} MB of "
+            f"{len(result['databases'])} database(s) into the page cache "
+            f"in {result['seconds']:.2f}s ({method})"
+        )
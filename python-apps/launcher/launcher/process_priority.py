@@ -0,0 +1,287 @@
+"""
+CPU and I/O scheduling priority for supervised daemons and background work.
+
+Each daemon gets a PrioritySettings with the platform knobs that matter:
+- Linux: nice value and ionice class/level
+- macOS: nice value and a QoS clamp (via taskpolicy)
+- Windows: process priority class
+
+Defaults keep the sync server ahead of everything else, Caddy at normal
+priority, and launcher background work (backups, maintenance) at the bottom.
+Overrides come from settings.toml:
+
+    [process_priority.syncserver]
+    nice = 0
+    ionice_class = "best-effort"
+    ionice_level = 0
+"""
+
+import logging
+import os
+import platform
+import subprocess
+import threading
+from typing import Any, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger("launcher")
+
+IONICE_CLASSES = ("realtime", "best-effort", "idle")
+WINDOWS_PRIORITY_CLASSES = ("idle", "below_normal", "normal", "above_normal", "high")
+MACOS_QOS_CLASSES = ("default", "utility", "background")
+
+
+class PrioritySettings:
+    """Scheduling priority for one daemon (or background task)."""
+
+    def __init__(
+        self,
+        nice: Optional[int] = None,
+        ionice_class: Optional[str] = None,
+        ionice_level: Optional[int] = None,
+        windows_priority: Optional[str] = None,
+        macos_qos: Optional[str] = None,
+    ):
+        self.nice = nice
+        self.ionice_class = ionice_class
+        self.ionice_level = ionice_level
+        self.windows_priority = windows_priority
+        self.macos_qos = macos_qos
+
+    def copy(self, **overrides) -> "PrioritySettings":
+        """Return a copy with the given fields replaced."""
+        values = self.to_dict()
+        values.update(overrides)
+        return PrioritySettings(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Settings as a plain dict (e.g. for status reporting)."""
+        return {
+            "nice": self.nice,
+            "ionice_class": self.ionice_class,
+            "ionice_level": self.ionice_level,
+            "windows_priority": self.windows_priority,
+            "macos_qos": self.macos_qos,
+        }
+
+
+DEFAULT_PRIORITIES: Dict[str, PrioritySettings] = {
+    # Interactive sync: best I/O slot we can take without privileges
+    "syncserver": PrioritySettings(
+        nice=0,
+        ionice_class="best-effort",
+        ionice_level=0,
+        windows_priority="above_normal",
+        macos_qos="default",
+    ),
+    # Static assets and proxying: normal priority, default I/O level
+    "caddy": PrioritySettings(
+        nice=0,
+        ionice_class="best-effort",
+        ionice_level=4,
+        windows_priority="normal",
+        macos_qos="default",
+    ),
+}
+
+# Launcher-side background work (backups, DB maintenance, prewarming)
+BACKGROUND_PRIORITY = PrioritySettings(
+    nice=10,
+    ionice_class="idle",
+    windows_priority="below_normal",
+    macos_qos="background",
+)
+
+
+def load_priorities(
+    settings: Optional[Dict[str, Any]],
+) -> Dict[str, PrioritySettings]:
+    """
+    Build per-daemon priorities from the [process_priority] settings table.
+
+    Args:
+        settings: Mapping of daemon name to overrides (may be None or empty)
+
+    Returns:
+        Dict of daemon name to PrioritySettings with overrides applied
+    """
+    priorities = {name: p.copy() for name, p in DEFAULT_PRIORITIES.items()}
+    for daemon_name, overrides in (settings or {}).items():
+        if not isinstance(overrides, dict):
+            logger.warning(f"Ignoring invalid process_priority.{daemon_name}")
+            continue
+        base = priorities.get(daemon_name, PrioritySettings())
+        try:
+            priorities[daemon_name] = base.copy(**overrides)
+        except TypeError as exc:
+            logger.warning(f"Ignoring invalid process_priority.{daemon_name}: {exc}")
+    return priorities
+
+
+def apply_priority(pid: int, settings: PrioritySettings) -> list[str]:
+    """
+    Apply scheduling priority to a process.
+
+    Failures (e.g. raising priority without privileges) are logged and skipped;
+    the remaining settings are still applied.
+
+    Args:
+        pid: Process ID
+        settings: Priority to apply
+
+    Returns:
+        Descriptions of the settings that were applied
+    """
+    system = platform.system()
+    applied = []
+
+    try:
+        process = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        logger.debug(f"Cannot set priority: process {pid} no longer exists")
+        return applied
+
+    if system == "Windows":
+        if settings.windows_priority:
+            _try(
+                applied,
+                f"priority class {settings.windows_priority}",
+                process.nice,
+                _windows_priority_class(settings.windows_priority),
+            )
+        return applied
+
+    if settings.nice is not None:
+        _try(applied, f"nice {settings.nice}", process.nice, settings.nice)
+
+    if system == "Linux" and settings.ionice_class:
+        ioclass = _linux_ionice_class(settings.ionice_class)
+        if settings.ionice_class == "idle":
+            _try(applied, "ionice idle", process.ionice, ioclass)
+        else:
+            level = settings.ionice_level if settings.ionice_level is not None else 4
+            _try(
+                applied,
+                f"ionice {settings.ionice_class}/{level}",
+                process.ionice,
+                ioclass,
+                level,
+            )
+
+    if system == "Darwin" and settings.macos_qos and settings.macos_qos != "default":
+        _try(
+            applied,
+            f"QoS {settings.macos_qos}",
+            _apply_macos_qos,
+            pid,
+            settings.macos_qos,
+        )
+
+    return applied
+
+
+def apply_priority_tree(pid: int, settings: PrioritySettings) -> list[str]:
+    """Apply priority to a process and all its children (e.g. tsx -> node)."""
+    applied = apply_priority(pid, settings)
+    try:
+        for child in psutil.Process(pid).children(recursive=True):
+            apply_priority(child.pid, settings)
+    except psutil.NoSuchProcess:
+        pass
+    return applied
+
+
+def apply_to_current_thread(settings: PrioritySettings = BACKGROUND_PRIORITY) -> None:
+    """
+    Lower the calling thread's priority for background work.
+
+    On Linux nice and ionice are per-thread, so only the calling thread is
+    affected. Elsewhere this falls back to the whole process and should only be
+    used from a dedicated worker process.
+    """
+    if platform.system() == "Linux":
+        tid = threading.get_native_id()
+        try:
+            if settings.nice is not None:
+                os.setpriority(os.PRIO_PROCESS, tid, settings.nice)
+            if settings.ionice_class:
+                psutil.Process(tid).ionice(
+                    _linux_ionice_class(settings.ionice_class),
+                    *(
+                        []
+                        if settings.ionice_class == "idle"
+                        else [settings.ionice_level or 4]
+                    ),
+                )
+        except (OSError, psutil.Error) as exc:
+            logger.debug(f"Could not lower background thread priority: {exc}")
+    else:
+        apply_priority(os.getpid(), settings)
+
+
+def make_after_spawn_hook(priorities: Dict[str, PrioritySettings]):
+    """
+    Build a Circus after_spawn hook applying the watcher's current priority.
+
+    The priorities dict is read at spawn time, so runtime changes made through
+    EmbeddedSupervisor.set_daemon_priority also apply to restarts.
+    """
+
+    def after_spawn(watcher, arbiter, hook_name, pid=None, **kwargs):
+        settings = priorities.get(watcher.name)
+        if settings and pid:
+            applied = apply_priority(pid, settings)
+            if applied:
+                logger.info(
+                    f"Applied priority to {watcher.name} (PID {pid}): "
+                    f"{', '.join(applied)}"
+                )
+        # Returning False from after_spawn makes Circus kill the process
+        return True
+
+    return after_spawn
+
+
+def _try(applied: list[str], description: str, func, *args) -> None:
+    """Run one priority change, recording it on success and logging failures."""
+    try:
+        func(*args)
+        applied.append(description)
+    except (psutil.Error, OSError, ValueError, subprocess.SubprocessError) as exc:
+        logger.warning(f"Could not apply {description}: {exc}")
+
+
+def _linux_ionice_class(name: str) -> int:
+    """Map an ionice class name to the psutil constant."""
+    if name not in IONICE_CLASSES:
+        raise ValueError(f"Unknown ionice class: {name}")
+    return {
+        "realtime": psutil.IOPRIO_CLASS_RT,
+        "best-effort": psutil.IOPRIO_CLASS_BE,
+        "idle": psutil.IOPRIO_CLASS_IDLE,
+    }[name]
+
+
+def _windows_priority_class(name: str) -> int:
+    """Map a Windows priority class name to the psutil constant."""
+    if name not in WINDOWS_PRIORITY_CLASSES:
+        raise ValueError(f"Unknown Windows priority class: {name}")
+    return {
+        "idle": psutil.IDLE_PRIORITY_CLASS,
+        "below_normal": psutil.BELOW_NORMAL_PRIORITY_CLASS,
+        "normal": psutil.NORMAL_PRIORITY_CLASS,
+        "above_normal": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+        "high": psutil.HIGH_PRIORITY_CLASS,
+    }[name]
+
+
+def _apply_macos_qos(pid: int, qos: str) -> None:
+    """Clamp a process's QoS on macOS using taskpolicy."""
+    if qos not in MACOS_QOS_CLASSES:
+        raise ValueError(f"Unknown macOS QoS class: {qos}")
+    if qos == "background":
+        command = ["taskpolicy", "-b", "-p", str(pid)]
+    else:
+        command = ["taskpolicy", "-c", qos, "-p", str(pid)]
+    subprocess.run(command, check=True, capture_output=True, timeout=5)
@@ -0,0 +1,260 @@
+"""
+On-demand CPU profiles and heap snapshots for the Node sync server.
+"""
+
+import logging
+import platform
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import psutil
+
+if TYPE_CHECKING:
+    from launcher.daemon_manager import EmbeddedSupervisor
+
+logger = logging.getLogger("launcher")
+
+# Default CPU profile length and the hard upper bound (seconds)
+DEFAULT_CPU_PROFILE_SECONDS = 30
+MAX_CPU_PROFILE_SECONDS = 300
+
+# Total size of the profiles directory; oldest artefacts are pruned beyond this
+DEFAULT_MAX_PROFILE_BYTES = 512 * 1024 * 1024  # 512MB
+
+# Sampling interval for --cpu-prof (microseconds, Node's default is 1000)
+CPU_PROFILE_INTERVAL_US = 1000
+
+# Signal Node listens on for writing a heap snapshot (POSIX only)
+HEAPSNAPSHOT_SIGNAL = "SIGUSR2"
+
+CPU_PROFILE_SUFFIX = ".cpuprofile"
+HEAP_SNAPSHOT_SUFFIX = ".heapsnapshot"
+
+
+def heapsnapshot_supported() -> bool:
+    """Signal-triggered heap snapshots need POSIX signals (not available on Windows)."""
+    return platform.system() != "Windows"
+
+
+def get_heapsnapshot_node_flags(profiles_dir: Path) -> list[str]:
+    """
+    Node flags that arm signal-triggered heap snapshots.
+
+    These are always passed to the sync server: they cost nothing until the
+    signal is received.
+    """
+    if not heapsnapshot_supported():
+        return []
+    return [
+        f"--heapsnapshot-signal={HEAPSNAPSHOT_SIGNAL}",
+        f"--diagnostic-dir={profiles_dir}",
+    ]
+
+
+def get_cpu_profile_node_flags(profiles_dir: Path) -> list[str]:
+    """Node flags that record a CPU profile, written to profiles_dir on exit."""
+    return [
+        "--cpu-prof",
+        f"--cpu-prof-dir={profiles_dir}",
+        f"--cpu-prof-interval={CPU_PROFILE_INTERVAL_US}",
+    ]
+
+
+class SyncServerProfiler:
+    """
+    Helpers for time-boxed CPU profiles and heap snapshots of the sync server.
+
+    CPU profiles restart the sync server with --cpu-prof for the requested
+    duration, then restart it with its normal arguments (the profile is written
+    when the profiled process exits). Heap snapshots are triggered in place with
+    a signal and don't interrupt sync.
+
+    The captures themselves are coroutines of the supervisor core
+    (SupervisorCore.capture_profile()), which serializes them with the sync
+    server's other operations. Only one capture runs at a time.
+    """
+
+    # Seconds to wait for Node to write a CPU profile after the profiled exit
+    CPU_PROFILE_WRITE_TIMEOUT = 30.0
+
+    def __init__(
+        self,
+        supervisor: "EmbeddedSupervisor",
+        max_total_bytes: int = DEFAULT_MAX_PROFILE_BYTES,
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            supervisor: The EmbeddedSupervisor managing the sync server
+            max_total_bytes: Size cap for the profiles directory
+        """
+        self.supervisor = supervisor
+        self.max_total_bytes = max_total_bytes
+        self.profiles_dir = supervisor.logs_dir / "profiles"
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        """True while a capture is in progress."""
+        return self._lock.locked()
+
+    def begin(self) -> bool:
+        """Claim the profiler for a capture (False if one is in progress)."""
+        if not self._lock.acquire(blocking=False):
+            logger.warning("A profile capture is already in progress")
+            return False
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        return True
+
+    def end(self) -> None:
+        """Release the profiler after a capture."""
+        self._lock.release()
+
+    def cpu_profile_args(self) -> list[str]:
+        """Sync server watcher args recording a CPU profile."""
+        return self.supervisor._create_syncserver_watcher(
+            extra_node_flags=get_cpu_profile_node_flags(self.profiles_dir)
+        )["args"]
+
+    def normal_args(self) -> list[str]:
+        """Sync server watcher args without profiling."""
+        return self.supervisor._create_syncserver_watcher()["args"]
+
+    def heap_snapshot_fits(self, pid: int) -> bool:
+        """
+        Whether a heap snapshot of the process fits the size cap.
+
+        The snapshot is roughly as large as the heap, so this refuses when the
+        sync server's resident memory already exceeds the cap.
+        """
+        rss = self._get_tree_rss(pid)
+        if rss > self.max_total_bytes:
+            logger.warning(
+                f"Skipping heap snapshot: sync server RSS ({rss} bytes) "
+                f"exceeds the profile size cap ({self.max_total_bytes} bytes)"
+            )
+            return False
+        return True
+
+    def collect(self, kind: str, before: set[Path], timeout: float) -> Optional[Path]:
+        """
+        Wait for the capture's artefact and move it into the profiles dir.
+
+        Args:
+            kind: "cpu" or "heap"
+            before: existing_files() from before the capture
+            timeout: Seconds to wait for the file to be written
+
+        Returns:
+            Path to the artefact, or None if it wasn't written (or too large)
+        """
+        suffix = CPU_PROFILE_SUFFIX if kind == "cpu" else HEAP_SNAPSHOT_SUFFIX
+        artefact = self._wait_for_new_file(suffix, before, timeout=timeout)
+        if artefact is None:
+            logger.error(f"The sync server did not write the {kind} profile")
+            return None
+        return self._finalize_artifact(artefact, kind)
+
+    def runs_via_wrapper(self) -> bool:
+        """Whether the sync server watcher runs a wrapper (tsx) around node."""
+        cmd = Path(self.supervisor._create_syncserver_watcher()["cmd"]).name
+        return cmd.startswith("tsx")
+
+    def _search_dirs(self) -> list[Path]:
+        """Directories Node may write diagnostics to (diagnostic dir, then cwd)."""
+        working_dir = Path(self.supervisor._create_syncserver_watcher()["working_dir"])
+        return [self.profiles_dir, working_dir]
+
+    def existing_files(self, suffix: str) -> set[Path]:
+        """Snapshot of diagnostic files already present before a capture."""
+        existing = set()
+        for directory in self._search_dirs():
+            if directory.exists():
+                existing.update(directory.glob(f"*{suffix}"))
+        return existing
+
+    def _wait_for_new_file(
+        self, suffix: str, before: set[Path], timeout: float, poll_interval: float = 0.5
+    ) -> Optional[Path]:
+        """
+        Wait for a new diagnostic file to appear and finish being written.
+
+        A file is considered complete once its size stops changing between polls.
+        """
+        start_time = time.time()
+        candidate = None
+        last_size = -1
+
+        while time.time() - start_time < timeout:
+            if candidate is None:
+                new_files = self.existing_files(suffix) - before
+                if new_files:
+                    candidate = max(new_files, key=lambda p: p.stat().st_mtime)
+            else:
+                try:
+                    size = candidate.stat().st_size
+                except FileNotFoundError:
+                    candidate, last_size = None, -1
+                    continue
+                if size > 0 and size == last_size:
+                    return candidate
+                last_size = size
+            time.sleep(poll_interval)
+
+        return None
+
+    def _finalize_artifact(self, path: Path, kind: str) -> Optional[Path]:
+        """Move the artefact into the profiles dir and enforce the size cap."""
+        size = path.stat().st_size
+        if size > self.max_total_bytes:
+            logger.warning(
+                f"Discarding {kind} profile {path.name}: {size} bytes exceeds the "
+                f"size cap of {self.max_total_bytes} bytes"
+            )
+            path.unlink(missing_ok=True)
+            return None
+
+        target = (
+            self.profiles_dir
+            / f"syncserver-{kind}-{time.strftime('%Y%m%d-%H%M%S')}{path.suffix}"
+        )
+        if path != target:
+            shutil.move(str(path), target)
+
+        self._prune(keep=target)
+        logger.info(f"Captured {kind} profile: {target} ({size} bytes)")
+        return target
+
+    def _prune(self, keep: Path) -> None:
+        """Delete the oldest artefacts until the profiles dir fits the size cap."""
+        artefacts = sorted(
+            (
+                p
+                for p in self.profiles_dir.iterdir()
+                if p.suffix in (CPU_PROFILE_SUFFIX, HEAP_SNAPSHOT_SUFFIX)
+            ),
+            key=lambda p: p.stat().st_mtime,
+        )
+        total = sum(p.stat().st_size for p in artefacts)
+        for artefact in artefacts:
+            if total <= self.max_total_bytes:
+                break
+            if artefact == keep:
+                continue
+            total -= artefact.stat().st_size
+            logger.info(f"Pruning old profile to stay under size cap: {artefact.name}")
+            artefact.unlink(missing_ok=True)
+
+    @staticmethod
+    def _get_tree_rss(pid: int) -> int:
+        """Resident memory of a process and its children, in bytes."""
+        try:
+            process = psutil.Process(pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return 0
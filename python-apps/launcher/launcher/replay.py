@@ -0,0 +1,282 @@
+"""
+Replay of Caddy access logs against a local launcher.
+
+Caddy's JSON access logs (caddy-access.log and its rolled, possibly gzipped,
+siblings) record the request mix a store produced. The replay reads them in
+order and re-sends the HTTP part against a local stack: GET and HEAD requests,
+with their Range and conditional headers. WebSocket upgrades (/sync) and
+requests that change data (POST /:dbname/exec, ...) are skipped.
+
+Requests keep their recorded spacing divided by `speed` (0 sends them as fast
+as the concurrency allows), with idle gaps (a closed store overnight) clipped
+to `max_gap` seconds first. Every response body is read to the end.
+
+A run is summarized by request category (static, meta, file, health, ...) as
+latency percentiles and error counts, and saved as JSON so that runs before and
+after a Caddyfile or supervisor change can be compared:
+
+    librocco-headless replay --speed 10 --output before.json
+    librocco-headless replay --speed 10 --output after.json --compare before.json
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import httpx
+
+from launcher.api_client import AsyncHttpClient
+from launcher.config import CADDY_PORT
+from launcher.stats import PERCENTILES, summarize
+
+logger = logging.getLogger("launcher")
+
+REPLAY_URL = f"https://127.0.0.1:{CADDY_PORT}"
+
+REPLAYED_METHODS = ("GET", "HEAD")
+# Recorded request headers sent again (they change what the response is)
+REPLAYED_HEADERS = ("Range", "If-None-Match", "If-Modified-Since")
+
+DEFAULT_TIMEOUT = 30.0
+
+
+class ReplayRequest:
+    """One request from the access log."""
+
+    def __init__(
+        self,
+        ts: float,
+        method: str,
+        uri: str,
+        headers: Dict[str, str],
+        status: int,
+        duration: float,
+    ):
+        self.ts = ts
+        self.method = method
+        self.uri = uri
+        self.headers = headers
+        # As recorded in production
+        self.status = status
+        self.duration = duration
+
+
+def access_log_files(logs_dir: Path, name: str = "caddy-access") -> list[Path]:
+    """Rolled access logs, oldest first, then the current one."""
+    rolled = sorted(
+        [
+            *logs_dir.glob(f"{name}-*.log"),
+            *logs_dir.glob(f"{name}-*.log.gz"),
+        ]
+    )
+    current = logs_dir / f"{name}.log"
+    return rolled + ([current] if current.exists() else [])
+
+
+def _lines(path: Path) -> Iterator[str]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+        yield from f
+
+
+def category(uri: str) -> str:
+    """Request category of a path, for per-category latencies."""
+    path = uri.split("?", 1)[0]
+    if path.startswith("/sync"):
+        return "sync"
+    if path.startswith("/reports/"):
+        return "reports"
+    if path.startswith("/printlabel"):
+        return "printlabel"
+    parts = path.strip("/").split("/")
+    if len(parts) == 2 and parts[1] in ("meta", "file", "health"):
+        return parts[1]
+    if path == "/health":
+        return "health"
+    return "static"
+
+
+def read_requests(
+    files: Iterable[Path],
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> Iterator[ReplayRequest]:
+    """
+    Replayable requests from access logs, in file order.
+
+    Args:
+        files: JSON access logs (gzip if named .gz)
+        since: Skip requests before this timestamp
+        until: Skip requests from this timestamp on
+    """
+    for path in files:
+        for line in _lines(path):
+            try:
+                entry = json.loads(line)
+                request = entry["request"]
+                ts = float(entry["ts"])
+            except (ValueError, KeyError, TypeError):
+                continue
+            if (since is not None and ts < since) or (
+                until is not None and ts >= until
+            ):
+                continue
+            headers = request.get("headers") or {}
+            if request.get("method") not in REPLAYED_METHODS:
+                continue
+            if any(v.lower() == "websocket" for v in headers.get("Upgrade", [])):
+                continue
+            yield ReplayRequest(
+                ts,
+                request["method"],
+                request.get("uri", "/"),
+                {h: headers[h][0] for h in REPLAYED_HEADERS if headers.get(h)},
+                int(entry.get("status", 0)),
+                float(entry.get("duration", 0)),
+            )
+
+
+def compare_runs(
+    baseline: Dict[str, Any], current: Dict[str, Any]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Relative change of every category's percentiles between two runs.
+
+    Returns:
+        Category -> {"p50": change, ...} (0.1 = 10% slower), for categories in
+        both runs
+    """
+    changes = {}
+    for name, stats in current["summary"].items():
+        before = baseline["summary"].get(name)
+        if not before:
+            continue
+        changes[name] = {
+            f"p{pct}": (
+                stats[f"p{pct}_ms"] / before[f"p{pct}_ms"] - 1
+                if before[f"p{pct}_ms"]
+                else 0.0
+            )
+            for pct in PERCENTILES
+        }
+        changes[name]["errors"] = stats["errors"] - before["errors"]
+    return changes
+
+
+class AccessLogReplayer:
+    """Replays access log requests with bounded concurrency."""
+
+    def __init__(
+        self,
+        base_url: str = REPLAY_URL,
+        concurrency: int = 16,
+        speed: float = 1.0,
+        max_gap: float = 60.0,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        Args:
+            base_url: Local stack (Caddy by default; its certificate is not
+                verified, as everywhere for Caddy's internal CA)
+            concurrency: Maximum requests in flight
+            speed: Time compression of the recorded spacing (0 = no waiting)
+            max_gap: Longest recorded gap kept, in seconds (before compression)
+            timeout: Seconds for connecting and for each read
+        """
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.speed = speed
+        self.max_gap = max_gap
+        self.timeout = timeout
+
+    async def replay(self, requests: Iterable[ReplayRequest]) -> Dict[str, Any]:
+        """
+        Replay the requests.
+
+        Returns:
+            Dict with "summary" (see stats.summarize()), "seconds" (wall time),
+            "lag_ms" (worst delay behind schedule) and the settings
+        """
+        results: list[tuple[str, float, bool]] = []
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks: set[asyncio.Task] = set()
+        started = time.perf_counter()
+        max_lag = 0.0
+
+        async with AsyncHttpClient(
+            self.base_url,
+            timeout=self.timeout,
+            verify=False,
+            pool_size=self.concurrency,
+        ) as client:
+            due = 0.0
+            previous_ts: Optional[float] = None
+            for request in requests:
+                if previous_ts is not None and self.speed:
+                    gap = min(max(request.ts - previous_ts, 0.0), self.max_gap)
+                    due += gap / self.speed
+                previous_ts = request.ts
+
+                delay = started + due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await slots.acquire()
+                max_lag = max(max_lag, time.perf_counter() - started - due)
+                task = asyncio.create_task(self._send(client, request, results))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: slots.release())
+            await asyncio.gather(*tasks)
+
+        return {
+            "base_url": self.base_url,
+            "speed": self.speed,
+            "concurrency": self.concurrency,
+            "seconds": time.perf_counter() - started,
+            "lag_ms": max_lag * 1000,
+            "summary": summarize(results),
+        }
+
+    async def _send(self, client, request: ReplayRequest, results: list) -> None:
+        """Send one request, reading the body to the end."""
+        started = time.perf_counter()
+        try:
+            async with client.stream(
+                request.method, request.uri, headers=request.headers
+            ) as response:
+                # Undecoded: the transfer is what's being timed
+                async for _ in response.aiter_raw():
+                    pass
+            # Local data differs from the store's (ETags, DB files), so only
+            # failures that weren't recorded count as errors
+            ok = response.status_code < 400 or response.status_code == request.status
+        except httpx.HTTPError as exc:
+            logger.debug(f"Replay of {request.method} {request.uri} failed: {exc!r}")
+            ok = False
+        results.append((category(request.uri), time.perf_counter() - started, ok))
+
+
+def format_summary(
+    run: Dict[str, Any], changes: Optional[Dict[str, Dict[str, Any]]] = None
+) -> str:
+    """Table of a run's categories (and the change against a baseline)."""
+    lines = [
+        f"{'category':<12}{'count':>8}{'errors':>8}{'p50 ms':>10}"
+        f"{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+        + ("  vs baseline (p50 / p99)" if changes is not None else "")
+    ]
+    for name, stats in run["summary"].items():
+        line = (
+            f"{name:<12}{stats['count']:>8}{stats['errors']:>8}"
+            f"{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}"
+            f"{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}"
+        )
+        if changes is not None and name in changes:
+            change = changes[name]
+            line += f"  {change['p50']:+.0%} / {change['p99']:+.0%}"
+        lines.append(line)
+    return "\n".join(lines)
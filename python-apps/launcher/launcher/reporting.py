@@ -0,0 +1,446 @@
+"""
+Precomputed end-of-day reports over the store databases.
+
+Reports that tablets would otherwise compute in the browser against their
+synced copy are built here instead, in a worker process at background priority:
+
+- stock_by_warehouse: titles, copies and stock value per warehouse
+- sales_by_day: copies sold and revenue per day (outbound notes)
+- open_customer_orders: open customer order lines by status, with their ages
+
+Each database is read read-only inside a single transaction, so all reports of
+one run see the same consistent (WAL) snapshot and never block the sync server.
+The reports are written as JSON and CSV to reports_dir/<db file name>/ and served
+by Caddy under /reports/<db file name>/<report>.json (or .csv), with an index.json
+holding the db_version they were built at. A database is only rebuilt when its
+db_version moved on, so an idle store costs one cheap query per interval.
+
+NumPy is used for the order-age percentiles when it's installed.
+
+Configured in settings.toml:
+
+    [reporting]
+    enabled = true
+    interval_minutes = 10
+"""
+
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from launcher.change_feed import read_db_version
+from launcher.db_files import list_databases, read_only_uri
+from launcher.logging_config import setup_worker_logging, worker_log_queue
+from launcher.process_priority import BACKGROUND_PRIORITY, apply_priority
+
+logger = logging.getLogger("launcher")
+
+INDEX_NAME = "index.json"
+# Bumped when report definitions change, invalidating reports built before
+REPORTS_VERSION = 1
+# Rows fetched per batch for aggregations done in Python
+FETCH_BATCH_SIZE = 10000
+MS_PER_DAY = 86400 * 1000
+
+# Inbound and reconciliation notes add stock, outbound notes remove it
+# (as in apps/web-client/src/lib/db/cr-sqlite/stock.ts)
+STOCK_BY_WAREHOUSE_SQL = """
+WITH stock AS (
+    SELECT bt.isbn, bt.warehouse_id,
+        SUM(CASE WHEN n.warehouse_id IS NOT NULL OR n.is_reconciliation_note = 1
+            THEN bt.quantity ELSE -bt.quantity END) AS quantity
+    FROM book_transaction bt
+    JOIN note n ON bt.note_id = n.id
+    WHERE n.committed = 1
+    GROUP BY bt.isbn, bt.warehouse_id
+    HAVING quantity != 0
+)
+SELECT
+    s.warehouse_id,
+    COALESCE(w.display_name, s.warehouse_id) AS warehouse_name,
+    COALESCE(w.discount, 0) AS discount,
+    COUNT(*) AS titles,
+    SUM(s.quantity) AS copies,
+    ROUND(SUM(s.quantity * COALESCE(b.price, 0)), 2) AS list_value,
+    ROUND(SUM(s.quantity * COALESCE(b.price, 0))
+        * (1 - COALESCE(w.discount, 0) / 100.0), 2) AS discounted_value
+FROM stock s
+LEFT JOIN book b ON b.isbn = s.isbn
+LEFT JOIN warehouse w ON w.id = s.warehouse_id
+GROUP BY s.warehouse_id
+ORDER BY s.warehouse_id
+"""
+
+# Books are sold at their warehouse's discount, custom items at their price
+SALES_BY_DAY_SQL = """
+WITH outbound AS (
+    SELECT id, committed_at FROM note
+    WHERE committed = 1 AND warehouse_id IS NULL AND is_reconciliation_note = 0
+),
+sales AS (
+    SELECT o.id AS note_id, o.committed_at, bt.quantity,
+        bt.quantity * COALESCE(b.price, 0) AS list_total,
+        bt.quantity * COALESCE(b.price, 0)
+            * (1 - COALESCE(w.discount, 0) / 100.0) AS discounted_total
+    FROM outbound o
+    JOIN book_transaction bt ON bt.note_id = o.id
+    LEFT JOIN book b ON b.isbn = bt.isbn
+    LEFT JOIN warehouse w ON w.id = bt.warehouse_id
+    UNION ALL
+    SELECT o.id, o.committed_at, 1, COALESCE(ci.price, 0), COALESCE(ci.price, 0)
+    FROM outbound o
+    JOIN custom_item ci ON ci.note_id = o.id
+)
+SELECT
+    DATE(committed_at / 1000, 'unixepoch') AS day,
+    COUNT(DISTINCT note_id) AS notes,
+    SUM(quantity) AS copies,
+    ROUND(SUM(list_total), 2) AS list_total,
+    ROUND(SUM(discounted_total), 2) AS discounted_total
+FROM sales
+GROUP BY day
+ORDER BY day
+"""
+
+OPEN_CUSTOMER_ORDER_LINES_SQL = """
+SELECT
+    CASE
+        WHEN received IS NOT NULL THEN 'received'
+        WHEN placed IS NOT NULL THEN 'placed'
+        ELSE 'pending'
+    END AS status,
+    created
+FROM customer_order_lines
+WHERE collected IS NULL
+"""
+
+ORDER_STATUSES = ("pending", "placed", "received")
+
+
+def _numpy_module():
+    """The optional numpy module, or None if not installed."""
+    try:
+        import numpy
+
+        return numpy
+    except ImportError:
+        return None
+
+
+def percentiles(values: list[float], percents: list[float]) -> list[float]:
+    """
+    Percentiles with linear interpolation (numpy.percentile's default method).
+
+    Args:
+        values: Non-empty list of values
+        percents: Percentiles to compute (0-100)
+
+    Returns:
+        One value per requested percentile
+    """
+    np = _numpy_module()
+    if np is not None:
+        result = np.percentile(np.asarray(values, dtype=float), percents)
+        return [float(value) for value in result]
+
+    ordered = sorted(values)
+    result = []
+    for percent in percents:
+        rank = (len(ordered) - 1) * percent / 100
+        low = math.floor(rank)
+        high = min(low + 1, len(ordered) - 1)
+        result.append(ordered[low] + (ordered[high] - ordered[low]) * (rank - low))
+    return result
+
+
+def _query_report(conn: sqlite3.Connection, sql: str) -> list[Dict[str, Any]]:
+    """Run an aggregation query, returning its rows as dicts."""
+    cursor = conn.execute(sql)
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def stock_by_warehouse(conn: sqlite3.Connection, now_ms: int) -> list[Dict[str, Any]]:
+    """Stock totals and value per warehouse."""
+    return _query_report(conn, STOCK_BY_WAREHOUSE_SQL)
+
+
+def sales_by_day(conn: sqlite3.Connection, now_ms: int) -> list[Dict[str, Any]]:
+    """Copies sold and revenue per day."""
+    return _query_report(conn, SALES_BY_DAY_SQL)
+
+
+def open_customer_orders(conn: sqlite3.Connection, now_ms: int) -> list[Dict[str, Any]]:
+    """Open customer order lines per status, with age statistics in days."""
+    ages: Dict[str, list[float]] = {status: [] for status in ORDER_STATUSES}
+    cursor = conn.execute(OPEN_CUSTOMER_ORDER_LINES_SQL)
+    while batch := cursor.fetchmany(FETCH_BATCH_SIZE):
+        for status, created in batch:
+            ages[status].append(max(now_ms - (created or now_ms), 0) / MS_PER_DAY)
+
+    rows = []
+    for status in ORDER_STATUSES:
+        row: Dict[str, Any] = {
+            "status": status,
+            "lines": len(ages[status]),
+            "median_age_days": None,
+            "p90_age_days": None,
+            "oldest_age_days": None,
+        }
+        if ages[status]:
+            median, p90, oldest = percentiles(ages[status], [50, 90, 100])
+            row["median_age_days"] = round(median, 1)
+            row["p90_age_days"] = round(p90, 1)
+            row["oldest_age_days"] = round(oldest, 1)
+        rows.append(row)
+    return rows
+
+
+REPORTS: Dict[str, Callable[[sqlite3.Connection, int], list[Dict[str, Any]]]] = {
+    "stock_by_warehouse": stock_by_warehouse,
+    "sales_by_day": sales_by_day,
+    "open_customer_orders": open_customer_orders,
+}
+
+
+def report_dir(reports_dir: Path, db_path: Path) -> Path:
+    """
+    Directory of a database's reports (/reports/dev.sqlite3/ for dev.sqlite3).
+
+    Keyed on the whole file name, as snapshots are, so dev.sqlite3 and dev.db
+    keep separate reports. The URLs still go to the /reports/* route: the
+    sync server's /*.sqlite3/* routes only match a database at the top level.
+    """
+    return reports_dir / db_path.name
+
+
+def _write_atomically(path: Path, write: Callable[[Any], None]) -> None:
+    """Write a text file via a temporary file, so Caddy never serves half of it."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _write_report(
+    output_dir: Path, name: str, rows: list[Dict[str, Any]], header: Dict[str, Any]
+) -> None:
+    """Write one report as <name>.json and <name>.csv."""
+    _write_atomically(
+        output_dir / f"{name}.json",
+        lambda f: json.dump({**header, "report": name, "rows": rows}, f),
+    )
+
+    def write_csv(f):
+        writer = csv.writer(f)
+        if rows:
+            writer.writerow(rows[0].keys())
+            writer.writerows(row.values() for row in rows)
+
+    _write_atomically(output_dir / f"{name}.csv", write_csv)
+
+
+def read_index(output_dir: Path) -> Optional[Dict[str, Any]]:
+    """The index of a database's reports, or None if there is none (or it's unreadable)."""
+    try:
+        return json.loads((output_dir / INDEX_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def build_reports(
+    db_path: Path, output_dir: Path, now: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Build every report of a database from one consistent snapshot.
+
+    Reports whose tables don't exist (databases with another schema) are skipped.
+
+    Args:
+        db_path: Database file (opened read-only)
+        output_dir: Directory for the report files
+        now: Report time (defaults to the current time)
+
+    Returns:
+        The index written to output_dir
+    """
+    now = time.time() if now is None else now
+    now_ms = int(now * 1000)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(
+        read_only_uri(db_path), uri=True, timeout=30, isolation_level=None
+    )
+    try:
+        # A single read transaction: every report sees the same snapshot
+        conn.execute("BEGIN")
+        db_version = read_db_version(conn)
+        header = {
+            "database": db_path.name,
+            "db_version": db_version,
+            "generated_at": datetime.fromtimestamp(now, timezone.utc).isoformat(),
+        }
+        built = []
+        for name, report in REPORTS.items():
+            started = time.monotonic()
+            try:
+                rows = report(conn, now_ms)
+            except sqlite3.OperationalError as exc:
+                logger.debug(f"Report {name} skipped for {db_path.name}: {exc}")
+                continue
+            _write_report(output_dir, name, rows, header)
+            built.append(name)
+            logger.debug(
+                f"Report {name} for {db_path.name}: {len(rows)} rows "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+    index = {**header, "reports_version": REPORTS_VERSION, "reports": built}
+    _write_atomically(output_dir / INDEX_NAME, lambda f: json.dump(index, f))
+    return index
+
+
+def _reporting_process_main(log_queue, db_paths: list[str], reports_dir: str) -> None:
+    """Entry point of the reporting worker process."""
+    setup_worker_logging(log_queue)
+    apply_priority(os.getpid(), BACKGROUND_PRIORITY)
+    for db_path in db_paths:
+        build_reports(Path(db_path), report_dir(Path(reports_dir), Path(db_path)))
+
+
+class ReportingEngine:
+    """Rebuilds reports in a worker process when a database's db_version changes."""
+
+    def __init__(self, db_dir: Path, reports_dir: Path, interval_minutes: float = 10):
+        """
+        Args:
+            db_dir: Database directory
+            reports_dir: Directory served by Caddy under /reports
+            interval_minutes: Time between checks for changed databases
+        """
+        self.db_dir = db_dir
+        self.reports_dir = reports_dir
+        self.interval_minutes = interval_minutes
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process: Optional[multiprocessing.Process] = None
+        # Guards _process between the worker thread and stop()
+        self._process_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the reporting thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="reporting", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Reports refreshed every {self.interval_minutes:.0f} min "
+            f"into {self.reports_dir}"
+        )
+
+    def stop(self) -> None:
+        """Stop reporting, terminating a running build."""
+        self._stop_event.set()
+        with self._process_lock:
+            if self._process and self._process.is_alive():
+                self._process.terminate()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def stale_databases(self) -> list[Path]:
+        """Databases whose reports are missing or older than their db_version."""
+        stale = []
+        for db_path in list_databases(self.db_dir):
+            index = read_index(report_dir(self.reports_dir, db_path))
+            if index is None or index.get("reports_version") != REPORTS_VERSION:
+                stale.append(db_path)
+                continue
+            try:
+                conn = sqlite3.connect(read_only_uri(db_path), uri=True)
+                try:
+                    db_version = read_db_version(conn)
+                finally:
+                    conn.close()
+            except sqlite3.Error as exc:
+                logger.debug(f"db_version of {db_path.name} unavailable: {exc}")
+                continue
+            if index.get("db_version") != db_version:
+                stale.append(db_path)
+        return stale
+
+    def refresh(self) -> list[str]:
+        """
+        Rebuild the reports of changed databases in a worker process (blocking).
+
+        Returns:
+            Names of the databases whose reports were rebuilt
+        """
+        databases = {db_path.name for db_path in list_databases(self.db_dir)}
+        if self.reports_dir.is_dir():
+            for output_dir in self.reports_dir.iterdir():
+                if output_dir.is_dir() and output_dir.name not in databases:
+                    shutil.rmtree(output_dir, ignore_errors=True)
+                    logger.info(f"Removed reports of {output_dir.name}")
+
+        stale = self.stale_databases()
+        if not stale:
+            return []
+
+        started = time.monotonic()
+        # spawn: never fork a process that runs Qt and Circus threads
+        context = multiprocessing.get_context("spawn")
+        with worker_log_queue(context) as log_queue:
+            with self._process_lock:
+                if self._stop_event.is_set():
+                    # stop() ran before there was a process to terminate
+                    return []
+                self._process = context.Process(
+                    target=_reporting_process_main,
+                    args=(
+                        log_queue,
+                        [str(db_path) for db_path in stale],
+                        str(self.reports_dir),
+                    ),
+                    name="librocco-reporting",
+                    daemon=True,
+                )
+                self._process.start()
+            self._process.join()
+        with self._process_lock:
+            exit_code = self._process.exitcode
+            self._process = None
+        if exit_code != 0:
+            logger.error(f"Reporting process failed (exit code {exit_code})")
+            return []
+
+        names = [db_path.name for db_path in stale]
+        logger.info(
+            f"Reports for {', '.join(names)} built "
+            f"in {time.monotonic() - started:.1f}s"
+        )
+        return names
+
+    def _run(self) -> None:
+        """Reporting loop."""
+        delay = 0.0
+        while not self._stop_event.wait(delay):
+            try:
+                self.refresh()
+            except Exception as exc:
+                logger.error("Report refresh failed", exc_info=exc)
+            delay = self.interval_minutes * 60
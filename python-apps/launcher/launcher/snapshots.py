@@ -0,0 +1,292 @@
+"""
+Precompressed database snapshots for new-device bootstrap.
+
+New tablets download the whole DB during initial sync (GET /:dbname/file).
+Instead of streaming the live file from the sync server, Caddy serves a
+snapshot kept in snapshots_dir:
+
+- a consistent copy made with the online backup API (no WAL, never touching the
+  live file while it's served)
+- gzip and, if zstandard is installed, zstd sidecars that Caddy's file_server
+  serves as precompressed files, with ETag and Range support
+- a manifest.json with the sha256 and size of every snapshot
+
+Snapshots are only rewritten when their content changed, so the file's mtime,
+and with it Caddy's ETag, stays stable until the data does.
+
+Configured in settings.toml:
+
+    [snapshots]
+    enabled = true                # off by default
+    refresh_minutes = 15
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from launcher.backup import backup_database, zstd_module
+from launcher.db_files import list_databases
+from launcher.process_priority import apply_to_current_thread
+
+logger = logging.getLogger("launcher")
+
+MANIFEST_NAME = "manifest.json"
+TMP_SUFFIX = ".tmp"
+CHUNK_SIZE = 1024 * 1024
+
+# How often to check for databases that were replaced (e.g. reset) since their
+# snapshot was taken; those snapshots are withdrawn right away
+CHECK_INTERVAL_SECONDS = 30
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _compress(source: Path, destination: Path, encoding: str) -> None:
+    """Write a gzip or zstd compressed copy of source."""
+    with open(source, "rb") as src, open(destination, "wb") as raw:
+        if encoding == "zstd":
+            # Written once, downloaded by every new device over shop Wi-Fi:
+            # worth a higher level than backups use
+            writer = (
+                zstd_module().ZstdCompressor(level=12).stream_writer(raw, closefd=False)
+            )
+        else:
+            writer = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0)
+        try:
+            while chunk := src.read(CHUNK_SIZE):
+                writer.write(chunk)
+        finally:
+            writer.close()
+
+
+def source_fingerprint(db_path: Path) -> list:
+    """Cheap change detector: inode, size and mtime of the DB and its WAL."""
+    fingerprint = []
+    for path in (db_path, Path(f"{db_path}-wal")):
+        try:
+            stat = path.stat()
+            fingerprint.append([stat.st_ino, stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            fingerprint.append(None)
+    return fingerprint
+
+
+def _same_file(recorded: Optional[list], current: list) -> bool:
+    """Whether the DB file itself is the one a snapshot was taken from."""
+    return bool(recorded and recorded[0] and current[0]) and (
+        recorded[0][0] == current[0][0]
+    )
+
+
+class SnapshotManager:
+    """Builds and refreshes snapshots of every database in db_dir."""
+
+    def __init__(
+        self,
+        db_dir: Path,
+        snapshots_dir: Path,
+        refresh_minutes: float = 15.0,
+        exclusive_lock: Optional[threading.Lock] = None,
+    ):
+        """
+        Args:
+            db_dir: Database directory
+            snapshots_dir: Directory served by Caddy
+            refresh_minutes: How often to check databases for changes
+            exclusive_lock: Lock shared with other DB jobs (backups, maintenance)
+        """
+        self.db_dir = db_dir
+        self.snapshots_dir = snapshots_dir
+        self.refresh_minutes = refresh_minutes
+        self.lock = exclusive_lock or threading.Lock()
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def manifest(self) -> Dict[str, Any]:
+        """The current snapshot manifest ({} if none)."""
+        try:
+            return json.loads((self.snapshots_dir / MANIFEST_NAME).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Bring every snapshot up to date (blocking).
+
+        Databases unchanged since their last snapshot are skipped.
+
+        Returns:
+            The updated manifest
+        """
+        with self.lock:
+            self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+            manifest = self.manifest()
+            databases = manifest.get("databases", {})
+            current = {db_path.name for db_path in list_databases(self.db_dir)}
+
+            for db_path in list_databases(self.db_dir):
+                entry = databases.get(db_path.name)
+                if entry and entry.get("source") == source_fingerprint(db_path):
+                    continue
+                try:
+                    databases[db_path.name] = self._snapshot(db_path, entry)
+                except Exception as exc:
+                    logger.error(f"Snapshot of {db_path.name} failed: {exc}")
+
+            # Databases removed from db_dir
+            for name in set(databases) - current:
+                self._remove(name)
+                del databases[name]
+
+            return self._write_manifest(databases)
+
+    def withdraw_replaced(self) -> list[str]:
+        """
+        Remove snapshots of databases that were deleted or replaced.
+
+        Serving those would hand new devices data from a DB that no longer
+        exists; without a snapshot, Caddy falls back to the sync server.
+
+        Returns:
+            Names of the withdrawn snapshots
+        """
+        withdrawn = []
+        with self.lock:
+            manifest = self.manifest()
+            databases = manifest.get("databases", {})
+            for name, entry in list(databases.items()):
+                fingerprint = source_fingerprint(self.db_dir / name)
+                if not _same_file(entry.get("source"), fingerprint):
+                    self._remove(name)
+                    del databases[name]
+                    withdrawn.append(name)
+            if withdrawn:
+                logger.info(f"Withdrew snapshots of replaced DBs: {withdrawn}")
+                self._write_manifest(databases)
+        return withdrawn
+
+    def clear(self) -> None:
+        """
+        Remove every snapshot and the manifest.
+
+        Used when snapshots are disabled, so stale ones aren't left on disk
+        (or served again as soon as they are re-enabled).
+        """
+        if not self.snapshots_dir.is_dir():
+            return
+        with self.lock:
+            for path in self.snapshots_dir.iterdir():
+                if path.is_file():
+                    path.unlink()
+
+    def start(self) -> None:
+        """Start refreshing snapshots in the background."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="db-snapshots", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Database snapshots refreshed into {self.snapshots_dir}")
+
+    def stop(self) -> None:
+        """Stop the refresh thread."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=30)
+
+    def _snapshot(self, db_path: Path, previous: Optional[Dict]) -> Dict[str, Any]:
+        """Snapshot one database, replacing the served files only on change."""
+        fingerprint = source_fingerprint(db_path)
+        started = time.monotonic()
+        staged = self.snapshots_dir / (db_path.name + TMP_SUFFIX)
+        staged.unlink(missing_ok=True)
+        backup_database(db_path, staged)
+
+        sha256 = _sha256(staged)
+        if previous and previous.get("sha256") == sha256:
+            # Same content (e.g. only a checkpoint happened): keep the served
+            # files, and with them the ETag clients may already hold
+            staged.unlink()
+            return {**previous, "source": fingerprint}
+
+        encodings = ["gzip"] + (["zstd"] if zstd_module() else [])
+        suffixes = {"gzip": ".gz", "zstd": ".zst"}
+        target = self.snapshots_dir / db_path.name
+        for encoding in encodings:
+            sidecar = Path(f"{staged}{suffixes[encoding]}")
+            _compress(staged, sidecar, encoding)
+
+        # Sidecars first: Caddy only serves them when the base file exists
+        sizes = {}
+        for encoding in encodings:
+            sidecar_target = Path(f"{target}{suffixes[encoding]}")
+            os.replace(Path(f"{staged}{suffixes[encoding]}"), sidecar_target)
+            sizes[encoding] = sidecar_target.stat().st_size
+        for stale in set(suffixes) - set(encodings):
+            Path(f"{target}{suffixes[stale]}").unlink(missing_ok=True)
+        os.replace(staged, target)
+
+        size = target.stat().st_size
+        logger.info(
+            f"Snapshot of {db_path.name}: {size / (1024 * 1024):.1f} MB, "
+            + ", ".join(
+                f"{encoding} {compressed / (1024 * 1024):.1f} MB"
+                for encoding, compressed in sizes.items()
+            )
+            + f" in {time.monotonic() - started:.1f}s"
+        )
+        return {
+            "sha256": sha256,
+            "size": size,
+            "compressed_sizes": sizes,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "source": fingerprint,
+        }
+
+    def _write_manifest(self, databases: Dict[str, Any]) -> Dict[str, Any]:
+        """Atomically replace manifest.json."""
+        manifest = {
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+            "databases": databases,
+        }
+        tmp = self.snapshots_dir / (MANIFEST_NAME + TMP_SUFFIX)
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.snapshots_dir / MANIFEST_NAME)
+        return manifest
+
+    def _remove(self, name: str) -> None:
+        """Delete a snapshot and its sidecars."""
+        for suffix in ("", ".gz", ".zst"):
+            (self.snapshots_dir / f"{name}{suffix}").unlink(missing_ok=True)
+
+    def _run(self) -> None:
+        """Refresh loop (first refresh right away)."""
+        apply_to_current_thread()
+        next_refresh = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                if time.monotonic() >= next_refresh:
+                    self.refresh()
+                    next_refresh = time.monotonic() + self.refresh_minutes * 60
+                else:
+                    self.withdraw_replaced()
+            except Exception as exc:
+                logger.error("Snapshot refresh failed", exc_info=exc)
+            self._stop_event.wait(CHECK_INTERVAL_SECONDS)
@@ -4,9 +4,8 @@ Common launcher startup logic shared between GUI and headless modes.
 
 import sys
 import logging
+import threading
 import time
-import ssl
-import urllib.request
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -14,6 +13,20 @@ from launcher.config import Config
 from launcher.binary_manager import BinaryManager
 from launcher.daemon_manager import EmbeddedSupervisor
 from launcher.logging_config import setup_logging as _setup_file_logging
+from launcher.api_client import HttpClient
+from launcher.backup import BackupScheduler, BackupSettings
+from launcher.catalogue_loader import find_crsqlite_extension
+from launcher.cgroups import CgroupManager, load_cgroup_limits
+from launcher.change_feed import ChangeFeedMonitor
+from launcher.listen_sockets import prebound_sockets_enabled
+from launcher.maintenance import MaintenanceScheduler, MaintenanceSettings
+from launcher.node_tuning import load_tuning_profile
+from launcher.preflight import PreflightChecker
+from launcher.prewarm import PagePrewarmer
+from launcher.process_priority import load_priorities
+from launcher.reporting import ReportingEngine
+from launcher.snapshots import SnapshotManager
+from launcher.storage_analytics import StorageAnalyzer, StorageSettings
 from launcher.i18n import setup_i18n, _
 from launcher.network_utils import (
     get_caddy_root_ca_path,
@@ -142,6 +155,26 @@ def create_daemon_manager(
     """
     logger.info("Initializing daemon manager...")
 
+    node_tuning = load_tuning_profile(config.get("syncserver_tuning"))
+    logger.info(f"Sync server Node tuning: {node_tuning.describe()}")
+
+    cgroups = None
+    cgroup_settings = config.get("cgroups") or {}
+    if cgroup_settings.get("enabled", False):
+        cgroups = CgroupManager(
+            load_cgroup_limits(cgroup_settings),
+            strategy=cgroup_settings.get("strategy", "auto"),
+        )
+
+    preflight = None
+    preflight_settings = config.get("preflight") or {}
+    if preflight_settings.get("enabled", True):
+        preflight = PreflightChecker(
+            config.db_dir,
+            config.data_dir / "preflight.json",
+            max_workers=preflight_settings.get("workers") or None,
+        )
+
     daemon_manager = EmbeddedSupervisor(
         caddy_binary=caddy_binary_path,
         caddyfile=config.caddyfile_path,
@@ -152,6 +185,11 @@ def create_daemon_manager(
         syncserver_dir=config.syncserver_dir_path,
         db_dir=config.db_dir,
         gui_mode=gui_mode,
+        node_tuning=node_tuning,
+        priorities=load_priorities(config.get("process_priority")),
+        cgroups=cgroups,
+        prebind_sockets=prebound_sockets_enabled(config.get("prebind_sockets")),
+        preflight=preflight,
     )
 
     # Start daemon manager (starts Circus arbiter)
@@ -161,6 +199,111 @@ def create_daemon_manager(
     return daemon_manager
 
 
+def start_background_services(
+    config: Config, daemon_manager: EmbeddedSupervisor
+) -> None:
+    """
+    Start launcher-side background jobs (backups, maintenance, snapshots, ...).
+
+    Each service is switched by the "enabled" key of its settings section (see
+    Config.service_enabled): the jobs writing to the DB directory are opt-in.
+    Services are registered with the daemon manager, which stops them on
+    shutdown.
+
+    Args:
+        config: Config object
+        daemon_manager: EmbeddedSupervisor instance
+    """
+    # Backups, maintenance and snapshots never run at the same time
+    db_jobs_lock = threading.Lock()
+
+    # Settings section -> service built from its settings, in start order.
+    # Prewarm first, so the databases are warm before the first tills sync;
+    # storage analytics, the change feed and reporting only read, so they don't
+    # take the DB jobs lock
+    services = {
+        "prewarm": lambda settings: PagePrewarmer(
+            config.db_dir, budget_mb=settings.get("budget_mb", 256)
+        ),
+        "backups": lambda settings: BackupScheduler(
+            config.db_dir,
+            config.backups_dir,
+            BackupSettings.from_settings(settings),
+            exclusive_lock=db_jobs_lock,
+        ),
+        "maintenance": lambda settings: MaintenanceScheduler(
+            config.db_dir,
+            access_log=config.logs_dir / "caddy-access.log",
+            history_file=config.logs_dir / "maintenance.jsonl",
+            settings=MaintenanceSettings.from_settings(settings),
+            exclusive_lock=db_jobs_lock,
+            extension=find_crsqlite_extension(),
+            preflight=daemon_manager.preflight,
+        ),
+        "snapshots": lambda settings: SnapshotManager(
+            config.db_dir,
+            config.snapshots_dir,
+            refresh_minutes=settings.get("refresh_minutes", 15.0),
+            exclusive_lock=db_jobs_lock,
+        ),
+        "storage_analytics": lambda settings: StorageAnalyzer(
+            config.db_dir,
+            history_file=config.logs_dir / "storage.jsonl",
+            settings=StorageSettings.from_settings(settings),
+        ),
+        "change_feed": lambda settings: ChangeFeedMonitor(
+            config.db_dir,
+            history_file=config.logs_dir / "change_feed.jsonl",
+            interval_seconds=settings.get("interval_seconds", 60.0),
+            lag_warning_versions=settings.get("lag_warning_versions", 1000),
+        ),
+        "reporting": lambda settings: ReportingEngine(
+            config.db_dir,
+            config.reports_dir,
+            interval_minutes=settings.get("interval_minutes", 10.0),
+        ),
+    }
+    for section, build in services.items():
+        if config.service_enabled(section):
+            service = build(config.get(section) or {})
+            service.start()
+            daemon_manager.background_services.append(service)
+
+    if not config.service_enabled("snapshots"):
+        # The Caddyfile no longer serves them
+        SnapshotManager(config.db_dir, config.snapshots_dir).clear()
+
+
+def start_control_api(config: Config, daemon_manager: EmbeddedSupervisor):
+    """
+    Start the local control API (librocco-headless ctl, chaos, loadgen).
+
+    Both the tray and the headless launcher serve it, unless "control_api" is
+    false in settings.toml. Started before the daemons so scripts can wait for
+    them; registered with the daemon manager, which stops it on shutdown.
+
+    Args:
+        config: Config object
+        daemon_manager: EmbeddedSupervisor instance
+
+    Returns:
+        The running ControlServer, or None if disabled or unavailable
+    """
+    if not config.get("control_api", True):
+        return None
+
+    from launcher.control_api import ControlServer, control_address
+
+    control_server = ControlServer(daemon_manager, control_address(config.data_dir))
+    try:
+        control_server.start()
+    except (RuntimeError, OSError) as e:
+        logger.error(f"Control API not available: {e}")
+        return None
+    daemon_manager.background_services.append(control_server)
+    return control_server
+
+
 def auto_start_daemons(daemon_manager: EmbeddedSupervisor, config: Config) -> None:
     """
     Auto-start configured daemons.
@@ -246,18 +389,11 @@ def setup_ca_certificate(config: Config) -> None:
 
         logger.info("Triggering Caddy CA certificate generation with HTTPS request...")
         try:
-            # Create SSL context that accepts self-signed certificates
-            ssl_context = ssl.create_default_context()
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = ssl.CERT_NONE
-
-            # Make request to trigger CA certificate generation
+            # Accept the not-yet-trusted certificate, that's what we're after
             url = config.get_web_url()
-            req = urllib.request.Request(url, method="HEAD")
-            with urllib.request.urlopen(
-                req, context=ssl_context, timeout=10
-            ) as response:
-                logger.info(f"Made request to {url}, status: {response.status}")
+            with HttpClient(url, timeout=10, verify=False) as client:
+                response = client.request("HEAD", "/")
+                logger.info(f"Made request to {url}, status: {response.status_code}")
         except Exception as e:
             logger.debug(f"Request to trigger CA generation: {e}")
             # This is expected - Caddy may still be starting or the request may fail
@@ -0,0 +1,58 @@
+"""
+Latency statistics shared by the launcher's measurement tools.
+
+Replay, the control API stress test, the load generator, the chaos harness,
+the operation scheduler and the benchmarks all report nearest-rank percentiles
+of timing samples, computed here so their numbers can be compared:
+
+    summary = summarize([("static", 0.012, True), ("file", 0.4, False)])
+    summary["all"]["p90_ms"]
+"""
+
+import math
+from typing import Any, Dict, Iterable
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(ordered: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of sorted samples (0 for none).
+
+    The smallest sample with at least pct% of the samples at or below it: the
+    99th of 100 samples for p99, the lower middle one of an even count for p50.
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(len(ordered) * pct / 100) - 1)]
+
+
+def summarize(
+    results: Iterable[tuple[str, float, bool]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Latency percentiles (ms) and errors by category, plus "all".
+
+    Args:
+        results: (category, seconds, ok) per sample
+
+    Returns:
+        Category -> {"count", "errors", "p50_ms", "p90_ms", "p99_ms", "max_ms"}
+    """
+    by_category: Dict[str, list[tuple[float, bool]]] = {"all": []}
+    for name, seconds, ok in results:
+        by_category.setdefault(name, []).append((seconds, ok))
+        by_category["all"].append((seconds, ok))
+
+    summary = {}
+    for name, samples in sorted(by_category.items()):
+        ordered = sorted(seconds for seconds, _ in samples)
+        stats: Dict[str, Any] = {
+            "count": len(samples),
+            "errors": sum(1 for _, ok in samples if not ok),
+        }
+        for pct in PERCENTILES:
+            stats[f"p{pct}_ms"] = percentile(ordered, pct) * 1000
+        stats["max_ms"] = ordered[-1] * 1000 if ordered else 0.0
+        summary[name] = stats
+    return summary
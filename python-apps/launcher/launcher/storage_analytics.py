@@ -0,0 +1,452 @@
+"""
+Storage breakdown of the sync server's databases, tracked over time.
+
+For every database in db_dir the analyzer reports the bytes used by each table
+and index, grouped into categories:
+
+- "table" / "index": application data (book_transaction, ...)
+- "crsql": CR-SQLite metadata (the *__crsql_clock / *__crsql_pks shadow tables,
+  their indexes and crsql_* bookkeeping tables)
+- "sqlite": SQLite internals (sqlite_schema, sqlite_stat1, ...)
+- "free": pages on the freelist
+
+Databases are opened read-only in a separate process at background priority,
+using the dbstat virtual table, or (when SQLite is built without it) by walking
+the b-tree pages of the main file. Samples go into a TimeSeriesStore, and a
+linear fit over them forecasts when a database hits the size limit or fills
+the disk.
+
+Configured in settings.toml:
+
+    [storage_analytics]
+    enabled = true
+    interval_hours = 24
+    warn_size_mb = 2048     # size where bootstrap downloads and VACUUM get slow
+    warn_days = 90          # warn when a limit is forecast within this horizon
+"""
+
+import dataclasses
+import logging
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional
+
+from launcher.config import settings_from_table
+from launcher.db_files import list_databases, read_only_uri
+from launcher.logging_config import setup_worker_logging, worker_log_queue
+from launcher.process_priority import BACKGROUND_PRIORITY, apply_priority
+from launcher.timeseries import (
+    SECONDS_PER_DAY,
+    TimeSeriesStore,
+    days_until,
+    linear_fit,
+)
+
+logger = logging.getLogger("launcher")
+
+# Forecasts are fitted over this much history
+FORECAST_WINDOW_DAYS = 60
+
+# Delay before the first sample after launcher start
+STARTUP_DELAY_SECONDS = 600
+
+# B-tree page types (first byte of the page header)
+INTERIOR_INDEX_PAGE = 0x02
+INTERIOR_TABLE_PAGE = 0x05
+
+
+@dataclasses.dataclass
+class StorageSettings:
+    """Options for storage analytics."""
+
+    interval_hours: float = dataclasses.field(default=24.0, metadata={"positive": True})
+    warn_size_mb: float = dataclasses.field(default=2048.0, metadata={"positive": True})
+    warn_days: float = dataclasses.field(default=90.0, metadata={"positive": True})
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> "StorageSettings":
+        """Build from the [storage_analytics] settings table, ignoring invalid values."""
+        return settings_from_table(cls, "storage_analytics", settings)
+
+
+def object_category(name: str, object_type: str, table_name: str) -> str:
+    """Category of a b-tree (see the module docstring)."""
+    if "__crsql_" in table_name or table_name.startswith("crsql_"):
+        return "crsql"
+    if name.startswith("sqlite_") and object_type == "table":
+        return "sqlite"
+    return "index" if object_type == "index" else "table"
+
+
+def analyze_database(db_path: Path) -> Dict[str, Any]:
+    """
+    Measure the space used by each table and index of a database.
+
+    Args:
+        db_path: Database file (opened read-only)
+
+    Returns:
+        Dict with file sizes, page counts, the method used ("dbstat" or
+        "pages"), per-object bytes and per-category totals
+    """
+    conn = sqlite3.connect(read_only_uri(db_path), uri=True)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        schema = {
+            name: (object_type, table_name, rootpage)
+            for object_type, name, table_name, rootpage in conn.execute(
+                "SELECT type, name, tbl_name, rootpage FROM sqlite_schema "
+                "WHERE rootpage > 0"
+            )
+        }
+        schema.setdefault("sqlite_schema", ("table", "sqlite_schema", 1))
+
+        try:
+            usage = {
+                name: {"bytes": size, "unused": unused, "pages": pages}
+                for name, size, unused, pages in conn.execute(
+                    "SELECT name, sum(pgsize), sum(unused), count(*) "
+                    "FROM dbstat GROUP BY name"
+                )
+            }
+            method = "dbstat"
+        except sqlite3.OperationalError:
+            method = "pages"
+    finally:
+        conn.close()
+
+    if method == "pages":
+        # Without dbstat: count each b-tree's pages in the main file. Overflow
+        # pages and changes still in the WAL are not attributed
+        roots = {name: rootpage for name, (_, _, rootpage) in schema.items()}
+        counts = count_btree_pages(db_path, page_size, roots)
+        usage = {
+            name: {"bytes": pages * page_size, "unused": None, "pages": pages}
+            for name, pages in counts.items()
+        }
+
+    objects = {}
+    categories = {"table": 0, "index": 0, "crsql": 0, "sqlite": 0}
+    for name, stats in usage.items():
+        object_type, table_name, _ = schema.get(name, ("table", name, 0))
+        category = object_category(name, object_type, table_name)
+        objects[name] = {"type": object_type, "category": category, **stats}
+        categories[category] += stats["bytes"]
+    categories["free"] = freelist_count * page_size
+
+    wal_path = Path(f"{db_path}-wal")
+    return {
+        "file_bytes": db_path.stat().st_size,
+        "wal_bytes": wal_path.stat().st_size if wal_path.exists() else 0,
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "method": method,
+        "objects": objects,
+        "categories": categories,
+    }
+
+
+def walk_btree(f: BinaryIO, page_size: int, root: int) -> tuple[set[int], set[int]]:
+    """
+    Find the pages of a b-tree by reading its interior pages.
+
+    Args:
+        f: Database file opened for binary reading
+        page_size: Page size in bytes
+        root: Root page number
+
+    Returns:
+        (interior page numbers, leaf page numbers); leaf pages aren't read
+    """
+    interior: set[int] = set()
+    leaves: set[int] = set()
+    stack = [root]
+    while stack:
+        page_number = stack.pop()
+        if page_number in interior or page_number in leaves or page_number < 1:
+            continue
+        f.seek((page_number - 1) * page_size)
+        page = f.read(page_size)
+        # Page 1 starts with the 100 byte file header
+        header = 100 if page_number == 1 else 0
+        if len(page) <= header or page[header] not in (
+            INTERIOR_INDEX_PAGE,
+            INTERIOR_TABLE_PAGE,
+        ):
+            leaves.add(page_number)
+            continue
+        interior.add(page_number)
+        cell_count = int.from_bytes(page[header + 3 : header + 5], "big")
+        stack.append(int.from_bytes(page[header + 8 : header + 12], "big"))
+        for i in range(cell_count):
+            pointer_at = header + 12 + 2 * i
+            cell = int.from_bytes(page[pointer_at : pointer_at + 2], "big")
+            stack.append(int.from_bytes(page[cell : cell + 4], "big"))
+    return interior, leaves
+
+
+def count_btree_pages(
+    db_path: Path, page_size: int, roots: Dict[str, int]
+) -> Dict[str, int]:
+    """
+    Count the interior and leaf pages of each b-tree by walking the file.
+
+    Args:
+        db_path: Database file
+        page_size: Page size in bytes
+        roots: Root page number of each b-tree, by name
+
+    Returns:
+        Page count by name
+    """
+    counts = {}
+    with open(db_path, "rb") as f:
+        for name, root in roots.items():
+            interior, leaves = walk_btree(f, page_size, root)
+            counts[name] = len(interior) + len(leaves)
+    return counts
+
+
+def sample_storage(db_dir: Path, store: TimeSeriesStore) -> Dict[str, Any]:
+    """
+    Analyze every database and append the results to the store.
+
+    Returns:
+        Analysis by database file name
+    """
+    results = {}
+    for db_path in list_databases(db_dir):
+        try:
+            analysis = analyze_database(db_path)
+        except (sqlite3.Error, OSError) as exc:
+            logger.error(f"Storage analysis of {db_path.name} failed: {exc}")
+            continue
+        store.append(db_path.name, analysis)
+        results[db_path.name] = analysis
+    store.compact()
+    return results
+
+
+def forecast(
+    store: TimeSeriesStore,
+    db_name: str,
+    size_limit_bytes: float,
+    disk_free_bytes: Optional[float] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Forecast a database's growth from its stored samples.
+
+    Args:
+        store: Storage samples
+        db_name: Database file name (series)
+        size_limit_bytes: Size considered a performance cliff
+        disk_free_bytes: Free space on the DB's disk, if known
+        now: Reference time (defaults to now)
+
+    Returns:
+        Dict with the current size, growth in bytes/day (None with too few
+        samples), the CR-SQLite metadata share, and days until the size limit
+        and until the disk is full (None when not growing)
+    """
+    now = time.time() if now is None else now
+    since = now - FORECAST_WINDOW_DAYS * SECONDS_PER_DAY
+    records = store.read(db_name, since=since)
+    if not records:
+        return {}
+
+    def total(record):
+        return record["values"]["file_bytes"] + record["values"]["wal_bytes"]
+
+    points = [(record["ts"], total(record)) for record in records]
+    current = points[-1][1]
+    latest = records[-1]["values"]
+    used = sum(latest["categories"].values()) - latest["categories"]["free"]
+
+    result = {
+        "bytes": current,
+        "crsql_share": latest["categories"]["crsql"] / used if used else 0.0,
+        "growth_bytes_per_day": None,
+        "days_to_size_limit": days_until(points, size_limit_bytes, now),
+        "days_to_disk_full": None,
+    }
+    fit = linear_fit(points)
+    if fit is not None:
+        result["growth_bytes_per_day"] = fit[0] * SECONDS_PER_DAY
+    if disk_free_bytes is not None:
+        result["days_to_disk_full"] = days_until(points, current + disk_free_bytes, now)
+    return result
+
+
+def format_report(analysis: Dict[str, Any], top: int = 10) -> list[str]:
+    """Human-readable lines summarizing one database analysis."""
+
+    def mb(size):
+        return f"{size / (1024 * 1024):.1f} MB"
+
+    lines = [
+        ", ".join(
+            f"{category} {mb(size)}"
+            for category, size in analysis["categories"].items()
+            if size
+        )
+    ]
+    largest = sorted(
+        analysis["objects"].items(), key=lambda item: item[1]["bytes"], reverse=True
+    )
+    for name, stats in largest[:top]:
+        lines.append(f"  {name} ({stats['category']}): {mb(stats['bytes'])}")
+    return lines
+
+
+def _storage_process_main(log_queue, db_dir: str, store_path: str) -> None:
+    """Entry point of the analysis worker process."""
+    setup_worker_logging(log_queue)
+    apply_priority(os.getpid(), BACKGROUND_PRIORITY)
+    sample_storage(Path(db_dir), TimeSeriesStore(Path(store_path)))
+
+
+class StorageAnalyzer:
+    """Samples storage in a worker process on a fixed interval and forecasts growth."""
+
+    def __init__(self, db_dir: Path, history_file: Path, settings: StorageSettings):
+        """
+        Args:
+            db_dir: Database directory
+            history_file: Time-series file for the samples
+            settings: Analytics options
+        """
+        self.db_dir = db_dir
+        self.store = TimeSeriesStore(history_file)
+        self.settings = settings
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process: Optional[multiprocessing.Process] = None
+        # Guards _process between the worker thread and stop()
+        self._process_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the sampling thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="storage-analytics", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Storage analytics every {self.settings.interval_hours}h "
+            f"into {self.store.path}"
+        )
+
+    def stop(self) -> None:
+        """Stop sampling, terminating a running analysis."""
+        self._stop_event.set()
+        with self._process_lock:
+            if self._process and self._process.is_alive():
+                self._process.terminate()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def sample_sync(self) -> bool:
+        """
+        Take one sample in a worker process and report on it (blocking).
+
+        Returns:
+            True if the worker succeeded
+        """
+        started = time.monotonic()
+        # spawn: never fork a process that runs Qt and Circus threads
+        context = multiprocessing.get_context("spawn")
+        with worker_log_queue(context) as log_queue:
+            with self._process_lock:
+                if self._stop_event.is_set():
+                    # stop() ran before there was a process to terminate
+                    return False
+                self._process = context.Process(
+                    target=_storage_process_main,
+                    args=(log_queue, str(self.db_dir), str(self.store.path)),
+                    name="librocco-storage-analytics",
+                    daemon=True,
+                )
+                self._process.start()
+            self._process.join()
+        with self._process_lock:
+            exit_code = self._process.exitcode
+            self._process = None
+        if exit_code != 0:
+            logger.error(f"Storage analysis process failed (exit code {exit_code})")
+            return False
+
+        logger.info(f"Storage analysis took {time.monotonic() - started:.1f}s")
+        self.report()
+        return True
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Log the latest breakdown and forecast of every database.
+
+        Forecasts reaching the size limit or a full disk within warn_days are
+        logged as warnings.
+
+        Returns:
+            Forecast by database file name
+        """
+        try:
+            disk_free = shutil.disk_usage(self.db_dir).free
+        except OSError:
+            disk_free = None
+        size_limit = self.settings.warn_size_mb * 1024 * 1024
+
+        forecasts = {}
+        for db_name in self.store.series_names():
+            latest = self.store.read(db_name)[-1]["values"]
+            outlook = forecast(self.store, db_name, size_limit, disk_free)
+            if not outlook:
+                continue
+            forecasts[db_name] = outlook
+
+            growth = outlook["growth_bytes_per_day"]
+            logger.info(
+                f"Storage {db_name}: {outlook['bytes'] / (1024 * 1024):.1f} MB, "
+                f"{outlook['crsql_share']:.0%} CR-SQLite metadata"
+                + (f", {growth / 1024:+.0f} KB/day" if growth is not None else "")
+            )
+            for line in format_report(latest):
+                logger.info(f"  {line}")
+
+            for key, what in (
+                ("days_to_size_limit", f"{self.settings.warn_size_mb:.0f} MB"),
+                ("days_to_disk_full", "a full disk"),
+            ):
+                days = outlook[key]
+                if days is not None and days <= self.settings.warn_days:
+                    logger.warning(
+                        f"Storage {db_name} is forecast to reach {what} "
+                        f"in {days:.0f} days"
+                    )
+        return forecasts
+
+    def _run(self) -> None:
+        """Sampling loop."""
+        interval = self.settings.interval_hours * 3600
+        delay = STARTUP_DELAY_SECONDS
+        records = self.store.read()
+        if records:
+            age = time.time() - records[-1]["ts"]
+            delay = max(interval - age, STARTUP_DELAY_SECONDS)
+        while not self._stop_event.wait(delay):
+            try:
+                self.sample_sync()
+            except Exception as exc:
+                logger.error("Storage analysis failed", exc_info=exc)
+            delay = interval
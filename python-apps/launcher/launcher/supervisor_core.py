@@ -0,0 +1,528 @@
+"""
+asyncio core of the embedded supervisor.
+
+Every daemon operation (status, start, stop, restart, priority changes, profile
+captures) is a coroutine running on one event loop, owned by the supervisor and
+running in its own thread. Both modes drive the same core:
+
+- headless mode and blocking callers (startup, tests, benchmarks) through
+  run(), which waits for the result
+- the GUI through submit(): EmbeddedSupervisor's non-blocking methods go
+  through the core's OperationScheduler (operation_scheduler.py) and emit the
+  result as a Qt signal, which Qt queues to the GUI thread
+
+    status = supervisor.core.run(supervisor.core.status("caddy"))
+    supervisor.core.submit(supervisor.core.restart_all())
+
+Circus commands go over an asyncio DEALER socket that matches replies to calls
+by id, so concurrent calls don't lose each other's replies. The arbiter carries
+out one watcher command at a time and rejects the others ("arbiter is already
+running ..."): rejected commands are retried until the arbiter is free, instead
+of sleeping between commands. Operations on one daemon are serialized, while
+operations on different daemons run in parallel (e.g. the sync server starts
+while Caddy's admin API is being polled). A CPU profile capture holds the sync
+server's lock for its whole duration, so nothing restarts the sync server
+under it. Blocking work (pre-flight checks, waiting for profile files) runs in
+the default executor.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import signal
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Coroutine, Dict, Optional
+
+import zmq
+import zmq.asyncio
+from circus.exc import CallError
+
+from launcher.api_client import AsyncCaddyAdminClient
+from launcher.config import DAEMONS
+from launcher.operation_scheduler import OperationScheduler
+from launcher.process_priority import apply_priority_tree
+from launcher.profiling import (
+    CPU_PROFILE_SUFFIX,
+    DEFAULT_CPU_PROFILE_SECONDS,
+    HEAP_SNAPSHOT_SUFFIX,
+    HEAPSNAPSHOT_SIGNAL,
+    MAX_CPU_PROFILE_SECONDS,
+    heapsnapshot_supported,
+)
+
+logger = logging.getLogger("launcher")
+
+# Reason of the arbiter's rejections while it carries out another command
+ARBITER_BUSY = "arbiter is already running"
+
+
+class DaemonStatus:
+    """Daemon status information."""
+
+    def __init__(
+        self,
+        name: str,
+        status: str,
+        pid: Optional[int] = None,
+        uptime: Optional[float] = None,
+    ):
+        self.name = name
+        self.status = status  # "active", "stopped", "starting", "error"
+        self.pid = pid
+        self.uptime = uptime
+
+
+class CircusConnection:
+    """asyncio Circus client: concurrent calls over one DEALER socket."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        """
+        Args:
+            endpoint: The arbiter's controller endpoint
+            timeout: Seconds to wait for each reply
+        """
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self._context: Optional[zmq.asyncio.Context] = None
+        self._socket = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    def connect(self) -> None:
+        """Open the socket (on the event loop it will be used from)."""
+        self._context = zmq.asyncio.Context()
+        self._socket = self._context.socket(zmq.DEALER)
+        self._socket.setsockopt(zmq.IDENTITY, uuid.uuid4().hex.encode())
+        self._socket.setsockopt(zmq.LINGER, 0)
+        self._socket.connect(self.endpoint)
+        self._reader = asyncio.get_running_loop().create_task(self._read_replies())
+
+    async def send_message(self, command: str, **props) -> Dict[str, Any]:
+        """Send a command and wait for its reply (CallError on timeout)."""
+        call_id = uuid.uuid4().hex
+        reply = asyncio.get_running_loop().create_future()
+        self._pending[call_id] = reply
+        message = {"command": command, "properties": props, "id": call_id}
+        try:
+            await self._socket.send(json.dumps(message).encode())
+            return await asyncio.wait_for(reply, self.timeout)
+        except asyncio.TimeoutError:
+            raise CallError("Timed out.")
+        except zmq.ZMQError as exc:
+            raise CallError(str(exc))
+        finally:
+            self._pending.pop(call_id, None)
+
+    async def _read_replies(self) -> None:
+        while True:
+            frames = await self._socket.recv_multipart()
+            try:
+                reply = json.loads(frames[-1])
+            except ValueError:
+                continue
+            waiter = self._pending.get(reply.get("id"))
+            if waiter and not waiter.done():
+                waiter.set_result(reply)
+
+    async def close(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+        if self._socket is not None:
+            self._socket.close()
+        if self._context is not None:
+            self._context.term()
+
+
+class SupervisorCore:
+    """Awaitable daemon operations of an EmbeddedSupervisor."""
+
+    # Seconds to keep retrying a command the busy arbiter rejected
+    BUSY_TIMEOUT = 30.0
+    BUSY_RETRY_INTERVAL = 0.02
+    # Seconds for a stopped watcher to report "stopped"
+    STOP_TIMEOUT = 30.0
+    CADDY_READY_TIMEOUT = 30.0
+    CADDY_READY_INTERVAL = 0.5
+
+    def __init__(self, supervisor):
+        """
+        Args:
+            supervisor: The EmbeddedSupervisor (arbiter endpoint, pre-flight
+                checks, profiler)
+        """
+        self.supervisor = supervisor
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.circus: Optional[CircusConnection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._daemon_locks: Dict[str, asyncio.Lock] = {}
+        self.scheduler = OperationScheduler(self)
+
+    @property
+    def running(self) -> bool:
+        # Coroutines can be submitted as soon as the loop exists
+        return self.loop is not None
+
+    def start(self) -> None:
+        """Start the event loop thread and connect to the arbiter."""
+        if self.running:
+            return
+        # zmq.asyncio needs add_reader(), which Windows' proactor loop lacks
+        self.loop = asyncio.SelectorEventLoop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="supervisor-core", daemon=True
+        )
+        self._thread.start()
+        self.circus = CircusConnection(self.supervisor.endpoint)
+        self.scheduler = OperationScheduler(self)
+        self.run(self._connect())
+
+    async def _connect(self) -> None:
+        self.circus.connect()
+        self._daemon_locks = {name: asyncio.Lock() for name in DAEMONS}
+
+    def stop(self) -> None:
+        """Cancel pending operations and stop the event loop thread."""
+        if not self.running:
+            return
+
+        async def shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.circus.close()
+
+        try:
+            self.run(shutdown(), timeout=10)
+        except Exception as exc:
+            logger.error("Failed to shut down the supervisor core", exc_info=exc)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.loop.close()
+        self.loop = None
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the core's loop, from any thread."""
+        if not self.running:
+            coro.close()
+            raise RuntimeError("Supervisor core is not running")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the core's loop and wait for its result."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run() would block the supervisor core's own loop")
+        return self.submit(coro).result(timeout)
+
+    async def call(self, command: str, **props) -> Dict[str, Any]:
+        """Send a Circus command, retrying while the arbiter is busy."""
+        deadline = time.monotonic() + self.BUSY_TIMEOUT
+        while True:
+            response = await self.circus.send_message(command, **props)
+            if (
+                response.get("status") != "error"
+                or ARBITER_BUSY not in str(response.get("reason"))
+                or time.monotonic() > deadline
+            ):
+                return response
+            await asyncio.sleep(self.BUSY_RETRY_INTERVAL)
+
+    async def status(self, daemon_name: str) -> DaemonStatus:
+        """Status of a daemon ("error" if the arbiter can't be asked)."""
+        if not self.supervisor._running:
+            return DaemonStatus(daemon_name, "stopped")
+        try:
+            # When querying with name parameter, status is in response["status"]
+            response = await self.circus.send_message("status", name=daemon_name)
+            watcher_status = response.get("status", "stopped")
+            if watcher_status == "active":
+                listed = await self.circus.send_message("list", name=daemon_name)
+                pids = listed.get("pids", [])
+                return DaemonStatus(
+                    daemon_name, "active", pid=pids[0] if pids else None
+                )
+            return DaemonStatus(daemon_name, watcher_status)
+        except Exception as exc:
+            logger.error(f"Failed to get status for {daemon_name}", exc_info=exc)
+            return DaemonStatus(daemon_name, "error")
+
+    async def system_status(self) -> tuple[DaemonStatus, DaemonStatus]:
+        """Statuses of Caddy and the sync server."""
+        caddy, syncserver = await asyncio.gather(
+            self.status("caddy"), self.status("syncserver")
+        )
+        return caddy, syncserver
+
+    async def start_daemon(self, daemon_name: str) -> bool:
+        """Start a daemon (Caddy: until its admin API answers)."""
+        async with self._daemon_locks[daemon_name]:
+            status = await self.status(daemon_name)
+            if status.status == "active":
+                logger.info(
+                    f"Daemon {daemon_name} is already running (PID {status.pid})"
+                )
+                return True
+            return await self._start(daemon_name)
+
+    async def stop_daemon(self, daemon_name: str) -> bool:
+        """Stop a daemon, returning once its watcher reports it stopped."""
+        async with self._daemon_locks[daemon_name]:
+            status = await self.status(daemon_name)
+            if status.status == "stopped":
+                logger.info(f"Daemon {daemon_name} is already stopped")
+                return True
+            return await self._stop(daemon_name)
+
+    async def restart_daemon(self, daemon_name: str) -> bool:
+        """
+        Restart a daemon (Caddy: until its admin API answers).
+
+        Stops and starts the watcher rather than using Circus' restart, so the
+        sync server's pre-flight checks run while no process has the
+        databases open.
+        """
+        async with self._daemon_locks[daemon_name]:
+            logger.info(f"Restarting daemon: {daemon_name}")
+            if not await self._restart(daemon_name):
+                return False
+            logger.info(f"Successfully restarted daemon: {daemon_name}")
+            return True
+
+    async def set_priority(self, daemon_name: str, settings) -> bool:
+        """
+        Apply CPU/IO priority settings to a running daemon's process tree.
+
+        Holds the daemon's lock, so the process can't be replaced while its
+        tree is walked (a daemon spawned later gets the settings from the
+        after_spawn hook).
+        """
+        async with self._daemon_locks[daemon_name]:
+            status = await self.status(daemon_name)
+            if status.status != "active" or not status.pid:
+                return True
+            applied = await asyncio.to_thread(apply_priority_tree, status.pid, settings)
+            logger.info(
+                f"Updated priority of {daemon_name} (PID {status.pid}): "
+                f"{', '.join(applied) or 'nothing applied'}"
+            )
+            return True
+
+    async def _restart(
+        self, daemon_name: str, args: Optional[list[str]] = None
+    ) -> bool:
+        """
+        Stop a daemon, optionally change its args, and start it again (the
+        caller holds its lock).
+
+        The watcher's args are only set while it is stopped: Circus reloads a
+        running watcher by spawning the new process before stopping the old
+        one, which would leave two sync servers on the same port and
+        databases.
+        """
+        status = await self.status(daemon_name)
+        if status.status != "stopped" and not await self._stop(daemon_name):
+            return False
+        if args is not None and not await self._set_args(daemon_name, args):
+            return False
+        return await self._start(daemon_name)
+
+    async def _start(self, daemon_name: str) -> bool:
+        """Start a stopped daemon (the caller holds its lock)."""
+        if daemon_name == "syncserver":
+            await asyncio.to_thread(self.supervisor._run_preflight)
+
+        logger.info(f"Starting daemon: {daemon_name}")
+        response = await self.call("start", name=daemon_name)
+        if response.get("status") != "ok":
+            logger.error(
+                f"Failed to start daemon {daemon_name}. Circus response: {response}"
+            )
+            return False
+
+        logger.info(f"Successfully sent start command to {daemon_name}")
+        if daemon_name == "caddy" and not await self._wait_for_caddy_ready():
+            logger.error("Caddy did not become ready within timeout")
+            return False
+        logger.info(f"Successfully started daemon: {daemon_name}")
+        return True
+
+    async def _stop(self, daemon_name: str) -> bool:
+        """Stop a running daemon (the caller holds its lock)."""
+        logger.info(f"Stopping daemon: {daemon_name}")
+        response = await self.call("stop", name=daemon_name)
+        if response.get("status") != "ok":
+            logger.error(
+                f"Failed to stop daemon {daemon_name}. Circus response: {response}"
+            )
+            return False
+
+        # The arbiter answers before the process has exited
+        if not await self._wait_for_status(daemon_name, "stopped"):
+            logger.warning(f"Daemon {daemon_name} is still stopping")
+        logger.info(f"Successfully stopped daemon: {daemon_name}")
+        return True
+
+    async def start_all(self) -> bool:
+        """Start Caddy and the sync server side by side."""
+        logger.info("Starting all daemons (Caddy + Sync Server)")
+        caddy, syncserver = await asyncio.gather(
+            self.start_daemon("caddy"), self.start_daemon("syncserver")
+        )
+        return self._log_all("start", {"caddy": caddy, "syncserver": syncserver})
+
+    async def stop_all(self) -> bool:
+        """
+        Stop the sync server, then Caddy (even if the sync server failed to
+        stop): Caddy keeps proxying sync connections until the sync server has
+        flushed and closed them.
+        """
+        logger.info("Stopping all daemons (Sync Server + Caddy)")
+        results = {}
+        for daemon_name in ("syncserver", "caddy"):
+            results[daemon_name] = await self.stop_daemon(daemon_name)
+        return self._log_all("stop", results)
+
+    async def restart_all(self) -> bool:
+        """Restart Caddy, then the sync server (not if Caddy failed)."""
+        logger.info("Restarting all daemons (Caddy + Sync Server)")
+        results = {"caddy": await self.restart_daemon("caddy")}
+        if results["caddy"]:
+            results["syncserver"] = await self.restart_daemon("syncserver")
+        return self._log_all("restart", results)
+
+    def _log_all(self, operation: str, results: Dict[str, bool]) -> bool:
+        failed = [name for name, ok in results.items() if not ok]
+        if failed:
+            logger.error(f"Failed to {operation}: {', '.join(failed)}")
+            return False
+        done = {"start": "started", "stop": "stopped", "restart": "restarted"}
+        logger.info(f"Successfully {done[operation]} all daemons")
+        return True
+
+    async def operation_stats(self) -> Dict[str, Dict[str, Any]]:
+        """The scheduler's per operation counts and timings (on the loop)."""
+        return self.scheduler.stats()
+
+    async def capture_profile(
+        self, kind: str = "cpu", duration: float = DEFAULT_CPU_PROFILE_SECONDS
+    ) -> Optional[Path]:
+        """
+        Capture a sync server profile.
+
+        Args:
+            kind: "cpu" for a time-boxed CPU profile, "heap" for a heap snapshot
+            duration: CPU profile length in seconds (capped at
+                MAX_CPU_PROFILE_SECONDS)
+
+        Returns:
+            Path to the captured artefact, or None on failure
+        """
+        if kind not in ("cpu", "heap"):
+            raise ValueError(f"Unknown profile kind: {kind}")
+        if kind == "heap" and not heapsnapshot_supported():
+            logger.warning("Heap snapshots are not supported on this platform")
+            return None
+        profiler = self.supervisor.profiler
+        if not profiler.begin():
+            return None
+        try:
+            if kind == "cpu":
+                return await self._capture_cpu_profile(profiler, duration)
+            return await self._capture_heap_snapshot(profiler)
+        finally:
+            profiler.end()
+
+    async def _capture_cpu_profile(self, profiler, duration: float) -> Optional[Path]:
+        async with self._daemon_locks["syncserver"]:
+            if (await self.status("syncserver")).status != "active":
+                logger.warning("Cannot capture CPU profile: sync server is not running")
+                return None
+
+            duration = max(1.0, min(float(duration), MAX_CPU_PROFILE_SECONDS))
+            before = await asyncio.to_thread(
+                profiler.existing_files, CPU_PROFILE_SUFFIX
+            )
+            try:
+                logger.info(
+                    f"Restarting sync server with CPU profiling for {duration:.0f}s"
+                )
+                if not await self._restart("syncserver", profiler.cpu_profile_args()):
+                    return None
+                await asyncio.sleep(duration)
+            finally:
+                # Always return the sync server to its normal arguments
+                logger.info("Restarting sync server without CPU profiling")
+                await self._restart("syncserver", profiler.normal_args())
+
+        return await asyncio.to_thread(
+            profiler.collect, "cpu", before, profiler.CPU_PROFILE_WRITE_TIMEOUT
+        )
+
+    async def _capture_heap_snapshot(
+        self, profiler, timeout: float = 120.0
+    ) -> Optional[Path]:
+        async with self._daemon_locks["syncserver"]:
+            status = await self.status("syncserver")
+            if status.status != "active" or not status.pid:
+                logger.warning("Cannot take heap snapshot: sync server is not running")
+                return None
+            if not await asyncio.to_thread(profiler.heap_snapshot_fits, status.pid):
+                return None
+
+            before = await asyncio.to_thread(
+                profiler.existing_files, HEAP_SNAPSHOT_SUFFIX
+            )
+            logger.info(f"Requesting heap snapshot from sync server (PID {status.pid})")
+            response = await self.call(
+                "signal",
+                name="syncserver",
+                signum=getattr(signal, HEAPSNAPSHOT_SIGNAL),
+                # In development the watcher runs tsx, which spawns the actual
+                # node process - signal that instead of the tsx wrapper
+                children=profiler.runs_via_wrapper(),
+            )
+            if response.get("status") != "ok":
+                logger.error(
+                    f"Failed to signal sync server. Circus response: {response}"
+                )
+                return None
+
+        return await asyncio.to_thread(profiler.collect, "heap", before, timeout)
+
+    async def _set_args(self, daemon_name: str, args: list[str]) -> bool:
+        """Change a stopped watcher's args (see _restart())."""
+        response = await self.call("set", name=daemon_name, options={"args": args})
+        if response.get("status") != "ok":
+            logger.error(
+                f"Failed to update {daemon_name} arguments. Circus response: {response}"
+            )
+            return False
+        return True
+
+    async def _wait_for_status(self, daemon_name: str, expected: str) -> bool:
+        deadline = time.monotonic() + self.STOP_TIMEOUT
+        while time.monotonic() < deadline:
+            if (await self.status(daemon_name)).status == expected:
+                return True
+            await asyncio.sleep(0.02)
+        return False
+
+    async def _wait_for_caddy_ready(self) -> bool:
+        """Wait for Caddy's admin API to become responsive."""
+        logger.info("Waiting for Caddy admin API to be ready...")
+        # One keep-alive connection for all polls
+        async with AsyncCaddyAdminClient(timeout=1) as admin:
+            if await admin.wait_until_ready(
+                timeout=self.CADDY_READY_TIMEOUT, interval=self.CADDY_READY_INTERVAL
+            ):
+                logger.info("Caddy admin API is ready.")
+                return True
+        logger.error(
+            "Caddy admin API did not become ready within the specified timeout."
+        )
+        return False
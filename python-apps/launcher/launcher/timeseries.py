@@ -0,0 +1,160 @@
+"""
+Small local time-series store for launcher metrics.
+
+Samples are appended as JSON lines ({"ts": ..., "series": ..., "values": {...}})
+to one file per metric family under logs_dir. Files are compacted in place once
+they hold samples older than the retention period, so they stay small enough to
+read whole.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("launcher")
+
+SECONDS_PER_DAY = 86400
+
+
+class TimeSeriesStore:
+    """Append-only JSON lines store with age-based retention."""
+
+    def __init__(self, path: Path, retention_days: float = 365.0):
+        """
+        Args:
+            path: JSON lines file
+            retention_days: Samples older than this are dropped on compaction
+        """
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+
+    def append(
+        self, series: str, values: Dict[str, Any], ts: Optional[float] = None
+    ) -> None:
+        """
+        Append one sample.
+
+        Args:
+            series: Series name (e.g. a database file name)
+            values: JSON-serializable sample values
+            ts: Unix timestamp (defaults to now)
+        """
+        record = {"ts": time.time() if ts is None else ts, "series": series}
+        record["values"] = values
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def read(
+        self, series: Optional[str] = None, since: Optional[float] = None
+    ) -> list[Dict[str, Any]]:
+        """
+        Read samples, oldest first.
+
+        Args:
+            series: Only samples of this series
+            since: Only samples at or after this Unix timestamp
+
+        Returns:
+            List of {"ts", "series", "values"} records
+        """
+        records = []
+        for record in self._iter_records():
+            if series is not None and record.get("series") != series:
+                continue
+            if since is not None and record.get("ts", 0) < since:
+                continue
+            records.append(record)
+        records.sort(key=lambda record: record["ts"])
+        return records
+
+    def series_names(self) -> list[str]:
+        """Names of all series in the store."""
+        return sorted({record["series"] for record in self._iter_records()})
+
+    def compact(self) -> int:
+        """
+        Drop samples older than the retention period.
+
+        Returns:
+            Number of samples dropped
+        """
+        cutoff = time.time() - self.retention_days * SECONDS_PER_DAY
+        with self._lock:
+            records = list(self._iter_records())
+            kept = [record for record in records if record["ts"] >= cutoff]
+            if len(kept) == len(records):
+                return 0
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "w") as f:
+                for record in kept:
+                    f.write(json.dumps(record) + "\n")
+            os.replace(tmp, self.path)
+        return len(records) - len(kept)
+
+    def _iter_records(self) -> Iterable[Dict[str, Any]]:
+        """Parse the file, skipping torn or malformed lines."""
+        try:
+            with open(self.path) as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "ts" in record and "series" in record:
+                yield record
+
+
+def linear_fit(points: list[tuple[float, float]]) -> Optional[tuple[float, float]]:
+    """
+    Least-squares line through (x, y) points.
+
+    Returns:
+        (slope, intercept), or None with fewer than two distinct x values
+    """
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+    return slope, mean_y - slope * mean_x
+
+
+def days_until(
+    points: list[tuple[float, float]], threshold: float, now: Optional[float] = None
+) -> Optional[float]:
+    """
+    Forecast when a growing value reaches a threshold.
+
+    Args:
+        points: (unix timestamp, value) samples
+        threshold: Value to reach
+        now: Reference time (defaults to now)
+
+    Returns:
+        Days from now (0 if already reached), or None if not growing
+    """
+    fit = linear_fit(points)
+    if fit is None:
+        return None
+    slope, intercept = fit
+    now = time.time() if now is None else now
+    current = slope * now + intercept
+    if current >= threshold:
+        return 0.0
+    if slope <= 0:
+        return None
+    return (threshold - current) / slope / SECONDS_PER_DAY
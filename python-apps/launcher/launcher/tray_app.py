@@ -23,6 +23,8 @@ from PyQt6.QtCore import QCoreApplication, QTimer, Qt
 from .error_handler import ErrorHandler
 from .i18n import _
 from .icon_manager import IconManager
+from .change_feed import ChangeFeedMonitor
+from .profiling import heapsnapshot_supported
 from .network_utils import (
     get_caddy_root_ca_path,
     check_ca_installed,
@@ -228,6 +230,9 @@ class TrayApp:
             self._handle_operation_complete
         )
         self.daemon_manager.worker.error_occurred.connect(self._handle_worker_error)
+        self.daemon_manager.worker.profile_captured.connect(
+            self._handle_profile_captured
+        )
 
         # Initial status update
         self.update_status()
@@ -313,6 +318,12 @@ class TrayApp:
         self.syncserver_status_action.setEnabled(False)
         self.menu.addAction(self.syncserver_status_action)
 
+        # Change rate and lagging sync peers (see change_feed.py)
+        self.sync_feed_status_action = QAction("", self.menu)
+        self.sync_feed_status_action.setEnabled(False)
+        self.sync_feed_status_action.setVisible(False)
+        self.menu.addAction(self.sync_feed_status_action)
+
         self.menu.addSeparator()
 
         # System-level controls
@@ -330,6 +341,28 @@ class TrayApp:
 
         self.menu.addSeparator()
 
+        # Diagnostics (sync server profiling)
+        self.diagnostics_menu = self.menu.addMenu(_("Diagnostics"))
+
+        self.capture_cpu_profile_action = QAction(
+            _("Capture Sync Server CPU Profile (30s)"), self.diagnostics_menu
+        )
+        self.capture_cpu_profile_action.triggered.connect(
+            lambda: self.capture_profile("cpu")
+        )
+        self.diagnostics_menu.addAction(self.capture_cpu_profile_action)
+
+        self.capture_heap_snapshot_action = QAction(
+            _("Capture Sync Server Heap Snapshot"), self.diagnostics_menu
+        )
+        self.capture_heap_snapshot_action.triggered.connect(
+            lambda: self.capture_profile("heap")
+        )
+        self.capture_heap_snapshot_action.setEnabled(heapsnapshot_supported())
+        self.diagnostics_menu.addAction(self.capture_heap_snapshot_action)
+
+        self.menu.addSeparator()
+
         # Quit
         quit_action = QAction(_("Quit"), self.menu)
         quit_action.triggered.connect(self.quit_app)
@@ -341,20 +374,38 @@ class TrayApp:
         if reason == QSystemTrayIcon.ActivationReason.Trigger:
             self.open_browser()
 
-    def open_browser(self):
-        """Open the web application in the default browser."""
-        try:
-            # Check if Caddy is running (use synchronous method for immediate result)
-            status = self.daemon_manager._get_status_sync("caddy")
-            if status.status != "active":
-                logger.warning("User tried to open browser but Caddy is not running")
+    def _when_caddy_active(self, action, feature: str):
+        """
+        Run action() once Caddy's status arrives, if it is running.
+
+        The status is read on the supervisor's core, so the tray stays
+        responsive while the arbiter is busy.
+        """
+
+        def handle(status):
+            if status is None or status.status != "active":
+                logger.warning(f"User tried to {feature} but Caddy is not running")
                 self.show_message(
                     _("Web Server Not Running"),
                     _("Please start the web server first using the tray menu."),
                     error=True,
                 )
                 return
+            action()
+
+        if not self.daemon_manager._running:
+            handle(None)
+            return
+        self.daemon_manager.call_async(
+            self.daemon_manager.core.scheduler.request("status", "caddy"), handle
+        )
+
+    def open_browser(self):
+        """Open the web application in the default browser."""
+        self._when_caddy_active(self._open_browser, "open browser")
 
+    def _open_browser(self):
+        try:
             # Get the web URL from config
             url = self.config.get_web_url()
             logger.info(f"Opening browser to: {url}")
@@ -373,18 +424,10 @@ class TrayApp:
 
     def show_qr_code(self):
         """Display QR code dialog for local network access."""
-        try:
-            # Check if Caddy is running (use synchronous method for immediate result)
-            status = self.daemon_manager._get_status_sync("caddy")
-            if status.status != "active":
-                logger.warning("User tried to show QR code but Caddy is not running")
-                self.show_message(
-                    _("Web Server Not Running"),
-                    _("Please start the web server first using the tray menu."),
-                    error=True,
-                )
-                return
+        self._when_caddy_active(self._show_qr_code, "show QR code")
 
+    def _show_qr_code(self):
+        try:
             # Get the web URL from config
             url = self.config.get_web_url()
             logger.info(f"Showing QR code for: {url}")
@@ -406,6 +449,34 @@ class TrayApp:
         """Request status update from daemon manager (async, non-blocking)."""
         # Call async method - result will arrive via status_ready signal
         self.daemon_manager.get_system_status()
+        self._update_sync_feed_status()
+
+    def _update_sync_feed_status(self):
+        """Show the change rate, or the most lagging sync peer, in the menu."""
+        monitor = next(
+            (
+                service
+                for service in self.daemon_manager.background_services
+                if isinstance(service, ChangeFeedMonitor)
+            ),
+            None,
+        )
+        # In-memory state only, safe to read from the GUI thread
+        rate = monitor.total_changes_per_second() if monitor else None
+        if rate is None:
+            self.sync_feed_status_action.setVisible(False)
+            return
+
+        lagging = monitor.lagging_peers()
+        if lagging:
+            _db_name, site_id, lag = lagging[0]
+            # Translators: {0} is a sync peer id, {1} a number of versions
+            text = _("  ⚠ Peer {0} is {1} versions behind").format(site_id[:8], lag)
+        else:
+            # Translators: {0} is the number of database changes per minute
+            text = _("  Sync: {0:.0f} changes/min").format(rate * 60)
+        self.sync_feed_status_action.setText(text)
+        self.sync_feed_status_action.setVisible(True)
 
     def _handle_status_update(self, statuses):
         """Handle system status update from worker thread.
@@ -595,6 +666,34 @@ class TrayApp:
         logger.info("User initiated: Restart System")
         self.daemon_manager.restart_all_daemons()
 
+    def capture_profile(self, kind: str):
+        """Capture a sync server CPU profile or heap snapshot (async, non-blocking)."""
+        logger.info(f"User initiated: Capture {kind} profile")
+        self.capture_cpu_profile_action.setEnabled(False)
+        self.capture_heap_snapshot_action.setEnabled(False)
+        self.show_message(
+            _("Capturing Profile"),
+            _("Profiling the sync server. This may take a while..."),
+        )
+        self.daemon_manager.capture_profile(kind)
+
+    def _handle_profile_captured(self, kind: str, path: str):
+        """Handle profile capture completion from worker thread."""
+        self.capture_cpu_profile_action.setEnabled(True)
+        self.capture_heap_snapshot_action.setEnabled(heapsnapshot_supported())
+
+        if path:
+            self.show_message(
+                _("Profile Captured"),
+                _("Saved to {0}").format(path),
+            )
+        else:
+            self.show_message(
+                _("Profile Capture Failed"),
+                _("Check the logs for details."),
+                error=True,
+            )
+
     def install_certificate(self):
         """Install the CA certificate to remove browser security warnings."""
         try:
@@ -4,6 +4,7 @@ Librocco Launcher - GUI entry point with system tray.
 """
 import sys
 import logging
+import multiprocessing
 import argparse
 import shlex
 from pathlib import Path
@@ -16,9 +17,12 @@ from launcher.startup import (
     download_binaries,
     create_daemon_manager,
     auto_start_daemons,
+    start_background_services,
+    start_control_api,
     setup_ca_certificate,
 )
 from launcher.daemon_manager import EmbeddedSupervisor
+from launcher.node_tuning import load_tuning_profile
 from launcher.tray_app import TrayApp
 from launcher.error_handler import ErrorHandler
 from launcher.i18n import _
@@ -94,6 +98,7 @@ def main():
             syncserver_dir=config.syncserver_dir_path,
             db_dir=config.db_dir,
             gui_mode=False,
+            node_tuning=load_tuning_profile(config.get("syncserver_tuning")),
         )
         command_specs = supervisor.get_manual_command_specs()
         for daemon_name in ("caddy", "syncserver"):
@@ -157,8 +162,12 @@ def main():
         )
         return 1
 
+    # Local control API (ctl, chaos, loadgen), up before the daemons
+    start_control_api(config, daemon_manager)
+
     # Auto-start daemons
     auto_start_daemons(daemon_manager, config)
+    start_background_services(config, daemon_manager)
 
     # Create and run tray application
     try:
@@ -210,4 +219,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Background jobs (backups) run in spawned worker processes
+    multiprocessing.freeze_support()
     sys.exit(main())
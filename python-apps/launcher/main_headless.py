@@ -4,12 +4,26 @@ Librocco Headless Launcher - Terminal-only entry point for CI and development.
 
 No GUI, no system tray. Runs daemons in foreground with logs to stdout.
 Graceful shutdown on SIGINT/SIGTERM.
+
+Subcommands:
+    load FILE --db NAME --table TABLE   Bulk-load CSV/JSONL rows into a sync DB
+    loadgen --experimental --template NAME
+                                        Load-test the running sync stack
+                                        (message encoding not verified yet)
+    replay [--speed N] [--compare RUN]  Replay Caddy access logs against it
+    chaos [--faults F ...]              Time recovery from injected faults
+    ctl status|start|stop|restart|wait|logs
+                                        Control the running launcher through
+                                        its local control API
 """
+import argparse
 import sys
 import signal
 import logging
+import multiprocessing
 from pathlib import Path
 
+from launcher.chaos import DEFAULT_FAULTS, FAULTS
 from launcher.startup import (
     initialize_i18n,
     setup_logging_for_mode,
@@ -17,16 +31,299 @@ from launcher.startup import (
     download_binaries,
     create_daemon_manager,
     auto_start_daemons,
+    start_background_services,
+    start_control_api,
 )
 
 # Logger will be initialized in main() after config is loaded
 logger = None
 
 
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Command line: no subcommand runs the launcher."""
+    parser = argparse.ArgumentParser(prog="librocco-headless")
+    subcommands = parser.add_subparsers(dest="command")
+
+    load = subcommands.add_parser(
+        "load", help="Bulk-load catalogue rows (CSV or JSON lines) into a sync DB"
+    )
+    load.add_argument("file", type=Path, help="CSV (with header) or .jsonl file")
+    load.add_argument("--db", required=True, help="DB file name in the DB directory")
+    load.add_argument("--table", required=True, help="Target table (book, ...)")
+    load.add_argument("--format", choices=["csv", "jsonl"], help="Input format")
+    load.add_argument(
+        "--batch-size", type=int, default=5000, help="Rows per transaction"
+    )
+    load.add_argument(
+        "--extension", type=Path, help="crsqlite extension (default: sync server's)"
+    )
+
+    loadgen = subcommands.add_parser(
+        "loadgen",
+        help="Load-test the running sync stack with simulated tills (experimental)",
+    )
+    loadgen.add_argument(
+        "--experimental",
+        action="store_true",
+        help="Run although the tills' message encoding is not verified yet",
+    )
+    loadgen.add_argument(
+        "--template", required=True, help="DB copied into the scratch room"
+    )
+    loadgen.add_argument("--max-clients", type=int, default=64)
+    loadgen.add_argument("--step-seconds", type=float, default=10.0)
+    loadgen.add_argument("--changes", type=int, default=10, help="Rows per changeset")
+    loadgen.add_argument("--json", type=Path, help="Also write the report here")
+
+    replay = subcommands.add_parser(
+        "replay", help="Replay Caddy access logs against the running launcher"
+    )
+    replay.add_argument(
+        "logs", type=Path, nargs="*", help="Access logs (default: the launcher's)"
+    )
+    replay.add_argument(
+        "--speed", type=float, default=1.0, help="Time compression (0 = no waits)"
+    )
+    replay.add_argument("--concurrency", type=int, default=16)
+    replay.add_argument(
+        "--max-gap", type=float, default=60.0, help="Longest idle gap kept (s)"
+    )
+    replay.add_argument("--output", type=Path, help="Save the run (JSON)")
+    replay.add_argument("--compare", type=Path, help="Run to compare with (JSON)")
+
+    chaos = subcommands.add_parser(
+        "chaos", help="Inject faults into the running launcher and time recovery"
+    )
+    chaos.add_argument(
+        "--faults",
+        nargs="+",
+        choices=FAULTS,
+        default=list(DEFAULT_FAULTS),
+        help="Faults to inject (default: all but disk_full)",
+    )
+    chaos.add_argument("--rounds", type=int, default=3)
+    chaos.add_argument(
+        "--hold", type=float, default=5.0, help="Seconds lasting faults are held"
+    )
+    chaos.add_argument("--json", type=Path, help="Also write the results here")
+
+    ctl = subcommands.add_parser(
+        "ctl", help="Control the running launcher (local control API)"
+    )
+    ctl.add_argument(
+        "action", choices=["status", "start", "stop", "restart", "wait", "logs"]
+    )
+    ctl.add_argument(
+        "targets",
+        nargs="*",
+        help="Daemon (caddy, syncserver, all); wait: daemons (default both); "
+        "logs: caddy, caddy-access or syncserver",
+    )
+    ctl.add_argument(
+        "--timeout", type=float, default=30.0, help="wait: seconds to wait"
+    )
+    ctl.add_argument("-n", "--lines", type=int, default=100, help="logs: last lines")
+    ctl.add_argument(
+        "-f", "--follow", action="store_true", help="logs: keep printing new lines"
+    )
+    ctl.add_argument("--json", action="store_true", help="Print the raw reply")
+    return parser
+
+
+def load_command(args: argparse.Namespace) -> int:
+    """Run the load subcommand against the launcher's DB directory."""
+    from launcher.catalogue_loader import run_load_command
+
+    app_dir = Path(__file__).parent / "app"
+    config = initialize_config(app_dir)
+    setup_logging_for_mode(None, logging.INFO, to_file=False)
+    return run_load_command(
+        config.db_dir,
+        args.file,
+        db_name=args.db,
+        table=args.table,
+        file_format=args.format,
+        batch_size=args.batch_size,
+        extension=args.extension,
+    )
+
+
+def _connect_daemon_pid_lookup(config):
+    """
+    daemon_pid_lookup() of the running launcher, checked once up front.
+
+    chaos and loadgen find the daemons through the control API, which both the
+    tray and the headless launcher serve. Prints why and returns None when it
+    can't be reached, instead of every fault or sample failing on its own.
+    """
+    from launcher.control_api import ControlError, control_address, daemon_pid_lookup
+
+    daemon_pid = daemon_pid_lookup(control_address(config.data_dir))
+    try:
+        daemon_pid("syncserver")
+    except ControlError as exc:
+        print(
+            f"{exc}\nStart the launcher (tray or librocco-headless) with "
+            "control_api enabled in settings.toml first.",
+            file=sys.stderr,
+        )
+        return None
+    return daemon_pid
+
+
+def loadgen_command(args: argparse.Namespace) -> int:
+    """Run the loadgen subcommand against the running launcher."""
+    import asyncio
+    import json
+
+    from launcher.loadgen import (
+        DaemonSampler,
+        LoadGenError,
+        LoadGenerator,
+        local_ssl_context,
+    )
+    from launcher.network_utils import get_caddy_root_ca_path
+
+    if not args.experimental:
+        print(
+            "loadgen is experimental: its @vlcn.io/ws-common message encoding has "
+            "not been verified against the sync server, so its numbers are not "
+            "benchmark results. Pass --experimental to run it anyway.",
+            file=sys.stderr,
+        )
+        return 2
+
+    app_dir = Path(__file__).parent / "app"
+    config = initialize_config(app_dir)
+    setup_logging_for_mode(None, logging.INFO, to_file=False)
+    daemon_pid = _connect_daemon_pid_lookup(config)
+    if daemon_pid is None:
+        return 1
+    generator = LoadGenerator(
+        config.db_dir,
+        args.template,
+        ssl_context=local_ssl_context(get_caddy_root_ca_path(config.caddy_data_dir)),
+        max_clients=args.max_clients,
+        step_seconds=args.step_seconds,
+        changes_per_message=args.changes,
+        sampler=DaemonSampler(daemon_pid),
+    )
+    try:
+        report = asyncio.run(generator.run())
+    except LoadGenError as exc:
+        print(f"Load generation failed: {exc}", file=sys.stderr)
+        return 1
+    saturation = report["saturation"]
+    print(
+        f"Saturation point: {saturation} tills"
+        if saturation
+        else "Not saturated within the ramp"
+    )
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    return 0
+
+
+def replay_command(args: argparse.Namespace) -> int:
+    """Run the replay subcommand against the running launcher."""
+    import asyncio
+    import json
+
+    from launcher.replay import (
+        AccessLogReplayer,
+        access_log_files,
+        compare_runs,
+        format_summary,
+        read_requests,
+    )
+
+    app_dir = Path(__file__).parent / "app"
+    config = initialize_config(app_dir)
+    setup_logging_for_mode(None, logging.INFO, to_file=False)
+    files = args.logs or access_log_files(config.logs_dir)
+    if not files:
+        print("No access logs to replay", file=sys.stderr)
+        return 1
+
+    replayer = AccessLogReplayer(
+        concurrency=args.concurrency, speed=args.speed, max_gap=args.max_gap
+    )
+    run = asyncio.run(replayer.replay(read_requests(files)))
+    changes = None
+    if args.compare:
+        changes = compare_runs(json.loads(args.compare.read_text()), run)
+    print(format_summary(run, changes))
+    if args.output:
+        args.output.write_text(json.dumps(run, indent=2))
+    return 0
+
+
+def chaos_command(args: argparse.Namespace) -> int:
+    """Run the chaos subcommand against the running launcher."""
+    import json
+
+    from launcher.chaos import ChaosHarness, format_table, summarize
+
+    app_dir = Path(__file__).parent / "app"
+    config = initialize_config(app_dir)
+    setup_logging_for_mode(None, logging.INFO, to_file=False)
+    daemon_pid = _connect_daemon_pid_lookup(config)
+    if daemon_pid is None:
+        return 1
+    harness = ChaosHarness(
+        config.db_dir,
+        config.logs_dir,
+        daemon_pid,
+        hold_seconds=args.hold,
+    )
+    results = harness.run(args.faults, rounds=args.rounds)
+    summary = summarize(results)
+    print(format_table(summary))
+    if args.json:
+        args.json.write_text(
+            json.dumps({"results": results, "summary": summary}, indent=2)
+        )
+    return 0
+
+
+def ctl_command(args: argparse.Namespace) -> int:
+    """Run the ctl subcommand against the running launcher."""
+    from launcher.control_api import control_address, run_ctl_command
+
+    if args.action in ("start", "stop", "restart", "logs") and len(args.targets) != 1:
+        print(f"ctl {args.action} takes exactly one target", file=sys.stderr)
+        return 2
+
+    app_dir = Path(__file__).parent / "app"
+    config = initialize_config(app_dir)
+    setup_logging_for_mode(None, logging.WARNING, to_file=False)
+    return run_ctl_command(
+        control_address(config.data_dir),
+        args.action,
+        args.targets,
+        timeout=args.timeout,
+        lines=args.lines,
+        follow=args.follow,
+        as_json=args.json,
+    )
+
+
 def main():
     """Main entry point for headless launcher."""
     global logger
 
+    args = build_arg_parser().parse_args()
+    if args.command == "load":
+        return load_command(args)
+    if args.command == "loadgen":
+        return loadgen_command(args)
+    if args.command == "replay":
+        return replay_command(args)
+    if args.command == "chaos":
+        return chaos_command(args)
+    if args.command == "ctl":
+        return ctl_command(args)
+
     # Initialize i18n (even though we won't translate console output)
     initialize_i18n()
 
@@ -81,8 +378,25 @@ def main():
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
+    # On-demand sync server profiling: SIGUSR1 -> CPU profile, SIGUSR2 -> heap
+    # snapshot. Captures block, so hand them to the supervisor's core.
+    def profile_signal_handler(signum, frame):
+        """Capture a sync server profile on the supervisor's core."""
+        kind = "cpu" if signum == signal.SIGUSR1 else "heap"
+        logger.info(f"Received {signal.Signals(signum).name}, capturing {kind} profile")
+        daemon_manager.capture_profile(kind)
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, profile_signal_handler)
+        signal.signal(signal.SIGUSR2, profile_signal_handler)
+
+    # Local control API (librocco-headless ctl), up before the daemons so
+    # scripts can wait for them
+    control_server = start_control_api(config, daemon_manager)
+
     # Auto-start daemons
     auto_start_daemons(daemon_manager, config)
+    start_background_services(config, daemon_manager)
 
     # Print ready message
     logger.info("Librocco Headless Launcher is ready")
@@ -90,6 +404,15 @@ def main():
     logger.info("  - Sync Server: http://127.0.0.1:3000")
     if config.get("auto_start_caddy", True):
         logger.info(f"  - Web Server (Caddy): {config.get_web_url()}")
+    if control_server:
+        logger.info(
+            f"  - Control API: {control_server.address} (librocco-headless ctl)"
+        )
+    if hasattr(signal, "SIGUSR1"):
+        logger.info(
+            "Send SIGUSR1 (CPU profile) or SIGUSR2 (heap snapshot) to profile the "
+            "sync server"
+        )
     logger.info("Press Ctrl+C to stop")
     sys.stdout.flush()
 
@@ -97,8 +420,11 @@ def main():
         # Block forever (or until signal)
         # On Unix, signal.pause() is more efficient than a sleep loop
         # On Windows, we'll use an infinite loop with short sleeps
+        # pause() also returns after the SIGUSR1/SIGUSR2 profile handlers:
+        # only SIGINT/SIGTERM (whose handler exits) end the wait
         if hasattr(signal, "pause"):
-            signal.pause()  # Unix only
+            while True:
+                signal.pause()  # Unix only
         else:
             # Windows: poll in a loop
             import time
@@ -118,4 +444,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Background jobs (backups) run in spawned worker processes
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,185 @@
+"""Benchmark recording with per-machine baselines and regression gates.
+
+Benchmarks only run when selected with ``-m benchmark``:
+
+    uv run pytest tests/benchmarks -m benchmark -s
+
+Each benchmark's timings are compared with the baseline stored for this machine
+in tests/benchmarks/baselines/<machine>.json. A benchmark fails when its median
+is more than BENCHMARK_MAX_REGRESSION (default 0.25, i.e. 25%) slower than the
+baseline and also at least BENCHMARK_MIN_REGRESSION_MS (default 5) slower.
+Missing baselines are recorded on the first run; to accept new numbers run with
+BENCHMARK_UPDATE_BASELINE=1. BENCHMARK_BASELINE_DIR moves the baseline files.
+"""
+
+import json
+import os
+import platform
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+
+from launcher.stats import percentile
+
+BASELINE_DIR = Path(
+    os.environ.get("BENCHMARK_BASELINE_DIR", Path(__file__).parent / "baselines")
+)
+MAX_REGRESSION = float(os.environ.get("BENCHMARK_MAX_REGRESSION", "0.25"))
+# Slowdowns below this are noise, whatever the ratio
+MIN_REGRESSION_SECONDS = (
+    float(os.environ.get("BENCHMARK_MIN_REGRESSION_MS", "5")) / 1000
+)
+UPDATE_BASELINE = os.environ.get("BENCHMARK_UPDATE_BASELINE") == "1"
+
+
+def machine_id() -> str:
+    """Name of this machine's baseline file."""
+    name = f"{platform.node()}-{platform.system()}-{platform.machine()}".lower()
+    return re.sub(r"[^a-z0-9_.-]+", "-", name)
+
+
+def summarize(samples: list[float]) -> Dict[str, Any]:
+    """Statistics of a list of timings in seconds (nearest-rank percentiles)."""
+    ordered = sorted(samples)
+    return {
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "median": percentile(ordered, 50),
+        "p90": percentile(ordered, 90),
+        "max": ordered[-1],
+    }
+
+
+class BenchmarkRecorder:
+    """Collects timings and compares them with the stored baseline."""
+
+    def __init__(self, baseline_file: Path):
+        self.baseline_file = baseline_file
+        try:
+            self.baselines: Dict[str, Dict[str, Any]] = json.loads(
+                baseline_file.read_text()
+            )["benchmarks"]
+        except (OSError, ValueError, KeyError):
+            self.baselines = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def measure(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        rounds: int = 5,
+        warmup: int = 1,
+        setup: Optional[Callable[[], Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Time func over several rounds and check it against the baseline.
+
+        Args:
+            name: Benchmark name (key in the baseline file)
+            func: Operation to time
+            rounds: Timed rounds
+            warmup: Untimed rounds before those
+            setup: Run before every round, untimed
+
+        Returns:
+            Statistics of the timed rounds
+        """
+        samples = []
+        for i in range(warmup + rounds):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                samples.append(elapsed)
+        return self.record(name, samples)
+
+    def record(self, name: str, samples: list[float]) -> Dict[str, Any]:
+        """
+        Record timings measured by the caller and check them against the baseline.
+
+        Fails the calling test on a regression.
+        """
+        stats = summarize(samples)
+        self.results[name] = stats
+        baseline = self.baselines.get(name)
+        line = f"{name:<50} median {stats['median'] * 1000:>9.2f} ms"
+        if baseline:
+            change = (
+                stats["median"] / baseline["median"] - 1 if baseline["median"] else 0
+            )
+            line += f"  baseline {baseline['median'] * 1000:>9.2f} ms ({change:+.0%})"
+        print(line)
+
+        if baseline and not UPDATE_BASELINE:
+            limit = max(
+                baseline["median"] * (1 + MAX_REGRESSION),
+                baseline["median"] + MIN_REGRESSION_SECONDS,
+            )
+            if stats["median"] > limit:
+                pytest.fail(
+                    f"{name} regressed: median {stats['median'] * 1000:.2f} ms, "
+                    f"baseline {baseline['median'] * 1000:.2f} ms "
+                    f"(limit {limit * 1000:.2f} ms)"
+                )
+        return stats
+
+    def save(self) -> None:
+        """Store new baselines (and all results with BENCHMARK_UPDATE_BASELINE=1)."""
+        changed = {
+            name: stats
+            for name, stats in self.results.items()
+            if UPDATE_BASELINE or name not in self.baselines
+        }
+        if not changed:
+            return
+        self.baselines.update(changed)
+        self.baseline_file.parent.mkdir(parents=True, exist_ok=True)
+        self.baseline_file.write_text(
+            json.dumps(
+                {
+                    "machine": {
+                        "node": platform.node(),
+                        "system": platform.system(),
+                        "machine": platform.machine(),
+                        "python": platform.python_version(),
+                        "cpus": os.cpu_count(),
+                    },
+                    "benchmarks": dict(sorted(self.baselines.items())),
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+
+
+@pytest.fixture(scope="session")
+def benchmark_recorder():
+    """Session-wide recorder, saving new baselines when the session ends."""
+    recorder = BenchmarkRecorder(BASELINE_DIR / f"{machine_id()}.json")
+    yield recorder
+    recorder.save()
+
+
+@pytest.fixture
+def bench(benchmark_recorder):
+    """The benchmark recorder."""
+    return benchmark_recorder
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks (before any fixture setup) unless selected with -m."""
+    if "benchmark" in (config.getoption("markexpr") or ""):
+        return
+    skip = pytest.mark.skip(reason="benchmarks only run with -m benchmark")
+    benchmarks_dir = Path(__file__).parent
+    for item in items:
+        if (
+            item.get_closest_marker("benchmark")
+            and benchmarks_dir in Path(item.fspath).parents
+        ):
+            item.add_marker(skip)
@@ -0,0 +1,132 @@
+"""Benchmark: sync server write throughput across Node tuning profiles.
+
+Starts the development sync server (via tsx) once per tuning profile and drives
+writes through its RPC endpoint, which runs the same better-sqlite3 + CR-SQLite
+write path the websocket sync uses. Results are printed as a table; run with:
+
+    uv run pytest tests/benchmarks/test_node_tuning_benchmark.py -m benchmark -s
+"""
+
+import socket
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import requests
+
+from launcher.daemon_manager import EmbeddedSupervisor
+from launcher.node_tuning import load_tuning_profile
+
+SYNC_SERVER_DIR = Path(__file__).parents[4] / "apps" / "sync-server"
+TSX_BINARY = SYNC_SERVER_DIR / "node_modules" / ".bin" / "tsx"
+BASE_URL = "http://127.0.0.1:3000"
+DB_NAME = "tuning-bench.sqlite3"
+
+PROFILES = ["off", "small", "medium", "large"]
+WRITES = 2000
+CONCURRENCY = 8
+
+
+def _port_in_use(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+
+def _wait_for_syncserver(timeout: float = 60.0) -> bool:
+    start = time.time()
+    while time.time() - start < timeout:
+        try:
+            if requests.get(BASE_URL, timeout=1.0).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def _run_workload(session: requests.Session) -> dict:
+    """Insert WRITES books with CONCURRENCY writers and time it."""
+    url = f"{BASE_URL}/{DB_NAME}/exec"
+    latencies = []
+
+    def write(i: int) -> None:
+        started = time.perf_counter()
+        response = session.post(
+            url,
+            json={
+                "sql": "INSERT OR REPLACE INTO book (isbn, title, price, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                "bind": [f"978{i:010d}", f"Benchmark book {i}", 10.5, i],
+            },
+            timeout=30,
+        )
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+
+    # Warm up (creates the DB from the schema)
+    write(-1)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        list(pool.map(write, range(WRITES)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "writes_per_sec": WRITES / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+    }
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark
+@pytest.mark.skipif(
+    not TSX_BINARY.exists(), reason="sync server dependencies not installed"
+)
+def test_sync_throughput_across_tuning_profiles():
+    """Compare sync server write throughput for each tuning profile."""
+    if _port_in_use(3000):
+        pytest.skip("Port 3000 is in use (is a launcher already running?)")
+
+    results = {}
+    for profile_name in PROFILES:
+        profile = load_tuning_profile({"profile": profile_name})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data_dir = Path(tmpdir)
+            supervisor = EmbeddedSupervisor(
+                caddy_binary=data_dir / "caddy",
+                caddyfile=data_dir / "Caddyfile",
+                caddy_data_dir=data_dir / "caddy-data",
+                logs_dir=data_dir / "logs",
+                node_binary=data_dir / "node",
+                syncserver_script=data_dir / "syncserver.mjs",
+                syncserver_dir=data_dir,
+                db_dir=data_dir / "db",
+                gui_mode=False,
+                node_tuning=profile,
+            )
+            try:
+                supervisor.start()
+                assert supervisor._start_daemon_sync("syncserver")
+                if not _wait_for_syncserver():
+                    pytest.fail(
+                        f"Sync server did not start with profile {profile_name}"
+                    )
+
+                with requests.Session() as session:
+                    results[profile.describe()] = _run_workload(session)
+            finally:
+                supervisor.stop()
+
+    print()
+    print(f"{'profile':<90} {'writes/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:<90} {result['writes_per_sec']:>10.1f} "
+            f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f}"
+        )
+
+    assert all(result["writes_per_sec"] > 0 for result in results.values())
@@ -0,0 +1,258 @@
+"""Benchmarks: the built web client served by Caddy over HTTP/1.1 and HTTP/2.
+
+The asset graph of the built web client (index.html, the JS/CSS chunks it
+references and the crsqlite WASM) is fetched through the launcher's own
+Caddyfile, behind a proxy simulating LAN bandwidth and latency, and every run
+prints total bytes and requests and records the time to last byte:
+
+- cold: a first visit (new connections, every asset downloaded)
+- warm: a reload revalidating every asset (If-Modified-Since)
+
+Requests are made by curl (HTTP/2 via nghttp2) in two waves, like a browser
+following index.html's modulepreload hints: index.html, then every other asset
+in parallel (6 connections with HTTP/1.1, one multiplexed with HTTP/2).
+
+The web client must be built first; point LIBROCCO_APP_DIR at the build:
+
+    LIBROCCO_APP_DIR=../../apps/web-client/build \\
+        uv run pytest tests/benchmarks/test_static_assets_benchmark.py -m benchmark -s
+"""
+
+import asyncio
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+import pytest
+
+from launcher.config import CADDY_PORT
+
+APP_DIR = Path(
+    os.environ.get("LIBROCCO_APP_DIR", Path(__file__).parents[2] / "app")
+).resolve()
+
+# name -> (bandwidth in bytes/s, round trip time in seconds)
+NETWORK_PROFILES = {
+    "lan": (100_000_000 / 8, 0.002),
+    "wifi": (30_000_000 / 8, 0.015),
+}
+
+# Browsers open up to 6 HTTP/1.1 connections per host
+HTTP1_CONNECTIONS = 6
+
+HTML_REFERENCE = re.compile(rb"""(?:src|href)=["']([^"'#?]+)""")
+JS_REFERENCE = re.compile(rb"""["']([^"'\s]+\.(?:js|mjs|css|wasm))["']""")
+CSS_REFERENCE = re.compile(rb"""url\(\s*["']?([^"')#?]+)""")
+
+
+def asset_graph(app_dir: Path) -> list[str]:
+    """
+    URL paths of index.html and every asset reachable from it, in discovery
+    order (only references to files in app_dir are followed).
+    """
+    found = ["/index.html"]
+    queue = ["/index.html"]
+    while queue:
+        url_path = queue.pop(0)
+        content = (app_dir / url_path.lstrip("/")).read_bytes()
+        if url_path.endswith(".html"):
+            pattern = HTML_REFERENCE
+        elif url_path.endswith(".css"):
+            pattern = CSS_REFERENCE
+        elif url_path.endswith((".js", ".mjs")):
+            pattern = JS_REFERENCE
+        else:
+            continue
+        for match in pattern.findall(content):
+            reference = match.decode("utf-8", errors="replace")
+            if urlsplit(reference).scheme or reference.startswith("data:"):
+                continue
+            target = urljoin(url_path, reference)
+            if target not in found and (app_dir / target.lstrip("/")).is_file():
+                found.append(target)
+                queue.append(target)
+    return found
+
+
+class ThrottlingProxy:
+    """TCP proxy adding latency and a shared bandwidth limit per direction."""
+
+    def __init__(self, target_port: int, bandwidth: float, rtt: float):
+        """
+        Args:
+            target_port: Port on 127.0.0.1 to forward to
+            bandwidth: Bytes per second, shared by all connections per direction
+            rtt: Added round trip time in seconds
+        """
+        self.target_port = target_port
+        self.bandwidth = bandwidth
+        self.one_way = rtt / 2
+        self.port = 0
+        self._free_at = {"up": 0.0, "down": 0.0}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._server = None
+
+    def start(self) -> None:
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, "127.0.0.1", 0), self._loop
+        ).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def stop(self) -> None:
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    async def _handle(self, client_reader, client_writer):
+        try:
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", self.target_port
+            )
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self._pipe(client_reader, writer, "up"),
+            self._pipe(reader, client_writer, "down"),
+            return_exceptions=True,
+        )
+
+    async def _pipe(self, reader, writer, direction: str) -> None:
+        """Forward chunks, each delivered once transmitted and propagated."""
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver():
+            while (item := await queue.get()) is not None:
+                deliver_at, chunk = item
+                await asyncio.sleep(deliver_at - time.monotonic())
+                writer.write(chunk)
+                await writer.drain()
+            writer.close()
+
+        delivering = asyncio.create_task(deliver())
+        try:
+            while chunk := await reader.read(16384):
+                start = max(time.monotonic(), self._free_at[direction])
+                self._free_at[direction] = start + len(chunk) / self.bandwidth
+                await queue.put((self._free_at[direction] + self.one_way, chunk))
+        except OSError:
+            pass
+        await queue.put(None)
+        await delivering
+
+
+def _curl_features() -> str:
+    curl = shutil.which("curl")
+    if not curl:
+        return ""
+    return subprocess.run([curl, "--version"], capture_output=True, text=True).stdout
+
+
+def _fetch(port: int, url_paths: list[str], protocol: str, headers=()) -> list[tuple]:
+    """Fetch URLs in parallel with one curl, returning (status, bytes) each."""
+    command = [
+        "curl",
+        "--silent",
+        "--insecure",
+        "--parallel",
+        "--parallel-immediate",
+        "--parallel-max",
+        str(HTTP1_CONNECTIONS if protocol == "h1" else 100),
+        "--http1.1" if protocol == "h1" else "--http2",
+        "--write-out",
+        "%{http_code} %{size_download}\\n",
+    ]
+    for header in headers:
+        command += ["--header", header]
+    command += ["--resolve", f"localhost:{port}:127.0.0.1"]
+    for url_path in url_paths:
+        command += [f"https://localhost:{port}{url_path}", "--output", os.devnull]
+    output = subprocess.run(command, capture_output=True, text=True, check=True)
+    return [tuple(map(int, line.split())) for line in output.stdout.splitlines()]
+
+
+def _page_load(port: int, graph: list[str], protocol: str, warm: bool):
+    """Time to last byte, bytes and requests of one page load."""
+    headers = [f"If-Modified-Since: {formatdate(usegmt=True)}"] if warm else []
+    started = time.perf_counter()
+    results = _fetch(port, graph[:1], protocol, headers)
+    results += _fetch(port, graph[1:], protocol, headers) if graph[1:] else []
+    elapsed = time.perf_counter() - started
+    expected = 304 if warm else 200
+    assert all(status == expected for status, _ in results), results
+    return elapsed, sum(size for _, size in results), len(results)
+
+
+@pytest.fixture
+def caddy_port(request, temp_data_dir, test_port):
+    """Caddy serving APP_DIR with the launcher's Caddyfile on a free port."""
+    if not (APP_DIR / "index.html").is_file():
+        pytest.skip(f"web client not built in {APP_DIR} (set LIBROCCO_APP_DIR)")
+    if "HTTP2" not in _curl_features():
+        pytest.skip("curl with HTTP/2 support not installed")
+    config = request.getfixturevalue("mock_config")
+    config.ensure_caddyfile(APP_DIR)
+    caddyfile = config.caddyfile_path
+    caddyfile.write_text(
+        caddyfile.read_text().replace(f"https://:{CADDY_PORT}", f"https://:{test_port}")
+    )
+
+    caddy = subprocess.Popen(
+        [
+            str(config.caddy_binary_path),
+            "run",
+            "--config",
+            str(caddyfile),
+            "--adapter",
+            "caddyfile",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                _fetch(test_port, ["/index.html"], "h1")
+                break
+            except subprocess.CalledProcessError:
+                if time.monotonic() > deadline:
+                    pytest.fail("Caddy did not start serving")
+                time.sleep(0.2)
+        yield test_port
+    finally:
+        caddy.terminate()
+        caddy.wait(timeout=10)
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark
+@pytest.mark.parametrize("warm", [False, True], ids=["cold", "warm"])
+@pytest.mark.parametrize("protocol", ["h1", "h2"])
+@pytest.mark.parametrize("profile", list(NETWORK_PROFILES))
+def test_page_load(bench, caddy_port, profile, protocol, warm):
+    """Time to last byte of the web client's assets."""
+    graph = asset_graph(APP_DIR)
+    proxy = ThrottlingProxy(caddy_port, *NETWORK_PROFILES[profile])
+    proxy.start()
+    try:
+        # Warm Caddy's and the OS's caches
+        _page_load(proxy.port, graph, protocol, warm)
+        samples = []
+        for _ in range(3):
+            elapsed, size, requests = _page_load(proxy.port, graph, protocol, warm)
+            samples.append(elapsed)
+    finally:
+        proxy.stop()
+
+    state = "warm" if warm else "cold"
+    print(f"static[{profile},{protocol},{state}]: {requests} requests, {size} bytes")
+    bench.record(f"static_page_load[{profile},{protocol},{state}]", samples)
@@ -0,0 +1,300 @@
+"""Benchmarks: supervisor startup, daemon lifecycle latency and helper costs.
+
+Timings are checked against this machine's baselines (see conftest.py); run with:
+
+    uv run pytest tests/benchmarks/test_supervisor_benchmark.py -m benchmark -s
+
+The lifecycle benchmarks need the Caddy binary (downloaded once per session)
+and, for the sync server, the development sync server dependencies (tsx). The
+fake daemon lifecycle benchmarks run the stand-in daemons instead, measuring
+the supervisor's own overhead without binaries or network.
+"""
+
+import shutil
+import socket
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from launcher.api_client import HttpClient
+from launcher.binary_manager import BinaryManager
+from launcher.control_stress import ControlStressHarness, format_report
+from launcher.daemon_manager import EmbeddedSupervisor
+from launcher.fake_daemons import fake_daemon_commands
+
+SYNC_SERVER_DIR = Path(__file__).parents[4] / "apps" / "sync-server"
+TSX_BINARY = SYNC_SERVER_DIR / "node_modules" / ".bin" / "tsx"
+SYNCSERVER_PORT = 3000
+
+needs_syncserver = pytest.mark.skipif(
+    not TSX_BINARY.exists(), reason="sync server dependencies not installed"
+)
+
+
+def _wait_for_http(port: int, timeout: float = 60.0) -> bool:
+    """Poll until the port answers GET / with 200."""
+    deadline = time.monotonic() + timeout
+    with HttpClient(f"http://127.0.0.1:{port}", timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if client.request("GET", "/").status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+    return False
+
+
+def _wait_for_port_closed(port: int, timeout: float = 30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            if sock.connect_ex(("127.0.0.1", port)) != 0:
+                return True
+        time.sleep(0.02)
+    return False
+
+
+def _wait_for_stopped(supervisor, daemon_name: str, timeout: float = 30.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if supervisor._get_status_sync(daemon_name).status == "stopped":
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def _supervisor(data_dir: Path, caddy_binary: Path, caddyfile: Path, **options):
+    return EmbeddedSupervisor(
+        caddy_binary=caddy_binary,
+        caddyfile=caddyfile,
+        caddy_data_dir=data_dir / "caddy-data",
+        logs_dir=data_dir / "logs",
+        node_binary=data_dir / "node",
+        syncserver_script=data_dir / "syncserver.mjs",
+        syncserver_dir=data_dir,
+        db_dir=data_dir / "db",
+        gui_mode=False,
+        **options,
+    )
+
+
+@pytest.fixture
+def supervisor(temp_data_dir):
+    """A running supervisor without daemon binaries."""
+    (temp_data_dir / "logs").mkdir()
+    supervisor = _supervisor(
+        temp_data_dir, temp_data_dir / "caddy", temp_data_dir / "Caddyfile"
+    )
+    supervisor.start()
+    yield supervisor
+    supervisor.stop()
+
+
+@pytest.mark.benchmark
+def test_arbiter_startup(bench, temp_data_dir):
+    """Time from start() until the arbiter answers a status request."""
+    (temp_data_dir / "logs").mkdir()
+    samples = []
+    # The first round (imports, first ZMQ context) is not timed
+    for i in range(8):
+        supervisor = _supervisor(
+            temp_data_dir, temp_data_dir / "caddy", temp_data_dir / "Caddyfile"
+        )
+        started = time.perf_counter()
+        supervisor.start()
+        assert supervisor.client.send_message("list")["status"] == "ok"
+        if i:
+            samples.append(time.perf_counter() - started)
+        supervisor.stop()
+    bench.record("arbiter_startup", samples)
+
+
+@pytest.mark.benchmark
+def test_status_round_trip(bench, supervisor):
+    """CircusClient round trip of a daemon status request."""
+    bench.measure(
+        "status_round_trip",
+        lambda: supervisor._get_status_sync("caddy"),
+        rounds=200,
+        warmup=10,
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size_mb", [1, 16, 64])
+def test_get_logs_tail_cost(bench, supervisor, size_mb):
+    """Cost of reading the last 100 log lines, by log file size."""
+    line = "2026-01-01T00:00:00.000Z info sync: applied 12 changes from peer\n"
+    with open(supervisor.syncserver_log, "w") as f:
+        f.write(line * (size_mb * 1024 * 1024 // len(line)))
+
+    bench.measure(
+        f"get_logs_tail[{size_mb}MB]",
+        lambda: supervisor.get_logs("syncserver", lines=100),
+        rounds=5,
+    )
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("binary_type", ["caddy", "node"])
+def test_ensure_binary(bench, request, binary_type):
+    """ensure_binary() when the binary is already in place (every launcher start)."""
+    if binary_type == "caddy":
+        binary_path = request.getfixturevalue("caddy_binary_path")
+    else:
+        node = shutil.which("node")
+        if not node:
+            pytest.skip("node not installed")
+        binary_path = Path(node)
+    manager = BinaryManager(binary_path, binary_type)
+
+    bench.measure(f"ensure_binary[{binary_type}]", manager.ensure_binary, rounds=5)
+
+
+def _lifecycle_samples(supervisor, daemon_name, port, rounds=3):
+    """Start, restart and stop latencies of a daemon until it serves / is gone."""
+    samples = {"start": [], "restart": [], "stop": []}
+    for _ in range(rounds):
+        started = time.perf_counter()
+        assert supervisor._start_daemon_sync(daemon_name)
+        assert _wait_for_http(port), f"{daemon_name} did not become ready"
+        samples["start"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        assert supervisor._restart_daemon_sync(daemon_name)
+        assert _wait_for_http(port), f"{daemon_name} did not come back"
+        samples["restart"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        assert supervisor._stop_daemon_sync(daemon_name)
+        assert _wait_for_port_closed(port), f"{daemon_name} did not stop"
+        # Until the arbiter has reaped it and takes commands again
+        assert _wait_for_stopped(supervisor, daemon_name)
+        samples["stop"].append(time.perf_counter() - started)
+    return samples
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("daemon_name", ["caddy", "syncserver"])
+def test_fake_daemon_lifecycle(
+    bench, temp_data_dir, simple_caddyfile, test_port, daemon_name
+):
+    """Start/restart/stop latency of a stand-in daemon (supervisor overhead)."""
+    for name in ("logs", "caddy-data", "db"):
+        (temp_data_dir / name).mkdir()
+    supervisor = _supervisor(
+        temp_data_dir,
+        temp_data_dir / "caddy",
+        simple_caddyfile,
+        daemon_commands=fake_daemon_commands(),
+    )
+    port = test_port if daemon_name == "caddy" else SYNCSERVER_PORT
+    try:
+        supervisor.start()
+        samples = _lifecycle_samples(supervisor, daemon_name, port, rounds=5)
+    finally:
+        supervisor.stop()
+    for operation, timings in samples.items():
+        bench.record(f"fake_{daemon_name}_{operation}", timings)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("threads", [1, 8])
+def test_control_plane_contention(bench, temp_data_dir, simple_caddyfile, threads):
+    """Wall time of 200 interleaved control operations on the fake sync server."""
+    for name in ("logs", "caddy-data", "db"):
+        (temp_data_dir / name).mkdir()
+    supervisor = _supervisor(
+        temp_data_dir,
+        temp_data_dir / "caddy",
+        simple_caddyfile,
+        daemon_commands=fake_daemon_commands(),
+    )
+    samples = []
+    try:
+        supervisor.start()
+        for seed in range(3):
+            harness = ControlStressHarness(
+                supervisor,
+                daemons=["syncserver"],
+                threads=threads,
+                operations=200,
+                seed=seed,
+            )
+            report = harness.run()
+            print(format_report(report))
+            assert not report["hung"] and not report["inconsistencies"]
+            samples.append(report["seconds"])
+    finally:
+        supervisor.stop()
+    bench.record(f"control_plane_contention[{threads}]", samples)
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark
+def test_caddy_lifecycle(bench, mock_config, simple_caddyfile, test_port):
+    """Start/restart/stop latency of Caddy."""
+    supervisor = _supervisor(
+        mock_config.data_dir, mock_config.caddy_binary_path, simple_caddyfile
+    )
+    try:
+        supervisor.start()
+        samples = _lifecycle_samples(supervisor, "caddy", test_port)
+    finally:
+        supervisor.stop()
+    for operation, timings in samples.items():
+        bench.record(f"caddy_{operation}", timings)
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark
+@needs_syncserver
+def test_syncserver_lifecycle(bench, temp_data_dir):
+    """Start/restart/stop latency of the sync server."""
+    (temp_data_dir / "logs").mkdir()
+    supervisor = _supervisor(
+        temp_data_dir, temp_data_dir / "caddy", temp_data_dir / "Caddyfile"
+    )
+    try:
+        supervisor.start()
+        samples = _lifecycle_samples(supervisor, "syncserver", SYNCSERVER_PORT)
+    finally:
+        supervisor.stop()
+    for operation, timings in samples.items():
+        bench.record(f"syncserver_{operation}", timings)
+
+
+@pytest.mark.slow
+@pytest.mark.benchmark
+@needs_syncserver
+def test_system_lifecycle(bench, mock_config, simple_caddyfile, test_port):
+    """Start/restart/stop latency of Caddy and the sync server together."""
+    supervisor = _supervisor(
+        mock_config.data_dir, mock_config.caddy_binary_path, simple_caddyfile
+    )
+    samples = {"start": [], "restart": [], "stop": []}
+    try:
+        supervisor.start()
+        for _ in range(3):
+            started = time.perf_counter()
+            assert supervisor._start_all_daemons_sync()
+            assert _wait_for_http(test_port) and _wait_for_http(SYNCSERVER_PORT)
+            samples["start"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            assert supervisor._restart_all_daemons_sync()
+            assert _wait_for_http(test_port) and _wait_for_http(SYNCSERVER_PORT)
+            samples["restart"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            assert supervisor._stop_all_daemons_sync()
+            assert _wait_for_port_closed(test_port)
+            assert _wait_for_port_closed(SYNCSERVER_PORT)
+            samples["stop"].append(time.perf_counter() - started)
+    finally:
+        supervisor.stop()
+    for operation, timings in samples.items():
+        bench.record(f"system_{operation}", timings)
@@ -4,10 +4,13 @@ import tempfile
 import socket
 import time
 from pathlib import Path
+import httpx
 import pytest
-import requests
 from circus.client import CircusClient
+from launcher.api_client import HttpClient
 from launcher.binary_manager import BinaryManager
+from launcher.daemon_manager import EmbeddedSupervisor
+from launcher.fake_daemons import fake_daemon_commands
 
 
 # Helper functions for intelligent waiting (replaces fixed time.sleep() calls)
@@ -47,14 +50,14 @@ def wait_for_caddy_ready(host: str, port: int, timeout: float = 10.0) -> bool:
         True if Caddy responds with HTTP 200, False if timeout
     """
     start = time.time()
-    while time.time() - start < timeout:
-        try:
-            response = requests.get(f"http://{host}:{port}", timeout=1.0)
-            if response.status_code == 200:
-                return True
-        except (requests.ConnectionError, requests.Timeout, requests.RequestException):
-            pass
-        time.sleep(0.1)
+    with HttpClient(f"http://{host}:{port}", timeout=1.0) as client:
+        while time.time() - start < timeout:
+            try:
+                if client.request("GET", "/").status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
     return False
 
 
@@ -211,3 +214,25 @@ def simple_caddyfile(temp_data_dir, test_port):
 """
     caddyfile_path.write_text(caddyfile_content)
     return caddyfile_path
+
+
+@pytest.fixture
+def fake_supervisor(temp_data_dir, simple_caddyfile):
+    """A running supervisor whose watchers run the fake daemons."""
+    for name in ("logs", "caddy-data", "db"):
+        (temp_data_dir / name).mkdir()
+    supervisor = EmbeddedSupervisor(
+        caddy_binary=temp_data_dir / "caddy",
+        caddyfile=simple_caddyfile,
+        caddy_data_dir=temp_data_dir / "caddy-data",
+        logs_dir=temp_data_dir / "logs",
+        node_binary=temp_data_dir / "node",
+        syncserver_script=temp_data_dir / "syncserver.mjs",
+        syncserver_dir=temp_data_dir,
+        db_dir=temp_data_dir / "db",
+        gui_mode=False,
+        daemon_commands=fake_daemon_commands(),
+    )
+    supervisor.start()
+    yield supervisor
+    supervisor.stop()
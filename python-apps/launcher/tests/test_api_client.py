@@ -0,0 +1,183 @@
+"""Tests for the sync server / Caddy admin API clients."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from launcher.api_client import (
+    ApiError,
+    AsyncCaddyAdminClient,
+    AsyncSyncServerClient,
+    CaddyAdminClient,
+    SyncServerClient,
+)
+
+DB_CONTENT = b"SQLite format 3\x00" + bytes(range(256)) * 64
+
+HEALTH = {
+    "status": "unhealthy",
+    "databases": {
+        "dev.sqlite3": {
+            "ok": False,
+            "checks": [
+                {
+                    "name": "integrity",
+                    "passed": False,
+                    "message": "corrupt",
+                    "severity": "critical",
+                }
+            ],
+        }
+    },
+}
+
+
+class FakeSyncServer(BaseHTTPRequestHandler):
+    """Keep-alive HTTP/1.1 server with the sync server's endpoints."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._json(503, HEALTH)
+        elif self.path == "/dev.sqlite3/meta":
+            self._json(200, {"siteId": "abcd", "schemaName": "init"})
+        elif self.path == "/dev.sqlite3/file":
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(DB_CONTENT)))
+            self.end_headers()
+            self.wfile.write(DB_CONTENT)
+        elif self.path == "/chunked.sqlite3/file":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(DB_CONTENT), 5000):
+                chunk = DB_CONTENT[start : start + 5000]
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+        elif self.path == "/config/":
+            self._json(200, {"apps": {}})
+        else:
+            self._json(404, {"message": "not found"})
+
+    def _json(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSyncServer)
+    server.connections = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class TestSyncServerClient:
+    """Tests for the blocking client."""
+
+    def test_endpoints_share_one_connection(self, server):
+        with SyncServerClient(_url(server)) as client:
+            health = client.health()
+            meta = client.meta("dev.sqlite3")
+            client.meta("dev.sqlite3")
+
+        assert not health.healthy
+        assert health.databases["dev.sqlite3"].checks[0].severity == "critical"
+        assert meta.site_id == "abcd"
+        assert meta.schema_version is None
+        assert server.connections == 1
+
+    def test_download_file(self, server, temp_data_dir):
+        progress = []
+        with SyncServerClient(_url(server)) as client:
+            written = client.download_file(
+                "dev.sqlite3",
+                temp_data_dir / "dev.sqlite3",
+                lambda done, total: progress.append((done, total)),
+            )
+
+        assert written == len(DB_CONTENT)
+        assert (temp_data_dir / "dev.sqlite3").read_bytes() == DB_CONTENT
+        assert progress[-1] == (len(DB_CONTENT), len(DB_CONTENT))
+
+    def test_error_status(self, server):
+        with SyncServerClient(_url(server)) as client:
+            with pytest.raises(ApiError) as error:
+                client.meta("missing.sqlite3")
+        assert error.value.status == 404
+
+    def test_caddy_admin_not_running(self):
+        with CaddyAdminClient("http://127.0.0.1:9", timeout=0.2) as admin:
+            assert not admin.wait_until_ready(timeout=0.3, interval=0.1)
+
+
+class TestAsyncSyncServerClient:
+    """Tests for the asyncio client."""
+
+    def test_endpoints_reuse_connections(self, server):
+        async def scenario():
+            async with AsyncSyncServerClient(_url(server), pool_size=2) as client:
+                results = await asyncio.gather(
+                    *(client.meta("dev.sqlite3") for _ in range(10))
+                )
+                health = await client.health()
+                return results, health
+
+        results, health = asyncio.run(scenario())
+
+        assert {meta.site_id for meta in results} == {"abcd"}
+        assert not health.databases["dev.sqlite3"].ok
+        assert server.connections <= 2
+
+    def test_streaming_downloads(self, server, temp_data_dir):
+        async def scenario():
+            async with AsyncSyncServerClient(_url(server)) as client:
+                for name in ("dev.sqlite3", "chunked.sqlite3"):
+                    await client.download_file(name, temp_data_dir / name)
+                # The connection is still usable after both framings
+                return await client.meta("dev.sqlite3")
+
+        meta = asyncio.run(scenario())
+
+        assert (temp_data_dir / "dev.sqlite3").read_bytes() == DB_CONTENT
+        assert (temp_data_dir / "chunked.sqlite3").read_bytes() == DB_CONTENT
+        assert meta.site_id == "abcd"
+        assert server.connections == 1
+
+    def test_error_leaves_no_partial_file(self, server, temp_data_dir):
+        async def scenario():
+            async with AsyncSyncServerClient(_url(server)) as client:
+                await client.download_file("missing.sqlite3", temp_data_dir / "x")
+
+        with pytest.raises(ApiError):
+            asyncio.run(scenario())
+        assert list(temp_data_dir.iterdir()) == []
+
+    def test_caddy_admin_ready(self, server):
+        async def scenario():
+            async with AsyncCaddyAdminClient(_url(server)) as admin:
+                return await admin.wait_until_ready(timeout=1)
+
+        assert asyncio.run(scenario())
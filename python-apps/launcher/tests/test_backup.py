@@ -0,0 +1,160 @@
+"""Tests for online database backups."""
+
+import gzip
+import hashlib
+import logging
+import os
+import sqlite3
+
+import pytest
+
+from launcher.backup import (
+    BackupScheduler,
+    BackupSettings,
+    backup_database,
+    list_backups,
+    prune_backups,
+    run_backup,
+)
+from launcher.db_files import list_databases
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    """A db_dir with one WAL-mode database held open by a writer."""
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    conn = sqlite3.connect(db_dir / "dev.sqlite3")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT)")
+    conn.executemany(
+        "INSERT INTO book VALUES (?, ?)",
+        [(f"978{i:010d}", f"Book {i}") for i in range(2000)],
+    )
+    conn.commit()
+    yield db_dir
+    conn.close()
+
+
+def _gunzip_to(archive, target):
+    target.write_bytes(gzip.decompress(archive.read_bytes()))
+    return target
+
+
+class TestBackupDatabase:
+    """Tests for copying a live database."""
+
+    def test_copies_live_wal_database(self, db_dir, temp_data_dir):
+        copy = temp_data_dir / "copy.sqlite3"
+
+        result = backup_database(db_dir / "dev.sqlite3", copy, pages_per_step=4)
+
+        assert result["method"] == "backup"
+        conn = sqlite3.connect(copy)
+        assert conn.execute("SELECT count(*) FROM book").fetchone()[0] == 2000
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        conn.close()
+
+    def test_db_discovery_skips_wal_files(self, db_dir):
+        (db_dir / "notes.txt").write_text("not a db")
+
+        assert [p.name for p in list_databases(db_dir)] == ["dev.sqlite3"]
+
+
+class TestBackupRuns:
+    """Tests for run directories, manifests and retention."""
+
+    def test_run_writes_compressed_copy_and_manifest(self, db_dir, temp_data_dir):
+        backup_root = temp_data_dir / "backups"
+        settings = BackupSettings(compression="gzip", max_write_mb_per_sec=0)
+
+        run_dir = run_backup(db_dir, backup_root, settings)
+
+        manifest = list_backups(backup_root)[0]
+        entry = manifest["databases"][0]
+        archive = run_dir / entry["file"]
+        assert entry["name"] == "dev.sqlite3"
+        assert entry["sha256"] == hashlib.sha256(archive.read_bytes()).hexdigest()
+
+        restored = _gunzip_to(archive, temp_data_dir / "restored.sqlite3")
+        conn = sqlite3.connect(restored)
+        assert conn.execute("SELECT count(*) FROM book").fetchone()[0] == 2000
+        conn.close()
+
+    def test_prune_keeps_newest_runs(self, temp_data_dir):
+        backup_root = temp_data_dir / "backups"
+        for name in ["20260101T000000Z", "20260102T000000Z", "20260103T000000Z"]:
+            (backup_root / name).mkdir(parents=True)
+            (backup_root / name / "manifest.json").write_text("{}")
+        (backup_root / ".tmp-20260104T000000Z").mkdir()
+
+        prune_backups(backup_root, keep=2)
+
+        assert sorted(p.name for p in backup_root.iterdir()) == [
+            "20260102T000000Z",
+            "20260103T000000Z",
+        ]
+
+    def test_settings_ignore_invalid_values(self):
+        settings = BackupSettings.from_settings({"keep": "many", "interval_hours": 6})
+
+        assert settings.keep == 14
+        assert settings.interval_hours == 6.0
+
+    def test_settings_warn_about_unknown_keys(self, caplog):
+        settings = BackupSettings.from_settings(
+            {"enabled": True, "kep": 3, "interval_hours": 0}
+        )
+
+        assert settings == BackupSettings()
+        warnings = [record.getMessage() for record in caplog.records]
+        assert warnings == [
+            "Ignoring unknown setting backups.kep",
+            "Ignoring invalid backups.interval_hours=0",
+        ]
+
+
+class TestBackupScheduler:
+    """Tests for running backups in a worker process."""
+
+    def test_backup_sync_runs_in_worker_process(self, db_dir, temp_data_dir):
+        scheduler = BackupScheduler(
+            db_dir,
+            temp_data_dir / "backups",
+            BackupSettings(compression="gzip", max_write_mb_per_sec=0),
+        )
+
+        run_dir = scheduler.backup_sync()
+
+        assert run_dir is not None
+        assert (run_dir / "dev.sqlite3.gz").exists()
+
+    def test_worker_logs_reach_launcher_logger(self, db_dir, temp_data_dir, caplog):
+        backup_root = temp_data_dir / "backups"
+        (backup_root / "20260101T000000Z").mkdir(parents=True)
+        (backup_root / "20260101T000000Z" / "manifest.json").write_text("{}")
+        scheduler = BackupScheduler(
+            db_dir,
+            backup_root,
+            BackupSettings(keep=1, compression="gzip", max_write_mb_per_sec=0),
+        )
+
+        with caplog.at_level(logging.INFO, logger="launcher"):
+            assert scheduler.backup_sync() is not None
+
+        # Logged by the worker, handled by this process' "launcher" logger
+        removed = [
+            record
+            for record in caplog.records
+            if record.getMessage() == "Removing old backup 20260101T000000Z"
+        ]
+        assert len(removed) == 1
+        assert removed[0].name == "launcher"
+        assert removed[0].process != os.getpid()
+
+    def test_no_backup_after_stop(self, db_dir, temp_data_dir):
+        scheduler = BackupScheduler(db_dir, temp_data_dir / "backups", BackupSettings())
+        scheduler.stop()
+
+        assert scheduler.backup_sync() is None
+        assert list_backups(temp_data_dir / "backups") == []
@@ -0,0 +1,131 @@
+"""Tests for the bulk catalogue loader."""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from launcher.catalogue_loader import (
+    CatalogueLoader,
+    LoaderError,
+    open_database,
+    read_rows,
+)
+
+
+@pytest.fixture
+def conn():
+    """An autocommit connection with the app's book table (without CRR triggers)."""
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    conn.execute(
+        "CREATE TABLE book (isbn TEXT NOT NULL, title TEXT, authors TEXT, "
+        "price DECIMAL, year INTEGER, updated_at INTEGER, PRIMARY KEY (isbn))"
+    )
+    yield conn
+    conn.close()
+
+
+class TestReadRows:
+    """Tests for streaming input files."""
+
+    def test_csv_and_jsonl(self, temp_data_dir):
+        csv_file = temp_data_dir / "books.csv"
+        csv_file.write_text("isbn,title\n9780000000001,One\n9780000000002,Two\n")
+        jsonl_file = temp_data_dir / "books.jsonl"
+        jsonl_file.write_text(
+            json.dumps({"isbn": "9780000000001", "price": 12.5}) + "\n\n"
+        )
+
+        assert [row["title"] for row in read_rows(csv_file)] == ["One", "Two"]
+        assert list(read_rows(jsonl_file)) == [{"isbn": "9780000000001", "price": 12.5}]
+
+    def test_invalid_jsonl_line(self, temp_data_dir):
+        jsonl_file = temp_data_dir / "books.jsonl"
+        jsonl_file.write_text('{"isbn": "1"}\n[1, 2]\n')
+
+        with pytest.raises(LoaderError, match=":2: expected a JSON object"):
+            list(read_rows(jsonl_file))
+
+
+class TestCatalogueLoader:
+    """Tests for batched upserts."""
+
+    def test_loads_in_batches(self, conn):
+        rows = (
+            {"isbn": f"978{i:010d}", "title": f"Book {i}", "price": "9.99"}
+            for i in range(25000)
+        )
+
+        result = CatalogueLoader(conn, "book", batch_size=10000).load(rows)
+
+        assert result["rows"] == 25000
+        assert result["batches"] == 3
+        assert conn.execute("SELECT count(*) FROM book").fetchone()[0] == 25000
+        # Column affinity converts CSV strings
+        assert conn.execute("SELECT typeof(price) FROM book LIMIT 1").fetchone() == (
+            "real",
+        )
+
+    def test_upserts_and_normalizes_values(self, conn):
+        conn.execute(
+            "INSERT INTO book VALUES ('9780000000001', 'Old', 'Someone', 5, 2001, 1)"
+        )
+
+        CatalogueLoader(conn, "book").load(
+            [
+                {"isbn": "9780000000001", "title": "New", "year": "", "unknown": "x"},
+                {"isbn": "9780000000002", "title": "Other", "year": "2020"},
+            ]
+        )
+
+        rows = conn.execute(
+            "SELECT isbn, title, authors, year, updated_at FROM book ORDER BY isbn"
+        ).fetchall()
+        # Columns not in the input keep their values, empty fields become NULL
+        assert rows[0][:4] == ("9780000000001", "New", "Someone", None)
+        assert rows[1][:4] == ("9780000000002", "Other", None, 2020)
+        assert all(updated_at > 1 for *_, updated_at in rows)
+
+    def test_requires_primary_key_column(self, conn):
+        with pytest.raises(LoaderError, match="primary key"):
+            CatalogueLoader(conn, "book").load([{"title": "No ISBN"}])
+
+    def test_failed_batch_is_rolled_back(self, conn):
+        conn.execute("CREATE TABLE strict_book (isbn TEXT PRIMARY KEY NOT NULL)")
+        rows = [{"isbn": "1"}, {"isbn": None}]
+
+        with pytest.raises(sqlite3.IntegrityError):
+            CatalogueLoader(conn, "strict_book", batch_size=10).load(rows)
+
+        assert conn.execute("SELECT count(*) FROM strict_book").fetchone()[0] == 0
+        assert not conn.in_transaction
+
+    def test_touches_database_file(self, temp_data_dir):
+        # In WAL mode commits don't write the DB file itself, and the sync
+        # server's file watcher only looks at its mtime
+        db_path = temp_data_dir / "dev.sqlite3"
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT)")
+        os.utime(db_path, (0, 0))
+
+        CatalogueLoader(conn, "book").load([{"isbn": "1", "title": "One"}])
+
+        assert db_path.stat().st_mtime > 0
+        conn.close()
+
+
+class TestOpenDatabase:
+    """Tests for opening the target DB."""
+
+    def test_missing_database(self, temp_data_dir):
+        with pytest.raises(LoaderError, match="doesn't exist"):
+            open_database(temp_data_dir / "missing.sqlite3", None)
+
+    def test_missing_extension(self, temp_data_dir):
+        db_path = temp_data_dir / "dev.sqlite3"
+        sqlite3.connect(db_path).close()
+
+        with pytest.raises(LoaderError, match="crsqlite extension not found"):
+            open_database(db_path, None)
@@ -0,0 +1,200 @@
+"""Tests for cgroup v2 limits and stats parsing."""
+
+import os
+import platform
+import subprocess
+import threading
+
+import pytest
+
+from launcher import cgroups
+from launcher.cgroups import (
+    CgroupLimits,
+    CgroupManager,
+    get_process_cgroup,
+    load_cgroup_limits,
+    parse_pressure,
+    parse_size,
+    read_cgroup_stats,
+)
+
+
+class TestLimits:
+    """Tests for settings parsing."""
+
+    def test_parse_size(self):
+        assert parse_size("512M") == 512 * 1024**2
+        assert parse_size("2G") == 2 * 1024**3
+        assert parse_size("1.5GB") == int(1.5 * 1024**3)
+        assert parse_size(4096) == 4096
+
+    def test_parse_size_rejects_invalid(self):
+        with pytest.raises(ValueError):
+            parse_size("lots")
+        with pytest.raises(ValueError):
+            parse_size(0)
+
+    def test_load_limits(self):
+        limits = load_cgroup_limits(
+            {
+                "enabled": True,
+                "strategy": "auto",
+                "syncserver": {"memory_max": "1G", "cpu_weight": 200},
+                "caddy": {"io_weight": 50000},
+            }
+        )
+
+        assert limits["syncserver"].memory_max == 1024**3
+        assert limits["syncserver"].cpu_weight == 200
+        # Out-of-range weight is ignored, leaving caddy without limits
+        assert "caddy" not in limits
+
+    def test_interface_files(self):
+        limits = CgroupLimits(memory_high=1024, io_weight=300)
+
+        assert limits.interface_files() == {
+            "memory.high": "1024",
+            "io.weight": "default 300",
+        }
+
+
+class TestStats:
+    """Tests for reading cgroup stats back."""
+
+    def test_parse_pressure(self):
+        pressure = parse_pressure(
+            "some avg10=1.50 avg60=0.20 avg300=0.00 total=12345\n"
+            "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+        )
+
+        assert pressure["some"]["avg10"] == 1.5
+        assert pressure["full"]["total"] == 0
+
+    def test_read_stats_from_cgroup_dir(self, temp_data_dir):
+        (temp_data_dir / "memory.current").write_text("2097152\n")
+        (temp_data_dir / "memory.max").write_text("max\n")
+        (temp_data_dir / "cpu.stat").write_text("usage_usec 900\nuser_usec 600\n")
+        (temp_data_dir / "io.pressure").write_text(
+            "some avg10=3.00 avg60=1.00 avg300=0.50 total=10\n"
+        )
+
+        stats = read_cgroup_stats(temp_data_dir)
+
+        assert stats["memory_current"] == 2097152
+        assert stats["memory_max"] is None
+        assert stats["cpu_usage_usec"] == 900
+        assert stats["io_pressure"]["some"]["avg10"] == 3.0
+        assert "cpu_pressure" not in stats
+
+    @pytest.mark.skipif(platform.system() != "Linux", reason="Linux only")
+    def test_own_cgroup_is_under_cgroup_root(self):
+        cgroup = get_process_cgroup(os.getpid())
+        if cgroup is None:
+            pytest.skip("cgroup v2 not available")
+
+        assert str(cgroup).startswith("/sys/fs/cgroup")
+
+
+class TestManager:
+    """Tests for strategy fallback."""
+
+    def test_no_limits_means_no_placement(self):
+        manager = CgroupManager({})
+
+        assert manager.setup() is None
+        assert manager.place("syncserver", os.getpid()) is False
+        assert manager.get_stats(os.getpid()) is None
+
+
+class FakeBusctl:
+    """Stands in for subprocess.run, recording busctl calls."""
+
+    def __init__(self, returncode=0, block=False):
+        self.calls = []
+        self.returncode = returncode
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, args, check=False, **kwargs):
+        self.calls.append((args, threading.current_thread().name))
+        assert self.release.wait(10)
+        if check and self.returncode:
+            raise subprocess.CalledProcessError(self.returncode, args)
+        return subprocess.CompletedProcess(args, self.returncode, b"", b"")
+
+
+@pytest.fixture
+def cgroup_v2_linux(temp_data_dir, monkeypatch):
+    """A cgroup v2 Linux host without delegation: setup() falls back to systemd."""
+    (temp_data_dir / "cgroup.controllers").write_text("cpu memory io\n")
+    monkeypatch.setattr(cgroups, "CGROUP_ROOT", temp_data_dir)
+    monkeypatch.setattr(cgroups.platform, "system", lambda: "Linux")
+    monkeypatch.setattr(cgroups, "get_process_cgroup", lambda pid: None)
+    monkeypatch.setattr(cgroups.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+
+class TestSystemdStrategy:
+    """Tests for transient systemd scopes, with busctl faked."""
+
+    def test_setup_with_user_manager(self, cgroup_v2_linux, monkeypatch):
+        busctl = FakeBusctl()
+        monkeypatch.setattr(cgroups.subprocess, "run", busctl)
+        manager = CgroupManager({"syncserver": CgroupLimits(memory_max=1024)})
+
+        assert manager.setup() == "systemd"
+        assert busctl.calls[0][0][:3] == ["busctl", "--user", "status"]
+
+    def test_setup_without_busctl(self, cgroup_v2_linux, monkeypatch):
+        monkeypatch.setattr(cgroups.shutil, "which", lambda name: None)
+        manager = CgroupManager(
+            {"syncserver": CgroupLimits(memory_max=1024)}, strategy="systemd"
+        )
+
+        assert manager.setup() is None
+
+    def test_transient_scope_call(self, monkeypatch):
+        busctl = FakeBusctl()
+        monkeypatch.setattr(cgroups.subprocess, "run", busctl)
+        manager = CgroupManager(
+            {"syncserver": CgroupLimits(memory_max=1024, cpu_weight=200)}
+        )
+        manager.strategy = "systemd"
+
+        assert manager.place("syncserver", 4321)
+
+        args = busctl.calls[0][0]
+        assert args[args.index("StartTransientUnit") + 2 :] == [
+            "librocco-syncserver-4321.scope",
+            "fail",
+            "3",
+            "PIDs", "au", "1", "4321",
+            "MemoryMax", "t", "1024",
+            "CPUWeight", "t", "200",
+            "0",
+        ]  # fmt: skip
+
+    def test_place_soon_does_not_block(self, monkeypatch):
+        busctl = FakeBusctl(block=True)
+        monkeypatch.setattr(cgroups.subprocess, "run", busctl)
+        manager = CgroupManager({"syncserver": CgroupLimits(memory_max=1024)})
+        manager.strategy = "systemd"
+
+        # Returns while busctl is still running
+        placed = manager.place_soon("syncserver", 4321)
+        assert not placed.done()
+
+        busctl.release.set()
+        assert placed.result(10) is True
+        assert busctl.calls[0][1].startswith("cgroup-placement")
+        manager.close()
+
+    def test_failed_placement(self, monkeypatch):
+        monkeypatch.setattr(cgroups.subprocess, "run", FakeBusctl(returncode=1))
+        manager = CgroupManager({"caddy": CgroupLimits(io_weight=300)})
+        manager.strategy = "systemd"
+
+        assert manager.place_soon("caddy", 4321).result(10) is False
+        # Daemons without limits are never placed
+        assert manager.place_soon("syncserver", 4321).result() is False
+        manager.close()
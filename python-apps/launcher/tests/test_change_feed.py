@@ -0,0 +1,93 @@
+"""Tests for the change-feed monitor."""
+
+import sqlite3
+
+import pytest
+
+from launcher.change_feed import ChangeFeedMonitor, read_change_feed
+
+TILL = bytes.fromhex("aa" * 16)
+OFFICE = bytes.fromhex("bb" * 16)
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    """A db_dir with one database shaped like a synced CR-SQLite DB."""
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    conn = sqlite3.connect(db_dir / "dev.sqlite3")
+    for table in ("book", "warehouse"):
+        conn.execute(
+            f'CREATE TABLE "{table}__crsql_clock" (key INTEGER, col_name TEXT, '
+            "col_version INTEGER, db_version INTEGER, site_id INTEGER, seq INTEGER)"
+        )
+    conn.execute(
+        "CREATE TABLE crsql_tracked_peers (site_id BLOB NOT NULL, version INTEGER "
+        "NOT NULL, seq INTEGER DEFAULT 0, tag INTEGER, event INTEGER, "
+        "PRIMARY KEY (site_id, tag, event))"
+    )
+    conn.commit()
+    conn.close()
+    return db_dir
+
+
+def _write(db_dir, db_version, peers):
+    """Record changes up to db_version and the peers' received versions."""
+    conn = sqlite3.connect(db_dir / "dev.sqlite3")
+    conn.execute(
+        "INSERT INTO book__crsql_clock VALUES (1, 'title', 1, ?, 0, 0)", (db_version,)
+    )
+    for site_id, version in peers.items():
+        conn.execute(
+            "INSERT INTO crsql_tracked_peers VALUES (?, ?, 0, 0, 0) "
+            "ON CONFLICT DO UPDATE SET version = excluded.version",
+            (site_id, version),
+        )
+    # Versions we sent are tracked too, but don't count as received
+    conn.execute(
+        "INSERT OR REPLACE INTO crsql_tracked_peers VALUES (?, 999, 0, 0, 1)", (TILL,)
+    )
+    conn.commit()
+    conn.close()
+
+
+class TestChangeFeedMonitor:
+    """Tests for rates and peer lag."""
+
+    def test_read_change_feed(self, db_dir):
+        _write(db_dir, 40, {TILL: 7})
+
+        feed = read_change_feed(db_dir / "dev.sqlite3")
+
+        assert feed == {"db_version": 40, "peers": {TILL.hex(): 7}}
+
+    def test_rate_and_lag(self, db_dir, temp_data_dir):
+        monitor = ChangeFeedMonitor(
+            db_dir, temp_data_dir / "feed.jsonl", lag_warning_versions=50
+        )
+        _write(db_dir, 100, {TILL: 10, OFFICE: 5})
+        monitor.sample(now=1000.0)
+
+        # The office keeps syncing, the till goes quiet
+        _write(db_dir, 220, {TILL: 10, OFFICE: 9})
+        feeds = monitor.sample(now=1060.0)
+
+        feed = feeds["dev.sqlite3"]
+        assert feed.changes_per_second == pytest.approx(2.0)
+        assert feed.lag(OFFICE.hex()) == 0
+        assert monitor.lagging_peers() == [("dev.sqlite3", TILL.hex(), 120)]
+        assert monitor.total_changes_per_second() == pytest.approx(2.0)
+
+    def test_state_restored_from_history(self, db_dir, temp_data_dir):
+        history = temp_data_dir / "feed.jsonl"
+        first = ChangeFeedMonitor(db_dir, history, lag_warning_versions=50)
+        _write(db_dir, 100, {TILL: 10})
+        first.sample(now=1000.0)
+        _write(db_dir, 300, {TILL: 10})
+        first.sample(now=1060.0)
+
+        restarted = ChangeFeedMonitor(db_dir, history, lag_warning_versions=50)
+        restarted._restore()
+
+        assert restarted.lagging_peers() == [("dev.sqlite3", TILL.hex(), 200)]
+        assert restarted.total_changes_per_second() is None
@@ -0,0 +1,128 @@
+"""Tests for the chaos harness."""
+
+import platform
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from launcher.chaos import ChaosHarness, format_table, summarize
+from launcher.control_api import ControlClient, ControlServer, daemon_pid_lookup
+
+DAEMON = (
+    "import http.server, sys\n"
+    "http.server.HTTPServer(('127.0.0.1', int(sys.argv[1])),"
+    " http.server.SimpleHTTPRequestHandler).serve_forever()\n"
+)
+
+
+@pytest.fixture
+def supervised_daemon(temp_data_dir, test_port):
+    """An HTTP server respawned when it exits, like a Circus watcher."""
+    (temp_data_dir / "index.html").write_text("ok")
+    stopping = threading.Event()
+    state = {}
+
+    def supervise():
+        while not stopping.is_set():
+            state["process"] = subprocess.Popen(
+                [sys.executable, "-c", DAEMON, str(test_port)],
+                cwd=temp_data_dir,
+                stderr=subprocess.DEVNULL,
+            )
+            state["process"].wait()
+            stopping.wait(0.3)
+
+    def daemon_pid(name):
+        return state["process"].pid
+
+    thread = threading.Thread(target=supervise, daemon=True)
+    thread.start()
+    while "process" not in state:
+        stopping.wait(0.01)
+    yield test_port, daemon_pid
+    stopping.set()
+    state["process"].kill()
+    thread.join(timeout=10)
+
+
+class TestChaosHarness:
+    """Tests for fault injection and recovery timing."""
+
+    def test_kill_and_stop(self, temp_data_dir, supervised_daemon):
+        port, daemon_pid = supervised_daemon
+        harness = ChaosHarness(
+            temp_data_dir,
+            temp_data_dir,
+            daemon_pid,
+            probes={"static": f"http://127.0.0.1:{port}/"},
+            daemon_ports={"syncserver": port},
+            hold_seconds=0.5,
+            timeout=15,
+            interval=0.05,
+        )
+
+        results = harness.run(["kill_syncserver", "stop_syncserver"], rounds=1)
+
+        killed, stopped = results
+        assert killed["recovered"]
+        # Respawned 0.3s after the kill
+        assert 0.25 < killed["recovery_seconds"] < 10
+        assert stopped["recovered"]
+        assert not stopped["serving_during_fault"]
+        assert stopped["outage_seconds"] >= 0.4
+        # Resumed, not restarted: serving right away
+        assert stopped["recovery_seconds"] < 2
+
+    def test_fault_not_applicable(self, temp_data_dir, supervised_daemon):
+        port, daemon_pid = supervised_daemon
+        harness = ChaosHarness(
+            temp_data_dir,
+            temp_data_dir,
+            daemon_pid,
+            probes={"static": f"http://127.0.0.1:{port}/"},
+            daemon_ports={"syncserver": port},
+            timeout=15,
+        )
+
+        results = harness.run(["corrupt_db"], rounds=3)
+
+        assert len(results) == 1
+        summary = summarize(results)
+        assert summary["corrupt_db"]["error"] == "no database to copy"
+        assert "no database to copy" in format_table(summary)
+
+    def test_launcher_not_running(self, temp_data_dir, supervised_daemon):
+        port, _ = supervised_daemon
+        harness = ChaosHarness(
+            temp_data_dir,
+            temp_data_dir,
+            daemon_pid_lookup(temp_data_dir / "control.sock"),
+            probes={"static": f"http://127.0.0.1:{port}/"},
+            timeout=15,
+        )
+
+        result = harness.run_fault("kill_syncserver")
+
+        assert "not reachable" in result["error"]
+
+
+@pytest.mark.skipif(platform.system() == "Windows", reason="Unix socket transport")
+class TestControlApiPids:
+    """Tests for looking daemon PIDs up through the control API."""
+
+    def test_pids_from_supervisor(self, fake_supervisor, temp_data_dir):
+        server = ControlServer(fake_supervisor, temp_data_dir / "control.sock")
+        server.start()
+        try:
+            daemon_pid = daemon_pid_lookup(server.address)
+            assert daemon_pid("syncserver") is None
+
+            core = fake_supervisor.core
+            assert core.run(core.start_daemon("syncserver"))
+            with ControlClient(server.address) as client:
+                assert client.request("wait_ready", daemons=["syncserver"])["ok"]
+            assert daemon_pid("syncserver") == core.run(core.status("syncserver")).pid
+        finally:
+            server.stop()
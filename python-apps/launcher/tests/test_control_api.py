@@ -0,0 +1,171 @@
+"""Tests for the local control API, against the fake daemons."""
+
+import os
+import platform
+import stat
+import time
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+from launcher.control_api import (
+    ControlClient,
+    ControlServer,
+    format_status,
+    run_ctl_command,
+)
+from launcher.startup import start_control_api
+
+pytestmark = pytest.mark.skipif(
+    platform.system() == "Windows", reason="Unix socket transport"
+)
+
+
+@pytest.fixture
+def control_server(fake_supervisor, temp_data_dir):
+    server = ControlServer(fake_supervisor, temp_data_dir / "control.sock")
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(control_server):
+    with ControlClient(control_server.address) as client:
+        yield client
+
+
+class TestControlServer:
+    """Tests for ControlServer and ControlClient."""
+
+    def test_status(self, client):
+        reply = client.request("status")
+
+        assert reply["ok"]
+        assert reply["supervisor"] == "running"
+        assert reply["daemons"]["caddy"]["status"] == "stopped"
+        assert reply["daemons"]["syncserver"]["pid"] is None
+        assert "syncserver   stopped" in format_status(reply)
+
+    def test_start_wait_and_stop(self, client):
+        assert client.request("start", daemon="syncserver") == {"ok": True}
+
+        reply = client.request("wait_ready", daemons=["syncserver"], timeout=10)
+        assert reply["ok"], reply
+
+        syncserver = client.request("status")["daemons"]["syncserver"]
+        assert syncserver["status"] == "active"
+        assert syncserver["process"]["rss_bytes"] > 0
+
+        assert client.request("stop", daemon="syncserver") == {"ok": True}
+        assert client.request("status")["daemons"]["syncserver"]["status"] == "stopped"
+
+    def test_wait_ready_timeout(self, client):
+        reply = client.request("wait_ready", daemons=["caddy"], timeout=0.3)
+
+        assert not reply["ok"]
+        assert "caddy" in reply["error"]
+
+    def test_logs(self, fake_supervisor, client):
+        fake_supervisor.syncserver_log.write_text("one\ntwo\nthree\npartial")
+
+        messages = list(client.stream("logs", log="syncserver", lines=2))
+
+        assert messages == [{"line": "two"}, {"line": "three"}, {"ok": True}]
+
+    def test_logs_follow(self, fake_supervisor, control_server):
+        log = fake_supervisor.syncserver_log
+        log.write_text("old\n")
+        with ControlClient(control_server.address, timeout=5) as client:
+            messages = client.stream("logs", log="syncserver", lines=10, follow=True)
+            assert next(messages) == {"line": "old"}
+            with open(log, "a") as f:
+                f.write("new 1\nnew ")
+            assert next(messages) == {"line": "new 1"}
+            with open(log, "a") as f:
+                f.write("2\n")
+            assert next(messages) == {"line": "new 2"}
+
+            # Rotated: followed from the new file's start
+            log.rename(log.with_suffix(".log.1"))
+            log.write_text("rotated\n")
+            assert next(messages) == {"line": "rotated"}
+
+    def test_logs_follow_ends_with_client(self, fake_supervisor, control_server):
+        log = fake_supervisor.syncserver_log
+        log.write_text("old\n")
+        with ControlClient(control_server.address, timeout=5) as client:
+            messages = client.stream("logs", log="syncserver", lines=10, follow=True)
+            assert next(messages) == {"line": "old"}
+
+        # Nothing more is written: the follow still ends, closing the log
+        def log_open():
+            return any(f.path == str(log) for f in psutil.Process().open_files())
+
+        deadline = time.monotonic() + 5
+        while log_open():
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+    def test_invalid_requests(self, client):
+        assert not client.request("reboot")["ok"]
+        assert "Invalid request" in client.request("start")["error"]
+        assert "Invalid request" in client.request("start", daemon="nginx")["error"]
+        # The connection is still usable
+        assert client.request("status")["ok"]
+
+    def test_address_in_use(self, fake_supervisor, control_server):
+        with pytest.raises(RuntimeError):
+            ControlServer(fake_supervisor, control_server.address).start()
+        # The running server keeps its socket
+        with ControlClient(control_server.address) as client:
+            assert client.request("status")["ok"]
+
+    def test_socket_owner_only(self, control_server):
+        mode = stat.S_IMODE(os.stat(control_server.address).st_mode)
+        assert mode & 0o077 == 0
+
+    def test_socket_removed_on_stop(self, control_server):
+        control_server.stop()
+        assert not control_server.address.exists()
+
+
+class TestCtlCommand:
+    """Tests for run_ctl_command (`librocco-headless ctl`)."""
+
+    def test_status(self, control_server, capsys):
+        assert run_ctl_command(control_server.address, "status", []) == 0
+        assert "caddy" in capsys.readouterr().out
+
+    def test_failed_wait(self, control_server):
+        code = run_ctl_command(control_server.address, "wait", ["caddy"], timeout=0.2)
+        assert code == 1
+
+    def test_not_running(self, temp_data_dir):
+        assert run_ctl_command(temp_data_dir / "control.sock", "status", []) == 2
+
+
+def _config(data_dir, **settings):
+    return SimpleNamespace(
+        data_dir=data_dir, get=lambda key, default=None: settings.get(key, default)
+    )
+
+
+class TestStartControlApi:
+    """Tests for startup.start_control_api, shared by the tray and headless."""
+
+    def test_registered_with_supervisor(self, fake_supervisor, temp_data_dir):
+        server = start_control_api(_config(temp_data_dir), fake_supervisor)
+
+        assert server in fake_supervisor.background_services
+        with ControlClient(server.address) as client:
+            assert client.request("status")["ok"]
+        fake_supervisor.stop()
+        assert not server.address.exists()
+
+    def test_disabled(self, fake_supervisor, temp_data_dir):
+        config = _config(temp_data_dir, control_api=False)
+
+        assert start_control_api(config, fake_supervisor) is None
+        assert fake_supervisor.background_services == []
@@ -0,0 +1,55 @@
+"""Tests for the control plane stress harness."""
+
+import threading
+
+from launcher.control_stress import ControlStressHarness, format_report
+
+
+class TestControlStressHarness:
+    """Tests for ControlStressHarness against the fake daemons."""
+
+    def test_storm(self, fake_supervisor, test_port):
+        harness = ControlStressHarness(
+            fake_supervisor,
+            threads=4,
+            operations=80,
+            daemon_ports={"caddy": test_port},
+            seed=1,
+        )
+        report = harness.run()
+
+        assert report["completed"] == 80
+        assert report["hung"] == []
+        # Calls from several threads must not lose each other's replies
+        assert report["lost_replies"] == 0
+        assert report["inconsistencies"] == []
+        assert report["summary"]["status"]["errors"] == 0
+        # Commands the busy arbiter rejected are retried, not reported as done
+        assert report["false_successes"] == {}
+        assert "lost replies: 0" in format_report(report)
+        # The harness puts the core's own connection back
+        assert type(fake_supervisor.core.circus).__name__ == "CircusConnection"
+
+    def test_hung_operation(self, fake_supervisor, monkeypatch):
+        released = threading.Event()
+
+        async def stuck(daemon_name):
+            # Blocks the core's event loop, like a blocking call slipped into it
+            released.wait()
+
+        monkeypatch.setattr(fake_supervisor.core, "status", stuck)
+        harness = ControlStressHarness(
+            fake_supervisor,
+            threads=2,
+            operations=10,
+            mix={"status": 1},
+            hang_timeout=0.3,
+        )
+        try:
+            report = harness.run()
+        finally:
+            released.set()
+
+        assert report["hung"]
+        assert report["hung"][0]["operation"] == "status"
+        assert any("stuck" in stack for stack in report["hung"][0]["stacks"].values())
@@ -0,0 +1,86 @@
+"""Tests for the stand-in daemons and the supervisor's daemon_commands."""
+
+import json
+import time
+
+import pytest
+
+from launcher.api_client import HttpClient, SyncServerClient
+from launcher.daemon_manager import EmbeddedSupervisor
+from launcher.fake_daemons import fake_daemon_commands, main
+
+from tests.conftest import wait_for_caddy_ready, wait_for_daemon_status
+
+
+def _supervisor(temp_data_dir, caddyfile, **fake_options):
+    (temp_data_dir / "logs").mkdir(exist_ok=True)
+    (temp_data_dir / "db").mkdir(exist_ok=True)
+    return EmbeddedSupervisor(
+        caddy_binary=temp_data_dir / "caddy",
+        caddyfile=caddyfile,
+        caddy_data_dir=temp_data_dir,
+        logs_dir=temp_data_dir / "logs",
+        node_binary=temp_data_dir / "node",
+        syncserver_script=temp_data_dir / "syncserver.mjs",
+        syncserver_dir=temp_data_dir,
+        db_dir=temp_data_dir / "db",
+        gui_mode=False,
+        daemon_commands=fake_daemon_commands(**fake_options),
+    )
+
+
+@pytest.fixture
+def caddyfile(temp_data_dir, test_port):
+    """A Caddyfile with a site on a free port and a JSON access log."""
+    path = temp_data_dir / "Caddyfile"
+    path.write_text(f"""
+:{test_port} {{
+    log {{
+        output file {temp_data_dir / "server.log"}
+    }}
+    log {{
+        output file {temp_data_dir / "access.log"}
+    }}
+    respond "Hello" 200
+}}
+""")
+    return path
+
+
+class TestFakeDaemons:
+    """Tests for running the fake daemons under the supervisor."""
+
+    def test_start_and_stop(self, temp_data_dir, caddyfile, test_port):
+        (temp_data_dir / "db").mkdir()
+        (temp_data_dir / "db" / "dev.sqlite3").touch()
+        supervisor = _supervisor(temp_data_dir, caddyfile, log_lines=50)
+        supervisor.start()
+        try:
+            assert supervisor._start_all_daemons_sync()
+            assert wait_for_caddy_ready("127.0.0.1", test_port)
+            with SyncServerClient() as client:
+                deadline = time.monotonic() + 10
+                while True:
+                    try:
+                        health = client.health()
+                        break
+                    except Exception:
+                        assert time.monotonic() < deadline
+                        time.sleep(0.05)
+            assert health.healthy
+            assert list(health.databases) == ["dev.sqlite3"]
+            with HttpClient("http://127.0.0.1:2019") as admin:
+                assert admin.get_json("/config/")["apps"]
+
+            time.sleep(0.2)
+            access = (temp_data_dir / "access.log").read_text().splitlines()
+            assert json.loads(access[-1])["logger"] == "http.log.access"
+
+            assert supervisor._stop_all_daemons_sync()
+            assert wait_for_daemon_status(supervisor, "caddy", "stopped")
+        finally:
+            supervisor.stop()
+
+    def test_crash_probability(self, capsys):
+        assert main(["caddy", "--crash-probability=1", "--", "run"]) == 1
+        assert "simulated crash" in capsys.readouterr().err
@@ -0,0 +1,206 @@
+"""Tests for supervisor-owned listening sockets."""
+
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+import urllib3
+
+from launcher.listen_sockets import (
+    CADDY_BIND_ENV,
+    CADDY_BIND_H3_ENV,
+    SYNCSERVER_FD_ENV,
+    ListenSockets,
+    PortInUseError,
+    prebound_sockets_enabled,
+)
+
+pytestmark = pytest.mark.skipif(
+    platform.system() == "Windows", reason="Socket inheritance is POSIX only"
+)
+
+# Child that serves one connection on the inherited socket
+ECHO_CHILD = """
+import os, socket
+sock = socket.socket(fileno=int(os.environ["LISTEN_FD"]))
+conn, _ = sock.accept()
+conn.sendall(b"hello from child")
+conn.close()
+"""
+
+# Child reporting which of the fds given as arguments it inherited
+INHERITED_CHILD = """
+import os, sys
+for fd in sys.argv[1:]:
+    try:
+        os.fstat(int(fd))
+        print(True)
+    except OSError:
+        print(False)
+"""
+
+
+@pytest.fixture
+def listen_sockets():
+    """Sockets on ephemeral ports, closed after the test."""
+    sockets = ListenSockets({"caddy": ("127.0.0.1", 0), "syncserver": ("127.0.0.1", 0)})
+    sockets.bind()
+    yield sockets
+    sockets.close()
+
+
+def _port(listen_sockets, name):
+    return listen_sockets.sockets[name].getsockname()[1]
+
+
+class TestListenSockets:
+    """Tests for binding and handing over sockets."""
+
+    def test_env_hands_over_fds(self, listen_sockets):
+        caddy_fd = listen_sockets.fd("caddy")
+        quic_fd = listen_sockets.datagram_sockets["caddy"].fileno()
+
+        assert listen_sockets.env("caddy") == {
+            CADDY_BIND_ENV: f"fd/{caddy_fd}",
+            CADDY_BIND_H3_ENV: f"fdgram/{quic_fd}",
+        }
+        assert listen_sockets.env("syncserver") == {
+            SYNCSERVER_FD_ENV: str(listen_sockets.fd("syncserver"))
+        }
+
+    def test_only_spawning_daemon_inherits(self, listen_sockets):
+        caddy_fd = listen_sockets.fd("caddy")
+        syncserver_fd = listen_sockets.fd("syncserver")
+        assert not os.get_inheritable(caddy_fd)
+
+        listen_sockets.inherit_only("syncserver")
+        child = subprocess.run(
+            [sys.executable, "-c", INHERITED_CHILD, str(caddy_fd), str(syncserver_fd)],
+            close_fds=False,
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        assert child.stdout.split() == ["False", "True"]
+
+        listen_sockets.inherit_only(None)
+        assert not os.get_inheritable(syncserver_fd)
+
+    def test_caddy_udp_socket_shares_its_port(self, listen_sockets):
+        quic = listen_sockets.datagram_sockets["caddy"]
+
+        assert quic.type == socket.SOCK_DGRAM
+        assert quic.getsockname()[1] == _port(listen_sockets, "caddy")
+        assert "syncserver" not in listen_sockets.datagram_sockets
+
+        listen_sockets.inherit_only("caddy")
+        assert os.get_inheritable(quic.fileno())
+        listen_sockets.inherit_only("syncserver")
+        assert not os.get_inheritable(quic.fileno())
+
+    def test_port_conflict_is_detected(self, listen_sockets):
+        taken = _port(listen_sockets, "syncserver")
+        conflicting = ListenSockets({"syncserver": ("127.0.0.1", taken)})
+
+        with pytest.raises(PortInUseError, match=str(taken)):
+            conflicting.bind()
+        assert conflicting.sockets == {}
+
+    def test_connection_waits_in_backlog_until_child_starts(self, listen_sockets):
+        # Connect while no daemon is running: accepted by the kernel, not refused
+        client = socket.create_connection(
+            ("127.0.0.1", _port(listen_sockets, "syncserver")), timeout=10
+        )
+
+        listen_sockets.inherit_only("syncserver")
+        child = subprocess.Popen(
+            [sys.executable, "-c", ECHO_CHILD],
+            env=dict(os.environ, **listen_sockets.env("syncserver")),
+            close_fds=False,
+        )
+        try:
+            assert client.recv(100) == b"hello from child"
+        finally:
+            client.close()
+            child.wait(timeout=10)
+
+    def test_can_be_disabled(self):
+        assert prebound_sockets_enabled(None)
+        assert not prebound_sockets_enabled(False)
+
+
+@pytest.mark.slow
+@pytest.mark.binary
+class TestCaddyInheritsSockets:
+    """The generated Caddyfile, run by a real Caddy on inherited sockets."""
+
+    @pytest.fixture
+    def caddyfile(self, mock_config):
+        mock_config.ensure_caddyfile(mock_config.data_dir / "app")
+        return mock_config.caddy_config_dir / "Caddyfile"
+
+    def test_serves_http3_on_inherited_udp_socket(self, mock_config, caddyfile):
+        sockets = ListenSockets({"caddy": ("127.0.0.1", 0)})
+        sockets.bind()
+        port = _port(sockets, "caddy")
+        sockets.inherit_only("caddy")
+        caddy = subprocess.Popen(
+            [
+                str(mock_config.caddy_binary_path),
+                "run",
+                "--config",
+                str(caddyfile),
+                "--adapter",
+                "caddyfile",
+            ],
+            cwd=mock_config.caddy_data_dir,
+            env=dict(os.environ, **sockets.env("caddy")),
+            close_fds=False,
+        )
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    response = requests.get(
+                        f"https://127.0.0.1:{port}/", verify=False, timeout=5
+                    )
+                    break
+                except requests.RequestException:
+                    assert caddy.poll() is None, "Caddy exited"
+                    assert time.monotonic() < deadline, "Caddy never answered"
+                    time.sleep(0.2)
+
+            # Advertised only while the HTTP/3 server runs, on the UDP socket
+            assert f'h3=":{port}"' in response.headers.get("Alt-Svc", "")
+        finally:
+            caddy.terminate()
+            caddy.wait(timeout=15)
+            sockets.close()
+
+    def test_started_by_hand(self, mock_config, caddyfile):
+        # Without the launcher's sockets both binds fall back to 0.0.0.0
+        result = subprocess.run(
+            [
+                str(mock_config.caddy_binary_path),
+                "adapt",
+                "--config",
+                str(caddyfile),
+                "--adapter",
+                "caddyfile",
+            ],
+            env={
+                k: v
+                for k, v in os.environ.items()
+                if k not in (CADDY_BIND_ENV, CADDY_BIND_H3_ENV)
+            },
+            capture_output=True,
+            text=True,
+            timeout=30,
+        )
+        assert result.returncode == 0, result.stderr
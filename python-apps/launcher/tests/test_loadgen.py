@@ -0,0 +1,304 @@
+"""Tests for the sync load generator."""
+
+import asyncio
+import json
+import shutil
+import socket
+import subprocess
+import sqlite3
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+import requests
+from websockets.asyncio.server import serve
+
+from launcher.daemon_manager import EmbeddedSupervisor
+from launcher.loadgen import (
+    TAG_ANNOUNCE_PRESENCE,
+    TAG_CHANGES,
+    LoadGenError,
+    LoadGenerator,
+    _varint,
+    _varuint,
+    encode_announce_presence,
+    encode_changes,
+    find_saturation,
+    pack_columns,
+)
+
+SYNC_SERVER_DIR = Path(__file__).parents[3] / "apps" / "sync-server"
+TSX_BINARY = SYNC_SERVER_DIR / "node_modules" / ".bin" / "tsx"
+SYNCSERVER_PORT = 3000
+
+# Decodes hex frames with @vlcn.io/ws-common and prints them as JSON (bigints
+# as strings, byte arrays as hex)
+WS_COMMON_DECODE = """
+import { readFileSync } from "node:fs";
+import { join } from "node:path";
+import { pathToFileURL } from "node:url";
+
+const [dir, ...frames] = process.argv.slice(1);
+const pkg = JSON.parse(readFileSync(join(dir, "package.json"), "utf8"));
+const root = pkg.exports?.["."] ?? pkg.module ?? pkg.main;
+const entry = typeof root === "string" ? root : root.import ?? root.default;
+const { decode } = await import(pathToFileURL(join(dir, entry)));
+function json(key, value) {
+  // The raw value: a Buffer has already been through its toJSON()
+  const raw = this[key];
+  if (typeof raw === "bigint") return raw.toString();
+  if (raw instanceof Uint8Array) return Buffer.from(raw).toString("hex");
+  return value;
+}
+for (const frame of frames) {
+  const bytes = new Uint8Array(Buffer.from(frame, "hex"));
+  console.log(JSON.stringify(decode(bytes), json));
+}
+"""
+
+
+def _ws_common_dir():
+    """@vlcn.io/ws-common as installed for the sync server's ws-server, or None."""
+    modules = SYNC_SERVER_DIR / "node_modules" / "@vlcn.io"
+    ws_server = modules / "ws-server"
+    # Hoisted (npm) or next to ws-server's real path (pnpm)
+    for candidate in (modules / "ws-common", ws_server.resolve().parent / "ws-common"):
+        if (candidate / "package.json").exists():
+            return candidate
+    return None
+
+
+class NoDaemons:
+    """Sampler stand-in: no daemons found."""
+
+    processes = {}
+
+    def start(self):
+        pass
+
+    def sample(self):
+        return {}
+
+
+async def _relay_server():
+    """WebSocket server relaying Changes to the other connections of a room."""
+    rooms = {}
+
+    async def handle(ws):
+        room = parse_qs(urlsplit(ws.request.path).query)["room"][0]
+        peers = rooms.setdefault(room, [])
+        peers.append(ws)
+        try:
+            async for message in ws:
+                if message[0] == TAG_CHANGES:
+                    for peer in peers:
+                        if peer is not ws:
+                            await peer.send(message)
+        finally:
+            peers.remove(ws)
+
+    return await serve(handle, "127.0.0.1", 0), rooms
+
+
+def _wait_for_syncserver(timeout: float = 60.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = requests.get(f"http://127.0.0.1:{SYNCSERVER_PORT}", timeout=1)
+            if response.status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+class TestEncoding:
+    """Tests for the wire format helpers."""
+
+    def test_varints(self):
+        assert _varuint(0) == b"\x00"
+        assert _varuint(300) == b"\xac\x02"
+        assert _varint(5) == b"\x05"
+        assert _varint(-5) == b"\x45"
+        assert _varint(100) == b"\xa4\x01"
+
+    def test_pack_columns(self):
+        assert pack_columns(["978"]) == b"\x01\x0b\x03978"
+        assert pack_columns([1, 256]) == b"\x02\x09\x01\x11\x01\x00"
+
+    @pytest.mark.skipif(
+        not shutil.which("node") or _ws_common_dir() is None,
+        reason="sync server dependencies (@vlcn.io/ws-common) not installed",
+    )
+    def test_ws_common_decodes_frames(self):
+        sender = bytes(range(16))
+        pk = pack_columns(["lg-1-0-1-0"])
+        frames = [
+            encode_announce_presence(sender, "init", 123),
+            encode_changes(
+                sender,
+                (5, 0),
+                [("book", pk, "title", "lg-1-0-1", 1, 6, sender, 1, 0)],
+            ),
+        ]
+
+        output = subprocess.run(
+            ["node", "--input-type=module", "-e", WS_COMMON_DECODE]
+            + [str(_ws_common_dir())]
+            + [frame.hex() for frame in frames],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        presence, changes = [json.loads(line) for line in output.splitlines()]
+
+        assert presence == {
+            "_tag": TAG_ANNOUNCE_PRESENCE,
+            "sender": sender.hex(),
+            "lastSeens": [],
+            "schemaName": "init",
+            "schemaVersion": "123",
+        }
+        assert changes == {
+            "_tag": TAG_CHANGES,
+            "sender": sender.hex(),
+            "since": ["5", 0],
+            "changes": [
+                ["book", pk.hex(), "title", "lg-1-0-1", "1", "6", sender.hex(), "1", 0]
+            ],
+        }
+
+
+class TestLoadGenerator:
+    """Tests for the ramp against a local relay server."""
+
+    @pytest.fixture
+    def db_dir(self, temp_data_dir):
+        db_dir = temp_data_dir / "db"
+        db_dir.mkdir()
+        conn = sqlite3.connect(db_dir / "dev.sqlite3")
+        conn.execute("CREATE TABLE crsql_master (key TEXT PRIMARY KEY, value ANY)")
+        conn.executemany(
+            "INSERT INTO crsql_master VALUES (?, ?)",
+            [("schema_name", "init"), ("schema_version", 123)],
+        )
+        conn.commit()
+        conn.close()
+        return db_dir
+
+    def test_ramp(self, db_dir):
+        async def run():
+            server, rooms = await _relay_server()
+            async with server:
+                generator = LoadGenerator(
+                    db_dir,
+                    "dev.sqlite3",
+                    port=server.sockets[0].getsockname()[1],
+                    max_clients=4,
+                    step_seconds=0.3,
+                    changes_per_message=3,
+                    sampler=NoDaemons(),
+                )
+                return await generator.run(), rooms
+
+        report, rooms = asyncio.run(run())
+
+        assert [step["clients"] for step in report["steps"]] == [2, 4]
+        for step in report["steps"]:
+            assert step["round_trips"] > 0
+            assert step["changes_per_sec"] > 0
+            assert 0 < step["p50_ms"] <= step["p99_ms"]
+            assert step["timeouts"] == 0
+        assert list(rooms) == [report["room"]]
+        # The scratch room is removed
+        assert [p.name for p in db_dir.iterdir()] == ["dev.sqlite3"]
+
+    def test_nothing_relayed_fails(self, db_dir):
+        async def run():
+            async def swallow(ws):
+                async for _ in ws:
+                    pass
+
+            async with await serve(swallow, "127.0.0.1", 0) as server:
+                generator = LoadGenerator(
+                    db_dir,
+                    "dev.sqlite3",
+                    port=server.sockets[0].getsockname()[1],
+                    max_clients=4,
+                    step_seconds=0.3,
+                    timeout=0.1,
+                    sampler=NoDaemons(),
+                )
+                await generator.run()
+
+        with pytest.raises(LoadGenError, match="No changeset reached a peer"):
+            asyncio.run(run())
+        assert [p.name for p in db_dir.iterdir()] == ["dev.sqlite3"]
+
+    def test_saturation(self):
+        steps = [
+            {"clients": 2, "changes_per_sec": 100.0, "timeouts": 0},
+            {"clients": 4, "changes_per_sec": 190.0, "timeouts": 0},
+            {"clients": 8, "changes_per_sec": 200.0, "timeouts": 0},
+            {"clients": 16, "changes_per_sec": 150.0, "timeouts": 3},
+        ]
+
+        assert find_saturation(steps) == 4
+        assert find_saturation(steps[:2]) is None
+
+
+@pytest.mark.slow
+@pytest.mark.integration
+@pytest.mark.skipif(
+    not TSX_BINARY.exists(), reason="sync server dependencies not installed"
+)
+def test_ramp_against_sync_server(temp_data_dir):
+    """Drive the development sync server (via tsx) directly, without Caddy."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        if sock.connect_ex(("127.0.0.1", SYNCSERVER_PORT)) == 0:
+            pytest.skip("Port 3000 is in use (is a launcher already running?)")
+
+    db_dir = temp_data_dir / "db"
+    supervisor = EmbeddedSupervisor(
+        caddy_binary=temp_data_dir / "caddy",
+        caddyfile=temp_data_dir / "Caddyfile",
+        caddy_data_dir=temp_data_dir / "caddy-data",
+        logs_dir=temp_data_dir / "logs",
+        node_binary=temp_data_dir / "node",
+        syncserver_script=temp_data_dir / "syncserver.mjs",
+        syncserver_dir=temp_data_dir,
+        db_dir=db_dir,
+        gui_mode=False,
+    )
+    try:
+        supervisor.start()
+        assert supervisor._start_daemon_sync("syncserver")
+        assert _wait_for_syncserver(), "Sync server did not start"
+
+        # Creates the template database from the sync server's schema
+        response = requests.post(
+            f"http://127.0.0.1:{SYNCSERVER_PORT}/template.sqlite3/exec",
+            json={"sql": "SELECT 1", "bind": []},
+            timeout=30,
+        )
+        response.raise_for_status()
+
+        generator = LoadGenerator(
+            db_dir,
+            "template.sqlite3",
+            port=SYNCSERVER_PORT,
+            max_clients=4,
+            step_seconds=2,
+            sampler=NoDaemons(),
+        )
+        report = asyncio.run(generator.run())
+    finally:
+        supervisor.stop()
+
+    assert [step["clients"] for step in report["steps"]] == [2, 4]
+    for step in report["steps"]:
+        assert step["round_trips"] > 0
+        assert step["timeouts"] == 0
+    assert not (db_dir / report["room"]).exists()
@@ -0,0 +1,145 @@
+"""Tests for idle-time database maintenance."""
+
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from launcher.catalogue_loader import find_crsqlite_extension
+from launcher.maintenance import (
+    ActivityMonitor,
+    MaintenanceScheduler,
+    MaintenanceSettings,
+    last_access_log_request,
+    maintain_database,
+)
+
+
+@pytest.fixture
+def db_path(temp_data_dir):
+    """A WAL database with a pending WAL and plenty of free pages."""
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    path = db_dir / "dev.sqlite3"
+    conn = sqlite3.connect(path)
+    # Stands in for the sync server's connection (keeps the WAL around)
+    holder = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT)")
+    holder.execute("SELECT count(*) FROM book").fetchall()
+    conn.executemany(
+        "INSERT INTO book VALUES (?, ?)",
+        [(f"978{i:010d}", "x" * 200) for i in range(5000)],
+    )
+    conn.commit()
+    conn.execute("DELETE FROM book WHERE rowid > 500")
+    conn.commit()
+    conn.close()
+    yield path
+    holder.close()
+
+
+def _set_mtime(path, mtime):
+    os.utime(path, (mtime, mtime))
+
+
+class TestMaintainDatabase:
+    """Tests for the per-database maintenance steps."""
+
+    def test_checkpoints_without_changing_schema(self, db_path):
+        conn = sqlite3.connect(db_path)
+        schema = conn.execute("SELECT * FROM sqlite_schema").fetchall()
+
+        record = maintain_database(
+            db_path, MaintenanceSettings(freelist_threshold=0.1), extension=None
+        )
+
+        checkpoint = record["steps"]["checkpoint_passive"]
+        assert checkpoint["wal_pages"] > 0
+        assert checkpoint["checkpointed"] == checkpoint["wal_pages"]
+        # The WAL is left for the sync server to restart
+        assert record["after"]["wal"] == record["before"]["wal"]
+        assert record["freelist_ratio"] > 0.1
+        # No statistics yet: optimize would have created sqlite_stat1
+        assert record["skipped"] == ["optimize"]
+        assert conn.execute("SELECT * FROM sqlite_schema").fetchall() == schema
+        conn.close()
+
+    def test_optimizes_with_existing_statistics(self, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("ANALYZE")
+        conn.close()
+
+        record = maintain_database(db_path, MaintenanceSettings(), extension=None)
+
+        assert set(record["steps"]) == {"checkpoint_passive", "optimize"}
+        assert record["skipped"] == []
+
+    def test_stops_when_activity_resumes(self, db_path):
+        record = maintain_database(
+            db_path,
+            MaintenanceSettings(),
+            extension=None,
+            should_continue=lambda: False,
+        )
+
+        assert record["steps"] == {}
+        assert "checkpoint_passive" in record["skipped"]
+
+
+class TestActivity:
+    """Tests for idle detection."""
+
+    def test_last_request_from_json_access_log(self, temp_data_dir):
+        log = temp_data_dir / "caddy-access.log"
+        log.write_text(
+            json.dumps({"ts": 1000.5, "msg": "handled request"})
+            + "\n"
+            + json.dumps({"ts": 2000.25, "msg": "handled request"})
+            + "\n"
+        )
+
+        assert last_access_log_request(log) == 2000.25
+
+    def test_wal_writes_count_as_activity(self, db_path, temp_data_dir):
+        monitor = ActivityMonitor(temp_data_dir / "missing.log", db_path.parent)
+        monitor.last_activity = 0
+        wal = db_path.with_name(db_path.name + "-wal")
+        _set_mtime(wal, time.time() - 10)
+
+        assert 9 <= monitor.idle_for() < 60
+        assert monitor.idle_for(include_wal=False) >= 0
+
+    def test_scheduler_needs_crsqlite(self, db_path, temp_data_dir):
+        history = temp_data_dir / "maintenance.jsonl"
+        scheduler = MaintenanceScheduler(
+            db_path.parent,
+            access_log=temp_data_dir / "caddy-access.log",
+            history_file=history,
+            settings=MaintenanceSettings(),
+        )
+
+        assert scheduler.run_maintenance(force=True) == []
+        assert not history.exists()
+
+    def test_scheduler_writes_history(self, db_path, temp_data_dir):
+        extension = find_crsqlite_extension()
+        if extension is None:
+            pytest.skip("crsqlite not installed (sync server dependencies)")
+        history = temp_data_dir / "maintenance.jsonl"
+        scheduler = MaintenanceScheduler(
+            db_path.parent,
+            access_log=temp_data_dir / "caddy-access.log",
+            history_file=history,
+            settings=MaintenanceSettings(),
+            extension=extension,
+        )
+
+        records = scheduler.run_maintenance(force=True)
+
+        assert [r["database"] for r in records] == ["dev.sqlite3"]
+        assert json.loads(history.read_text())["database"] == "dev.sqlite3"
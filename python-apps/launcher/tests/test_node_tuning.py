@@ -0,0 +1,69 @@
+"""Tests for host-aware Node tuning profiles."""
+
+from launcher.node_tuning import (
+    GB,
+    MAX_UV_THREADPOOL_SIZE,
+    MIN_UV_THREADPOOL_SIZE,
+    compute_tuning_profile,
+    load_tuning_profile,
+)
+
+
+class TestComputeTuningProfile:
+    """Tests for compute_tuning_profile heuristics."""
+
+    def test_small_host(self):
+        profile = compute_tuning_profile(total_memory=4 * GB, cpu_count=2)
+
+        assert profile.name == "auto/small"
+        assert profile.max_old_space_size_mb == 512
+        assert profile.uv_threadpool_size == MIN_UV_THREADPOOL_SIZE
+
+    def test_large_host(self):
+        profile = compute_tuning_profile(total_memory=32 * GB, cpu_count=16)
+
+        assert profile.name == "auto/large"
+        assert profile.max_old_space_size_mb == 4096
+        assert profile.uv_threadpool_size == MAX_UV_THREADPOOL_SIZE
+
+    def test_heap_scales_with_memory_within_preset(self):
+        profile = compute_tuning_profile(total_memory=6 * GB, cpu_count=4)
+
+        assert profile.name == "auto/medium"
+        assert profile.max_old_space_size_mb == 1536
+
+    def test_flags_and_env(self):
+        profile = compute_tuning_profile(total_memory=8 * GB, cpu_count=8)
+
+        assert "--max-old-space-size=2048" in profile.node_flags()
+        assert "--max-semi-space-size=32" in profile.node_flags()
+        assert profile.env() == {"UV_THREADPOOL_SIZE": "6"}
+
+
+class TestLoadTuningProfile:
+    """Tests for settings.toml overrides."""
+
+    def test_off_uses_node_defaults(self):
+        profile = load_tuning_profile({"profile": "off"})
+
+        assert profile.node_flags() == []
+        assert profile.env() == {}
+
+    def test_preset_with_override(self):
+        profile = load_tuning_profile({"profile": "small", "uv_threadpool_size": 12})
+
+        assert profile.max_old_space_size_mb == 512
+        assert profile.uv_threadpool_size == 12
+        assert "uv_threadpool_size" in profile.name
+
+    def test_invalid_override_is_ignored(self):
+        profile = load_tuning_profile(
+            {"profile": "small", "max_old_space_size_mb": "lots"}
+        )
+
+        assert profile.max_old_space_size_mb == 512
+
+    def test_missing_settings_default_to_auto(self):
+        profile = load_tuning_profile(None)
+
+        assert profile.name.startswith("auto/")
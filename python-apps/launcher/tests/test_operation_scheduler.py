@@ -0,0 +1,204 @@
+"""Tests for the operation scheduler (against a fake core, no Circus)."""
+
+import asyncio
+
+import pytest
+
+from launcher.operation_scheduler import OperationScheduler, OperationSuperseded
+
+
+class FakeCore:
+    """Records the operations it runs; mutations block until released."""
+
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+        self.cancelled = []
+
+    async def status(self, daemon_name):
+        self.calls.append(("status", daemon_name))
+        await asyncio.sleep(0.01)
+        return daemon_name
+
+    async def system_status(self):
+        self.calls.append(("system_status", None))
+        return ("caddy", "syncserver")
+
+    async def _mutation(self, operation, daemon_name=None):
+        self.calls.append((operation, daemon_name))
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.append((operation, daemon_name))
+            raise
+        return True
+
+    async def start_daemon(self, daemon_name):
+        return await self._mutation("start", daemon_name)
+
+    async def stop_daemon(self, daemon_name):
+        return await self._mutation("stop", daemon_name)
+
+    async def restart_daemon(self, daemon_name):
+        return await self._mutation("restart", daemon_name)
+
+    async def start_all(self):
+        return await self._mutation("start_all")
+
+    async def stop_all(self):
+        return await self._mutation("stop_all")
+
+    async def restart_all(self):
+        return await self._mutation("restart_all")
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestOperationScheduler:
+    """Tests for OperationScheduler."""
+
+    def test_reads_bypass_running_mutation(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            restart = asyncio.create_task(scheduler.request("restart", "caddy"))
+            await _settle()
+            status = await asyncio.wait_for(
+                scheduler.request("status", "caddy"), timeout=1
+            )
+            core.release.set()
+            return status, await restart
+
+        assert asyncio.run(scenario()) == ("caddy", True)
+
+    def test_duplicate_reads_coalesced(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            results = await asyncio.gather(
+                *(scheduler.request("status", "syncserver") for _ in range(5))
+            )
+            return core, scheduler, results
+
+        core, scheduler, results = asyncio.run(scenario())
+        assert results == ["syncserver"] * 5
+        assert core.calls == [("status", "syncserver")]
+        assert scheduler.stats()["status"]["coalesced"] == 4
+
+    def test_mutations_serialized(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            caddy = asyncio.create_task(scheduler.request("start", "caddy"))
+            syncserver = asyncio.create_task(scheduler.request("start", "syncserver"))
+            await _settle()
+            running = list(core.calls)
+            core.release.set()
+            await asyncio.gather(caddy, syncserver)
+            return running, core.calls
+
+        running, calls = asyncio.run(scenario())
+        assert running == [("start", "caddy")]
+        assert calls == [("start", "caddy"), ("start", "syncserver")]
+
+    def test_repeated_restart_coalesced(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            clicks = [
+                asyncio.create_task(scheduler.request("restart_all")) for _ in range(3)
+            ]
+            await _settle()
+            core.release.set()
+            return core, scheduler, await asyncio.gather(*clicks)
+
+        core, scheduler, results = asyncio.run(scenario())
+        assert results == [True, True, True]
+        assert core.calls == [("restart_all", None)]
+        assert scheduler.stats()["restart_all"]["coalesced"] == 2
+
+    def test_newer_mutation_drops_pending(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            syncserver = asyncio.create_task(scheduler.request("start", "syncserver"))
+            await _settle()
+            # Both wait behind the sync server's start: the stop replaces the restart
+            restart = asyncio.create_task(scheduler.request("restart", "caddy"))
+            await _settle()
+            stop = asyncio.create_task(scheduler.request("stop", "caddy"))
+            await _settle()
+            core.release.set()
+            results = await asyncio.gather(
+                syncserver, restart, stop, return_exceptions=True
+            )
+            return core, scheduler, results
+
+        core, scheduler, (syncserver, restart, stop) = asyncio.run(scenario())
+        assert syncserver is True
+        assert isinstance(restart, OperationSuperseded) and restart.newer == "stop"
+        assert stop is True
+        assert core.calls == [("start", "syncserver"), ("stop", "caddy")]
+        assert scheduler.stats()["restart"]["superseded"] == 1
+
+    def test_newer_mutation_cancels_running(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            # e.g. a Caddy start still waiting for the admin API
+            start = asyncio.create_task(scheduler.request("start", "caddy"))
+            await _settle()
+            stop_all = asyncio.create_task(scheduler.request("stop_all"))
+            await _settle()
+            core.release.set()
+            results = await asyncio.gather(start, stop_all, return_exceptions=True)
+            return core, scheduler, results
+
+        core, scheduler, (start, stop_all) = asyncio.run(scenario())
+        assert isinstance(start, OperationSuperseded) and start.newer == "stop_all"
+        assert stop_all is True
+        assert core.cancelled == [("start", "caddy")]
+        assert core.calls == [("start", "caddy"), ("stop_all", None)]
+        assert scheduler.stats()["start"]["cancelled"] == 1
+
+    def test_other_daemon_not_superseded(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            start_all = asyncio.create_task(scheduler.request("start_all"))
+            await _settle()
+            # Covers only caddy: queued behind start_all, which isn't cancelled
+            stop = asyncio.create_task(scheduler.request("stop", "caddy"))
+            await _settle()
+            core.release.set()
+            return core, await asyncio.gather(start_all, stop)
+
+        core, results = asyncio.run(scenario())
+        assert results == [True, True]
+        assert core.cancelled == []
+
+    def test_stats_timings(self):
+        async def scenario():
+            core = FakeCore()
+            scheduler = OperationScheduler(core)
+            first = asyncio.create_task(scheduler.request("start", "caddy"))
+            second = asyncio.create_task(scheduler.request("start", "syncserver"))
+            await asyncio.sleep(0.05)
+            core.release.set()
+            await asyncio.gather(first, second)
+            return scheduler.stats()
+
+        stats = asyncio.run(scenario())
+        assert stats["start"]["requested"] == 2
+        assert stats["start"]["run"]["count"] == 2
+        # The second start waited for the first one to finish
+        assert stats["start"]["wait"]["max_ms"] >= 40
+        assert stats["stop"]["run"]["count"] == 0
+
+    def test_unknown_daemon(self):
+        scheduler = OperationScheduler(FakeCore())
+        with pytest.raises(ValueError):
+            asyncio.run(scheduler.request("start", "postgres"))
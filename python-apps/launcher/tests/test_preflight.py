@@ -0,0 +1,152 @@
+"""Tests for the pre-flight database checks."""
+
+import json
+import sqlite3
+
+import pytest
+
+from launcher.preflight import (
+    PREFLIGHT_ENV,
+    PreflightChecker,
+    check_database,
+    file_identity,
+)
+
+
+def _create_database(db_path):
+    """A database with the CR-SQLite bookkeeping tables the checks look at."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE crsql_master (key TEXT PRIMARY KEY, value TEXT);
+        INSERT INTO crsql_master VALUES ('schema_name', 'init'), ('schema_version', '1');
+        CREATE TABLE crsql_site_id (site_id BLOB, ordinal INTEGER PRIMARY KEY);
+        INSERT INTO crsql_site_id VALUES (x'aabb', 0);
+        CREATE TABLE book__crsql_clock (key INTEGER, db_version INTEGER);
+        """)
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    return db_dir
+
+
+class TestCheckDatabase:
+    """Tests for the checks of one database."""
+
+    def test_healthy_database(self, db_dir):
+        _create_database(db_dir / "dev.sqlite3")
+
+        result = check_database(str(db_dir / "dev.sqlite3"))
+
+        assert result["ok"]
+        assert [c["name"] for c in result["checks"]] == [
+            "sqlite_quick_check",
+            "crsql_master_valid",
+            "site_id_valid",
+            "clock_tables_exist",
+        ]
+        assert "aabb" in result["checks"][2]["message"]
+
+    def test_corrupt_database(self, db_dir):
+        (db_dir / "corrupt.sqlite3").write_bytes(b"not a database" * 100)
+
+        result = check_database(str(db_dir / "corrupt.sqlite3"))
+
+        assert not result["ok"]
+        assert result["checks"][0]["name"] == "sqlite_quick_check"
+        assert not result["checks"][0]["passed"]
+
+    def test_missing_schema_fails(self, db_dir):
+        sqlite3.connect(db_dir / "plain.sqlite3").execute("CREATE TABLE t (id)")
+
+        result = check_database(str(db_dir / "plain.sqlite3"))
+
+        assert not result["ok"]
+        failed = {c["name"] for c in result["checks"] if not c["passed"]}
+        assert failed == {"crsql_master_valid", "site_id_valid", "clock_tables_exist"}
+
+
+class TestPreflightChecker:
+    """Tests for the parallel run and the verdict cache."""
+
+    def test_checks_in_parallel_and_caches(self, db_dir, temp_data_dir):
+        for name in ("a.sqlite3", "b.sqlite3"):
+            _create_database(db_dir / name)
+        (db_dir / "c.sqlite3").write_bytes(b"garbage" * 100)
+        checker = PreflightChecker(
+            db_dir, temp_data_dir / "preflight.json", max_workers=2
+        )
+
+        verdicts = checker.run()
+
+        assert {name: v["ok"] for name, v in verdicts.items()} == {
+            "a.sqlite3": True,
+            "b.sqlite3": True,
+            "c.sqlite3": False,
+        }
+        cache = json.loads((temp_data_dir / "preflight.json").read_text())
+        assert cache["databases"]["a.sqlite3"]["identity"]["size"] > 0
+        assert checker.env() == {PREFLIGHT_ENV: str(temp_data_dir / "preflight.json")}
+
+    def test_only_changed_files_are_checked(self, db_dir, temp_data_dir, monkeypatch):
+        for name in ("a.sqlite3", "b.sqlite3"):
+            _create_database(db_dir / name)
+        checker = PreflightChecker(db_dir, temp_data_dir / "preflight.json")
+        checker.run()
+
+        checked = []
+        original = checker._check_all
+
+        def record(names):
+            checked.extend(names)
+            return original(names)
+
+        monkeypatch.setattr(checker, "_check_all", record)
+        conn = sqlite3.connect(db_dir / "b.sqlite3")
+        conn.execute("INSERT INTO book__crsql_clock VALUES (1, 1)")
+        conn.commit()
+        conn.close()
+
+        verdicts = checker.run()
+
+        assert checked == ["b.sqlite3"]
+        assert set(verdicts) == {"a.sqlite3", "b.sqlite3"}
+
+    def test_verdict_kept_across_checkpoint(self, db_dir, temp_data_dir, monkeypatch):
+        db_path = db_dir / "dev.sqlite3"
+        _create_database(db_path)
+        writer = sqlite3.connect(db_path)
+        writer.execute("PRAGMA journal_mode=WAL")
+        writer.execute("PRAGMA wal_autocheckpoint=0")
+        writer.execute("INSERT INTO book__crsql_clock VALUES (1, 1)")
+        writer.commit()
+        checker = PreflightChecker(db_dir, temp_data_dir / "preflight.json")
+        checker.run()
+        checked = []
+        original = checker._check_all
+
+        def record(names):
+            checked.extend(names)
+            return original(names)
+
+        monkeypatch.setattr(checker, "_check_all", record)
+
+        before = file_identity(db_path)
+        writer.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        after = file_identity(db_path)
+        assert after != before
+        assert checker.keep_verdict("dev.sqlite3", before, after)
+        checker.run()
+        assert checked == []
+
+        # A commit changes the WAL: its content has to be checked again
+        writer.execute("INSERT INTO book__crsql_clock VALUES (2, 2)")
+        writer.commit()
+        assert not checker.keep_verdict("dev.sqlite3", after, file_identity(db_path))
+        checker.run()
+        assert checked == ["dev.sqlite3"]
+        writer.close()
@@ -0,0 +1,76 @@
+"""Tests for page-cache prewarming."""
+
+import os
+import sqlite3
+
+import pytest
+
+from launcher.prewarm import PagePrewarmer, _hot_pages
+
+
+def _create_database(db_path, rows):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT)")
+    conn.execute("CREATE INDEX idx_book_title ON book(title)")
+    conn.executemany(
+        "INSERT INTO book VALUES (?, ?)",
+        ((f"978{i:010d}", f"Title {i} " * 5) for i in range(rows)),
+    )
+    conn.commit()
+    return conn
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    return db_dir
+
+
+class TestPagePrewarmer:
+    """Tests for prewarming within the budget."""
+
+    def test_prewarms_whole_databases(self, db_dir):
+        # Kept open, so the changes stay in the WAL
+        conn = _create_database(db_dir / "dev.sqlite3", 5000)
+        wal_size = (db_dir / "dev.sqlite3-wal").stat().st_size
+        db_size = (db_dir / "dev.sqlite3").stat().st_size
+
+        result = PagePrewarmer(db_dir, budget_mb=64).prewarm()
+
+        conn.close()
+        assert result["databases"] == {"dev.sqlite3": db_size + wal_size}
+        assert result["bytes"] == db_size + wal_size
+
+    def test_budget_prefers_recent_databases(self, db_dir):
+        for name in ("old.sqlite3", "recent.sqlite3"):
+            _create_database(db_dir / name, 2000).close()
+        os.utime(db_dir / "old.sqlite3", (0, 0))
+
+        prewarmer = PagePrewarmer(db_dir, budget_mb=0.05)
+        result = prewarmer.prewarm()
+
+        assert result["bytes"] == prewarmer.budget_bytes
+        assert list(result["databases"]) == ["recent.sqlite3"]
+
+    def test_hot_pages_include_index_leaves(self, db_dir):
+        _create_database(db_dir / "dev.sqlite3", 5000).close()
+        conn = sqlite3.connect(db_dir / "dev.sqlite3")
+        index_pages = {
+            page
+            for (page,) in conn.execute(
+                "SELECT pageno FROM dbstat WHERE name = 'idx_book_title'"
+            )
+        }
+        table_pages = conn.execute(
+            "SELECT count(*) FROM dbstat WHERE name = 'book'"
+        ).fetchone()[0]
+        conn.close()
+
+        page_size, hot = _hot_pages(db_dir / "dev.sqlite3")
+
+        assert page_size == 4096
+        assert index_pages <= hot
+        # Table leaves are left for the sequential pass
+        assert len(hot) < len(index_pages) + table_pages
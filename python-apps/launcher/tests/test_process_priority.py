@@ -0,0 +1,89 @@
+"""Tests for per-daemon process priority settings."""
+
+import os
+import platform
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import psutil
+import pytest
+
+from launcher.process_priority import (
+    BACKGROUND_PRIORITY,
+    DEFAULT_PRIORITIES,
+    PrioritySettings,
+    apply_priority,
+    load_priorities,
+    make_after_spawn_hook,
+)
+
+
+@pytest.fixture
+def child_process():
+    """A short-lived child process we are allowed to deprioritise."""
+    process = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    yield process
+    process.kill()
+    process.wait()
+
+
+class TestLoadPriorities:
+    """Tests for settings.toml overrides."""
+
+    def test_defaults_rank_syncserver_above_background(self):
+        priorities = load_priorities(None)
+
+        assert priorities["syncserver"].nice <= priorities["caddy"].nice
+        assert priorities["syncserver"].nice < BACKGROUND_PRIORITY.nice
+        assert BACKGROUND_PRIORITY.ionice_class == "idle"
+
+    def test_override_keeps_other_defaults(self):
+        priorities = load_priorities({"caddy": {"nice": 5}})
+
+        assert priorities["caddy"].nice == 5
+        assert priorities["caddy"].ionice_class == "best-effort"
+        # Defaults are copied, not mutated
+        assert DEFAULT_PRIORITIES["caddy"].nice == 0
+
+    def test_unknown_field_is_ignored(self):
+        priorities = load_priorities({"caddy": {"niceness": 5}})
+
+        assert priorities["caddy"].nice == 0
+
+
+@pytest.mark.skipif(platform.system() == "Windows", reason="POSIX nice values")
+class TestApplyPriority:
+    """Tests applying priority to real processes."""
+
+    def test_lowers_nice(self, child_process):
+        applied = apply_priority(child_process.pid, PrioritySettings(nice=7))
+
+        assert "nice 7" in applied
+        assert psutil.Process(child_process.pid).nice() == 7
+
+    @pytest.mark.skipif(platform.system() != "Linux", reason="ionice is Linux only")
+    def test_sets_idle_io_class(self, child_process):
+        apply_priority(child_process.pid, PrioritySettings(ionice_class="idle"))
+
+        ioclass = psutil.Process(child_process.pid).ionice().ioclass
+        assert ioclass == psutil.IOPRIO_CLASS_IDLE
+
+    def test_missing_process_is_ignored(self):
+        assert apply_priority(2**22 + 1, PrioritySettings(nice=5)) == []
+
+    def test_after_spawn_hook_uses_current_settings(self, child_process):
+        priorities = {"syncserver": PrioritySettings(nice=3)}
+        hook = make_after_spawn_hook(priorities)
+        # Runtime changes replace the entry; the hook must pick them up
+        priorities["syncserver"] = PrioritySettings(nice=4)
+
+        watcher = SimpleNamespace(name="syncserver")
+        assert hook(watcher, None, "after_spawn", pid=child_process.pid) is True
+        assert psutil.Process(child_process.pid).nice() == 4
+
+    def test_after_spawn_hook_never_kills_process(self):
+        hook = make_after_spawn_hook({})
+        watcher = SimpleNamespace(name="unknown")
+
+        assert hook(watcher, None, "after_spawn", pid=os.getpid()) is True
@@ -0,0 +1,86 @@
+"""Tests for sync server profiling helpers."""
+
+import os
+import platform
+from types import SimpleNamespace
+
+import pytest
+
+from launcher.profiling import (
+    SyncServerProfiler,
+    get_cpu_profile_node_flags,
+    get_heapsnapshot_node_flags,
+)
+
+
+@pytest.fixture
+def profiler(temp_data_dir):
+    """Profiler bound to a stand-in supervisor with a temporary logs dir."""
+    supervisor = SimpleNamespace(logs_dir=temp_data_dir / "logs")
+    profiler = SyncServerProfiler(supervisor, max_total_bytes=100)
+    profiler.profiles_dir.mkdir(parents=True)
+    return profiler
+
+
+def _write_artefact(path, size, mtime):
+    path.write_bytes(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestNodeFlags:
+    """Tests for the Node flag builders."""
+
+    def test_cpu_profile_flags_target_profiles_dir(self, temp_data_dir):
+        flags = get_cpu_profile_node_flags(temp_data_dir)
+
+        assert "--cpu-prof" in flags
+        assert f"--cpu-prof-dir={temp_data_dir}" in flags
+
+    @pytest.mark.skipif(
+        platform.system() == "Windows", reason="Heap snapshot signal is POSIX only"
+    )
+    def test_heapsnapshot_flags_arm_signal(self, temp_data_dir):
+        flags = get_heapsnapshot_node_flags(temp_data_dir)
+
+        assert "--heapsnapshot-signal=SIGUSR2" in flags
+        assert f"--diagnostic-dir={temp_data_dir}" in flags
+
+
+class TestSizeCap:
+    """Tests for profile size cap enforcement."""
+
+    def test_prune_removes_oldest_until_under_cap(self, profiler):
+        old = _write_artefact(profiler.profiles_dir / "a.cpuprofile", 60, 1000)
+        mid = _write_artefact(profiler.profiles_dir / "b.heapsnapshot", 30, 2000)
+        new = _write_artefact(profiler.profiles_dir / "c.cpuprofile", 40, 3000)
+
+        profiler._prune(keep=new)
+
+        assert not old.exists()
+        assert mid.exists()
+        assert new.exists()
+
+    def test_prune_ignores_unrelated_files(self, profiler):
+        other = _write_artefact(profiler.profiles_dir / "notes.txt", 500, 1000)
+        kept = _write_artefact(profiler.profiles_dir / "a.cpuprofile", 10, 2000)
+
+        profiler._prune(keep=kept)
+
+        assert other.exists()
+
+    def test_oversized_artefact_is_discarded(self, profiler):
+        artefact = _write_artefact(profiler.profiles_dir / "big.cpuprofile", 200, 1000)
+
+        assert profiler._finalize_artifact(artefact, "cpu") is None
+        assert not artefact.exists()
+
+    def test_artefact_is_renamed_into_profiles_dir(self, profiler, temp_data_dir):
+        artefact = _write_artefact(temp_data_dir / "Heap.1.heapsnapshot", 10, 1000)
+
+        result = profiler._finalize_artifact(artefact, "heap")
+
+        assert result.parent == profiler.profiles_dir
+        assert result.name.startswith("syncserver-heap-")
+        assert result.suffix == ".heapsnapshot"
+        assert not artefact.exists()
@@ -0,0 +1,140 @@
+"""Tests for the access log replay."""
+
+import asyncio
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from launcher.replay import (
+    AccessLogReplayer,
+    access_log_files,
+    category,
+    compare_runs,
+    read_requests,
+)
+
+
+def _entry(ts, method, uri, status=200, headers=None):
+    return json.dumps(
+        {
+            "level": "info",
+            "ts": ts,
+            "logger": "http.log.access",
+            "msg": "handled request",
+            "request": {"method": method, "uri": uri, "headers": headers or {}},
+            "duration": 0.001,
+            "size": 10,
+            "status": status,
+        }
+    )
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    """200 for everything but /missing (404) and /broken (500)."""
+
+    protocol_version = "HTTP/1.1"
+    seen = []
+
+    def do_GET(self):
+        StaticHandler.seen.append((self.path, self.headers.get("Range")))
+        status = {"/missing": 404, "/broken": 500}.get(self.path, 200)
+        body = b"x" * 1000
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StaticHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    StaticHandler.seen = []
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def logs_dir(temp_data_dir):
+    """A rolled (gzipped) access log and the current one."""
+    logs_dir = temp_data_dir / "logs"
+    logs_dir.mkdir()
+    with gzip.open(logs_dir / "caddy-access-2026-03-01T18-00-00.000.log.gz", "wt") as f:
+        f.write(_entry(1000.0, "GET", "/index.html") + "\n")
+        f.write(
+            _entry(1000.5, "GET", "/sync?room=dev", 101, {"Upgrade": ["websocket"]})
+        )
+        f.write("\n" + _entry(1001.0, "POST", "/dev.sqlite3/exec") + "\n")
+    (logs_dir / "caddy-access.log").write_text(
+        "\n".join(
+            [
+                _entry(5000.0, "GET", "/dev.sqlite3/meta"),
+                _entry(
+                    5000.1, "GET", "/dev.sqlite3/file", 206, {"Range": ["bytes=0-9"]}
+                ),
+                _entry(5000.2, "GET", "/missing", 404),
+                _entry(5000.3, "GET", "/broken"),
+                "not json",
+            ]
+        )
+        + "\n"
+    )
+    return logs_dir
+
+
+class TestReadRequests:
+    """Tests for reading the access logs."""
+
+    def test_reads_rolled_logs_in_order(self, logs_dir):
+        files = access_log_files(logs_dir)
+        requests = list(read_requests(files))
+
+        assert [r.uri for r in requests] == [
+            "/index.html",
+            "/dev.sqlite3/meta",
+            "/dev.sqlite3/file",
+            "/missing",
+            "/broken",
+        ]
+        assert requests[2].headers == {"Range": "bytes=0-9"}
+        assert [r.uri for r in read_requests(files, since=5000.1, until=5000.3)] == [
+            "/dev.sqlite3/file",
+            "/missing",
+        ]
+
+    def test_category(self):
+        assert category("/dev.sqlite3/file") == "file"
+        assert category("/dev.sqlite3/meta") == "meta"
+        assert category("/reports/dev.sqlite3/index.json") == "reports"
+        assert category("/_app/immutable/start.js") == "static"
+
+
+class TestReplay:
+    """Tests for the replay and run comparison."""
+
+    def test_replay(self, logs_dir, server):
+        requests = read_requests(access_log_files(logs_dir))
+        # The 4000s idle gap is clipped to 1s, then compressed 10x
+        replayer = AccessLogReplayer(server, concurrency=2, speed=10, max_gap=1)
+
+        run = asyncio.run(replayer.replay(requests))
+
+        assert 0.1 < run["seconds"] < 2
+        summary = run["summary"]
+        assert summary["all"]["count"] == 5
+        assert summary["static"]["count"] == 3
+        # The recorded 404 is not an error, the new 500 is
+        assert summary["static"]["errors"] == 1
+        assert (summary["file"]["count"], summary["file"]["errors"]) == (1, 0)
+        assert ("/dev.sqlite3/file", "bytes=0-9") in StaticHandler.seen
+
+        changes = compare_runs(run, run)
+        assert changes["all"] == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "errors": 0}
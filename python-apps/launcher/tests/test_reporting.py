@@ -0,0 +1,200 @@
+"""Tests for the reporting engine."""
+
+import csv
+import json
+import shutil
+import sqlite3
+
+import pytest
+
+from launcher.reporting import (
+    REPORTS_VERSION,
+    ReportingEngine,
+    build_reports,
+    percentiles,
+    read_index,
+)
+
+DAY_MS = 86400 * 1000
+# 2026-03-02 12:00 UTC
+NOW = 1772452800.0
+
+SCHEMA = """
+CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT, price DECIMAL);
+CREATE TABLE warehouse (id INTEGER PRIMARY KEY, display_name TEXT, discount DECIMAL);
+CREATE TABLE note (id INTEGER PRIMARY KEY, warehouse_id INTEGER,
+    is_reconciliation_note INTEGER DEFAULT 0, committed INTEGER DEFAULT 0,
+    committed_at INTEGER);
+CREATE TABLE book_transaction (isbn TEXT, quantity INTEGER, note_id INTEGER,
+    warehouse_id INTEGER, PRIMARY KEY (isbn, note_id, warehouse_id));
+CREATE TABLE custom_item (id INTEGER, title TEXT, price DECIMAL, note_id INTEGER,
+    PRIMARY KEY (id, note_id));
+CREATE TABLE customer_order_lines (id INTEGER PRIMARY KEY, isbn TEXT,
+    created INTEGER, placed INTEGER, received INTEGER, collected INTEGER);
+CREATE TABLE book__crsql_clock (key INTEGER, col_name TEXT, col_version INTEGER,
+    db_version INTEGER, site_id INTEGER, seq INTEGER);
+"""
+
+
+def _bump_db_version(db_path, db_version):
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "INSERT INTO book__crsql_clock VALUES (1, 'title', 1, ?, 0, 0)", (db_version,)
+    )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    """A db_dir with a small store: two warehouses, one sale, open orders."""
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    now_ms = int(NOW * 1000)
+    conn = sqlite3.connect(db_dir / "dev.sqlite3")
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO book VALUES (?, ?, ?)",
+        [("111", "One", 10.0), ("222", "Two", 20.0)],
+    )
+    conn.executemany(
+        "INSERT INTO warehouse VALUES (?, ?, ?)",
+        [(1, "Shop", 0), (2, "Discounted", 50)],
+    )
+    conn.executemany(
+        "INSERT INTO note VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, 1, 0, 1, now_ms - 2 * DAY_MS),  # inbound to Shop
+            (2, 2, 0, 1, now_ms - 2 * DAY_MS),  # inbound to Discounted
+            (3, None, 0, 1, now_ms - DAY_MS),  # sale
+            (4, None, 0, 0, None),  # uncommitted sale
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO book_transaction VALUES (?, ?, ?, ?)",
+        [
+            ("111", 5, 1, 1),
+            ("222", 2, 1, 1),
+            ("111", 4, 2, 2),
+            ("111", 1, 3, 1),
+            ("111", 2, 3, 2),
+            ("222", 2, 4, 1),
+        ],
+    )
+    conn.execute("INSERT INTO custom_item VALUES (1, 'Bag', 3.5, 3)")
+    conn.executemany(
+        "INSERT INTO customer_order_lines VALUES (?, '111', ?, ?, ?, ?)",
+        [
+            (1, now_ms - 10 * DAY_MS, None, None, None),
+            (2, now_ms - 20 * DAY_MS, None, None, None),
+            (3, now_ms - 5 * DAY_MS, now_ms, None, None),
+            (4, now_ms - 30 * DAY_MS, now_ms, now_ms, now_ms),  # collected
+        ],
+    )
+    conn.commit()
+    conn.close()
+    _bump_db_version(db_dir / "dev.sqlite3", 42)
+    return db_dir
+
+
+class TestBuildReports:
+    """Tests for the report contents."""
+
+    def test_reports(self, db_dir, temp_data_dir):
+        output_dir = temp_data_dir / "reports" / "dev.sqlite3"
+
+        index = build_reports(db_dir / "dev.sqlite3", output_dir, now=NOW)
+
+        assert index["db_version"] == 42
+        assert index["reports"] == [
+            "stock_by_warehouse",
+            "sales_by_day",
+            "open_customer_orders",
+        ]
+        assert read_index(output_dir) == index
+
+        stock = json.loads((output_dir / "stock_by_warehouse.json").read_text())
+        assert stock["rows"] == [
+            {
+                "warehouse_id": 1,
+                "warehouse_name": "Shop",
+                "discount": 0,
+                "titles": 2,
+                "copies": 6,
+                "list_value": 80.0,
+                "discounted_value": 80.0,
+            },
+            {
+                "warehouse_id": 2,
+                "warehouse_name": "Discounted",
+                "discount": 50,
+                "titles": 1,
+                "copies": 2,
+                "list_value": 20.0,
+                "discounted_value": 10.0,
+            },
+        ]
+
+        sales = json.loads((output_dir / "sales_by_day.json").read_text())["rows"]
+        assert sales == [
+            {
+                "day": "2026-03-01",
+                "notes": 1,
+                "copies": 4,
+                "list_total": 33.5,
+                "discounted_total": 23.5,
+            }
+        ]
+
+        with open(output_dir / "open_customer_orders.csv", newline="") as f:
+            orders = list(csv.DictReader(f))
+        assert [(row["status"], row["lines"]) for row in orders] == [
+            ("pending", "2"),
+            ("placed", "1"),
+            ("received", "0"),
+        ]
+        assert orders[0]["median_age_days"] == "15.0"
+        assert orders[0]["oldest_age_days"] == "20.0"
+
+    def test_other_schema_has_no_reports(self, temp_data_dir):
+        db_path = temp_data_dir / "other.sqlite3"
+        sqlite3.connect(db_path).close()
+
+        index = build_reports(db_path, temp_data_dir / "other")
+
+        assert index["reports"] == []
+        assert index["db_version"] == 0
+
+    def test_percentiles(self):
+        assert percentiles([4.0, 1.0, 3.0, 2.0], [0, 50, 90, 100]) == pytest.approx(
+            [1.0, 2.5, 3.7, 4.0]
+        )
+
+
+class TestReportingEngine:
+    """Tests for the db_version keyed cache."""
+
+    def test_rebuilds_only_changed_databases(self, db_dir, temp_data_dir):
+        engine = ReportingEngine(db_dir, temp_data_dir / "reports")
+        (temp_data_dir / "reports" / "removed").mkdir(parents=True)
+
+        assert engine.refresh() == ["dev.sqlite3"]
+        assert not (temp_data_dir / "reports" / "removed").exists()
+        index = read_index(temp_data_dir / "reports" / "dev.sqlite3")
+        assert index["reports_version"] == REPORTS_VERSION
+        assert engine.stale_databases() == []
+        assert engine.refresh() == []
+
+        _bump_db_version(db_dir / "dev.sqlite3", 43)
+
+        assert engine.stale_databases() == [db_dir / "dev.sqlite3"]
+
+    def test_databases_sharing_a_stem(self, db_dir, temp_data_dir):
+        shutil.copy(db_dir / "dev.sqlite3", db_dir / "dev.db")
+        _bump_db_version(db_dir / "dev.db", 50)
+        engine = ReportingEngine(db_dir, temp_data_dir / "reports")
+
+        assert engine.refresh() == ["dev.db", "dev.sqlite3"]
+        assert read_index(temp_data_dir / "reports" / "dev.db")["db_version"] == 50
+        assert read_index(temp_data_dir / "reports" / "dev.sqlite3")["db_version"] == 42
+        assert engine.stale_databases() == []
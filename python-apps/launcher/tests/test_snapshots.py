@@ -0,0 +1,94 @@
+"""Tests for precompressed database snapshots."""
+
+import gzip
+import hashlib
+import sqlite3
+
+import pytest
+
+from launcher.snapshots import SnapshotManager
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    """A db_dir with one WAL-mode database held open by a writer."""
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    conn = sqlite3.connect(db_dir / "dev.sqlite3")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT)")
+    conn.executemany(
+        "INSERT INTO book VALUES (?, ?)",
+        [(f"978{i:010d}", f"Book {i}") for i in range(2000)],
+    )
+    conn.commit()
+    yield db_dir, conn
+    conn.close()
+
+
+@pytest.fixture
+def snapshots(db_dir, temp_data_dir):
+    return SnapshotManager(db_dir[0], temp_data_dir / "snapshots")
+
+
+class TestSnapshotManager:
+    """Tests for building and refreshing snapshots."""
+
+    def test_snapshot_is_consistent_and_compressed(self, snapshots):
+        manifest = snapshots.refresh()
+
+        snapshot = snapshots.snapshots_dir / "dev.sqlite3"
+        entry = manifest["databases"]["dev.sqlite3"]
+        assert entry["sha256"] == hashlib.sha256(snapshot.read_bytes()).hexdigest()
+        assert entry["size"] == snapshot.stat().st_size
+
+        # The gzip sidecar decompresses to the exact snapshot
+        sidecar = snapshots.snapshots_dir / "dev.sqlite3.gz"
+        assert gzip.decompress(sidecar.read_bytes()) == snapshot.read_bytes()
+
+        conn = sqlite3.connect(snapshot)
+        assert conn.execute("SELECT count(*) FROM book").fetchone()[0] == 2000
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        conn.close()
+
+    def test_unchanged_content_keeps_served_file(self, snapshots, db_dir):
+        _, conn = db_dir
+        snapshots.refresh()
+        snapshot = snapshots.snapshots_dir / "dev.sqlite3"
+        mtime = snapshot.stat().st_mtime_ns
+
+        # A checkpoint changes the source files but not the content
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        snapshots.refresh()
+        assert snapshot.stat().st_mtime_ns == mtime
+
+        conn.execute("INSERT INTO book VALUES ('9780000000000x', 'New')")
+        conn.commit()
+        manifest = snapshots.refresh()
+        assert snapshot.stat().st_mtime_ns != mtime
+        assert (
+            manifest["databases"]["dev.sqlite3"]["sha256"]
+            == hashlib.sha256(snapshot.read_bytes()).hexdigest()
+        )
+
+    def test_withdraws_snapshots_of_replaced_databases(self, snapshots, db_dir):
+        db_path = db_dir[0] / "dev.sqlite3"
+        snapshots.refresh()
+
+        # Simulate a reset: the DB is deleted and recreated
+        replacement = db_dir[0] / "new.tmp"
+        sqlite3.connect(replacement).execute("CREATE TABLE t (x)").connection.close()
+        replacement.replace(db_path)
+
+        assert snapshots.withdraw_replaced() == ["dev.sqlite3"]
+        assert not (snapshots.snapshots_dir / "dev.sqlite3").exists()
+        assert not (snapshots.snapshots_dir / "dev.sqlite3.gz").exists()
+        assert snapshots.manifest()["databases"] == {}
+
+    def test_clear(self, snapshots):
+        snapshots.refresh()
+
+        snapshots.clear()
+
+        assert list(snapshots.snapshots_dir.iterdir()) == []
+        assert snapshots.manifest() == {}
@@ -0,0 +1,47 @@
+"""Tests for the shared latency statistics."""
+
+from launcher.stats import percentile, summarize
+
+
+class TestStats:
+    """Tests for percentile() and summarize()."""
+
+    def test_percentile(self):
+        ordered = [0.1, 0.2, 0.3, 0.4]
+
+        assert percentile(ordered, 50) == 0.2
+        assert percentile(ordered, 75) == 0.3
+        assert percentile(ordered, 99) == 0.4
+        assert percentile(ordered, 0) == 0.1
+        assert percentile([], 50) == 0.0
+
+    def test_percentile_is_nearest_rank(self):
+        hundred = [float(i) for i in range(1, 101)]
+
+        assert percentile(hundred, 99) == 99.0
+        assert percentile(hundred, 50) == 50.0
+        assert percentile(hundred, 100) == 100.0
+        assert percentile([5.0], 99) == 5.0
+
+    def test_summarize(self):
+        summary = summarize(
+            [("static", 0.010, True), ("static", 0.030, False), ("file", 0.5, True)]
+        )
+
+        assert list(summary) == ["all", "file", "static"]
+        assert summary["static"]["count"] == 2
+        assert summary["static"]["errors"] == 1
+        assert summary["static"]["p50_ms"] == 10.0
+        assert summary["all"]["max_ms"] == 500.0
+
+    def test_summarize_nothing(self):
+        assert summarize([]) == {
+            "all": {
+                "count": 0,
+                "errors": 0,
+                "p50_ms": 0.0,
+                "p90_ms": 0.0,
+                "p99_ms": 0.0,
+                "max_ms": 0.0,
+            }
+        }
@@ -0,0 +1,146 @@
+"""Tests for DB storage analytics and the time-series store."""
+
+import sqlite3
+import time
+
+import pytest
+
+from launcher.storage_analytics import (
+    StorageAnalyzer,
+    StorageSettings,
+    analyze_database,
+    count_btree_pages,
+    forecast,
+)
+from launcher.timeseries import SECONDS_PER_DAY, TimeSeriesStore, days_until
+
+
+@pytest.fixture
+def db_dir(temp_data_dir):
+    """A db_dir with a data table and a CR-SQLite style clock table."""
+    db_dir = temp_data_dir / "db"
+    db_dir.mkdir()
+    conn = sqlite3.connect(db_dir / "dev.sqlite3")
+    conn.execute("CREATE TABLE book (isbn TEXT PRIMARY KEY, title TEXT)")
+    conn.execute(
+        'CREATE TABLE "book__crsql_clock" (key INTEGER, col_name TEXT, '
+        "col_version INTEGER, db_version INTEGER, PRIMARY KEY (key, col_name))"
+    )
+    conn.executemany(
+        "INSERT INTO book VALUES (?, ?)",
+        [(f"978{i:010d}", f"Book {i}" * 5) for i in range(3000)],
+    )
+    conn.executemany(
+        "INSERT INTO book__crsql_clock VALUES (?, 'title', 1, ?)",
+        [(i, i) for i in range(3000)],
+    )
+    conn.commit()
+    conn.close()
+    return db_dir
+
+
+class TestAnalyzeDatabase:
+    """Tests for the per-object breakdown."""
+
+    def test_breakdown_by_category(self, db_dir):
+        analysis = analyze_database(db_dir / "dev.sqlite3")
+
+        objects = analysis["objects"]
+        assert objects["book"]["category"] == "table"
+        assert objects["sqlite_autoindex_book_1"]["category"] == "index"
+        assert objects["book__crsql_clock"]["category"] == "crsql"
+        assert objects["sqlite_autoindex_book__crsql_clock_1"]["category"] == "crsql"
+        assert analysis["categories"]["crsql"] > 0
+
+        # Every page is attributed to an object or the freelist
+        used = sum(analysis["categories"].values())
+        assert used == analysis["page_count"] * analysis["page_size"]
+
+    def test_page_walk_matches_dbstat(self, db_dir):
+        db_path = db_dir / "dev.sqlite3"
+        analysis = analyze_database(db_path)
+        roots = {
+            name: rootpage
+            for name, rootpage in sqlite3.connect(db_path).execute(
+                "SELECT name, rootpage FROM sqlite_schema WHERE rootpage > 0"
+            )
+        }
+
+        counts = count_btree_pages(db_path, analysis["page_size"], roots)
+
+        for name, pages in counts.items():
+            assert pages == analysis["objects"][name]["pages"]
+
+
+class TestTimeSeries:
+    """Tests for the store and growth forecasts."""
+
+    def test_store_round_trip_and_compaction(self, temp_data_dir):
+        store = TimeSeriesStore(temp_data_dir / "series.jsonl", retention_days=30)
+        now = 1_700_000_000.0
+        store.append("a", {"v": 1}, ts=now - 60 * SECONDS_PER_DAY)
+        store.append("a", {"v": 2}, ts=now)
+        store.append("b", {"v": 3}, ts=now)
+        with open(store.path, "a") as f:
+            f.write('{"torn": ')
+
+        assert [r["values"]["v"] for r in store.read("a")] == [1, 2]
+        assert store.series_names() == ["a", "b"]
+
+        # Timestamps are in the past relative to the real clock
+        store.retention_days = (time.time() - now) / SECONDS_PER_DAY + 30
+        assert store.compact() == 1
+        assert [r["values"]["v"] for r in store.read("a")] == [2]
+
+    def test_days_until(self):
+        day = SECONDS_PER_DAY
+        points = [(0.0, 100.0), (day, 110.0), (2 * day, 120.0)]
+
+        assert days_until(points, 150.0, now=2 * day) == pytest.approx(3.0)
+        assert days_until(points, 100.0, now=2 * day) == 0.0
+        assert days_until([(0.0, 5.0), (day, 5.0)], 10.0, now=day) is None
+
+    def test_forecast_from_samples(self, temp_data_dir):
+        store = TimeSeriesStore(temp_data_dir / "storage.jsonl")
+        now = 1_700_000_000.0
+        for day in range(10):
+            size = (100 + 10 * day) * 1024 * 1024
+            categories = {"table": size // 2, "crsql": size // 2, "free": 0}
+            store.append(
+                "dev.sqlite3",
+                {"file_bytes": size, "wal_bytes": 0, "categories": categories},
+                ts=now - (9 - day) * SECONDS_PER_DAY,
+            )
+
+        outlook = forecast(
+            store, "dev.sqlite3", 290 * 1024 * 1024, disk_free_bytes=None, now=now
+        )
+
+        assert outlook["growth_bytes_per_day"] == pytest.approx(10 * 1024 * 1024)
+        assert outlook["days_to_size_limit"] == pytest.approx(10.0)
+        assert outlook["crsql_share"] == pytest.approx(0.5)
+
+
+class TestStorageAnalyzer:
+    """Tests for sampling in the worker process."""
+
+    def test_sample_sync_records_every_database(self, db_dir, temp_data_dir):
+        analyzer = StorageAnalyzer(
+            db_dir, temp_data_dir / "storage.jsonl", StorageSettings()
+        )
+
+        assert analyzer.sample_sync()
+
+        records = analyzer.store.read("dev.sqlite3")
+        assert len(records) == 1
+        assert records[0]["values"]["method"] == "dbstat"
+        assert "dev.sqlite3" in analyzer.report()
+
+    def test_settings_keep_limits_positive(self):
+        settings = StorageSettings.from_settings(
+            {"interval_hours": 6, "warn_size_mb": -1, "warn_days": "soon"}
+        )
+
+        assert settings.interval_hours == 6.0
+        assert settings.warn_size_mb == 2048.0
+        assert settings.warn_days == 90.0
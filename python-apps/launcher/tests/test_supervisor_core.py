@@ -0,0 +1,267 @@
+"""Tests for the supervisor's asyncio core, against the fake daemons."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+import pytest
+from PyQt6.QtCore import Qt
+
+from launcher.supervisor_core import SupervisorCore
+
+
+class TestSupervisorCore:
+    """Tests for SupervisorCore."""
+
+    def test_started_with_supervisor(self, fake_supervisor):
+        assert fake_supervisor.core.running
+        fake_supervisor.stop()
+        assert not fake_supervisor.core.running
+
+    def test_concurrent_status(self, fake_supervisor):
+        core = fake_supervisor.core
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(
+                pool.map(lambda _: core.run(core.system_status()), range(40))
+            )
+
+        assert all(
+            caddy.status == "stopped" and syncserver.status == "stopped"
+            for caddy, syncserver in results
+        )
+
+    def test_start_and_stop_all(self, fake_supervisor):
+        core = fake_supervisor.core
+
+        assert core.run(core.start_all())
+        caddy, syncserver = core.run(core.system_status())
+        assert caddy.status == "active" and caddy.pid
+        assert syncserver.status == "active" and syncserver.pid
+
+        assert core.run(core.stop_all())
+        caddy, syncserver = core.run(core.system_status())
+        assert caddy.status == "stopped"
+        assert syncserver.status == "stopped"
+
+    def test_stop_all_stops_syncserver_first(self, fake_supervisor, monkeypatch):
+        core = fake_supervisor.core
+        assert core.run(core.start_all())
+        stop_daemon = core.stop_daemon
+        events = []
+
+        async def recording_stop(daemon_name):
+            events.append(("stopping", daemon_name))
+            result = await stop_daemon(daemon_name)
+            events.append(("stopped", daemon_name))
+            return result
+
+        monkeypatch.setattr(core, "stop_daemon", recording_stop)
+
+        assert core.run(core.stop_all())
+        # Caddy keeps proxying until the sync server has gone
+        assert events == [
+            ("stopping", "syncserver"),
+            ("stopped", "syncserver"),
+            ("stopping", "caddy"),
+            ("stopped", "caddy"),
+        ]
+
+    def test_start_right_after_stop(self, fake_supervisor):
+        # The arbiter rejects commands while it reaps the stopped process:
+        # the core retries instead of failing (or claiming success)
+        core = fake_supervisor.core
+        for _ in range(3):
+            assert core.run(core.start_daemon("syncserver"))
+            assert core.run(core.stop_daemon("syncserver"))
+        assert core.run(core.status("syncserver")).status == "stopped"
+
+    def test_restart_runs_preflight_while_stopped(self, fake_supervisor, monkeypatch):
+        core = fake_supervisor.core
+        seen = []
+        # Runs on a worker thread, while the restart holds the daemon's lock
+        monkeypatch.setattr(
+            fake_supervisor,
+            "_run_preflight",
+            lambda: seen.append(fake_supervisor._get_status_sync("syncserver")),
+        )
+        assert core.run(core.start_daemon("syncserver"))
+        assert core.run(core._wait_for_status("syncserver", "active"))
+        before = core.run(core.status("syncserver")).pid
+
+        assert core.run(core.restart_daemon("syncserver"))
+
+        # Once for the start, once between the restart's stop and start
+        assert [status.status for status in seen] == ["stopped", "stopped"]
+        assert core.run(core._wait_for_status("syncserver", "active"))
+        assert core.run(core.status("syncserver")).pid != before
+
+    def test_run_on_core_thread_raises(self, fake_supervisor):
+        core = fake_supervisor.core
+
+        async def nested():
+            with pytest.raises(RuntimeError):
+                core.run(core.status("caddy"))
+            return True
+
+        assert core.run(nested())
+
+    def test_submit_when_not_running(self):
+        core = SupervisorCore(supervisor=None)
+
+        async def noop():
+            pass
+
+        with pytest.raises(RuntimeError):
+            core.submit(noop())
+
+
+def _syncserver_args(core) -> str:
+    response = core.run(core.call("get", name="syncserver", keys=["args"]))
+    return str(response["options"]["args"])
+
+
+class TestProfileCapture:
+    """Tests for SupervisorCore.capture_profile()."""
+
+    def test_cpu_profile_holds_syncserver(self, fake_supervisor, monkeypatch):
+        # The fake sync server writes no profile: don't wait long for it
+        monkeypatch.setattr(fake_supervisor.profiler, "CPU_PROFILE_WRITE_TIMEOUT", 0.5)
+        core = fake_supervisor.core
+        assert core.run(core.start_daemon("syncserver"))
+        assert core.run(core._wait_for_status("syncserver", "active"))
+        preflight = []
+        monkeypatch.setattr(
+            fake_supervisor,
+            "_run_preflight",
+            lambda: preflight.append(
+                (
+                    fake_supervisor._get_status_sync("syncserver").status,
+                    _syncserver_args(core),
+                )
+            ),
+        )
+
+        capture = core.submit(core.capture_profile("cpu", duration=1.5))
+        deadline = time.monotonic() + 10
+        while "--cpu-prof" not in _syncserver_args(core):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        # Waits for the capture instead of stopping the profiled process
+        stop = core.submit(core.stop_daemon("syncserver"))
+        time.sleep(0.3)
+        assert not stop.done()
+
+        assert capture.result(30) is None
+        assert stop.result(30)
+        assert "--cpu-prof" not in _syncserver_args(core)
+        # Stopped before the args changed, checked and started again: never
+        # two sync servers at once
+        assert [status for status, _ in preflight] == ["stopped", "stopped"]
+        assert ["--cpu-prof" in args for _, args in preflight] == [True, False]
+
+    def test_cpu_profile_needs_running_syncserver(self, fake_supervisor):
+        core = fake_supervisor.core
+        assert core.run(core.capture_profile("cpu", duration=1)) is None
+        assert not fake_supervisor.profiler.busy
+
+    def test_unknown_kind(self, fake_supervisor):
+        core = fake_supervisor.core
+        with pytest.raises(ValueError):
+            core.run(core.capture_profile("flamegraph"))
+
+
+# Without a Qt event loop (headless), receivers must run on the emitting thread
+DIRECT = Qt.ConnectionType.DirectConnection
+
+
+class TestNonBlockingMethods:
+    """EmbeddedSupervisor's signal based methods, driven by the core."""
+
+    def test_headless_get_system_status(self, fake_supervisor):
+        received = []
+        done = threading.Event()
+
+        def handle(statuses):
+            received.append(statuses)
+            done.set()
+
+        fake_supervisor.worker.status_ready.connect(handle, DIRECT)
+        fake_supervisor.get_system_status()
+
+        assert done.wait(10)
+        caddy, syncserver = received[0]
+        assert caddy.status == "stopped"
+        assert syncserver.status == "stopped"
+
+    def test_headless_start_daemon(self, fake_supervisor):
+        completed = []
+        done = threading.Event()
+
+        def handle(operation, success):
+            completed.append((operation, success))
+            done.set()
+
+        fake_supervisor.worker.operation_complete.connect(handle, DIRECT)
+        fake_supervisor.start_daemon("syncserver")
+
+        assert done.wait(30)
+        assert completed == [("start", True)]
+        assert fake_supervisor._get_status_sync("syncserver").status in (
+            "starting",
+            "active",
+        )
+
+    def test_headless_set_daemon_priority(self, fake_supervisor):
+        core = fake_supervisor.core
+        assert core.run(core.start_daemon("syncserver"))
+        assert core.run(core._wait_for_status("syncserver", "active"))
+        pid = core.run(core.status("syncserver")).pid
+        completed = []
+        done = threading.Event()
+
+        def handle(operation, success):
+            completed.append((operation, success))
+            done.set()
+
+        fake_supervisor.worker.operation_complete.connect(handle, DIRECT)
+        fake_supervisor.set_daemon_priority("syncserver", nice=6)
+
+        assert done.wait(10)
+        assert completed == [("set_priority", True)]
+        assert psutil.Process(pid).nice() == 6
+        assert fake_supervisor.priorities["syncserver"].nice == 6
+
+    def test_set_daemon_priority_rejects_unknown_field(self, fake_supervisor):
+        completed = []
+        fake_supervisor.worker.operation_complete.connect(
+            lambda operation, success: completed.append((operation, success)),
+            DIRECT,
+        )
+        before = fake_supervisor.priorities["caddy"]
+
+        fake_supervisor.set_daemon_priority("caddy", niceness=3)
+
+        assert completed == [("set_priority", False)]
+        assert fake_supervisor.priorities["caddy"] is before
+
+    def test_status_after_stop(self, fake_supervisor):
+        received = []
+        fake_supervisor.worker.status_ready.connect(received.append, DIRECT)
+        fake_supervisor.stop()
+
+        # Answered right away, without the core
+        fake_supervisor.get_status("caddy")
+        assert received[0].status == "stopped"
+
+    def test_operation_stats(self, fake_supervisor):
+        done = threading.Event()
+        fake_supervisor.worker.status_ready.connect(lambda _: done.set(), DIRECT)
+        fake_supervisor.get_system_status()
+        assert done.wait(10)
+
+        stats = fake_supervisor.get_operation_stats()
+        assert stats["system_status"]["requested"] == 1
+        assert stats["system_status"]["run"]["count"] == 1
+        assert stats["start"]["requested"] == 0